@@ -6,8 +6,9 @@ Interfaz web moderna con arquitectura de blueprints
 import sys
 from pathlib import Path
 import logging
-from flask import Flask, send_file, abort, render_template, jsonify
+from flask import Flask, send_file, abort, render_template, jsonify, request
 from flask_cors import CORS
+from werkzeug.exceptions import HTTPException
 
 # Agregar src al path
 sys.path.append(str(Path(__file__).parent / 'src'))
@@ -78,7 +79,10 @@ def create_app():
     # Rutas estáticas y archivos
     @app.route('/thumbnail/<path:filename>')
     def serve_thumbnail(filename):
-        """Servir thumbnails generados"""
+        """Servir thumbnails, variantes (?size=) y sprites de hover (Cache-Control largo + ETag/304)"""
+        from src.api.videos.media_files import send_media_file, get_thumbnail_fallback_cache, thumbnail_variant_candidates
+        from src.database.thumbnail_store import sharded_thumbnail_path, content_key_of
+        default_thumbnail = config.STATIC_DIR / 'img' / 'no-thumbnail.svg'
         try:
             # Limpiar filename para evitar path traversal y problemas de encoding
             import os
@@ -87,135 +91,71 @@ def create_app():
             # Si el filename está vacío o es solo una carpeta, usar thumbnail por defecto
             if not clean_filename or clean_filename.endswith('/') or clean_filename.endswith('\\') or clean_filename.strip() == '':
                 logger.warning(f"Filename inválido o vacío: '{filename}' -> '{clean_filename}'")
-                return send_file(config.STATIC_DIR / 'img' / 'no-thumbnail.svg')
+                return send_media_file(default_thumbnail)
             
-            thumbnail_path = config.DATA_DIR / 'thumbnails' / clean_filename
+            # Nombres por contenido ({hash}.jpg) viven en ab/cd/; los planos en la raíz
+            thumbnail_path = sharded_thumbnail_path(config.DATA_DIR / 'thumbnails', clean_filename)
             
-            if thumbnail_path.exists() and thumbnail_path.is_file():
-                return send_file(thumbnail_path)
-            else:
-                logger.warning(f"Thumbnail no encontrado: {thumbnail_path}")
-                
-                # 🎠 FALLBACK: Verificar si es un carrusel de imágenes y servir la primera imagen
+            # Un nombre por contenido nunca cambia de contenido: caché immutable de larga duración
+            stored = content_key_of(clean_filename) is not None
+            max_age = config.THUMBNAIL_IMMUTABLE_MAX_AGE if stored else config.THUMBNAIL_CACHE_MAX_AGE
+            
+            # 🖼️ VARIANTE: tamaño pedido (grid/card/detail) en el mejor formato que acepte el navegador
+            variant = request.args.get('size')
+            variant_requested = variant in config.THUMBNAIL_VARIANTS
+            if variant_requested:
+                for variant_name in thumbnail_variant_candidates(clean_filename, variant, request.accept_mimetypes):
+                    try:
+                        response = send_media_file(thumbnail_path.with_name(variant_name), max_age=max_age, immutable=stored)
+                        response.vary.add('Accept')
+                        return response
+                    except (FileNotFoundError, IsADirectoryError):
+                        continue
+            
+            try:
+                # Base en lugar de una variante aún no generada: sin immutable para esa URL
+                if variant_requested:
+                    return send_media_file(thumbnail_path, max_age=config.THUMBNAIL_CACHE_MAX_AGE)
+                return send_media_file(thumbnail_path, max_age=max_age, immutable=stored)
+            except (FileNotFoundError, IsADirectoryError):
+                logger.debug(f"Thumbnail no encontrado: {thumbnail_path}")
+            
+            # 🎠 FALLBACK: imagen original (carruseles / imágenes sueltas), resuelto una vez por nombre
+            image_path = get_thumbnail_fallback_cache().resolve(clean_filename)
+            if image_path:
                 try:
-                    from src.service_factory import get_database
-                    from pathlib import Path
-                    
-                    # Extraer nombre base del archivo (remover _thumb.jpg)
-                    if clean_filename.endswith('_thumb.jpg'):
-                        base_filename = clean_filename[:-10]  # Remover '_thumb.jpg'
-                        
-                        # Buscar video por file_name usando nuevo esquema
-                        db = get_database()
-                        with db.get_connection() as conn:
-                            cursor = conn.execute('''
-                                SELECT m.id, m.file_path, p.is_carousel, p.carousel_count
-                                FROM media m
-                                JOIN posts p ON m.post_id = p.id
-                                WHERE m.file_name = ? OR m.file_path LIKE ?
-                                AND p.deleted_at IS NULL
-                            ''', (base_filename, f'%{base_filename}%'))
-
-                            video_row = cursor.fetchone()
-                            if video_row:
-                                video_id, file_path, is_carousel, carousel_count = video_row
-
-                                # Si es parte de un carrusel, usar el archivo encontrado directamente
-                                if is_carousel and carousel_count > 1:
-                                    # Para carruseles, buscar la primera imagen del mismo post
-                                    cursor = conn.execute('''
-                                        SELECT m.file_path
-                                        FROM media m
-                                        JOIN posts p ON m.post_id = p.id
-                                        WHERE p.id = (SELECT p2.id FROM media m2 JOIN posts p2 ON m2.post_id = p2.id WHERE m2.id = ?)
-                                        AND m.media_type = 'image'
-                                        ORDER BY m.carousel_order ASC
-                                        LIMIT 1
-                                    ''', (video_id,))
-
-                                    first_image_row = cursor.fetchone()
-                                    if first_image_row:
-                                        first_image_path = Path(first_image_row[0])
-                                        # Verificar si es imagen y existe
-                                        if (first_image_path.exists() and
-                                            any(first_image_path.suffix.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp'])):
-                                            logger.info(f"🖼️ CAROUSEL FALLBACK - Serving first image: {first_image_path}")
-                                            return send_file(first_image_path)
-                                
-                                # Si es imagen individual, servirla directamente  
-                                elif file_path:
-                                    image_path = Path(file_path)
-                                    if (image_path.exists() and 
-                                        any(image_path.suffix.lower().endswith(ext) for ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp'])):
-                                        logger.info(f"🖼️ IMAGE FALLBACK - Serving original image: {image_path}")
-                                        return send_file(image_path)
-                
-                except Exception as e:
-                    logger.warning(f"Error en fallback de carrusel para {clean_filename}: {e}")
-                
-                # Thumbnail por defecto si no se puede resolver
-                return send_file(config.STATIC_DIR / 'img' / 'no-thumbnail.svg')
+                    return send_media_file(image_path, max_age=config.THUMBNAIL_CACHE_MAX_AGE)
+                except FileNotFoundError:
+                    get_thumbnail_fallback_cache().invalidate(clean_filename)
+            
+            # Thumbnail por defecto si no se puede resolver
+            return send_media_file(default_thumbnail)
         except Exception as e:
             logger.error(f"Error sirviendo thumbnail {filename}: {e}")
             # En caso de error, devolver thumbnail por defecto en lugar de 404
-            return send_file(config.STATIC_DIR / 'img' / 'no-thumbnail.svg')
+            return send_file(default_thumbnail)
     
     @app.route('/video-stream/<int:video_id>')
     def stream_video(video_id):
-        """Servir video/imagen para streaming (para reproducción en navegador)"""
+        """Servir video/imagen para streaming (Range/206 para búsquedas, ETag/304)"""
+        from src.api.videos.media_files import send_media_file, get_media_path_cache
+        media_cache = get_media_path_cache()
         try:
-            from src.service_factory import get_database
-            db = get_database()
-
-            # Consultar usando el nuevo esquema (media table)
-            with db.get_connection() as conn:
-                cursor = conn.execute("""
-                    SELECT m.file_path, m.file_name
-                    FROM media m
-                    JOIN posts p ON m.post_id = p.id
-                    WHERE m.id = ? AND p.deleted_at IS NULL
-                """, (video_id,))
-
-                row = cursor.fetchone()
-                if not row:
-                    abort(404)
-
-                file_path, file_name = row
-
-            video_path = Path(file_path)
-            if not video_path.exists():
+            media_file = media_cache.resolve(video_id)
+            if media_file is None:
                 abort(404)
             
-            # Detectar MIME type basándose en la extensión del archivo
-            file_extension = video_path.suffix.lower()
-            
-            # Mapear extensiones a MIME types
-            mime_types = {
-                # Videos
-                '.mp4': 'video/mp4',
-                '.avi': 'video/avi',
-                '.mov': 'video/quicktime',
-                '.mkv': 'video/x-matroska',
-                '.webm': 'video/webm',
-                '.flv': 'video/x-flv',
-                # Imágenes
-                '.jpg': 'image/jpeg',
-                '.jpeg': 'image/jpeg',
-                '.png': 'image/png',
-                '.gif': 'image/gif',
-                '.bmp': 'image/bmp',
-                '.webp': 'image/webp'
-            }
-            
-            mimetype = mime_types.get(file_extension, 'application/octet-stream')
-            
-            # Servir archivo con el MIME type correcto
-            return send_file(
-                video_path,
-                as_attachment=False,
-                mimetype=mimetype
-            )
+            try:
+                return send_media_file(media_file.file_path, mimetype=media_file.mimetype)
+            except FileNotFoundError:
+                # Ruta cacheada obsoleta (archivo movido): reintentar con la de la BD
+                media_file = media_cache.reload(video_id, media_file)
+                if media_file is None:
+                    abort(404)
+                return send_media_file(media_file.file_path, mimetype=media_file.mimetype)
             
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error streaming media {video_id}: {e}")
             abort(500)
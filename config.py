@@ -75,6 +75,10 @@ ACRCLOUD_HOST = os.getenv('ACRCLOUD_HOST')
 ACRCLOUD_ACCESS_KEY = os.getenv('ACRCLOUD_ACCESS_KEY')
 ACRCLOUD_ACCESS_SECRET = os.getenv('ACRCLOUD_ACCESS_SECRET')
 
+# Índice local de huellas acústicas (evita repetir llamadas a APIs musicales)
+USE_AUDIO_FINGERPRINT_INDEX = os.getenv('USE_AUDIO_FINGERPRINT_INDEX', 'true').lower() == 'true'
+AUDIO_FINGERPRINT_MIN_MATCHES = int(os.getenv('AUDIO_FINGERPRINT_MIN_MATCHES', '15'))  # Hashes alineados mínimos
+
 # ========================================
 # 📱 RUTAS EXTERNAS - 4K DOWNLOADERS (Configurables)
 # ========================================
@@ -97,6 +101,12 @@ ORGANIZED_YOUTUBE_PATH = ORGANIZED_BASE_PATH / 'Youtube'
 ORGANIZED_TIKTOK_PATH = ORGANIZED_BASE_PATH / 'Tiktok'  
 ORGANIZED_INSTAGRAM_PATH = ORGANIZED_BASE_PATH / 'Instagram'
 
+# Raíces indexadas para descubrimiento incremental (separadas por os.pathsep)
+_raw_file_index_roots = os.getenv('FILE_INDEX_ROOTS', '')
+FILE_INDEX_ROOTS = [Path(p) for p in _raw_file_index_roots.split(os.pathsep) if p.strip()] or [
+    ORGANIZED_BASE_PATH, EXTERNAL_TIKTOK_DB.parent, EXTERNAL_INSTAGRAM_DB.parent
+]
+
 # ========================================
 # ⚙️ CONFIGURACIONES DE PROCESAMIENTO
 # ========================================
@@ -104,13 +114,69 @@ ORGANIZED_INSTAGRAM_PATH = ORGANIZED_BASE_PATH / 'Instagram'
 # Thumbnails
 THUMBNAIL_SIZE = tuple(map(int, os.getenv('THUMBNAIL_SIZE', '320x180').split('x')))
 THUMBNAIL_MODE = os.getenv('THUMBNAIL_MODE', 'balanced')  # ultra_fast, balanced, quality, gpu, auto
-
-# Procesamiento concurrente
+# Cache-Control (s) de nombres que se sobrescriben al regenerar ({stem}_thumb.jpg, fallbacks): corto + revalidación ETag
+THUMBNAIL_CACHE_MAX_AGE = int(os.getenv('THUMBNAIL_CACHE_MAX_AGE', '300'))
+# Variantes por tamaño (/thumbnail/<nombre>?size=grid), generadas del mismo frame; '' = desactivadas
+_raw_thumbnail_variants = os.getenv('THUMBNAIL_VARIANTS', 'grid:160x90,card:320x180,detail:640x360')
+THUMBNAIL_VARIANTS = {
+    name.strip(): tuple(map(int, size.split('x')))
+    for name, size in (item.split(':') for item in _raw_thumbnail_variants.split(',') if item.strip())
+}
+# Formatos modernos de las variantes por orden de preferencia (JPEG siempre como fallback)
+THUMBNAIL_VARIANT_FORMATS = [f.strip().lower() for f in os.getenv('THUMBNAIL_VARIANT_FORMATS', 'webp').split(',') if f.strip()]
+# Archivos del almacén por contenido ({hash}...): su contenido nunca cambia (Cache-Control immutable)
+THUMBNAIL_IMMUTABLE_MAX_AGE = int(os.getenv('THUMBNAIL_IMMUTABLE_MAX_AGE', str(365 * 24 * 3600)))
+
+# Previews para scrubbing al pasar el ratón (sprite sheet + clip corto opcional, una decodificación)
+PREVIEW_SPRITES_ENABLED = os.getenv('PREVIEW_SPRITES_ENABLED', 'true').lower() == 'true'
+PREVIEW_SPRITE_FRAMES = int(os.getenv('PREVIEW_SPRITE_FRAMES', '16'))
+PREVIEW_SPRITE_COLUMNS = int(os.getenv('PREVIEW_SPRITE_COLUMNS', '4'))
+PREVIEW_SPRITE_FRAME_SIZE = tuple(map(int, os.getenv('PREVIEW_SPRITE_FRAME_SIZE', '160x90').split('x')))
+PREVIEW_CLIP_ENABLED = os.getenv('PREVIEW_CLIP_ENABLED', 'false').lower() == 'true'
+PREVIEW_CLIP_SECONDS = float(os.getenv('PREVIEW_CLIP_SECONDS', '3'))
+PREVIEW_CLIP_WIDTH = int(os.getenv('PREVIEW_CLIP_WIDTH', '320'))
+
+# Streaming de media (caché media_id → ruta para evitar consultas por petición)
+MEDIA_PATH_CACHE_SIZE = int(os.getenv('MEDIA_PATH_CACHE_SIZE', '4096'))
+MEDIA_PATH_CACHE_TTL = float(os.getenv('MEDIA_PATH_CACHE_TTL', '300'))  # segundos
+
+# Procesamiento concurrente (tope de workers por etapa del pipeline de análisis)
 MAX_CONCURRENT_PROCESSING = int(os.getenv('MAX_CONCURRENT_PROCESSING', 3))
 
+# Cola de operaciones en segundo plano (OperationManager)
+OPERATION_MAX_CONCURRENT = int(os.getenv('OPERATION_MAX_CONCURRENT', '3'))
+OPERATION_PERSISTENCE = os.getenv('OPERATION_PERSISTENCE', 'true').lower() == 'true'  # Estado y checkpoints en SQLite
+OPERATION_CHECKPOINT_INTERVAL = float(os.getenv('OPERATION_CHECKPOINT_INTERVAL', '2.0'))  # Segundos entre checkpoints
+# Límites por tipo "tipo:n,tipo:n" (sobrescriben los de OperationManager.DEFAULT_TYPE_LIMITS)
+OPERATION_TYPE_LIMITS = {
+    name.strip(): int(limit)
+    for name, limit in (item.split(':', 1) for item in os.getenv('OPERATION_TYPE_LIMITS', '').split(',') if ':' in item)
+}
+
+# Difusión WebSocket (WebSocketManager)
+WEBSOCKET_SEND_QUEUE_SIZE = int(os.getenv('WEBSOCKET_SEND_QUEUE_SIZE', '256'))  # Mensajes pendientes máximos por cliente
+WEBSOCKET_COMPRESSION = os.getenv('WEBSOCKET_COMPRESSION', 'true').lower() == 'true'  # Negociar permessage-deflate
+
+# Pipeline de análisis por etapas (workers por etapa + colas acotadas)
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '8'))  # Items máximos entre etapas (backpressure)
+PIPELINE_PROBE_WORKERS = int(os.getenv('PIPELINE_PROBE_WORKERS', '4'))
+PIPELINE_AUDIO_WORKERS = int(os.getenv('PIPELINE_AUDIO_WORKERS', '2'))
+PIPELINE_MUSIC_WORKERS = int(os.getenv('PIPELINE_MUSIC_WORKERS', '6'))  # Red: APIs externas
+PIPELINE_FRAME_WORKERS = int(os.getenv('PIPELINE_FRAME_WORKERS', '2'))
+PIPELINE_FACE_WORKERS = int(os.getenv('PIPELINE_FACE_WORKERS', '2'))  # CPU/GPU
+PIPELINE_THUMBNAIL_WORKERS = int(os.getenv('PIPELINE_THUMBNAIL_WORKERS', '2'))  # CPU
+PIPELINE_PREVIEW_WORKERS = int(os.getenv('PIPELINE_PREVIEW_WORKERS', '1'))  # FFmpeg (sprite sheet / clip)
+PIPELINE_USE_PROCESSES = os.getenv('PIPELINE_USE_PROCESSES', 'true').lower() == 'true'  # Procesos para etapas CPU
+AUDIO_EXTRACT_IN_MEMORY = os.getenv('AUDIO_EXTRACT_IN_MEMORY', 'true').lower() == 'true'  # Pipe ffmpeg → memoria (sin WAV temporal)
+AUDIO_CLIP_SAMPLE_RATE = int(os.getenv('AUDIO_CLIP_SAMPLE_RATE', '11025'))  # Mono, suficiente para reconocimiento
+
 # Deep Learning (reconocimiento facial)
 USE_GPU_DEEPFACE = os.getenv('USE_GPU_DEEPFACE', 'true').lower() == 'true'
 DEEPFACE_MODEL = os.getenv('DEEPFACE_MODEL', 'ArcFace')
+FACE_EMBEDDING_INDEX_PATH = DATA_DIR / 'face_embeddings.npz'  # Embeddings precalculados de caras_conocidas
+FACE_MATCH_METRIC = os.getenv('FACE_MATCH_METRIC', 'cosine')  # cosine | euclidean_l2
+FACE_MATCH_MAX_DISTANCE = float(os.getenv('FACE_MATCH_MAX_DISTANCE', '0.6'))
+FACE_MATCH_TOP_K = int(os.getenv('FACE_MATCH_TOP_K', '3'))  # Coincidencias máximas por cara
 
 # Optimizaciones de base de datos
 USE_OPTIMIZED_DATABASE = os.getenv('USE_OPTIMIZED_DATABASE', 'true').lower() == 'true'
@@ -118,6 +184,20 @@ DATABASE_CACHE_TTL = int(os.getenv('DATABASE_CACHE_TTL', '300'))  # 5 minutos
 DATABASE_CACHE_SIZE = int(os.getenv('DATABASE_CACHE_SIZE', '1000'))
 ENABLE_PERFORMANCE_METRICS = os.getenv('ENABLE_PERFORMANCE_METRICS', 'true').lower() == 'true'
 
+# Pool de conexiones SQLite (conexiones reutilizables por hilo)
+DATABASE_POOL_SIZE = int(os.getenv('DATABASE_POOL_SIZE', '8'))
+DATABASE_BUSY_TIMEOUT = float(os.getenv('DATABASE_BUSY_TIMEOUT', '30'))  # segundos
+DATABASE_SYNCHRONOUS = os.getenv('DATABASE_SYNCHRONOUS', 'NORMAL')  # OFF, NORMAL, FULL
+DATABASE_PAGE_CACHE_KB = int(os.getenv('DATABASE_PAGE_CACHE_KB', '65536'))  # 64 MB por conexión
+DATABASE_MMAP_SIZE = int(os.getenv('DATABASE_MMAP_SIZE', str(256 * 1024 * 1024)))  # 256 MB
+
+# Escritor por lotes (agrupa updates de workers en transacciones)
+DATABASE_WRITE_BATCH_SIZE = int(os.getenv('DATABASE_WRITE_BATCH_SIZE', '100'))
+DATABASE_WRITE_FLUSH_INTERVAL = float(os.getenv('DATABASE_WRITE_FLUSH_INTERVAL', '1.0'))  # segundos
+
+# Importación masiva de posts (populate): posts por transacción
+POPULATION_BATCH_SIZE = int(os.getenv('POPULATION_BATCH_SIZE', '1000'))
+
 # ========================================
 # 🛠️ FUNCIONES UTILITARIAS
 # ========================================
@@ -68,6 +68,7 @@ Ejemplos de uso:
   python main.py regenerate-thumbnails      # Regenerar thumbnails
   python main.py populate-thumbnails        # Generar thumbnails faltantes
   python main.py clean-thumbnails           # Limpiar thumbnails huérfanos
+  python main.py migrate-thumbnail-store    # Mover thumbnails planos al almacén por contenido
 
 👤 PERSONAJES:
   python main.py add-character --character "Nahida" --game "Genshin Impact" --aliases "Kusanali" "Dendro Archon"
@@ -155,6 +156,9 @@ Ejemplos de uso:
         clean_thumbs_parser = subparsers.add_parser('clean-thumbnails', help='Limpiar thumbnails huérfanos')
         clean_thumbs_parser.add_argument('--force', action='store_true', help='Ejecutar eliminación directamente sin confirmación')
         
+        migrate_thumbs_parser = subparsers.add_parser('migrate-thumbnail-store', help='Mover thumbnails planos al almacén por contenido')
+        migrate_thumbs_parser.add_argument('--batch-size', type=int, default=500, help='Media por transacción')
+        
         subparsers.add_parser('thumbnail-stats', help='Estadísticas de thumbnails')
         
         # Verificación e integridad
@@ -418,7 +422,7 @@ Ejemplos de uso:
                 print(f"❌ Error: {result.get('error', 'Error desconocido')}")
             return
             
-        elif command in ['regenerate-thumbnails', 'populate-thumbnails', 'clean-thumbnails', 'thumbnail-stats']:
+        elif command in ['regenerate-thumbnails', 'populate-thumbnails', 'clean-thumbnails', 'migrate-thumbnail-store', 'thumbnail-stats']:
             from src.maintenance.thumbnail_ops import ThumbnailOperations
             ops = ThumbnailOperations()
             
@@ -432,6 +436,8 @@ Ejemplos de uso:
                 )
             elif command == 'clean-thumbnails':
                 result = ops.clean_thumbnails(force=getattr(args, 'force', False))
+            elif command == 'migrate-thumbnail-store':
+                result = ops.migrate_thumbnail_store(batch_size=getattr(args, 'batch_size', 500))
             elif command == 'thumbnail-stats':
                 result = ops.get_thumbnail_stats()
                 
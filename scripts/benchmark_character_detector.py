@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Benchmark: OptimizedCharacterDetector con regex por variante vs autómata Aho-Corasick
+
+Genera un corpus sintético de títulos (por defecto 50K) a partir de la base de
+personajes (data/character_database.json ampliada con personajes sintéticos
+hasta --variants variantes), ejecuta ambos modos del detector con la caché
+desactivada y verifica que los resultados son idénticos.
+
+Usage: python scripts/benchmark_character_detector.py [--titles 50000] [--variants 3000] [--seed 42]
+"""
+import argparse
+import copy
+import json
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.services.optimized_detector import OptimizedCharacterDetector
+
+FILLER_WORDS = [
+    'dance', 'cosplay', 'mmd', 'edit', 'tiktok', 'short', 'cover', 'trend', 'fyp',
+    'viral', 'live', 'official', 'new', 'best', 'moments', 'compilation', 'x', '-',
+    '&', 'with', 'feat', '4K', '60FPS', 'part', 'the', 'and', 'video', 'shorts'
+]
+CJK_FILLER = ['原神', '舞蹈', '踊ってみた', '코스프레', 'ダンス', '翻跳']
+SYNTHETIC_SYLLABLES = ['ka', 'ri', 'mo', 'shi', 'ren', 'va', 'lo', 'ne', 'zu', 'tha', 'qi', 'an', 'el', 'yu']
+SYNTHETIC_CJK = ['星', '月', '花', '雪', '风', '夜', '光', '影', '龙', '樱', '霞', '凛']
+
+
+def load_character_db(db_path: Path) -> dict:
+    if db_path.exists():
+        with open(db_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def count_variants(character_db: dict) -> int:
+    total = 0
+    for game_data in character_db.values():
+        if isinstance(game_data.get('characters'), dict):
+            for char_info in game_data['characters'].values():
+                total += sum(len(v) for v in char_info.get('variants', {}).values())
+    return total
+
+
+def pad_character_db(character_db: dict, target_variants: int, rng: random.Random) -> dict:
+    """Añadir personajes sintéticos hasta alcanzar target_variants variantes"""
+    character_db = copy.deepcopy(character_db)
+    game_index = 0
+
+    while count_variants(character_db) < target_variants:
+        game = f"synthetic_game_{game_index // 200}"
+        characters = character_db.setdefault(game, {'characters': {}})['characters']
+
+        first = ''.join(rng.choice(SYNTHETIC_SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+        last = ''.join(rng.choice(SYNTHETIC_SYLLABLES) for _ in range(rng.randint(1, 3))).capitalize()
+        name = f"{first} {last}"
+        variants = {
+            'exact': [name],
+            'joined': [f"{first}{last}"],
+            'common': [first],
+            'native': [''.join(rng.choice(SYNTHETIC_CJK) for _ in range(rng.randint(2, 3)))]
+        }
+        if rng.random() < 0.3:
+            variants['abbreviations'] = [f"{first[0]}{last[0]}{rng.choice(SYNTHETIC_SYLLABLES)}".upper()]
+
+        characters[f"{name} {game_index}"] = {
+            'canonical_name': name,
+            'priority': rng.randint(1, 3),
+            'variants': variants,
+            'detection_weight': round(rng.uniform(0.8, 0.95), 2),
+            'context_hints': [game.replace('_', ' '), rng.choice(SYNTHETIC_SYLLABLES)]
+        }
+        game_index += 1
+
+    return character_db
+
+
+def build_corpus(character_db: dict, size: int, rng: random.Random) -> list:
+    """Títulos sintéticos con variantes en distintas formas (hashtags, CJK, mayúsculas)"""
+    variants = []
+    for game, game_data in character_db.items():
+        if isinstance(game_data.get('characters'), dict):
+            for char_info in game_data['characters'].values():
+                for variant_list in char_info.get('variants', {}).values():
+                    variants.extend((v, game) for v in variant_list if v and len(v) >= 2)
+
+    titles = []
+    for i in range(size):
+        words = [rng.choice(FILLER_WORDS) for _ in range(rng.randint(2, 8))]
+        for _ in range(rng.choice([0, 1, 1, 2, 3])):
+            variant, game = rng.choice(variants)
+            form = rng.random()
+            if form < 0.15:
+                variant = '#' + variant.replace(' ', '')
+            elif form < 0.3:
+                variant = variant.upper()
+            elif form < 0.4:
+                variant = variant.lower()
+            elif form < 0.45:
+                variant = variant + rng.choice(['s', '123', 'dance'])  # no debe coincidir (límite de palabra)
+            words.insert(rng.randint(0, len(words)), variant)
+            if rng.random() < 0.3:
+                words.append(game.replace('_', ' '))
+        if rng.random() < 0.2:
+            words.insert(0, f"【{rng.choice(CJK_FILLER)}】")
+        if rng.random() < 0.1:
+            words.insert(0, f"{i}.")
+        if rng.random() < 0.1:
+            words.append(f"@user{i}")
+        titles.append(' '.join(words))
+    return titles
+
+
+def run_detector(detector: OptimizedCharacterDetector, titles: list):
+    detector.clear_cache()
+    results = []
+    start = time.perf_counter()
+    for title in titles:
+        results.append(detector.detect_in_title(title))
+    elapsed = time.perf_counter() - start
+    detector.clear_cache()
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--titles', type=int, default=50000, help='Número de títulos del corpus')
+    parser.add_argument('--variants', type=int, default=3000, help='Variantes mínimas en la base de personajes')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', type=Path, default=Path(__file__).resolve().parent.parent / 'data' / 'character_database.json')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    rng = random.Random(args.seed)
+
+    character_db = pad_character_db(load_character_db(args.db), args.variants, rng)
+    titles = build_corpus(character_db, args.titles, rng)
+    print(f"Base de personajes: {count_variants(character_db)} variantes | corpus: {len(titles)} títulos")
+
+    start = time.perf_counter()
+    regex_detector = OptimizedCharacterDetector(character_db, use_automaton=False)
+    automaton_detector = OptimizedCharacterDetector(character_db, use_automaton=True)
+    print(f"Construcción de ambos detectores: {time.perf_counter() - start:.2f}s "
+          f"(autómata: {automaton_detector.automaton.node_count} nodos)")
+
+    # Sin caché: cada título distinto se detecta una vez en cada modo
+    automaton_detector.detection_cache = {}
+    regex_detector.detection_cache = {}
+
+    regex_results, regex_time = run_detector(regex_detector, titles)
+    automaton_results, automaton_time = run_detector(automaton_detector, titles)
+
+    mismatches = [i for i, (a, b) in enumerate(zip(regex_results, automaton_results)) if a != b]
+    detections = sum(len(r) for r in automaton_results)
+
+    print(f"Regex por variante : {regex_time:8.2f}s  ({regex_time / len(titles) * 1000:.3f} ms/título)")
+    print(f"Autómata           : {automaton_time:8.2f}s  ({automaton_time / len(titles) * 1000:.3f} ms/título)")
+    print(f"Speedup            : {regex_time / automaton_time:8.1f}x")
+    print(f"Detecciones        : {detections}")
+
+    if mismatches:
+        print(f"❌ {len(mismatches)} títulos con resultados distintos")
+        for i in mismatches[:5]:
+            print(f"   {titles[i]!r}\n     regex:    {regex_results[i]}\n     autómata: {automaton_results[i]}")
+        sys.exit(1)
+
+    print("✅ Resultados idénticos en todo el corpus")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: coste por item de progress_callback en OperationManager
+
+Ejecuta una operación que llama a progress_callback --items veces y compara su
+duración con el mismo bucle llamando a una función vacía; la diferencia por
+item es el sobrecoste del callback. Como referencia mide también el callback
+anterior (lock global + actualización de campos en cada tick) y cuenta las
+notificaciones realmente enviadas. Sale con código 1 si el sobrecoste supera
+--max-overhead-us.
+
+Usage: python scripts/benchmark_operation_progress.py [--items 200000] [--max-overhead-us 2.0] [--runs 3]
+"""
+import argparse
+import logging
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import src.core.operation_manager as operation_manager_module
+from src.core.operation_manager import OperationManager, OperationProgress, OperationStatus
+
+
+def run_loop(callback, items: int) -> float:
+    start = time.perf_counter()
+    for i in range(items):
+        callback(i + 1, items, "item", successful=i, failed=0)
+    return time.perf_counter() - start
+
+
+def noop_callback(processed, total=None, current_item="", successful=None, failed=None, checkpoint=None):
+    pass
+
+
+def legacy_callback_factory():
+    """Callback anterior: lock global y campos actualizados en cada tick"""
+    lock = threading.Lock()
+    operation = OperationProgress('legacy', 'benchmark', OperationStatus.RUNNING)
+
+    def progress_callback(processed, total=None, current_item="", successful=None, failed=None, checkpoint=None):
+        with lock:
+            if operation.cancellation_requested:
+                raise InterruptedError()
+            operation.processed_items = processed
+            if total is not None:
+                operation.total_items = total
+            if current_item:
+                operation.current_step = current_item
+            if successful is not None:
+                operation.successful_items = successful
+            if failed is not None:
+                operation.failed_items = failed
+            if operation.total_items > 0:
+                operation.progress_percentage = (processed / operation.total_items) * 100
+    return progress_callback
+
+
+def run_manager(manager: OperationManager, items: int) -> float:
+    timings = {}
+
+    def job(progress_callback=None):
+        timings['elapsed'] = run_loop(progress_callback, items)
+        return {'items': items}
+
+    operation_id = manager.create_operation('benchmark', total_items=items, notification_interval=0.5)
+    manager.start_operation(operation_id, job)
+    while manager.operations[operation_id].is_active:
+        time.sleep(0.01)
+    return timings['elapsed']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--items', type=int, default=200000, help='Llamadas a progress_callback por ejecución')
+    parser.add_argument('--runs', type=int, default=3, help='Ejecuciones (se toma la mejor)')
+    parser.add_argument('--max-overhead-us', type=float, default=2.0, help='Sobrecoste máximo por item (µs)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger(operation_manager_module.__name__).setLevel(logging.WARNING)
+
+    # Contar notificaciones en lugar de enviarlas por WebSocket
+    sent = []
+    operation_manager_module.send_operation_progress = lambda operation_id, data: sent.append(operation_id)
+    operation_manager_module.send_operation_complete = lambda operation_id, data: None
+    operation_manager_module.send_notification = lambda *a, **k: None
+
+    manager = OperationManager(max_concurrent_operations=1, persist=False)
+    try:
+        baseline = min(run_loop(noop_callback, args.items) for _ in range(args.runs))
+        legacy = min(run_loop(legacy_callback_factory(), args.items) for _ in range(args.runs))
+        sent.clear()
+        current = min(run_manager(manager, args.items) for _ in range(args.runs))
+    finally:
+        manager.stop_notification_system()
+
+    def per_item_us(elapsed):
+        return (elapsed - baseline) / args.items * 1e6
+
+    overhead = per_item_us(current)
+    print(f"Items por ejecución : {args.items}")
+    print(f"Bucle vacío         : {baseline:8.3f}s")
+    print(f"Callback anterior   : {legacy:8.3f}s  (+{per_item_us(legacy):.3f} µs/item)")
+    print(f"Callback por eventos: {current:8.3f}s  (+{overhead:.3f} µs/item)")
+    print(f"Notificaciones      : {len(sent)} en {args.runs} ejecuciones de {args.items} ticks")
+
+    if overhead > args.max_overhead_us:
+        print(f"❌ Sobrecoste {overhead:.3f} µs/item supera el límite de {args.max_overhead_us} µs")
+        sys.exit(1)
+
+    print(f"✅ Sobrecoste por item dentro del límite ({args.max_overhead_us} µs)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Benchmark: montaje de páginas de galería en CursorPaginationService.get_videos
+
+Crea una base de datos temporal con --videos medias (personajes repetidos,
+categorías y carruseles), recorre la galería en páginas de --page-size filas
+y mide el montaje de cada página: el camino anterior (dict por fila +
+process_video_data_for_api + add_video_categories + process_image_carousels,
+cada uno con su conexión) frente a materialize_video_rows, más la
+serialización de la respuesta (json vs orjson). Verifica que ambos caminos
+producen los mismos datos y sale con código 1 si el p95 del montaje por lotes
+supera --max-p95-ms.
+
+Usage: python scripts/benchmark_page_assembly.py [--videos 5000] [--page-size 100] [--rounds 5] [--max-p95-ms 10]
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.database.manager import DatabaseManager
+from src.api.pagination.cursor_service import CursorPaginationService
+from src.api.pagination.row_materializer import ORJSON_AVAILABLE, orjson
+from src.api.videos.carousels import process_video_data_for_api, add_video_categories, process_image_carousels
+
+CHARACTERS = ['Raiden Shogun', 'Hu Tao', 'Furina', 'Kafka', 'Firefly', 'Acheron', 'Nahida', 'Zhongli']
+CATEGORIES = ['videos', 'shorts', 'feed', 'reels', 'stories']
+
+
+def populate(db: DatabaseManager, videos: int, rng: random.Random):
+    with db.get_connection() as conn:
+        conn.execute("INSERT INTO creators (id, name, platform_id) VALUES (1, 'creator', 1)")
+        conn.execute("INSERT INTO subscriptions (id, name, platform_id, subscription_type) VALUES (1, 'sub', 1, 'account')")
+        media_id = 0
+        for post_id in range(1, videos + 1):
+            is_carousel = rng.random() < 0.1
+            items = rng.randint(2, 6) if is_carousel else 1
+            conn.execute('''
+                INSERT INTO posts (id, platform_id, title_post, creator_id, subscription_id,
+                                   publication_date, download_date, is_carousel, carousel_count)
+                VALUES (?, 1, ?, 1, ?, ?, ?, ?, ?)
+            ''', (post_id, f"Post {post_id}", 1 if rng.random() < 0.5 else None,
+                  1700000000 + post_id, 1700000000 + post_id, is_carousel, items))
+            for category in rng.sample(CATEGORIES, rng.randint(0, 2)):
+                conn.execute('INSERT INTO post_categories (post_id, category_type) VALUES (?, ?)', (post_id, category))
+
+            characters = json.dumps(rng.sample(CHARACTERS, rng.randint(0, 2)))
+            for order in range(items):
+                media_id += 1
+                conn.execute('''
+                    INSERT INTO media (id, post_id, file_path, file_name, thumbnail_path, media_type,
+                                       carousel_order, is_primary, detected_characters, final_characters)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (media_id, post_id, f"/videos/{media_id}.mp4", f"{media_id}.mp4",
+                      f"/thumbnails/{media_id}.jpg", 'image' if is_carousel else 'video', order,
+                      order == 0, characters, characters if rng.random() < 0.3 else None))
+        conn.commit()
+
+
+def legacy_page(db: DatabaseManager, columns, rows):
+    """Camino anterior: dict por fila y una conexión/pasada por enriquecimiento"""
+    data = [process_video_data_for_api(dict(zip(columns, row))) for row in rows]
+    data = add_video_categories(db, data)
+    return process_image_carousels(db, data)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--videos', type=int, default=5000, help='Posts en la base de datos temporal')
+    parser.add_argument('--page-size', type=int, default=100, help='Filas por página (máximo 100)')
+    parser.add_argument('--rounds', type=int, default=5, help='Recorridos completos de la galería')
+    parser.add_argument('--max-p95-ms', type=float, default=10.0, help='p95 máximo del montaje por lotes (ms)')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logging.getLogger('src.api.videos.carousels').setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DatabaseManager(Path(tmp) / 'benchmark.db')
+        db.init_database()
+        populate(db, args.videos, random.Random(args.seed))
+
+        conn = db.get_connection()
+        service = CursorPaginationService(conn, cursor_field='m.id')
+        legacy_times, batch_times, json_times, orjson_times = [], [], [], []
+        pages = 0
+
+        for _ in range(args.rounds):
+            cursor = None
+            while True:
+                result = service.get_videos({}, cursor, 'next', args.page_size)
+                batch_times.append(result.performance_info['assembly_time_ms'])
+
+                # Misma página por el camino anterior, sobre las mismas filas
+                ids = [video['id'] for video in result.data]
+                placeholders = ','.join('?' * len(ids))
+                cursor_obj = conn.execute(f"""
+                    SELECT m.id, p.title_post, m.file_path, m.file_name, m.thumbnail_path, m.file_size,
+                           m.duration_seconds, c.name as creator_name, pl.name as platform,
+                           m.detected_music, m.detected_music_artist, m.detected_characters,
+                           m.final_music, m.final_music_artist, m.final_characters, m.difficulty_level,
+                           m.edit_status, m.processing_status, m.notes, m.id, m.last_updated, p.post_url,
+                           p.publication_date, p.download_date, p.is_carousel, p.carousel_count,
+                           s.id as subscription_id, s.name as subscription_name, s.subscription_type
+                    FROM media m
+                    JOIN posts p ON m.post_id = p.id
+                    LEFT JOIN creators c ON p.creator_id = c.id
+                    LEFT JOIN platforms pl ON p.platform_id = pl.id
+                    LEFT JOIN subscriptions s ON p.subscription_id = s.id
+                    WHERE m.id IN ({placeholders}) ORDER BY m.id DESC
+                """, ids)
+                rows = cursor_obj.fetchall()
+                columns = [description[0] for description in cursor_obj.description]
+
+                start = time.perf_counter()
+                legacy = legacy_page(db, columns, rows)
+                legacy_times.append((time.perf_counter() - start) * 1000)
+
+                if legacy != result.data:
+                    print(f"❌ Página {pages}: el montaje por lotes difiere del camino anterior")
+                    sys.exit(1)
+
+                payload = {'success': True, 'data': result.data}
+                start = time.perf_counter()
+                json.dumps(payload)
+                json_times.append((time.perf_counter() - start) * 1000)
+                if ORJSON_AVAILABLE:
+                    start = time.perf_counter()
+                    orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+                    orjson_times.append((time.perf_counter() - start) * 1000)
+
+                pages += 1
+                if not result.has_more:
+                    break
+                cursor = result.next_cursor
+
+        conn.close()
+
+    p95 = percentile(batch_times, 95)
+    print(f"Páginas             : {pages} de {args.page_size} filas ({args.videos} posts, {args.rounds} recorridos)")
+    print(f"Montaje anterior    : p50 {percentile(legacy_times, 50):7.3f} ms  p95 {percentile(legacy_times, 95):7.3f} ms")
+    print(f"Montaje por lotes   : p50 {percentile(batch_times, 50):7.3f} ms  p95 {p95:7.3f} ms")
+    print(f"Serialización json  : p50 {percentile(json_times, 50):7.3f} ms")
+    if orjson_times:
+        print(f"Serialización orjson: p50 {percentile(orjson_times, 50):7.3f} ms")
+    else:
+        print("Serialización orjson: no disponible (pip install orjson)")
+
+    if p95 > args.max_p95_ms:
+        print(f"❌ p95 {p95:.3f} ms supera el límite de {args.max_p95_ms} ms")
+        sys.exit(1)
+
+    print(f"✅ p95 del montaje por lotes dentro del límite ({args.max_p95_ms} ms)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark: thumbnails/segundo de ThumbnailGenerator en modo rápido
+
+Genera --videos clips de prueba con ffmpeg (testsrc2, horizontales y
+verticales) y crea sus thumbnails de dos formas: el camino anterior (FFmpeg
+escribe un JPEG temporal, PIL lo recarga, lo borra, redimensiona, aplica las
+tres pasadas de ImageEnhance y recodifica) frente a generate_thumbnail con el
+frame RGB crudo leído por pipe (escalado, padding y mejoras en el filtro de
+FFmpeg, una sola codificación). Informa la diferencia media de píxeles entre
+ambos resultados y sale con código 1 si el camino nuevo no alcanza
+--min-speedup veces el rendimiento anterior.
+
+Usage: python scripts/benchmark_thumbnails.py [--videos 12] [--rounds 3] [--min-speedup 1.2]
+"""
+import argparse
+import logging
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, ImageEnhance
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.services.thumbnail_generator import ThumbnailGenerator
+
+SIZES = ['1280x720', '720x1280', '1920x1080', '1080x1920']
+
+
+def make_videos(directory: Path, count: int):
+    videos = []
+    for i in range(count):
+        video = directory / f"clip_{i}.mp4"
+        subprocess.run([
+            'ffmpeg', '-v', 'error', '-y', '-f', 'lavfi',
+            '-i', f"testsrc2=size={SIZES[i % len(SIZES)]}:rate=30:duration=5",
+            '-c:v', 'libx264', '-preset', 'ultrafast', '-pix_fmt', 'yuv420p', str(video)
+        ], check=True)
+        videos.append(video)
+    return videos
+
+
+def legacy_thumbnail(generator: ThumbnailGenerator, video: Path, thumbnail_path: Path):
+    """Camino anterior: JPEG temporal de FFmpeg + recarga PIL + mejoras + recodificación"""
+    target_width, target_height = generator.thumbnail_size
+    subprocess.run([
+        'ffmpeg', '-y', '-ss', str(generator._fixed_timestamp(video, 3.0)), '-i', str(video),
+        '-vframes', '1',
+        '-vf', f'scale={target_width}:{target_height}:force_original_aspect_ratio=decrease:flags=fast_bilinear,'
+               f'pad={target_width}:{target_height}:(ow-iw)/2:(oh-ih)/2:black',
+        '-q:v', '8', '-loglevel', 'quiet', str(thumbnail_path)
+    ], capture_output=True, timeout=8)
+    frame = np.array(Image.open(thumbnail_path))
+    thumbnail_path.unlink()
+
+    image = generator._resize_with_aspect_ratio_optimized(Image.fromarray(frame))
+    image = ImageEnhance.Contrast(image).enhance(1.1)
+    image = ImageEnhance.Color(image).enhance(1.05)
+    image = ImageEnhance.Sharpness(image).enhance(1.1)
+    generator._save_thumbnail_ultra_fast(image, thumbnail_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--videos', type=int, default=12, help='Clips de prueba generados')
+    parser.add_argument('--rounds', type=int, default=3, help='Pasadas por camino (se toma la mejor)')
+    parser.add_argument('--min-speedup', type=float, default=1.2, help='Mejora mínima de thumbnails/segundo')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    if not shutil.which('ffmpeg'):
+        print("❌ ffmpeg no está disponible en el PATH")
+        sys.exit(1)
+
+    generator = ThumbnailGenerator()
+    generator.enable_ultra_fast_mode()
+    generator.use_ffmpeg_direct = True
+    generator.add_watermark = False
+    generator.variants = {}  # Solo el thumbnail base: misma salida en ambos caminos
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        videos = make_videos(tmp, args.videos)
+        legacy_dir, raw_dir = tmp / 'legacy', tmp / 'raw'
+        legacy_dir.mkdir()
+        raw_dir.mkdir()
+        generator.output_path = raw_dir
+
+        # Calentar el probe compartido (ambos caminos lo usan para el timestamp)
+        for video in videos:
+            generator._fixed_timestamp(video, 3.0)
+
+        legacy_times, raw_times = [], []
+        for _ in range(args.rounds):
+            start = time.perf_counter()
+            for video in videos:
+                legacy_thumbnail(generator, video, legacy_dir / f"{video.stem}_thumb.jpg")
+            legacy_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for video in videos:
+                if generator.generate_thumbnail(video, force_regenerate=True) is None:
+                    print(f"❌ generate_thumbnail falló para {video.name}")
+                    sys.exit(1)
+            raw_times.append(time.perf_counter() - start)
+
+        differences = []
+        for video in videos:
+            legacy = np.asarray(Image.open(legacy_dir / f"{video.stem}_thumb.jpg").convert('RGB'), dtype=np.int16)
+            raw = np.asarray(Image.open(raw_dir / f"{video.stem}_thumb.jpg").convert('RGB'), dtype=np.int16)
+            if legacy.shape != raw.shape:
+                print(f"❌ Tamaño distinto para {video.name}: {legacy.shape} vs {raw.shape}")
+                sys.exit(1)
+            differences.append(float(np.abs(legacy - raw).mean()))
+
+    legacy_rate = len(videos) / min(legacy_times)
+    raw_rate = len(videos) / min(raw_times)
+    speedup = raw_rate / legacy_rate
+
+    print(f"Clips               : {len(videos)} ({generator.thumbnail_size[0]}x{generator.thumbnail_size[1]}, calidad {generator.quality})")
+    print(f"Camino anterior     : {legacy_rate:7.2f} thumbnails/s")
+    print(f"RGB crudo por pipe  : {raw_rate:7.2f} thumbnails/s  (x{speedup:.2f})")
+    print(f"Diferencia media    : {np.mean(differences):.2f} niveles/píxel (máx. {max(differences):.2f})")
+
+    if speedup < args.min_speedup:
+        print(f"❌ Mejora x{speedup:.2f} por debajo del mínimo x{args.min_speedup}")
+        sys.exit(1)
+
+    print(f"✅ Mejora de rendimiento dentro del objetivo (x{args.min_speedup})")
+
+
+if __name__ == '__main__':
+    main()
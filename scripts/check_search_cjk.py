@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Check: búsqueda de la galería con títulos CJK (bilibili/douyin)
+
+El tokenizer unicode61 del índice FTS5 trata cada tramo de han/kana como un
+único token, así que un prefijo ("将军"*) no encuentra palabras en medio del
+título. Crea una base de datos temporal con el índice FTS aplicado y verifica
+que las búsquedas por subcadena CJK (que usan el LIKE) siguen devolviendo las
+filas, igual que las búsquedas latinas por FTS. Sale con código 1 si alguna
+búsqueda no devuelve lo esperado.
+
+Usage: python scripts/check_search_cjk.py
+"""
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.database.manager import DatabaseManager
+from src.database.migrations import DatabaseMigration
+from src.api.pagination.cursor_service import CursorPaginationService
+
+TITLES = {
+    1: '【原神】雷電将軍のコスプレ',
+    2: '原神 雷电将军 cosplay',
+    3: 'Raiden Shogun cosplay tutorial',
+}
+
+# (filtros, ids esperados)
+CASES = [
+    ({'search': 'コスプレ'}, {1}),
+    ({'search': '将军'}, {2}),
+    ({'search': '雷電将軍'}, {1}),
+    ({'search': '原神'}, {1, 2}),
+    ({'creator_search': 'コスプレ'}, {1}),
+    ({'search': 'cosplay'}, {2, 3}),
+    ({'search': 'shog'}, {3}),
+]
+
+
+def populate(db: DatabaseManager):
+    with db.get_connection() as conn:
+        conn.execute("INSERT INTO creators (id, name, platform_id) VALUES (1, 'creator', 1)")
+        for post_id, title in TITLES.items():
+            conn.execute('''
+                INSERT INTO posts (id, platform_id, title_post, creator_id, publication_date, download_date)
+                VALUES (?, 1, ?, 1, ?, ?)
+            ''', (post_id, title, 1700000000 + post_id, 1700000000 + post_id))
+            conn.execute('''
+                INSERT INTO media (id, post_id, file_path, file_name, media_type, is_primary)
+                VALUES (?, ?, ?, ?, 'video', TRUE)
+            ''', (post_id, post_id, f"/videos/{post_id}.mp4", f"{post_id}.mp4"))
+        conn.commit()
+
+
+def main():
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / 'check.db'
+        db = DatabaseManager(db_path)
+        db.init_database()
+        if not DatabaseMigration(str(db_path)).apply_fts_search_index():
+            print("❌ No se pudo crear el índice FTS5")
+            sys.exit(1)
+        populate(db)
+
+        service = CursorPaginationService(db.get_connection(), cursor_field='m.id')
+        if not service.has_fts_index():
+            print("❌ El servicio no detecta el índice FTS5")
+            sys.exit(1)
+
+        failed = 0
+        for filters, expected in CASES:
+            found = {video['id'] for video in service.get_videos(filters, None, 'next', 50).data}
+            status = '✅' if found == expected else '❌'
+            failed += found != expected
+            print(f"{status} {filters}: {sorted(found)} (esperado {sorted(expected)})")
+
+    if failed:
+        print(f"❌ {failed} búsquedas no devolvieron las filas esperadas")
+        sys.exit(1)
+    print("✅ Búsquedas CJK y latinas correctas")
+
+
+if __name__ == '__main__':
+    main()
@@ -178,6 +178,32 @@ def api_clean_thumbnails():
         logger.error(f"Error iniciando limpieza de thumbnails: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@maintenance_bp.route('/thumbnails/migrate-store', methods=['POST'])
+def api_migrate_thumbnail_store():
+    """API para migrar thumbnails planos al almacén por contenido"""
+    try:
+        if not MAINTENANCE_AVAILABLE:
+            return jsonify({'success': False, 'error': 'Maintenance system not available'}), 503
+        
+        data = request.get_json() or {}
+        batch_size = data.get('batch_size', 500)
+        priority = data.get('priority', 'low')
+        
+        priority_enum = getattr(OperationPriority, priority.upper(), OperationPriority.LOW)
+        
+        api = get_maintenance_api()
+        operation_id = api.migrate_thumbnail_store_bulk(batch_size=batch_size, priority=priority_enum)
+        
+        return jsonify({
+            'success': True,
+            'operation_id': operation_id,
+            'message': 'Thumbnail store migration started'
+        })
+        
+    except Exception as e:
+        logger.error(f"Error iniciando migración de thumbnails: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @maintenance_bp.route('/system/health', methods=['GET'])
 def api_system_health():
     """API para obtener estado de salud del sistema"""
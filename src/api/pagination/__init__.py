@@ -7,11 +7,14 @@ from .cursor_service import CursorPaginationService, CursorResult
 from .query_builder import OptimizedQueryBuilder
 from .cache_coordinator import CacheCoordinator
 from .performance_monitor import PerformanceMonitor
+from .row_materializer import materialize_video_rows, json_response
 
 __all__ = [
     'CursorPaginationService',
     'CursorResult',
     'OptimizedQueryBuilder',
     'CacheCoordinator',
-    'PerformanceMonitor'
+    'PerformanceMonitor',
+    'materialize_video_rows',
+    'json_response'
 ]
\ No newline at end of file
@@ -9,6 +9,8 @@ from dataclasses import dataclass
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 
+from .row_materializer import materialize_video_rows
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -32,6 +34,22 @@ class CursorPaginationService:
         self.cursor_field = cursor_field
         self.page_size = page_size
         self.max_page_size = 100
+        self._fts_available = None
+
+    def has_fts_index(self) -> bool:
+        """Comprobar (una vez por servicio) si existe el índice FTS5 de búsqueda"""
+        if self._fts_available is None:
+            from src.database.migrations import FTS_SEARCH_TABLE
+            try:
+                row = self.db.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                    (FTS_SEARCH_TABLE,)
+                ).fetchone()
+                self._fts_available = row is not None
+            except Exception as e:
+                logger.warning(f"Could not check FTS index availability: {e}")
+                self._fts_available = False
+        return self._fts_available
 
     def _get_cursor_field_type(self) -> str:
         """Infiere el tipo de dato del campo del cursor para un parseo correcto."""
@@ -133,11 +151,18 @@ class CursorPaginationService:
 
         try:
             # Construir query optimizada
-            from .query_builder import OptimizedQueryBuilder
-            builder = OptimizedQueryBuilder(self.cursor_field)
+            from .query_builder import OptimizedQueryBuilder, SEARCH_RANK_FIELD
+            builder = OptimizedQueryBuilder(self.cursor_field, use_fts=self.has_fts_index())
 
             select_fields, from_clause, where_conditions, params = builder.build_base_query(filters or {})
 
+            # Ordenar por relevancia solo tiene sentido con búsqueda FTS activa
+            if self.cursor_field == SEARCH_RANK_FIELD and not builder.fts_query:
+                self.cursor_field = 'm.id'
+                cursor = cursor if self.validate_cursor(cursor) else None
+                builder = OptimizedQueryBuilder(self.cursor_field, use_fts=self.has_fts_index())
+                select_fields, from_clause, where_conditions, params = builder.build_base_query(filters or {})
+
             # Añadir condición de cursor
             if cursor:
                 cursor_condition, cursor_params = builder.build_cursor_condition(cursor, direction, sort_order)
@@ -174,14 +199,16 @@ class CursorPaginationService:
             cursor_obj = self.db.execute(query, params)
             rows = cursor_obj.fetchall()
 
-            # Convertir a diccionarios
-            columns = [description[0] for description in cursor_obj.description]
-            data = [dict(zip(columns, row)) for row in rows]
-
             # Detectar si hay más datos
-            has_more = len(data) > effective_limit
+            has_more = len(rows) > effective_limit
             if has_more:
-                data = data[:effective_limit]
+                rows = rows[:effective_limit]
+
+            # Materializar la página completa (formato API + categorías + carruseles)
+            assembly_start = time.time()
+            columns = [description[0] for description in cursor_obj.description]
+            data = materialize_video_rows(self.db, columns, rows)
+            assembly_time = time.time() - assembly_start
 
             # Calcular cursors
             next_cursor = None
@@ -245,6 +272,7 @@ class CursorPaginationService:
 
             performance_info = {
                 'query_time_ms': round(query_time * 1000, 2),
+                'assembly_time_ms': round(assembly_time * 1000, 2),
                 'pagination_type': 'cursor',
                 'cursor_field': self.cursor_field,
                 'items_returned': len(data),
@@ -297,7 +325,7 @@ class CursorPaginationService:
         try:
             # Construir query optimizada para trash (solo videos eliminados)
             from .query_builder import OptimizedQueryBuilder
-            builder = OptimizedQueryBuilder(self.cursor_field)
+            builder = OptimizedQueryBuilder(self.cursor_field, use_fts=self.has_fts_index())
 
             select_fields, from_clause, where_conditions, params = builder.build_base_query({})
 
@@ -332,14 +360,16 @@ class CursorPaginationService:
             cursor_obj = self.db.execute(query, params)
             rows = cursor_obj.fetchall()
 
-            # Convertir a diccionarios
-            columns = [description[0] for description in cursor_obj.description]
-            data = [dict(zip(columns, row)) for row in rows]
-
             # Detectar si hay más datos
-            has_more = len(data) > effective_limit
+            has_more = len(rows) > effective_limit
             if has_more:
-                data = data[:effective_limit]
+                rows = rows[:effective_limit]
+
+            # Materializar la página completa (formato API + categorías + carruseles)
+            assembly_start = time.time()
+            columns = [description[0] for description in cursor_obj.description]
+            data = materialize_video_rows(self.db, columns, rows)
+            assembly_time = time.time() - assembly_start
 
             # Calcular cursors para trash (usar deleted_at como cursor field)
             next_cursor = None
@@ -373,6 +403,7 @@ class CursorPaginationService:
 
             performance_info = {
                 'query_time_ms': round(query_time * 1000, 2),
+                'assembly_time_ms': round(assembly_time * 1000, 2),
                 'pagination_type': 'cursor_trash',
                 'cursor_field': 'deleted_at',
                 'items_returned': len(data),
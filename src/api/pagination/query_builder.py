@@ -4,15 +4,61 @@ Constructor de queries optimizado para cursor pagination con índices compuestos
 """
 
 import logging
-from typing import Dict, Any, List, Tuple
+import re
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.database.migrations import FTS_SEARCH_TABLE
 
 logger = logging.getLogger(__name__)
 
+# Columnas FTS consultadas por cada tipo de búsqueda
+SEARCH_FTS_COLUMNS = ['title', 'file_name', 'creator_name']
+CREATOR_SEARCH_FTS_COLUMNS = ['title', 'file_name', 'music', 'characters', 'notes']
+
+# Pesos bm25 en el orden de columnas del índice:
+# title, file_name, creator_name, music, characters, notes
+FTS_RANK_WEIGHTS = (10.0, 5.0, 8.0, 3.0, 6.0, 1.0)
+
+# Campo de ordenación por relevancia (solo disponible con búsqueda FTS activa)
+SEARCH_RANK_FIELD = 'fts.search_rank'
+
+_FTS_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Escrituras sin espacios entre palabras (han, kana, hangul): unicode61 indexa
+# cada tramo como un único token, así que un prefijo no encuentra subcadenas
+_CJK_RE = re.compile(
+    '[\u3040-\u30ff\u31f0-\u31ff\u3400-\u4dbf\u4e00-\u9fff'
+    '\uac00-\ud7af\uf900-\ufaff\uff66-\uff9f\U00020000-\U0002ffff]'
+)
+
+
+def build_fts_match(term: str, columns: List[str]) -> Optional[str]:
+    """
+    Convertir texto libre en una expresión MATCH de FTS5 segura
+
+    Cada palabra se busca como prefijo ("pala"*) y todas deben aparecer
+    (AND implícito) dentro de las columnas indicadas. Devuelve None si el
+    texto no contiene palabras indexables o contiene caracteres CJK (la
+    búsqueda usa entonces el LIKE por subcadena).
+    """
+    if not term or _CJK_RE.search(term):
+        return None
+
+    tokens = _FTS_TOKEN_RE.findall(term)
+    if not tokens:
+        return None
+
+    phrases = ' '.join(f'"{token}"*' for token in tokens)
+    return f"{{{' '.join(columns)}}} : ({phrases})"
+
+
 class OptimizedQueryBuilder:
     """Constructor de queries optimizado para cursor pagination"""
 
-    def __init__(self, cursor_field: str):
+    def __init__(self, cursor_field: str, use_fts: bool = True):
         self.cursor_field = cursor_field
+        self.use_fts = use_fts
+        self.fts_query = None
 
     def _get_cursor_field_type(self) -> str:
         """Infiere el tipo de dato del campo del cursor para un parseo correcto."""
@@ -84,11 +130,49 @@ class OptimizedQueryBuilder:
         ]
         params = []
 
+        # Búsqueda de texto vía índice FTS5 con ranking bm25
+        self.fts_query = self._build_fts_query(filters)
+        if self.fts_query:
+            weights = ', '.join(str(w) for w in FTS_RANK_WEIGHTS)
+            from_clause += f"""
+            JOIN (
+                SELECT rowid AS media_id, -bm25({FTS_SEARCH_TABLE}, {weights}) AS search_rank
+                FROM {FTS_SEARCH_TABLE}
+                WHERE {FTS_SEARCH_TABLE} MATCH ?
+            ) fts ON fts.media_id = m.id
+            """
+            if self.cursor_field != SEARCH_RANK_FIELD:
+                select_fields.append(SEARCH_RANK_FIELD)
+            params.append(self.fts_query)
+
         # Construir filtros optimizados
         where_conditions, params = self._build_filter_conditions(filters, where_conditions, params)
 
         return select_fields, from_clause, where_conditions, params
 
+    def _build_fts_query(self, filters: Dict[str, Any]) -> Optional[str]:
+        """Construir la expresión MATCH combinando 'search' y 'creator_search'"""
+        if not self.use_fts:
+            return None
+
+        expressions = []
+        if filters.get('search'):
+            match = build_fts_match(filters['search'], SEARCH_FTS_COLUMNS)
+            if not match:
+                return None
+            expressions.append(match)
+
+        if filters.get('creator_search'):
+            match = build_fts_match(filters['creator_search'], CREATOR_SEARCH_FTS_COLUMNS)
+            if not match:
+                return None
+            expressions.append(match)
+
+        if not expressions:
+            return None
+
+        return ' AND '.join(f"({expression})" for expression in expressions)
+
     def _build_filter_conditions(
         self,
         filters: Dict[str, Any],
@@ -108,7 +192,8 @@ class OptimizedQueryBuilder:
             params.append(filters['platform'])
 
         # Búsqueda de texto para la galería principal
-        if filters.get('search'):
+        # (fallback LIKE si el índice FTS no está disponible o el texto es CJK)
+        if filters.get('search') and not self.fts_query:
             search_term = f"%{filters['search']}%"
             where_conditions.append(
                 "(p.title_post LIKE ? OR m.file_name LIKE ? OR c.name LIKE ?)"
@@ -116,7 +201,7 @@ class OptimizedQueryBuilder:
             params.extend([search_term, search_term, search_term])
         
         # Mini-búsqueda para la página de creador
-        if filters.get('creator_search'):
+        if filters.get('creator_search') and not self.fts_query:
             search_term = f"%{filters['creator_search']}%"
             search_conditions = [
                 "p.title_post LIKE ?",
@@ -168,6 +253,14 @@ class OptimizedQueryBuilder:
                     "(m.detected_characters IS NULL AND m.final_characters IS NULL)"
                 )
 
+        # Filtro por personaje (lookup en índice media_characters)
+        if filters.get('character'):
+            where_conditions.append(
+                "m.id IN (SELECT mc.media_id FROM media_characters mc "
+                "JOIN characters ch ON ch.id = mc.character_id WHERE ch.name = ?)"
+            )
+            params.append(filters['character'])
+
         # Filtro por rango de duración
         if filters.get('min_duration'):
             where_conditions.append("m.duration_seconds >= ?")
@@ -234,6 +327,10 @@ class OptimizedQueryBuilder:
                     primary_value = primary_part
                     # Añadir COLLATE NOCASE para ordenación de texto consistente y correcta para Unicode.
                     condition = f"({self.cursor_field} COLLATE NOCASE, m.id) {op} (?, ?)"
+                elif self.cursor_field == SEARCH_RANK_FIELD:
+                    # El ranking de relevancia es un float
+                    primary_value = float(primary_part)
+                    condition = f"({self.cursor_field}, m.id) {op} (?, ?)"
                 else:  # 'numeric'
                     primary_value = int(primary_part)
                     condition = f"({self.cursor_field}, m.id) {op} (?, ?)"
@@ -276,10 +373,12 @@ class OptimizedQueryBuilder:
         if filters.get('platform'):
             hints['recommended_indices'].append('idx_posts_platform_id')
 
-        if filters.get('search'):
-            hints['query_complexity'] = 'medium'
-            hints['expected_performance'] = 'moderate'
-            hints['recommended_indices'].append('idx_posts_title_fts')
+        if filters.get('search') or filters.get('creator_search'):
+            if self.use_fts:
+                hints['recommended_indices'].append(FTS_SEARCH_TABLE)
+            else:
+                hints['query_complexity'] = 'medium'
+                hints['expected_performance'] = 'moderate'
 
         # Evaluar complejidad
         filter_count = len([k for k, v in filters.items() if v is not None])
@@ -8,8 +8,10 @@ from flask import Blueprint, request, jsonify
 from src.database.manager import DatabaseManager
 
 from .cursor_service import CursorPaginationService
+from .query_builder import SEARCH_RANK_FIELD
 from .cache_coordinator import CacheCoordinator
 from .performance_monitor import PerformanceMonitor
+from .row_materializer import json_response
 
 logger = logging.getLogger(__name__)
 
@@ -42,13 +44,14 @@ def get_videos_cursor():
         cursor (str): Cursor de paginación (timestamp)
         direction (str): 'next' o 'prev' (default: 'next')
         limit (int): Número de resultados (1-100, default: 50)
-        sort_by (str): Campo de ordenamiento (default: 'id')
+        sort_by (str): Campo de ordenamiento (default: 'id'; 'relevance' requiere search)
         sort_order (str): Orden 'asc' o 'desc' (default: 'desc')
         creator_name (str): Filtrar por creador
         platform (str): Filtrar por plataforma
         edit_status (str): Filtrar por estado de edición
         processing_status (str): Filtrar por estado de procesamiento
         search (str): Búsqueda de texto
+        character (str): Filtrar por personaje
         has_music (bool): Filtrar por presencia de música
         has_characters (bool): Filtrar por presencia de personajes
     """
@@ -74,12 +77,17 @@ def get_videos_cursor():
             'publication_date': 'p.publication_date',
             'file_name': 'm.file_name',
             'duration': 'm.duration_seconds',
-            'size': 'm.file_size'
+            'size': 'm.file_size',
+            'relevance': SEARCH_RANK_FIELD
         }
 
         if sort_by not in allowed_sort_fields:
             sort_by = 'id'
 
+        # Relevancia solo disponible con búsqueda de texto
+        if sort_by == 'relevance' and not request.args.get('search'):
+            sort_by = 'id'
+
         # Validar orden
         if sort_order not in ['asc', 'desc']:
             sort_order = 'desc'
@@ -89,7 +97,7 @@ def get_videos_cursor():
 
         # Filtros
         filters = {}
-        for param in ['creator_name', 'platform', 'edit_status', 'processing_status', 'search']:
+        for param in ['creator_name', 'platform', 'edit_status', 'processing_status', 'search', 'character']:
             value = request.args.get(param)
             if value:
                 filters[param] = value
@@ -119,7 +127,7 @@ def get_videos_cursor():
                 cursor_used=cursor is not None
             )
 
-            return jsonify({
+            return json_response({
                 'success': True,
                 'data': cached_result.data,
                 'pagination': {
@@ -135,21 +143,7 @@ def get_videos_cursor():
         # Ejecutar query con ordenamiento
         result = cursor_service.get_videos(filters, cursor, direction, limit, sort_order=sort_order)
 
-        # Procesar datos para API (aplicar transformaciones de carousels)
-        from src.api.videos.carousels import process_video_data_for_api, add_video_categories
-
-        processed_data = []
-        for video in result.data:
-            processed_video = process_video_data_for_api(video)
-            processed_data.append(processed_video)
-
-        # Añadir categorías
-        db_manager = DatabaseManager()
-        with db_manager.get_connection() as conn:
-            processed_data = add_video_categories(db_manager, processed_data)
-
-        # Actualizar resultado
-        result.data = processed_data
+        # result.data ya viene en formato API (row_materializer: categorías y carruseles incluidos)
 
         # Cache resultado
         cache_coordinator.cache_cursor_result(filters, cursor, result)
@@ -165,7 +159,7 @@ def get_videos_cursor():
             error=result.performance_info.get('error')
         )
 
-        return jsonify({
+        return json_response({
             'success': True,
             'data': result.data,
             'pagination': {
@@ -227,12 +221,17 @@ def get_creator_videos_cursor(creator_name: str):
             'title': 'p.title_post',
             'size': 'm.file_size',
             'duration': 'm.duration_seconds',
-            'id': 'm.id'
+            'id': 'm.id',
+            'relevance': SEARCH_RANK_FIELD
         }
 
         if sort_by not in allowed_sort_fields:
             sort_by = 'publication_date'
 
+        # Relevancia solo disponible con búsqueda de texto
+        if sort_by == 'relevance' and not request.args.get('search'):
+            sort_by = 'publication_date'
+
         if sort_order not in ['asc', 'desc']:
             sort_order = 'desc'
 
@@ -259,7 +258,7 @@ def get_creator_videos_cursor(creator_name: str):
         cached_result = cache_coordinator.get_cursor_result(filters, cursor)
         if cached_result:
             # ... (manejo de cache hit, igual que en get_videos_cursor)
-            return jsonify({
+            return json_response({
                 'success': True,
                 'data': cached_result.data,
                 'pagination': {
@@ -275,15 +274,7 @@ def get_creator_videos_cursor(creator_name: str):
         # Llamar al método genérico get_videos que ya soporta todos los filtros y ordenamiento
         result = cursor_service.get_videos(filters, cursor, direction, limit, sort_order)
 
-        # Procesar datos y devolver respuesta (igual que en get_videos_cursor)
-        from src.api.videos.carousels import process_video_data_for_api, add_video_categories
-
-        processed_data = [process_video_data_for_api(video) for video in result.data]
-        
-        with db_manager.get_connection() as conn_inner:
-            processed_data = add_video_categories(db_manager, processed_data)
-
-        result.data = processed_data
+        # result.data ya viene en formato API (igual que en get_videos_cursor)
         cache_coordinator.cache_cursor_result(filters, cursor, result)
 
         performance_monitor.record_query(
@@ -295,7 +286,7 @@ def get_creator_videos_cursor(creator_name: str):
             cursor_used=cursor is not None
         )
 
-        return jsonify({
+        return json_response({
             'success': True,
             'data': result.data,
             'pagination': {
@@ -329,21 +320,7 @@ def get_subscription_videos_cursor(subscription_type: str, subscription_id: int)
 
         result = cursor_service.get_subscription_videos(subscription_type, subscription_id, cursor, limit)
 
-        # Procesar datos
-        from src.api.videos.carousels import process_video_data_for_api, add_video_categories
-
-        processed_data = []
-        for video in result.data:
-            processed_video = process_video_data_for_api(video)
-            processed_data.append(processed_video)
-
-        db_manager = DatabaseManager()
-        with db_manager.get_connection() as conn:
-            processed_data = add_video_categories(db_manager, processed_data)
-
-        result.data = processed_data
-
-        # Cache resultado
+        # Cache resultado (result.data ya viene en formato API)
         filters = {
             'subscription_type': subscription_type,
             'subscription_id': subscription_id
@@ -360,7 +337,7 @@ def get_subscription_videos_cursor(subscription_type: str, subscription_id: int)
             cursor_used=cursor is not None
         )
 
-        return jsonify({
+        return json_response({
             'success': True,
             'data': result.data,
             'pagination': {
@@ -398,21 +375,9 @@ def get_trash_videos_cursor():
 
         result = cursor_service.get_trash_videos(cursor, limit)
 
-        # Procesar datos
-        from src.api.videos.carousels import process_video_data_for_api, add_video_categories
-
-        processed_data = []
+        # Agregar deleted_at para trash (result.data ya viene en formato API)
         for video in result.data:
-            processed_video = process_video_data_for_api(video)
-            # Agregar deleted_at para trash
-            processed_video['deletedAt'] = video.get('deleted_at')
-            processed_data.append(processed_video)
-
-        db_manager = DatabaseManager()
-        with db_manager.get_connection() as conn:
-            processed_data = add_video_categories(db_manager, processed_data)
-
-        result.data = processed_data
+            video['deletedAt'] = video.get('deleted_at')
 
         # Cache resultado
         cache_coordinator.cache_cursor_result({'trash': True}, cursor, result)
@@ -427,7 +392,7 @@ def get_trash_videos_cursor():
             cursor_used=cursor is not None
         )
 
-        return jsonify({
+        return json_response({
             'success': True,
             'data': result.data,
             'pagination': {
@@ -0,0 +1,161 @@
+"""
+Tag-Flow V2 - Page Row Materializer
+Conversión por lotes de una página de filas SQLite al formato de la API
+"""
+
+import json
+import os
+import logging
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence
+
+from flask import current_app, jsonify
+
+from src.database.preview_assets import get_preview_assets
+
+# orjson es opcional: serializa la respuesta directamente a bytes (~10x json)
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=4096)
+def _parse_characters_cached(raw: str):
+    """Parseo memoizado por valor (tupla inmutable, compartida entre llamadas)"""
+    try:
+        value = json.loads(raw)
+    except (ValueError, TypeError):
+        return ()
+    return tuple(value) if isinstance(value, list) else value
+
+
+def parse_characters_json(raw: str):
+    """
+    JSON de personajes memoizado por valor
+
+    Muchas filas repiten el mismo valor ('[]', '["Raiden Shogun"]', ...): cada
+    valor distinto se parsea una sola vez. Cada fila recibe su propia lista,
+    así que modificarla no afecta a otras filas ni a respuestas cacheadas.
+    """
+    value = _parse_characters_cached(raw)
+    return list(value) if isinstance(value, tuple) else json.loads(raw)
+
+
+def materialize_video_rows(conn, columns: Sequence[str], rows: Sequence) -> List[Dict[str, Any]]:
+    """
+    Convertir una página de filas al formato de la API en una sola pasada
+
+    Equivale a process_video_data_for_api + add_video_categories +
+    process_image_carousels, pero transforma la página por columnas (un
+    parseo por valor distinto de personajes) y obtiene categorías e items de
+    carrusel en una única query sobre la misma conexión. Los media con sprite
+    de hover reciben 'preview' (layout + nombres servidos por /thumbnail).
+    """
+    if not rows:
+        return []
+
+    index = {name: i for i, name in enumerate(columns)}
+    values = [list(column) for column in zip(*rows)]
+
+    i = index.get('detected_characters')
+    if i is not None:
+        values[i] = [parse_characters_json(v) if v else v for v in values[i]]
+    i = index.get('final_characters')
+    if i is not None:
+        values[i] = [parse_characters_json(v) if v else [] for v in values[i]]
+    i = index.get('thumbnail_path')
+    if i is not None:
+        values[i] = [os.path.basename(v) if v else v for v in values[i]]
+
+    videos = [dict(zip(columns, row)) for row in zip(*values)]
+
+    if 'subscription_id' in index:
+        for video in videos:
+            if video['subscription_id'] and video.get('subscription_name') and video.get('subscription_type'):
+                video['subscription_info'] = {
+                    'id': video['subscription_id'],
+                    'name': video['subscription_name'],
+                    'type': video['subscription_type']
+                }
+
+    try:
+        _attach_categories_and_carousels(conn, videos)
+    except Exception as e:
+        logger.warning(f"Error obteniendo categorías/carruseles de la página: {e}")
+
+    try:
+        previews = get_preview_assets(conn, [video['id'] for video in videos if video.get('id')])
+        for video in videos:
+            if video.get('id') in previews:
+                video['preview'] = previews[video['id']]
+    except Exception as e:
+        logger.warning(f"Error obteniendo sprites de hover de la página: {e}")
+
+    return videos
+
+
+def _attach_categories_and_carousels(conn, videos: List[Dict[str, Any]]):
+    """Categorías (post_categories) e items de carrusel en una sola query"""
+    by_id = {video['id']: video for video in videos if video.get('id')}
+    if not by_id:
+        return
+
+    video_ids = list(by_id)
+    carousel_ids = [video_id for video_id, video in by_id.items() if video.get('is_carousel')]
+
+    query = f"""
+        SELECT m.id, 0, pc.category_type, NULL, NULL, NULL
+        FROM media m
+        JOIN posts p ON m.post_id = p.id
+        JOIN post_categories pc ON pc.post_id = p.id
+        WHERE m.id IN ({','.join('?' * len(video_ids))})
+    """
+    params = list(video_ids)
+    if carousel_ids:
+        query += f"""
+            UNION ALL
+            SELECT m_primary.id, 1, NULL, m_all.id, m_all.carousel_order, m_all.file_path
+            FROM media m_primary
+            JOIN posts p ON m_primary.post_id = p.id
+            JOIN media m_all ON m_all.post_id = p.id
+            WHERE m_primary.id IN ({','.join('?' * len(carousel_ids))})
+            AND m_primary.is_primary = TRUE
+            AND p.is_carousel = TRUE
+        """
+        params.extend(carousel_ids)
+    query += " ORDER BY 1, 2, 3"
+
+    for video_id, kind, category_type, item_id, order, file_path in conn.execute(query, params):
+        video = by_id[video_id]
+        if kind == 0:
+            video.setdefault('categories', []).append({'type': category_type})
+        else:
+            video.setdefault('carousel_items', []).append({
+                'id': item_id,
+                'order': order or 0,
+                'file_path': file_path
+            })
+
+    for video_id in carousel_ids:
+        items = by_id[video_id].get('carousel_items')
+        if items:
+            items.sort(key=lambda x: x['order'])
+
+
+def json_response(payload: Dict[str, Any], status: int = 200):
+    """Respuesta JSON serializada con orjson si está disponible (jsonify si no)"""
+    if ORJSON_AVAILABLE:
+        try:
+            body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+            return current_app.response_class(body, status=status, mimetype='application/json')
+        except TypeError as e:
+            logger.debug(f"orjson no pudo serializar la respuesta, usando jsonify: {e}")
+
+    response = jsonify(payload)
+    response.status_code = status
+    return response
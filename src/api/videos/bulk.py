@@ -136,6 +136,10 @@ def api_bulk_delete_videos():
             if db.soft_delete_video(video_id):
                 success_count += 1
         
+        if success_count:
+            from .media_files import invalidate_media_paths
+            invalidate_media_paths()
+        
         return jsonify({
             'success': True,
             'message': f'{success_count} videos moved to trash',
@@ -164,6 +168,10 @@ def api_bulk_restore_videos():
             if db.restore_video(video_id):
                 success_count += 1
         
+        if success_count:
+            from .media_files import invalidate_media_paths
+            invalidate_media_paths()
+        
         return jsonify({
             'success': True,
             'message': f'{success_count} videos restored from trash',
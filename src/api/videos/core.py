@@ -77,6 +77,11 @@ def api_update_video(video_id):
 
                 cursor = conn.execute(update_query, params)
                 success = cursor.rowcount > 0
+
+                # Mantener sincronizado el índice media_characters
+                if success and 'final_characters' in update_data:
+                    from src.database.characters import sync_media_characters
+                    sync_media_characters(conn, video_id, 'final', update_data['final_characters'])
             else:
                 success = False
 
@@ -187,6 +192,8 @@ def api_delete_video(video_id):
         success = db.delete_video(video_id)
         
         if success:
+            from .media_files import invalidate_media_paths
+            invalidate_media_paths()
             return jsonify({'success': True, 'message': 'Video moved to trash'})
         else:
             return jsonify({'success': False, 'error': 'Delete failed'}), 500
@@ -207,6 +214,8 @@ def api_restore_video(video_id):
         success = db.restore_video(video_id)
         
         if success:
+            from .media_files import invalidate_media_paths
+            invalidate_media_paths()
             return jsonify({'success': True, 'message': 'Video restored successfully'})
         else:
             return jsonify({'success': False, 'error': 'Restore failed'}), 500
@@ -235,6 +244,8 @@ def api_permanent_delete_video(video_id):
         success = db.permanent_delete_video(video_id)
         
         if success:
+            from .media_files import invalidate_media_paths
+            invalidate_media_paths()
             return jsonify({'success': True, 'message': 'Video permanently deleted'})
         else:
             return jsonify({'success': False, 'error': 'Permanent delete failed'}), 500
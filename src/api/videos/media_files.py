@@ -0,0 +1,308 @@
+"""
+Tag-Flow V2 - Media File Serving
+Resolución cacheada media_id → ruta y envío condicional (Range, ETag, 304)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from flask import send_file
+
+from config import config
+from src.database.thumbnail_keys import thumbnail_variant_name
+from src.database.thumbnail_store import content_key_of
+
+logger = logging.getLogger(__name__)
+
+MEDIA_MIME_TYPES = {
+    # Videos
+    '.mp4': 'video/mp4',
+    '.m4v': 'video/mp4',
+    '.avi': 'video/avi',
+    '.mov': 'video/quicktime',
+    '.mkv': 'video/x-matroska',
+    '.webm': 'video/webm',
+    '.flv': 'video/x-flv',
+    '.wmv': 'video/x-ms-wmv',
+    # Imágenes
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.gif': 'image/gif',
+    '.bmp': 'image/bmp',
+    '.webp': 'image/webp',
+    '.avif': 'image/avif',
+    '.svg': 'image/svg+xml'
+}
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+
+def guess_media_mimetype(file_path, media_type: str = None) -> str:
+    """MIME type por extensión (con fallback según media_type)"""
+    mimetype = MEDIA_MIME_TYPES.get(os.path.splitext(str(file_path))[1].lower())
+    if mimetype:
+        return mimetype
+    if media_type == 'video':
+        return 'video/mp4'
+    return 'application/octet-stream'
+
+
+def thumbnail_variant_candidates(thumbnail_name: str, variant: str, accept_mimetypes) -> List[str]:
+    """
+    Archivos a probar para servir una variante, del formato preferido al JPEG
+
+    AVIF/WebP solo se ofrecen si el navegador los anuncia explícitamente en
+    Accept: el comodín */* no garantiza que sepa decodificarlos.
+    """
+    accepted = {value.lower() for value, quality in accept_mimetypes if quality > 0}
+    formats = [fmt for fmt in ('avif', 'webp') if f"image/{fmt}" in accepted]
+    return [thumbnail_variant_name(thumbnail_name, variant, fmt) for fmt in (*formats, 'jpeg')]
+
+
+def file_etag(stat: os.stat_result) -> str:
+    """ETag fuerte derivado de tamaño y mtime (independiente de la ruta)"""
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+
+def send_media_file(file_path, mimetype: str = None, max_age: Optional[int] = None,
+                    download_name: str = None, immutable: bool = False):
+    """
+    Enviar archivo con soporte condicional completo
+
+    - Range / 206 Partial Content para búsquedas en videos grandes
+    - ETag fuerte (tamaño + mtime) e If-None-Match / If-Modified-Since → 304
+    - Cache-Control con max_age (None = revalidar siempre con ETag); immutable
+      para archivos cuyo nombre ya identifica su contenido
+
+    Raises:
+        FileNotFoundError: si el archivo no existe (un único stat, sin exists() previo)
+    """
+    file_path = str(file_path)
+    stat = os.stat(file_path)
+
+    response = send_file(
+        file_path,
+        mimetype=mimetype or guess_media_mimetype(file_path),
+        as_attachment=False,
+        download_name=download_name,
+        conditional=True,
+        etag=file_etag(stat),
+        last_modified=stat.st_mtime,
+        max_age=max_age
+    )
+    response.headers['Accept-Ranges'] = 'bytes'
+    if max_age:
+        response.cache_control.public = True
+        if immutable:
+            response.cache_control.immutable = True
+    return response
+
+
+@dataclass(frozen=True)
+class MediaFile:
+    """Datos mínimos para servir un media"""
+    file_path: str
+    file_name: str
+    media_type: str
+    mimetype: str
+
+
+class MediaPathCache:
+    """
+    LRU thread-safe media_id → MediaFile con TTL
+
+    Evita la consulta media ⋈ posts en cada petición de streaming. El TTL
+    acota cuánto tarda en verse un borrado lógico o un archivo movido;
+    invalidate() permite forzarlo antes.
+    """
+
+    def __init__(self, max_entries: int = None, ttl: float = None):
+        self.max_entries = max_entries or config.MEDIA_PATH_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else config.MEDIA_PATH_CACHE_TTL
+        self._entries: "OrderedDict[int, Tuple[float, MediaFile]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolve(self, media_id: int) -> Optional[MediaFile]:
+        """Obtener MediaFile (None si no existe o el post está borrado)"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(media_id)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._entries.move_to_end(media_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        media_file = self._load(media_id)
+        if media_file is None:
+            self.invalidate(media_id)
+            return None
+
+        with self._lock:
+            self._entries[media_id] = (now, media_file)
+            self._entries.move_to_end(media_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return media_file
+
+    def invalidate(self, media_id: int = None):
+        """Olvidar un media (o todos)"""
+        with self._lock:
+            if media_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(media_id, None)
+
+    def reload(self, media_id: int, stale: MediaFile) -> Optional[MediaFile]:
+        """
+        Volver a resolver un media cuya ruta cacheada ya no existe en disco
+
+        Devuelve el MediaFile actualizado si el archivo se movió (otra ruta en
+        la BD), o None si sigue apuntando a la misma ruta o ya no existe.
+        """
+        self.invalidate(media_id)
+        media_file = self.resolve(media_id)
+        if media_file is None or media_file.file_path == stale.file_path:
+            return None
+        return media_file
+
+    def get_stats(self) -> Dict:
+        """Estadísticas de la caché"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total * 100, 1) if total else 0.0
+            }
+
+    def _load(self, media_id: int) -> Optional[MediaFile]:
+        from src.service_factory import get_database
+
+        with get_database().get_connection() as conn:
+            row = conn.execute("""
+                SELECT m.file_path, m.file_name, m.media_type
+                FROM media m
+                JOIN posts p ON m.post_id = p.id
+                WHERE m.id = ? AND p.deleted_at IS NULL
+            """, (media_id,)).fetchone()
+
+        if not row or not row[0]:
+            return None
+        file_path, file_name, media_type = row
+        return MediaFile(file_path, file_name, media_type, guess_media_mimetype(file_path, media_type))
+
+
+class ThumbnailFallbackCache:
+    """
+    Resolución cacheada de thumbnails inexistentes → imagen original
+
+    La resolución es una búsqueda por clave en thumbnail_keys y se ejecuta una
+    vez por nombre y TTL; también se recuerdan los nombres sin resolución, de
+    modo que los fallos repetidos cuestan O(1).
+    """
+
+    def __init__(self, max_entries: int = None, ttl: float = None):
+        self.max_entries = max_entries or config.MEDIA_PATH_CACHE_SIZE
+        self.ttl = ttl if ttl is not None else config.MEDIA_PATH_CACHE_TTL
+        self._entries: "OrderedDict[str, Tuple[float, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, thumbnail_name: str) -> Optional[Path]:
+        """Ruta de la imagen a servir en lugar del thumbnail (None = por defecto)"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(thumbnail_name)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._entries.move_to_end(thumbnail_name)
+                return Path(entry[1]) if entry[1] else None
+
+        image_path = self._lookup(thumbnail_name)
+
+        with self._lock:
+            self._entries[thumbnail_name] = (now, str(image_path) if image_path else None)
+            self._entries.move_to_end(thumbnail_name)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return image_path
+
+    def invalidate(self, thumbnail_name: str = None):
+        """Olvidar un nombre (o todos)"""
+        with self._lock:
+            if thumbnail_name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(thumbnail_name, None)
+
+    def _lookup(self, thumbnail_name: str) -> Optional[Path]:
+        """🎠 Imagen original precalculada en thumbnail_keys (carrusel → primera imagen)"""
+        if not thumbnail_name.endswith('_thumb.jpg') and not content_key_of(thumbnail_name):
+            return None
+
+        try:
+            from src.service_factory import get_database
+            from src.database.thumbnail_keys import resolve_thumbnail_key
+
+            with get_database().get_connection() as conn:
+                entry = resolve_thumbnail_key(conn, thumbnail_name)
+
+            if not entry or not entry['fallback_path']:
+                return None
+
+            image_path = Path(entry['fallback_path'])
+            if image_path.suffix.lower() in IMAGE_SUFFIXES and image_path.exists():
+                logger.info(f"🖼️ IMAGE FALLBACK - Serving original image: {image_path}")
+                return image_path
+        except Exception as e:
+            logger.warning(f"Error en fallback de carrusel para {thumbnail_name}: {e}")
+        return None
+
+
+_media_path_cache: Optional[MediaPathCache] = None
+_thumbnail_fallback_cache: Optional[ThumbnailFallbackCache] = None
+_caches_lock = threading.Lock()
+
+
+def get_media_path_cache() -> MediaPathCache:
+    """Caché compartida media_id → ruta"""
+    global _media_path_cache
+    with _caches_lock:
+        if _media_path_cache is None:
+            _media_path_cache = MediaPathCache()
+        return _media_path_cache
+
+
+def invalidate_media_paths(media_ids: Optional[List[int]] = None):
+    """
+    Olvidar rutas cacheadas tras borrar o restaurar media (None = todas)
+
+    El borrado lógico es por post y afecta a todos sus media, por eso las
+    operaciones de papelera vacían la caché completa.
+    """
+    cache = get_media_path_cache()
+    if media_ids is None:
+        cache.invalidate()
+        return
+    for media_id in media_ids:
+        cache.invalidate(media_id)
+
+
+def get_thumbnail_fallback_cache() -> ThumbnailFallbackCache:
+    """Caché compartida de fallbacks de thumbnails"""
+    global _thumbnail_fallback_cache
+    with _caches_lock:
+        if _thumbnail_fallback_cache is None:
+            _thumbnail_fallback_cache = ThumbnailFallbackCache()
+        return _thumbnail_fallback_cache
@@ -8,7 +8,7 @@ import platform
 import subprocess
 import logging
 from pathlib import Path
-from flask import Blueprint, request, jsonify, Response, send_file
+from flask import Blueprint, request, jsonify, Response
 
 logger = logging.getLogger(__name__)
 
@@ -161,55 +161,30 @@ def api_open_folder(video_id):
 
 @videos_streaming_bp.route('/video-stream/<int:video_id>')
 def api_stream_video(video_id):
-    """Stream video file directly using new schema"""
+    """Stream video file (Range/206, ETag/304, media_id → path cached in memory)"""
     try:
-        from src.service_factory import get_database
-        import os
-
-        db = get_database()
-
-        with db.get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT m.file_path, m.media_type, m.file_name
-                FROM media m
-                JOIN posts p ON m.post_id = p.id
-                WHERE m.id = ? AND p.deleted_at IS NULL
-            """, (video_id,))
-
-            row = cursor.fetchone()
-            if not row:
-                return jsonify({'error': 'Video not found'}), 404
-
-            file_path = row[0]
-            media_type = row[1]
-            file_name = row[2]
-
-            if not os.path.exists(file_path):
+        from .media_files import send_media_file, get_media_path_cache
+
+        media_cache = get_media_path_cache()
+        media_file = media_cache.resolve(video_id)
+        if media_file is None:
+            return jsonify({'error': 'Video not found'}), 404
+
+        try:
+            return send_media_file(
+                media_file.file_path,
+                mimetype=media_file.mimetype,
+                download_name=media_file.file_name
+            )
+        except FileNotFoundError:
+            # Ruta cacheada obsoleta (archivo movido): reintentar con la de la BD
+            media_file = media_cache.reload(video_id, media_file)
+            if media_file is None:
                 return jsonify({'error': 'File not found on disk'}), 404
-
-            # Determinar content type
-            content_type = 'video/mp4'
-            if media_type == 'image':
-                if file_path.lower().endswith('.jpg') or file_path.lower().endswith('.jpeg'):
-                    content_type = 'image/jpeg'
-                elif file_path.lower().endswith('.png'):
-                    content_type = 'image/png'
-                elif file_path.lower().endswith('.gif'):
-                    content_type = 'image/gif'
-            elif media_type == 'video':
-                if file_path.lower().endswith('.mp4'):
-                    content_type = 'video/mp4'
-                elif file_path.lower().endswith('.webm'):
-                    content_type = 'video/webm'
-                elif file_path.lower().endswith('.mov'):
-                    content_type = 'video/quicktime'
-
-            # Usar send_file para streaming eficiente
-            return send_file(
-                file_path,
-                mimetype=content_type,
-                as_attachment=False,
-                download_name=file_name
+            return send_media_file(
+                media_file.file_path,
+                mimetype=media_file.mimetype,
+                download_name=media_file.file_name
             )
 
     except Exception as e:
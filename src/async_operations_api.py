@@ -63,6 +63,13 @@ class AsyncOperationsAPI:
         self.operation_manager = get_operation_manager()
         self.websocket_manager = get_websocket_manager()
         
+        # Operaciones que pueden reconstruirse desde SQLite tras un reinicio
+        self.operation_manager.register_resumable('regenerate_thumbnails', self._regenerate_thumbnails_job)
+        self.operation_manager.register_resumable('populate_thumbnails', self._populate_thumbnails_job)
+        self.operation_manager.register_resumable('populate_database', self._populate_database_job)
+        self.operation_manager.register_resumable('migrate_thumbnail_store', self._migrate_thumbnail_store_job)
+        self.operation_manager.resume_interrupted_operations()
+        
         logger.info("🔄 Async Operations API inicializada")
     
     @property
@@ -262,6 +269,51 @@ class AsyncOperationsAPI:
         
         return operation_id
 
+    # === OPERACIONES REANUDABLES ===
+    # (params, checkpoint) -> función de la operación; usadas al crear y al reanudar
+    def _regenerate_thumbnails_job(self, params: Dict[str, Any], checkpoint: Any = None) -> Callable:
+        def regenerate_operation(progress_callback=None):
+            return self.thumbnail_ops.regenerate_thumbnails_by_ids(
+                video_ids=params['video_ids'],
+                force=params.get('force', False),
+                progress_callback=progress_callback,
+                checkpoint=checkpoint
+            )
+        return regenerate_operation
+    
+    def _populate_thumbnails_job(self, params: Dict[str, Any], checkpoint: Any = None) -> Callable:
+        def populate_operation(progress_callback=None):
+            return self.thumbnail_ops.populate_thumbnails(
+                platform=params.get('platform'),
+                limit=params.get('limit'),
+                force=params.get('force', False),
+                progress_callback=progress_callback,
+                checkpoint=checkpoint
+            )
+        return populate_operation
+    
+    def _populate_database_job(self, params: Dict[str, Any], checkpoint: Any = None) -> Callable:
+        # Sin checkpoint propio: al reanudar se vuelve a lanzar y los videos
+        # ya importados se omiten (salvo force)
+        def populate_operation(progress_callback=None):
+            return self.database_ops.populate_database(
+                source=params.get('source', 'all'),
+                platform=params.get('platform'),
+                limit=params.get('limit'),
+                force=params.get('force', False),
+                progress_callback=progress_callback
+            )
+        return populate_operation
+    
+    def _migrate_thumbnail_store_job(self, params: Dict[str, Any], checkpoint: Any = None) -> Callable:
+        # Sin checkpoint propio: los media ya migrados se saltan al relanzar
+        def migrate_operation(progress_callback=None):
+            return self.thumbnail_ops.migrate_thumbnail_store(
+                batch_size=params.get('batch_size', 500),
+                progress_callback=progress_callback
+            )
+        return migrate_operation
+    
     # === OPERACIONES DE MANTENIMIENTO ===
     # Operaciones de thumbnails con WebSockets
     def regenerate_thumbnails_bulk(self, video_ids: List[int], 
@@ -278,25 +330,19 @@ class AsyncOperationsAPI:
         Returns:
             operation_id: ID de la operación para tracking
         """
+        params = {'video_ids': list(video_ids), 'force': force}
         operation_id = self.operation_manager.create_operation(
             operation_type="regenerate_thumbnails",
             priority=priority,
             total_items=len(video_ids),
-            notification_interval=0.5  # Actualizar cada 500ms
+            notification_interval=0.5,  # Actualizar cada 500ms
+            params=params
         )
         
-        # Función wrapper para la operación
-        def regenerate_operation(progress_callback=None):
-            return self.thumbnail_ops.regenerate_thumbnails_by_ids(
-                video_ids=video_ids,
-                force=force,
-                progress_callback=progress_callback
-            )
-        
         # Iniciar operación
         success = self.operation_manager.start_operation(
             operation_id,
-            regenerate_operation
+            self._regenerate_thumbnails_job(params)
         )
         
         if success:
@@ -328,24 +374,18 @@ class AsyncOperationsAPI:
         Returns:
             operation_id: ID de la operación para tracking
         """
+        params = {'platform': platform, 'limit': limit, 'force': force}
         operation_id = self.operation_manager.create_operation(
             operation_type="populate_thumbnails",
             priority=priority,
             total_items=limit or 0,
-            notification_interval=1.0
+            notification_interval=1.0,
+            params=params
         )
         
-        def populate_operation(progress_callback=None):
-            return self.thumbnail_ops.populate_thumbnails(
-                platform=platform,
-                limit=limit,
-                force=force,
-                progress_callback=progress_callback
-            )
-        
         success = self.operation_manager.start_operation(
             operation_id,
-            populate_operation
+            self._populate_thumbnails_job(params)
         )
         
         if success:
@@ -399,6 +439,40 @@ class AsyncOperationsAPI:
         
         return operation_id
     
+    def migrate_thumbnail_store_bulk(self, batch_size: int = 500,
+                                     priority: OperationPriority = OperationPriority.LOW) -> str:
+        """
+        🗂️ Migrar thumbnails planos al almacén por contenido en segundo plano
+        
+        Args:
+            batch_size: media por transacción
+            priority: prioridad de la operación
+            
+        Returns:
+            operation_id: ID de la operación para tracking
+        """
+        params = {'batch_size': batch_size}
+        operation_id = self.operation_manager.create_operation(
+            operation_type="migrate_thumbnail_store",
+            priority=priority,
+            notification_interval=2.0,
+            params=params
+        )
+        
+        success = self.operation_manager.start_operation(
+            operation_id,
+            self._migrate_thumbnail_store_job(params)
+        )
+        
+        if success:
+            send_notification(
+                "Migración de thumbnails al almacén por contenido iniciada",
+                "info",
+                {'operation_id': operation_id}
+            )
+        
+        return operation_id
+    
     # Operaciones de base de datos
     def populate_database_bulk(self, source: str = 'all', 
                              platform: Optional[str] = None,
@@ -418,25 +492,18 @@ class AsyncOperationsAPI:
         Returns:
             operation_id: ID de la operación para tracking
         """
+        params = {'source': source, 'platform': platform, 'limit': limit, 'force': force}
         operation_id = self.operation_manager.create_operation(
             operation_type="populate_database",
             priority=priority,
             total_items=limit or 0,
-            notification_interval=1.0
+            notification_interval=1.0,
+            params=params
         )
         
-        def populate_operation(progress_callback=None):
-            return self.database_ops.populate_database(
-                source=source,
-                platform=platform,
-                limit=limit,
-                force=force,
-                progress_callback=progress_callback
-            )
-        
         success = self.operation_manager.start_operation(
             operation_id,
-            populate_operation
+            self._populate_database_job(params)
         )
         
         if success:
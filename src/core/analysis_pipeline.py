@@ -0,0 +1,522 @@
+"""
+Tag-Flow V2 - Analysis Pipeline
+Pipeline de análisis por etapas (productor/consumidor) con pools por etapa
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Marca de fin de flujo entre etapas
+_END = object()
+
+
+@dataclass
+class PipelineStage:
+    """Definición de una etapa: función ctx -> ctx, tamaño de pool y tipo de pool"""
+    name: str
+    func: Callable[[Dict], Dict]
+    workers: int = 1
+    use_processes: bool = False
+
+
+class StageStats:
+    """Métricas de una etapa (thread-safe)"""
+
+    def __init__(self, name: str, workers: int, pool_type: str):
+        self.name = name
+        self.workers = workers
+        self.pool_type = pool_type
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.errors = 0
+        self.skipped = 0
+        self.busy_time = 0.0
+        self.blocked_time = 0.0  # Tiempo esperando espacio en la cola siguiente (backpressure)
+        self.max_queue_depth = 0
+        self.started_at = None
+        self.finished_at = None
+
+    def record(self, elapsed: float, blocked: float, error: bool = False, skipped: bool = False):
+        with self._lock:
+            now = time.time()
+            if self.started_at is None:
+                self.started_at = now - elapsed
+            self.finished_at = now
+            if skipped:
+                self.skipped += 1
+                return
+            self.processed += 1
+            self.busy_time += elapsed
+            self.blocked_time += blocked
+            if error:
+                self.errors += 1
+
+    def observe_queue(self, depth: int):
+        with self._lock:
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            wall_time = (self.finished_at - self.started_at) if self.started_at and self.finished_at else 0.0
+            return {
+                'stage': self.name,
+                'pool': self.pool_type,
+                'workers': self.workers,
+                'processed': self.processed,
+                'errors': self.errors,
+                'skipped': self.skipped,
+                'throughput_per_sec': round(self.processed / wall_time, 2) if wall_time > 0 else 0.0,
+                'avg_time_ms': round(self.busy_time / self.processed * 1000, 1) if self.processed else 0.0,
+                'blocked_time_sec': round(self.blocked_time, 2),
+                'max_queue_depth': self.max_queue_depth
+            }
+
+
+class StagedPipeline:
+    """
+    Pipeline lineal de etapas conectadas por colas acotadas
+
+    Cada etapa tiene sus propios workers; las etapas CPU pueden ejecutarse en
+    un ProcessPoolExecutor (un worker-hilo por proceso, de modo que nunca hay
+    más trabajos en vuelo que procesos). Un item con 'error' atraviesa el resto
+    de etapas sin procesarse. Cuando una etapa lenta llena su cola de entrada,
+    las anteriores se bloquean (backpressure) en lugar de acumular memoria.
+    """
+
+    def __init__(self, stages: List[PipelineStage], queue_size: int = None,
+                 use_processes: bool = None):
+        self.stages = stages
+        self.queue_size = queue_size or config.PIPELINE_QUEUE_SIZE
+        self.use_processes = config.PIPELINE_USE_PROCESSES if use_processes is None else use_processes
+        self.stats: Dict[str, StageStats] = {}
+        self.wall_time = 0.0
+
+    def run(self, items: Iterable[Dict], on_result: Callable[[Dict], None] = None) -> List[Dict]:
+        """Procesar items por todas las etapas; devuelve los contextos finales"""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        results_queue = queue.Queue()
+        executors = []
+        threads = []
+        start_time = time.time()
+
+        try:
+            for index, stage in enumerate(self.stages):
+                executor = None
+                if stage.use_processes and self.use_processes:
+                    executor = ProcessPoolExecutor(
+                        max_workers=stage.workers,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+                    executors.append(executor)
+
+                stats = StageStats(stage.name, stage.workers, 'process' if executor else 'thread')
+                self.stats[stage.name] = stats
+
+                is_last = index == len(self.stages) - 1
+                output_queue = results_queue if is_last else queues[index + 1]
+                next_workers = 1 if is_last else self.stages[index + 1].workers
+                remaining = [stage.workers]
+                remaining_lock = threading.Lock()
+
+                for worker_num in range(stage.workers):
+                    thread = threading.Thread(
+                        target=self._worker_loop,
+                        args=(stage, executor, stats, queues[index], output_queue,
+                              remaining, remaining_lock, next_workers),
+                        name=f"pipeline-{stage.name}-{worker_num}",
+                        daemon=True
+                    )
+                    thread.start()
+                    threads.append(thread)
+
+            producer = threading.Thread(
+                target=self._produce, args=(items, queues[0], self.stages[0].workers),
+                name="pipeline-producer", daemon=True
+            )
+            producer.start()
+            threads.append(producer)
+
+            results = []
+            while True:
+                ctx = results_queue.get()
+                if ctx is _END:
+                    break
+                results.append(ctx)
+                if on_result:
+                    try:
+                        on_result(ctx)
+                    except Exception as e:
+                        logger.warning(f"⚠️ Error en callback de resultado: {e}")
+
+            for thread in threads:
+                thread.join()
+            return results
+
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True)
+            self.wall_time = time.time() - start_time
+
+    def _produce(self, items: Iterable[Dict], first_queue: queue.Queue, first_workers: int):
+        """Alimentar la primera etapa (bloquea si la cola está llena)"""
+        try:
+            for item in items:
+                first_queue.put(item)
+        finally:
+            for _ in range(first_workers):
+                first_queue.put(_END)
+
+    def _worker_loop(self, stage: PipelineStage, executor, stats: StageStats,
+                     input_queue: queue.Queue, output_queue: queue.Queue,
+                     remaining: List[int], remaining_lock: threading.Lock, next_workers: int):
+        """Consumir de la cola de la etapa, ejecutar y pasar a la siguiente"""
+        while True:
+            ctx = input_queue.get()
+            if ctx is _END:
+                break
+
+            stats.observe_queue(input_queue.qsize())
+
+            if ctx.get('error'):
+                stats.record(0.0, 0.0, skipped=True)
+                output_queue.put(ctx)
+                continue
+
+            stage_start = time.time()
+            try:
+                if executor is not None:
+                    try:
+                        ctx = executor.submit(stage.func, ctx).result()
+                    except BrokenProcessPool:
+                        # Pool roto (p.ej. worker caído): ejecutar en el hilo
+                        logger.warning(f"⚠️ Pool de procesos roto en etapa '{stage.name}', ejecutando en hilo")
+                        executor = None
+                        ctx = stage.func(ctx)
+                else:
+                    ctx = stage.func(ctx)
+            except Exception as e:
+                logger.error(f"❌ Error en etapa '{stage.name}' para {ctx.get('file_path', 'Unknown')}: {e}")
+                ctx['error'] = str(e)
+            elapsed = time.time() - stage_start
+
+            put_start = time.time()
+            output_queue.put(ctx)
+            stats.record(elapsed, time.time() - put_start, error=bool(ctx.get('error')))
+
+        # El último worker de la etapa cierra el flujo hacia la siguiente
+        with remaining_lock:
+            remaining[0] -= 1
+            last_worker = remaining[0] == 0
+        if last_worker:
+            for _ in range(next_workers):
+                output_queue.put(_END)
+
+    def get_stats(self) -> Dict:
+        """Métricas por etapa y tiempo total"""
+        return {
+            'wall_time_sec': round(self.wall_time, 2),
+            'stages': [self.stats[stage.name].to_dict() for stage in self.stages if stage.name in self.stats]
+        }
+
+    def log_stats(self):
+        """Mostrar throughput por etapa"""
+        stats = self.get_stats()
+        logger.info(f"📊 Pipeline: {stats['wall_time_sec']}s total")
+        for stage in stats['stages']:
+            logger.info(
+                f"   {stage['stage']:<10} [{stage['pool']} x{stage['workers']}] "
+                f"{stage['processed']} items, {stage['throughput_per_sec']}/s, "
+                f"avg {stage['avg_time_ms']}ms, bloqueado {stage['blocked_time_sec']}s, "
+                f"cola máx {stage['max_queue_depth']}"
+            )
+
+
+# ===========================================
+# ETAPAS DE ANÁLISIS DE VIDEO
+# ===========================================
+# Funciones a nivel de módulo para poder ejecutarse en procesos (picklables).
+# Cada proceso obtiene sus propios servicios mediante el service factory.
+
+def new_analysis_context(video_data: Dict, force: bool = False) -> Dict:
+    """Crear el contexto que recorre las etapas para un video"""
+    file_path = video_data['file_path']
+    return {
+        'video_data': video_data,
+        'file_path': file_path,
+        'file_name': video_data.get('file_name', Path(file_path).name),
+        'force': force,
+        'error': None
+    }
+
+
+def probe_stage(ctx: Dict) -> Dict:
+    """Validar archivo y extraer metadatos (un único probe)"""
+    from src.service_factory import get_video_processor
+    video_processor = get_video_processor()
+    file_path = Path(ctx['file_path'])
+
+    if not file_path.exists():
+        ctx['error'] = 'Archivo no encontrado'
+        return ctx
+    if not video_processor.is_valid_video(file_path):
+        ctx['error'] = 'Archivo de video inválido'
+        return ctx
+
+    ctx['metadata'] = video_processor.extract_metadata(file_path)
+    return ctx
+
+
+def existing_music_result(video_data: Dict) -> Optional[Dict]:
+    """Música ya detectada en un análisis previo (None si no hay)"""
+    if not video_data.get('detected_music'):
+        return None
+    return {
+        'detected_music': video_data.get('detected_music'),
+        'detected_music_artist': video_data.get('detected_music_artist'),
+        'detected_music_confidence': video_data.get('detected_music_confidence'),
+        'music_source': video_data.get('music_source')
+    }
+
+
+def audio_stage(ctx: Dict) -> Dict:
+    """
+    Extraer audio para reconocimiento musical (si hay audio y hace falta)
+
+    Sin force, la música ya detectada se conserva; si el nombre de archivo ya
+    identifica la canción tampoco se extrae audio. Por defecto el clip queda en
+    memoria (mono remuestreado); con AUDIO_EXTRACT_IN_MEMORY=false se usa un
+    WAV temporal.
+    """
+    ctx['audio_path'] = None
+    ctx['audio_clip'] = None
+
+    if not ctx.get('force'):
+        existing = existing_music_result(ctx['video_data'])
+        if existing:
+            ctx['music_result'] = existing
+            return ctx
+
+    from src.service_factory import get_music_recognizer, get_video_processor
+    try:
+        if get_music_recognizer().resolves_from_filename(Path(ctx['file_path']).name):
+            ctx['music_from_filename'] = True
+            return ctx
+    except Exception as e:
+        logger.debug(f"  Error comprobando música en el nombre de archivo: {e}")
+
+    if not ctx.get('metadata', {}).get('has_audio', False):
+        return ctx
+
+    try:
+        if config.AUDIO_EXTRACT_IN_MEMORY:
+            ctx['audio_clip'] = get_video_processor().extract_audio_clip(Path(ctx['file_path']), duration=30)
+        else:
+            audio_path = get_video_processor().extract_audio(Path(ctx['file_path']), duration=30)
+            ctx['audio_path'] = str(audio_path) if audio_path else None
+    except Exception as e:
+        logger.warning(f"  Error extrayendo audio: {e}")
+    return ctx
+
+
+def music_stage(ctx: Dict) -> Dict:
+    """Reconocimiento musical (red) y limpieza del audio temporal"""
+    audio_clip = ctx.pop('audio_clip', None)
+    audio_path = ctx.pop('audio_path', None)
+    if ctx.get('music_result'):
+        return ctx  # Música conservada de un análisis previo
+
+    ctx['music_result'] = {'song_name': None, 'artist_name': None, 'confidence': 0.0, 'source': None}
+    audio = audio_clip if audio_clip is not None else (Path(audio_path) if audio_path else None)
+    if audio is None and not ctx.get('music_from_filename'):
+        return ctx
+
+    try:
+        from src.service_factory import get_music_recognizer
+        ctx['music_result'] = get_music_recognizer().recognize_music(audio, Path(ctx['file_path']).name)
+    except Exception as e:
+        logger.warning(f"  Error en reconocimiento musical: {e}")
+    finally:
+        if audio_path and Path(audio_path).exists():
+            Path(audio_path).unlink()
+    return ctx
+
+
+def frame_stage(ctx: Dict) -> Dict:
+    """Extraer frame para reconocimiento facial"""
+    ctx['frame_data'] = None
+    try:
+        from src.service_factory import get_video_processor
+        ctx['frame_data'] = get_video_processor().get_video_frame(Path(ctx['file_path']), timestamp=2.0)
+    except Exception as e:
+        logger.warning(f"  Error extrayendo frame: {e}")
+    return ctx
+
+
+def faces_stage(ctx: Dict) -> Dict:
+    """Reconocimiento facial y de personajes (CPU/GPU)"""
+    ctx['face_result'] = {'characters': [], 'faces': []}
+    frame_data = ctx.pop('frame_data', None)
+    if not frame_data:
+        return ctx
+
+    video_data = ctx['video_data']
+    try:
+        from src.service_factory import get_face_recognizer
+        # Preparar datos del video para análisis inteligente
+        video_data_for_recognition = {
+            'creator_name': video_data.get('creator_name', ''),
+            'platform': video_data.get('platform', 'unknown'),
+            'title': video_data.get('title', '')
+        }
+        ctx['face_result'] = get_face_recognizer().recognize_faces_intelligent(frame_data, video_data_for_recognition)
+    except Exception as e:
+        logger.warning(f"  Error en reconocimiento de personajes: {e}")
+    return ctx
+
+
+def thumbnail_stage(ctx: Dict) -> Dict:
+    """Generar thumbnail (decodificación + encode, CPU)"""
+    from src.service_factory import get_thumbnail_generator
+    video_data = ctx['video_data']
+    thumbnail_result = get_thumbnail_generator().generate_thumbnail(
+        Path(ctx['file_path']), media_id=video_data.get('id') or video_data.get('existing_video_id')
+    )
+    ctx['thumbnail_path'] = str(thumbnail_result) if thumbnail_result else None
+    return ctx
+
+
+def preview_stage(ctx: Dict) -> Dict:
+    """Sprite sheet / clip de hover junto al thumbnail (una decodificación con FFmpeg)"""
+    if not config.PREVIEW_SPRITES_ENABLED or not ctx.get('thumbnail_path'):
+        return ctx
+    from src.service_factory import get_thumbnail_generator
+    ctx['preview_assets'] = get_thumbnail_generator().generate_preview_assets(
+        Path(ctx['file_path']), Path(ctx['thumbnail_path']), force_regenerate=ctx.get('force', False)
+    )
+    return ctx
+
+
+def build_update_data(ctx: Dict) -> Dict:
+    """Datos a persistir en media a partir de los resultados de las etapas"""
+    music_result = ctx.get('music_result') or {}
+    face_result = ctx.get('face_result') or {}
+    update_data = {
+        # Música detectada
+        'detected_music': music_result.get('detected_music'),
+        'detected_music_artist': music_result.get('detected_music_artist'),
+        'detected_music_confidence': music_result.get('detected_music_confidence'),
+        'music_source': music_result.get('music_source'),
+
+        # Personajes detectados
+        'detected_characters': face_result.get('detected_characters', []),
+
+        # Thumbnail
+        'thumbnail_path': ctx.get('thumbnail_path'),
+
+        # Estado
+        'processing_status': 'completado'
+    }
+    
+    # Sprite / clip de hover (tabla preview_assets, no columnas de media)
+    if ctx.get('preview_assets'):
+        update_data['preview_assets'] = ctx['preview_assets']
+    return update_data
+
+
+def character_confidences_for(ctx: Dict) -> Dict[str, float]:
+    """Confianza por personaje para el índice media_characters"""
+    face_result = ctx.get('face_result') or {}
+    return dict(zip(
+        face_result.get('detected_characters', []),
+        face_result.get('confidence_scores', [])
+    ))
+
+
+def db_write_stage(ctx: Dict) -> Dict:
+    """Encolar resultados en el escritor por lotes (no bloquea al pipeline)"""
+    video_data = ctx['video_data']
+    video_id = video_data.get('id') or video_data.get('existing_video_id')
+    if not video_id:
+        ctx['error'] = 'Video ID no encontrado para actualización'
+        return ctx
+
+    from src.database.batch_writer import get_batch_writer
+    ctx['video_id'] = video_id
+    ctx['write_future'] = get_batch_writer().submit(
+        video_id, build_update_data(ctx), character_confidences_for(ctx)
+    )
+    return ctx
+
+
+def resolve_write(ctx: Dict) -> Dict:
+    """Esperar el resultado de la escritura por lotes del contexto"""
+    future = ctx.pop('write_future', None)
+    if future is not None and not future.result():
+        logger.error(f"❌ Error actualizando video {ctx.get('video_id')} en BD")
+        ctx['error'] = 'Error actualizando video en base de datos'
+    return ctx
+
+
+def build_result(ctx: Dict) -> Dict:
+    """Resultado público de process_video a partir del contexto final"""
+    resolve_write(ctx)
+    if ctx.get('error'):
+        return {
+            'success': False,
+            'error': ctx['error'],
+            'video_path': ctx.get('file_path', 'Unknown')
+        }
+    face_result = ctx.get('face_result') or {}
+    return {
+        'success': True,
+        'video_id': ctx.get('video_id'),
+        'detected_music': (ctx.get('music_result') or {}).get('detected_music'),
+        'detected_characters': face_result.get('detected_characters', []),
+        'video_path': ctx['file_path']
+    }
+
+
+def build_analysis_stages(max_workers: int = None) -> List[PipelineStage]:
+    """Etapas del análisis de video con pools configurados (opcionalmente acotados)"""
+    def workers(value: int) -> int:
+        return max(1, min(value, max_workers) if max_workers else value)
+
+    return [
+        PipelineStage('probe', probe_stage, workers(config.PIPELINE_PROBE_WORKERS)),
+        PipelineStage('audio', audio_stage, workers(config.PIPELINE_AUDIO_WORKERS)),
+        PipelineStage('music', music_stage, workers(config.PIPELINE_MUSIC_WORKERS)),
+        PipelineStage('frame', frame_stage, workers(config.PIPELINE_FRAME_WORKERS)),
+        PipelineStage('faces', faces_stage, workers(config.PIPELINE_FACE_WORKERS), use_processes=True),
+        PipelineStage('thumbnail', thumbnail_stage, workers(config.PIPELINE_THUMBNAIL_WORKERS), use_processes=True),
+        # El trabajo lo hace el subproceso FFmpeg: basta con hilos
+        PipelineStage('preview', preview_stage, workers(config.PIPELINE_PREVIEW_WORKERS)),
+        # Solo encola en el BatchWriter: un único hilo escribe en SQLite
+        PipelineStage('db_write', db_write_stage, 1),
+    ]
+
+
+def run_analysis_stages_inline(video_data: Dict) -> Dict:
+    """Ejecutar todas las etapas en el hilo actual (un solo video)"""
+    ctx = new_analysis_context(video_data)
+    for stage in build_analysis_stages():
+        if ctx.get('error'):
+            break
+        ctx = stage.func(ctx)
+
+    if 'write_future' in ctx:
+        from src.database.batch_writer import get_batch_writer
+        get_batch_writer().flush()
+    return ctx
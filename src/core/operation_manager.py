@@ -4,12 +4,16 @@
 Middleware para manejo de operaciones de larga duración con notificaciones en tiempo real
 """
 
+import copy
 import time
 import uuid
 import json
+import heapq
 import asyncio
 import logging
+import itertools
 import threading
+from collections import deque
 from typing import Dict, List, Optional, Any, Callable
 from datetime import datetime, timedelta
 from dataclasses import dataclass, field, asdict
@@ -26,6 +30,7 @@ logger = logging.getLogger(__name__)
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
+import config
 from src.core.websocket_manager import get_websocket_manager, send_operation_progress, send_operation_complete, send_notification
 
 
@@ -47,6 +52,90 @@ class OperationPriority(Enum):
     HIGH = "high"
     CRITICAL = "critical"
 
+    @property
+    def rank(self) -> int:
+        """Orden de despacho en la cola (0 = primero)"""
+        return _PRIORITY_RANK[self.value]
+
+
+_PRIORITY_RANK = {'critical': 0, 'high': 1, 'medium': 2, 'normal': 3, 'low': 4}
+
+
+class ResourceSampler:
+    """
+    Muestreo compartido de memoria/CPU del proceso a frecuencia fija
+    
+    Un único hilo consulta psutil cada `interval` segundos; las operaciones
+    leen el último valor en lugar de muestrear en cada actualización.
+    """
+    
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.memory_mb = 0.0
+        self.cpu_percent = 0.0
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Arrancar el hilo de muestreo (idempotente)"""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, daemon=True, name='resource-sampler')
+            self._thread.start()
+    
+    def _run(self):
+        try:
+            process = psutil.Process()
+            process.cpu_percent()  # La primera lectura solo fija la referencia
+        except Exception as e:
+            logger.debug(f"Muestreo de recursos no disponible: {e}")
+            return
+        
+        while True:
+            try:
+                self.memory_mb = process.memory_info().rss / 1024 / 1024
+                self.cpu_percent = process.cpu_percent()
+            except Exception as e:
+                logger.debug(f"Error muestreando recursos: {e}")
+            time.sleep(self.interval)
+
+
+_resource_sampler = ResourceSampler()
+
+
+class ProgressBuffer:
+    """
+    Último progreso publicado por una operación, sin locks
+    
+    El callback de progreso sustituye una tupla inmutable (asignación atómica)
+    y avanza `version`; el notificador aplica solo la más reciente, así que
+    miles de ticks por segundo se agrupan en una notificación por intervalo.
+    """
+    __slots__ = ('latest', 'version', 'applied_version')
+    
+    def __init__(self):
+        self.latest = None
+        self.version = 0
+        self.applied_version = 0
+    
+    @property
+    def dirty(self) -> bool:
+        return self.version != self.applied_version
+    
+    def publish(self, snapshot: Optional[tuple]) -> bool:
+        """Publicar progreso; True si el buffer estaba al día (hay que avisar al notificador)"""
+        if snapshot is not None:
+            self.latest = snapshot
+        was_clean = self.version == self.applied_version
+        self.version += 1
+        return was_clean
+    
+    def take(self) -> Optional[tuple]:
+        """Último snapshot publicado, marcándolo como aplicado"""
+        self.applied_version = self.version
+        return self.latest
+
 
 @dataclass
 class OperationProgress:
@@ -78,6 +167,15 @@ class OperationProgress:
     last_notification_time: datetime = field(default_factory=datetime.now)
     notification_interval: float = 1.0  # segundos
     
+    # Cola persistente y reanudación
+    params: Optional[Dict[str, Any]] = None  # Argumentos para reconstruir el job tras un reinicio
+    checkpoint: Any = None  # Punto de reanudación reportado por el job (JSON)
+    resumed: bool = False
+    created_at: float = field(default_factory=time.time)
+    
+    # Progreso publicado por el callback, pendiente de aplicar
+    progress: ProgressBuffer = field(default_factory=ProgressBuffer, repr=False)
+    
     @property
     def duration(self) -> float:
         """Duración de la operación en segundos"""
@@ -107,17 +205,43 @@ class OperationProgress:
                 remaining_seconds = remaining_items / self.items_per_second
                 self.estimated_completion = datetime.now() + timedelta(seconds=remaining_seconds)
             
-            # Obtener uso de memoria y CPU del proceso actual
-            try:
-                process = psutil.Process()
-                self.memory_usage_mb = process.memory_info().rss / 1024 / 1024
-                self.cpu_usage_percent = process.cpu_percent()
-            except:
-                pass
+            # Uso de memoria y CPU del proceso (muestreador compartido)
+            self.memory_usage_mb = _resource_sampler.memory_mb
+            self.cpu_usage_percent = _resource_sampler.cpu_percent
                 
         except Exception as e:
             logger.debug(f"Error actualizando métricas: {e}")
     
+    def apply_progress(self):
+        """Volcar en los campos el último progreso publicado por el callback"""
+        if not self.progress.dirty:
+            return
+        snapshot = self.progress.take()
+        if snapshot is None:
+            return
+        
+        processed, total, current_item, successful, failed, checkpoint = snapshot
+        self.processed_items = processed
+        if total is not None:
+            self.total_items = total
+        if current_item:
+            self.current_step = current_item
+        if successful is not None:
+            self.successful_items = successful
+        if failed is not None:
+            self.failed_items = failed
+        if checkpoint is not None:
+            self.checkpoint = checkpoint
+        
+        # Calcular porcentaje
+        if self.total_items > 0:
+            self.progress_percentage = (processed / self.total_items) * 100
+    
+    def seconds_until_notify(self) -> float:
+        """Segundos hasta que toca la siguiente notificación (<= 0: ya)"""
+        elapsed = (datetime.now() - self.last_notification_time).total_seconds()
+        return self.notification_interval - elapsed
+    
     def should_notify(self) -> bool:
         """Verificar si debe enviar notificación"""
         now = datetime.now()
@@ -150,7 +274,25 @@ class OperationProgress:
             'items_per_second': self.items_per_second,
             'estimated_completion': self.estimated_completion.isoformat() if self.estimated_completion else None,
             'memory_usage_mb': self.memory_usage_mb,
-            'cpu_usage_percent': self.cpu_usage_percent
+            'cpu_usage_percent': self.cpu_usage_percent,
+            'resumed': self.resumed
+        }
+    
+    def to_job(self) -> Dict[str, Any]:
+        """Estado persistible en la tabla operation_jobs"""
+        return {
+            'operation_id': self.operation_id,
+            'operation_type': self.operation_type,
+            'status': self.status.value,
+            'priority': self.priority.value,
+            'params': self.params,
+            'checkpoint': copy.deepcopy(self.checkpoint),
+            'total_items': self.total_items,
+            'processed_items': self.processed_items,
+            'successful_items': self.successful_items,
+            'failed_items': self.failed_items,
+            'error_message': self.error_message,
+            'created_at': self.created_at
         }
 
 
@@ -163,11 +305,24 @@ class OperationManager:
     - Progreso en tiempo real
     - Cancelación y pausa
     - Métricas de rendimiento
-    - Priorización de operaciones
-    - Persistencia de estado
+    - Cola por prioridad: start_operation encola en lugar de rechazar
+    - Límite de concurrencia global y por tipo de operación
+    - Persistencia de estado y checkpoints en SQLite; reanudación tras reinicio
     """
     
-    def __init__(self, max_concurrent_operations: int = 3):
+    # Operaciones largas y exclusivas no ocupan más de un hueco
+    DEFAULT_TYPE_LIMITS = {
+        'create_backup': 1,
+        'migrate_thumbnail_store': 1,
+        'optimize_database': 1,
+        'populate_database': 1,
+        'verify_integrity': 1
+    }
+    
+    def __init__(self, max_concurrent_operations: int = 3,
+                 type_limits: Optional[Dict[str, int]] = None,
+                 persist: bool = False,
+                 checkpoint_interval: float = 2.0):
         self.operations: Dict[str, OperationProgress] = {}
         self.active_futures: Dict[str, Future] = {}
         self.executor = ThreadPoolExecutor(max_workers=max_concurrent_operations)
@@ -180,6 +335,28 @@ class OperationManager:
         self.operation_timeout = 3600  # 1 hora por defecto
         self.cleanup_interval = 300  # 5 minutos
         
+        # Límites por tipo: sin límite explícito, un tipo deja al menos un hueco libre para los demás
+        self.type_limits = {**self.DEFAULT_TYPE_LIMITS, **(type_limits or {})}
+        self.default_type_limit = max(1, max_concurrent_operations - 1)
+        
+        # Cola por prioridad: heap de (rank, secuencia, operation_id)
+        self._queue: List[tuple] = []
+        self._queue_seq = itertools.count()
+        self._jobs: Dict[str, tuple] = {}  # operation_id -> (func, args, kwargs) en cola
+        self._running_by_type: Dict[str, int] = {}
+        self._shutting_down = False
+        
+        # Persistencia y reanudación
+        self.persist = persist
+        self.checkpoint_interval = checkpoint_interval
+        self._last_persist: Dict[str, float] = {}
+        self._resumable: Dict[str, Callable] = {}
+        
+        # Notificaciones por eventos: operaciones con progreso nuevo (deque: append sin lock)
+        self._progress_event = threading.Event()
+        self._progress_ready = deque()
+        self.idle_interval = 1.0  # Espera máxima del notificador sin eventos
+        
         # Estadísticas
         self.stats = {
             'total_operations': 0,
@@ -196,6 +373,7 @@ class OperationManager:
     def start_notification_system(self):
         """Iniciar sistema de notificaciones en tiempo real"""
         self.running = True
+        _resource_sampler.start()
         self.notification_thread = threading.Thread(target=self._notification_worker, daemon=True)
         self.notification_thread.start()
         logger.info("⚙️ Sistema de notificaciones iniciado")
@@ -203,40 +381,90 @@ class OperationManager:
     def stop_notification_system(self):
         """Detener sistema de notificaciones"""
         self.running = False
+        self._progress_event.set()
         if self.notification_thread:
             self.notification_thread.join(timeout=5)
         logger.info("⚙️ Sistema de notificaciones detenido")
     
+    def _signal_progress(self, operation: OperationProgress, snapshot: Optional[tuple] = None):
+        """Publicar progreso (o un cambio de estado) y despertar al notificador si hace falta"""
+        if operation.progress.publish(snapshot):
+            self._progress_ready.append(operation)
+            self._progress_event.set()
+    
     def _notification_worker(self):
-        """Worker para enviar notificaciones periódicas"""
+        """
+        Worker de notificaciones por eventos
+        
+        Duerme hasta que una operación publica progreso; cada operación se
+        notifica como mucho una vez por notification_interval con el último
+        valor publicado. Las operaciones vigiladas se revisan también cada
+        idle_interval por si un aviso coincidió con el vaciado de su buffer.
+        """
+        watched: Dict[str, OperationProgress] = {}
+        timeout = self.idle_interval
+        last_cleanup = time.time()
+        
         while self.running:
             try:
-                with self.lock:
-                    for operation in self.operations.values():
-                        if operation.is_active and operation.should_notify():
-                            operation.update_metrics()
-                            
-                            # Enviar notificación de progreso
-                            send_operation_progress(
-                                operation.operation_id,
-                                operation.to_dict()
-                            )
-                            
-                            operation.mark_notified()
+                self._progress_event.wait(timeout)
+                self._progress_event.clear()
+                while self._progress_ready:
+                    operation = self._progress_ready.popleft()
+                    watched[operation.operation_id] = operation
                 
-                # Limpiar operaciones antiguas
-                self._cleanup_old_operations()
+                ready = []
+                timeout = self.idle_interval
+                for operation_id, operation in list(watched.items()):
+                    if operation.is_completed:
+                        del watched[operation_id]
+                    elif operation.progress.dirty:
+                        wait = operation.seconds_until_notify()
+                        if wait <= 0:
+                            ready.append(operation)
+                        else:
+                            timeout = min(timeout, wait)
                 
-                time.sleep(0.5)  # Verificar cada 500ms
+                if ready:
+                    self._notify_progress(ready)
+                
+                # Limpiar operaciones antiguas
+                if time.time() - last_cleanup >= self.idle_interval * 5:
+                    self._cleanup_old_operations()
+                    last_cleanup = time.time()
                 
             except Exception as e:
                 logger.error(f"Error en notification worker: {e}")
                 time.sleep(1)
     
+    def _notify_progress(self, operations: List[OperationProgress]):
+        """Aplicar el último progreso, enviarlo y persistir checkpoints vencidos"""
+        messages = []
+        jobs = []
+        now = time.time()
+        with self.lock:
+            for operation in operations:
+                operation.apply_progress()
+                operation.update_metrics()
+                operation.mark_notified()
+                messages.append((operation.operation_id, operation.to_dict()))
+                
+                # Checkpoint: se persiste como mucho cada checkpoint_interval segundos
+                operation_id = operation.operation_id
+                if self.persist and now - self._last_persist.get(operation_id, 0) >= self.checkpoint_interval:
+                    self._last_persist[operation_id] = now
+                    jobs.append(operation.to_job())
+        
+        for operation_id, data in messages:
+            send_operation_progress(operation_id, data)
+        for job in jobs:
+            self._persist(job)
+    
     def create_operation(self, operation_type: str, 
                         priority: OperationPriority = OperationPriority.NORMAL,
                         total_items: int = 0,
-                        notification_interval: float = 1.0) -> str:
+                        notification_interval: float = 1.0,
+                        params: Optional[Dict[str, Any]] = None) -> str:
         """
         Crear nueva operación
         
@@ -245,6 +473,8 @@ class OperationManager:
             priority: Prioridad de la operación
             total_items: Número total de items a procesar
             notification_interval: Intervalo de notificación en segundos
+            params: Argumentos (JSON) para reconstruir la operación tras un
+                reinicio con el handler de register_resumable
             
         Returns:
             operation_id: ID único de la operación
@@ -257,12 +487,16 @@ class OperationManager:
             status=OperationStatus.PENDING,
             priority=priority,
             total_items=total_items,
-            notification_interval=notification_interval
+            notification_interval=notification_interval,
+            params=params
         )
         
         with self.lock:
             self.operations[operation_id] = operation
             self.stats['total_operations'] += 1
+            job = operation.to_job()
+        
+        self._persist(job)
         
         # Notificar creación
         send_notification(
@@ -278,7 +512,10 @@ class OperationManager:
                        operation_func: Callable,
                        *args, **kwargs) -> bool:
         """
-        Iniciar operación
+        Encolar operación
+        
+        La operación queda en cola por prioridad y se inicia en cuanto hay
+        hueco dentro del límite global y del límite de su tipo.
         
         Args:
             operation_id: ID de la operación
@@ -286,78 +523,129 @@ class OperationManager:
             *args, **kwargs: Argumentos para la función
             
         Returns:
-            bool: True si se pudo iniciar, False si no
+            bool: True si se admitió en la cola, False si no existe o ya no está pendiente
         """
         with self.lock:
             operation = self.operations.get(operation_id)
-            if not operation or operation.status != OperationStatus.PENDING:
-                return False
-            
-            # Verificar límite de operaciones concurrentes
-            active_operations = len([op for op in self.operations.values() 
-                                   if op.status == OperationStatus.RUNNING])
-            
-            if active_operations >= self.max_concurrent_operations:
-                logger.warning(f"Límite de operaciones concurrentes alcanzado: {active_operations}")
+            if not operation or operation.status != OperationStatus.PENDING or operation_id in self._jobs:
                 return False
             
-            # Cambiar estado
-            operation.status = OperationStatus.RUNNING
-            operation.current_step = "Iniciando operación..."
+            self._jobs[operation_id] = (operation_func, args, kwargs)
+            heapq.heappush(self._queue, (operation.priority.rank, next(self._queue_seq), operation_id))
+            operation.current_step = "En cola..."
+        
+        logger.info(f"⚙️ Operación en cola: {operation_id} ({operation.operation_type}, "
+                    f"prioridad {operation.priority.value})")
+        self._dispatch()
+        return True
+    
+    def get_type_limit(self, operation_type: str) -> int:
+        """Operaciones simultáneas permitidas para un tipo"""
+        return self.type_limits.get(operation_type, self.default_type_limit)
+    
+    def _dispatch(self):
+        """Iniciar operaciones en cola por prioridad respetando límites global y por tipo"""
+        started = []
+        with self.lock:
+            if self._shutting_down:
+                return
             
-            # Crear wrapper para la función
-            def operation_wrapper():
-                return self._execute_operation(operation_id, operation_func, *args, **kwargs)
+            running = sum(self._running_by_type.values())
+            blocked = []
+            while self._queue and running < self.max_concurrent_operations:
+                entry = heapq.heappop(self._queue)
+                operation_id = entry[2]
+                operation = self.operations.get(operation_id)
+                if operation is None or operation.status != OperationStatus.PENDING or operation_id not in self._jobs:
+                    self._jobs.pop(operation_id, None)
+                    continue
+                
+                operation_type = operation.operation_type
+                if self._running_by_type.get(operation_type, 0) >= self.get_type_limit(operation_type):
+                    # Tipo saturado: cede el hueco a operaciones de otros tipos
+                    blocked.append(entry)
+                    continue
+                
+                func, args, kwargs = self._jobs.pop(operation_id)
+                self._running_by_type[operation_type] = self._running_by_type.get(operation_type, 0) + 1
+                running += 1
+                
+                operation.status = OperationStatus.RUNNING
+                operation.start_time = datetime.now()
+                operation.current_step = "Iniciando operación..."
+                started.append((operation, func, args, kwargs, operation.to_job()))
+                self._signal_progress(operation)
             
-            # Ejecutar en thread pool
-            future = self.executor.submit(operation_wrapper)
-            self.active_futures[operation_id] = future
+            for entry in blocked:
+                heapq.heappush(self._queue, entry)
+        
+        for operation, func, args, kwargs, job in started:
+            self._persist(job)
+            future = self.executor.submit(self._execute_operation, operation.operation_id, func, *args, **kwargs)
+            with self.lock:
+                self.active_futures[operation.operation_id] = future
+            future.add_done_callback(lambda f, op=operation: self._on_operation_done(op, f))
+            logger.info(f"⚙️ Operación iniciada: {operation.operation_id}")
+    
+    def _on_operation_done(self, operation: OperationProgress, future: Future):
+        """Liberar el hueco de la operación y despachar la siguiente de la cola"""
+        with self.lock:
+            operation_type = operation.operation_type
+            self._running_by_type[operation_type] = max(0, self._running_by_type.get(operation_type, 0) - 1)
+            self.active_futures.pop(operation.operation_id, None)
             
-            logger.info(f"⚙️ Operación iniciada: {operation_id}")
-            return True
+            # Future cancelado antes de ejecutarse
+            job = None
+            if future.cancelled() and operation.status == OperationStatus.RUNNING:
+                operation.status = OperationStatus.CANCELLED
+                operation.end_time = datetime.now()
+                operation.current_step = "Operación cancelada"
+                self.stats['cancelled_operations'] += 1
+                job = operation.to_job()
+        
+        if job:
+            self._persist(job)
+        self._dispatch()
+    
+    def _persist(self, job: Dict[str, Any]):
+        """Guardar estado del job en SQLite (un fallo no interrumpe la operación)"""
+        if not self.persist:
+            return
+        try:
+            from src.service_factory import get_database
+            get_database().save_operation_job(job)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo persistir la operación {job['operation_id']}: {e}")
     
     def _execute_operation(self, operation_id: str, operation_func: Callable, *args, **kwargs):
         """Ejecutar operación con manejo de errores"""
         operation = self.operations[operation_id]
         
+        progress = operation.progress
+        progress_ready = self._progress_ready
+        progress_event = self._progress_event
+        
         try:
-            # Crear callback de progreso
+            # Callback de progreso: sin locks, solo publica en el buffer de la operación
             def progress_callback(processed: int, total: int = None, current_item: str = "", 
-                                successful: int = None, failed: int = None):
-                with self.lock:
-                    if operation.cancellation_requested:
-                        raise InterruptedError("Operación cancelada por el usuario")
-                    
-                    if operation.pause_requested:
-                        operation.status = OperationStatus.PAUSED
-                        while operation.pause_requested and not operation.cancellation_requested:
-                            time.sleep(0.1)
-                        operation.status = OperationStatus.RUNNING
-                    
-                    # Actualizar progreso
-                    operation.processed_items = processed
-                    if total is not None:
-                        operation.total_items = total
-                    if current_item:
-                        operation.current_step = current_item
-                    if successful is not None:
-                        operation.successful_items = successful
-                    if failed is not None:
-                        operation.failed_items = failed
-                    
-                    # Calcular porcentaje
-                    if operation.total_items > 0:
-                        operation.progress_percentage = (processed / operation.total_items) * 100
+                                successful: int = None, failed: int = None, checkpoint: Any = None):
+                if operation.cancellation_requested:
+                    raise InterruptedError("Operación cancelada por el usuario")
+                
+                if operation.pause_requested:
+                    self._wait_while_paused(operation)
+                
+                if progress.publish((processed, total, current_item, successful, failed, checkpoint)):
+                    progress_ready.append(operation)
+                    progress_event.set()
             
             # Ejecutar función con callback
-            if 'progress_callback' in kwargs:
-                kwargs['progress_callback'] = progress_callback
-            else:
-                # Intentar agregar callback como parámetro posicional
-                result = operation_func(*args, progress_callback=progress_callback, **kwargs)
+            kwargs['progress_callback'] = progress_callback
+            result = operation_func(*args, **kwargs)
             
             # Operación completada exitosamente
             with self.lock:
+                operation.apply_progress()
                 operation.status = OperationStatus.COMPLETED
                 operation.end_time = datetime.now()
                 operation.progress_percentage = 100.0
@@ -366,6 +654,9 @@ class OperationManager:
                 
                 self.stats['completed_operations'] += 1
                 self._update_average_duration()
+                job = operation.to_job()
+            
+            self._persist(job)
             
             # Notificar completación
             send_operation_complete(operation_id, operation.to_dict())
@@ -379,14 +670,29 @@ class OperationManager:
             return result
             
         except InterruptedError as e:
+            if self._shutting_down:
+                # Apagado: queda pendiente en SQLite para reanudarse desde su checkpoint
+                with self.lock:
+                    operation.apply_progress()
+                    operation.current_step = "Interrumpida por apagado"
+                    job = operation.to_job()
+                job['status'] = OperationStatus.PENDING.value
+                self._persist(job)
+                logger.info(f"⏸️ Operación interrumpida por apagado: {operation_id}")
+                return None
+            
             # Operación cancelada
             with self.lock:
+                operation.apply_progress()
                 operation.status = OperationStatus.CANCELLED
                 operation.end_time = datetime.now()
                 operation.error_message = str(e)
                 operation.current_step = "Operación cancelada"
                 
                 self.stats['cancelled_operations'] += 1
+                job = operation.to_job()
+            
+            self._persist(job)
             
             send_notification(
                 f"Operación cancelada: {operation.operation_type}",
@@ -400,12 +706,16 @@ class OperationManager:
         except Exception as e:
             # Operación falló
             with self.lock:
+                operation.apply_progress()
                 operation.status = OperationStatus.FAILED
                 operation.end_time = datetime.now()
                 operation.error_message = str(e)
                 operation.current_step = "Operación falló"
                 
                 self.stats['failed_operations'] += 1
+                job = operation.to_job()
+            
+            self._persist(job)
             
             send_notification(
                 f"Operación falló: {operation.operation_type}",
@@ -415,11 +725,21 @@ class OperationManager:
             
             logger.error(f"❌ Operación falló: {operation_id} - {e}")
             return None
-            
-        finally:
-            # Limpiar future
-            if operation_id in self.active_futures:
-                del self.active_futures[operation_id]
+    
+    def _wait_while_paused(self, operation: OperationProgress):
+        """Bloquear el job mientras esté en pausa (sin retener el lock)"""
+        with self.lock:
+            operation.status = OperationStatus.PAUSED
+        self._signal_progress(operation)
+        
+        while operation.pause_requested and not operation.cancellation_requested:
+            time.sleep(0.1)
+        if operation.cancellation_requested:
+            raise InterruptedError("Operación cancelada por el usuario")
+        
+        with self.lock:
+            operation.status = OperationStatus.RUNNING
+        self._signal_progress(operation)
     
     def cancel_operation(self, operation_id: str) -> bool:
         """Cancelar operación"""
@@ -428,16 +748,33 @@ class OperationManager:
             if not operation or not operation.is_active:
                 return False
             
+            # En cola (o aún sin encolar): se retira sin llegar a ejecutarse
+            if operation.status == OperationStatus.PENDING:
+                self._jobs.pop(operation_id, None)
+                operation.status = OperationStatus.CANCELLED
+                operation.end_time = datetime.now()
+                operation.current_step = "Operación cancelada"
+                self.stats['cancelled_operations'] += 1
+                job = operation.to_job()
+            else:
+                job = None
+        
+        if job:
+            self._persist(job)
+            logger.info(f"❌ Operación en cola cancelada: {operation_id}")
+            return True
+        
+        with self.lock:
             operation.cancellation_requested = True
             operation.current_step = "Cancelación solicitada..."
-            
-            # Intentar cancelar Future
             future = self.active_futures.get(operation_id)
-            if future and not future.done():
-                future.cancel()
-            
-            logger.info(f"❌ Cancelación solicitada: {operation_id}")
-            return True
+        
+        # Intentar cancelar Future (fuera del lock: sus callbacks lo toman)
+        if future and not future.done():
+            future.cancel()
+        
+        logger.info(f"❌ Cancelación solicitada: {operation_id}")
+        return True
     
     def pause_operation(self, operation_id: str) -> bool:
         """Pausar operación"""
@@ -466,6 +803,7 @@ class OperationManager:
         with self.lock:
             operation = self.operations.get(operation_id)
             if operation:
+                operation.apply_progress()
                 operation.update_metrics()
                 return operation.to_dict()
         return None
@@ -475,6 +813,7 @@ class OperationManager:
         with self.lock:
             operations = []
             for operation in self.operations.values():
+                operation.apply_progress()
                 operation.update_metrics()
                 operations.append(operation.to_dict())
             return operations
@@ -485,16 +824,102 @@ class OperationManager:
             operations = []
             for operation in self.operations.values():
                 if operation.is_active:
+                    operation.apply_progress()
                     operation.update_metrics()
                     operations.append(operation.to_dict())
             return operations
     
+    def register_resumable(self, operation_type: str, job_factory: Callable[[Dict[str, Any], Any], Callable]):
+        """
+        Registrar cómo reconstruir un tipo de operación tras un reinicio
+        
+        Args:
+            operation_type: Tipo de operación
+            job_factory: (params, checkpoint) -> función de la operación
+                (recibe progress_callback) que continúa desde el checkpoint
+        """
+        self._resumable[operation_type] = job_factory
+    
+    def resume_interrupted_operations(self) -> List[str]:
+        """
+        Reencolar las operaciones que quedaron pendientes o en curso en SQLite
+        
+        Las de tipos sin handler registrado se marcan como fallidas.
+        
+        Returns:
+            IDs de las operaciones reanudadas
+        """
+        if not self.persist:
+            return []
+        try:
+            from src.service_factory import get_database
+            db = get_database()
+            jobs = db.get_unfinished_operation_jobs()
+            db.delete_finished_operation_jobs()
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron cargar operaciones pendientes: {e}")
+            return []
+        
+        resumed = []
+        for job in jobs:
+            operation_id = job['operation_id']
+            with self.lock:
+                if operation_id in self.operations:
+                    continue
+            
+            try:
+                priority = OperationPriority(job['priority'])
+            except ValueError:
+                priority = OperationPriority.NORMAL
+            
+            operation = OperationProgress(
+                operation_id=operation_id,
+                operation_type=job['operation_type'],
+                status=OperationStatus.PENDING,
+                priority=priority,
+                total_items=job['total_items'] or 0,
+                processed_items=job['processed_items'] or 0,
+                successful_items=job['successful_items'] or 0,
+                failed_items=job['failed_items'] or 0,
+                params=job['params'],
+                checkpoint=job['checkpoint'],
+                resumed=True,
+                created_at=job['created_at']
+            )
+            
+            job_factory = self._resumable.get(operation.operation_type)
+            if job_factory is None:
+                operation.status = OperationStatus.FAILED
+                operation.end_time = datetime.now()
+                operation.error_message = "Interrumpida por reinicio (tipo de operación no reanudable)"
+                self._persist(operation.to_job())
+                continue
+            
+            with self.lock:
+                self.operations[operation_id] = operation
+                self.stats['total_operations'] += 1
+            
+            if self.start_operation(operation_id, job_factory(job['params'] or {}, job['checkpoint'])):
+                resumed.append(operation_id)
+        
+        if resumed:
+            logger.info(f"▶️ {len(resumed)} operaciones reanudadas tras reinicio")
+            send_notification(
+                f"{len(resumed)} operaciones reanudadas tras reinicio",
+                "info",
+                {'operation_ids': resumed}
+            )
+        return resumed
+    
     def get_stats(self) -> Dict[str, Any]:
         """Obtener estadísticas del manager"""
         with self.lock:
             return {
                 **self.stats,
                 'active_operations': len([op for op in self.operations.values() if op.is_active]),
+                'queued_operations': len(self._jobs),
+                'running_by_type': {k: v for k, v in self._running_by_type.items() if v},
+                'type_limits': dict(self.type_limits),
                 'max_concurrent_operations': self.max_concurrent_operations,
                 'uptime_seconds': (datetime.now() - self.stats['start_time']).total_seconds()
             }
@@ -521,6 +946,7 @@ class OperationManager:
                 
                 for op_id in operations_to_remove:
                     del self.operations[op_id]
+                    self._last_persist.pop(op_id, None)
                     if op_id in self.active_futures:
                         del self.active_futures[op_id]
                 
@@ -537,14 +963,20 @@ class OperationManager:
         # Detener notificaciones
         self.stop_notification_system()
         
-        # Cancelar operaciones activas
+        # Las operaciones en cola siguen 'pending' en SQLite; las activas se
+        # interrumpen y quedan pendientes desde su último checkpoint
         with self.lock:
-            for operation_id, operation in self.operations.items():
-                if operation.is_active:
-                    self.cancel_operation(operation_id)
+            self._shutting_down = True
+            self._queue.clear()
+            self._jobs.clear()
+            active_ids = [op_id for op_id, op in self.operations.items()
+                          if op.status in (OperationStatus.RUNNING, OperationStatus.PAUSED)]
+        
+        for operation_id in active_ids:
+            self.cancel_operation(operation_id)
         
         # Apagar executor
-        self.executor.shutdown(wait=True, timeout=30)
+        self.executor.shutdown(wait=True)
         
         logger.info("⚙️ Operation Manager apagado")
 
@@ -556,7 +988,12 @@ def get_operation_manager() -> OperationManager:
     """Obtener instancia singleton del Operation Manager"""
     global _operation_manager
     if _operation_manager is None:
-        _operation_manager = OperationManager()
+        _operation_manager = OperationManager(
+            max_concurrent_operations=config.OPERATION_MAX_CONCURRENT,
+            type_limits=config.OPERATION_TYPE_LIMITS,
+            persist=config.OPERATION_PERSISTENCE,
+            checkpoint_interval=config.OPERATION_CHECKPOINT_INTERVAL
+        )
     return _operation_manager
 
 
@@ -564,10 +1001,11 @@ def get_operation_manager() -> OperationManager:
 def create_operation(operation_type: str, 
                     priority: OperationPriority = OperationPriority.NORMAL,
                     total_items: int = 0,
-                    notification_interval: float = 1.0) -> str:
+                    notification_interval: float = 1.0,
+                    params: Optional[Dict[str, Any]] = None) -> str:
     """Crear nueva operación"""
     return get_operation_manager().create_operation(
-        operation_type, priority, total_items, notification_interval
+        operation_type, priority, total_items, notification_interval, params
     )
 
 
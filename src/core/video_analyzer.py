@@ -4,9 +4,9 @@ Lógica central de análisis de videos extraída del main.py original
 """
 
 import logging
+import threading
 from pathlib import Path
 from typing import List, Dict, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from config import config
 # 🚀 REFACTORIZADO: Lazy loading mediante service factory
@@ -135,8 +135,11 @@ class VideoAnalyzer:
         if use_organized_folders:
             logger.info(f"  ✅ Carpetas organizadas (D:\\4K All)")
         
+        candidate_videos = []
+        external_time = 0.0
+        
         if use_external_sources:
-            # Usar fuentes externas (bases de datos y carpetas organizadas)
+            # Usar fuentes externas (bases de datos de 4K Apps)
             logger.info("📁 Consultando fuentes externas para videos nuevos...")
             
             # Mapear nombres de plataforma modernos a códigos legacy internos
@@ -162,26 +165,35 @@ class VideoAnalyzer:
                 if not internal_platform_code:
                     internal_platform_code = platform_filter.upper()
             
-            # Determinar source para external_sources basado en source_filter
-            if source_filter == 'db':
-                external_source = 'db'
-            elif source_filter == 'organized':
-                external_source = 'organized'
-            else:
-                external_source = 'all'
-            
             # Obtener videos de fuentes externas
             external_start = time.time()
-            external_videos = self.external_sources.get_all_videos_from_source(external_source, internal_platform_code)
-            external_time = time.time() - external_start
+            external_videos = self.external_sources.get_all_videos_from_source('db', internal_platform_code)
+            external_time += time.time() - external_start
             logger.debug(f"📊 Videos externos obtenidos en {external_time:.3f}s ({len(external_videos)} videos)")
-            
+            candidate_videos.extend(external_videos)
+        
+        if use_organized_folders:
+            # Lectura completa: los videos ya importados se filtran abajo por path y nombre
+            organized_handler = self.external_sources.organized_handler
+            if organized_handler and organized_handler.is_available():
+                organized_start = time.time()
+                organized_videos = organized_handler.extract_videos(platform_filter)
+                organized_time = time.time() - organized_start
+                external_time += organized_time
+                logger.debug(f"📊 Videos de carpetas organizadas en {organized_time:.3f}s ({len(organized_videos)} videos)")
+                candidate_videos.extend(organized_videos)
+        
+        if candidate_videos:
             # 🚀 OPTIMIZADO: Filtrado O(1) con verificación por path y nombre  
             # Pre-computar set de nombres para verificación O(1) de duplicados por nombre
             filter_start = time.time()
             existing_names = {Path(path).name for path in existing_videos}
             
-            for video_data in external_videos:
+            # 🚀 INCREMENTAL: existencia resuelta con el índice file_state (sin stat por archivo)
+            from src.database.file_index import IndexedFileChecker
+            file_checker = IndexedFileChecker(config.FILE_INDEX_ROOTS)
+            
+            for video_data in candidate_videos:
                 file_path = video_data.get('file_path')
                 if not file_path:
                     continue
@@ -193,7 +205,7 @@ class VideoAnalyzer:
                     # Verificación adicional O(1) por nombre de archivo (detecta duplicados con path diferente)
                     if video_path.name not in existing_names:
                         # Verificar que el archivo existe físicamente y es video
-                        if video_path.exists() and video_data.get('content_type', 'video') == 'video':
+                        if video_data.get('content_type', 'video') == 'video' and file_checker.exists(video_path):
                             new_videos.append(video_data)
                             logger.debug(f"✅ Nuevo video encontrado: {video_path.name}")
                     else:
@@ -209,13 +221,17 @@ class VideoAnalyzer:
         logger.info(f"🆕 Videos nuevos encontrados: {len(new_videos)}")
         return new_videos
     
-    def process_videos(self, videos: List[Dict], max_workers: int = None) -> Dict:
+    def process_videos(self, videos: List[Dict], max_workers: int = None, force: bool = False) -> Dict:
         """
-        Procesar lista de videos con procesamiento paralelo
+        Procesar lista de videos con un pipeline por etapas
+        
+        Probe, extracción de audio, música, frame, caras, thumbnail y escritura
+        en BD corren en pools independientes conectados por colas acotadas.
         
         Args:
             videos: Lista de diccionarios con información de videos
-            max_workers: Número máximo de workers paralelos
+            max_workers: Límite de workers por etapa (por defecto MAX_CONCURRENT_PROCESSING)
+            force: Si True, no se conserva la música detectada previamente
             
         Returns:
             Dict: Estadísticas del procesamiento
@@ -231,7 +247,7 @@ class VideoAnalyzer:
         total_videos = len(videos)
         max_workers = max_workers or config.MAX_CONCURRENT_PROCESSING
         
-        logger.info(f"🎬 Procesando {total_videos} videos (workers: {max_workers})...")
+        logger.info(f"🎬 Procesando {total_videos} videos (pipeline por etapas, máx. {max_workers} workers por etapa)...")
         
         results = {
             'processed': 0,
@@ -240,44 +256,54 @@ class VideoAnalyzer:
             'details': []
         }
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Enviar trabajos
-            future_to_video = {
-                executor.submit(self.process_video, video): video 
-                for video in videos
-            }
+        # Pipeline por etapas: cada etapa con su propio pool y colas acotadas
+        from src.core.analysis_pipeline import (
+            StagedPipeline, build_analysis_stages, build_result, new_analysis_context
+        )
+        
+        # report() corre también en el hilo del batch writer (callback del future)
+        report_lock = threading.Lock()
+        
+        def on_result(ctx):
+            # Los resultados escritos por lotes se reportan al confirmarse la escritura
+            future = ctx.get('write_future')
+            if future is not None:
+                future.add_done_callback(lambda _: report(ctx))
+            else:
+                report(ctx)
+        
+        def report(ctx):
+            result = build_result(ctx)
             
-            # Procesar resultados conforme van completándose
-            for future in as_completed(future_to_video):
-                video = future_to_video[future]
-                try:
-                    result = future.result()
-                    
-                    current_num = results['processed'] + results['errors'] + 1
-                    
-                    if result['success']:
-                        results['processed'] += 1
-                        # Solo mostrar detalles de procesamiento exitoso si hay pocos videos
-                        if total_videos <= 3:
-                            music = result.get('detected_music') or 'N/A'
-                            chars = len(result.get('detected_characters', []))
-                            logger.info(f"✅ [{current_num}/{total_videos}] {Path(video['file_path']).name} - Música: {music}, Personajes: {chars}")
-                        else:
-                            logger.info(f"✅ [{current_num}/{total_videos}] {Path(video['file_path']).name}")
+            with report_lock:
+                current_num = results['processed'] + results['errors'] + 1
+                
+                if result['success']:
+                    results['processed'] += 1
+                    # Solo mostrar detalles de procesamiento exitoso si hay pocos videos
+                    if total_videos <= 3:
+                        music = result.get('detected_music') or 'N/A'
+                        chars = len(result.get('detected_characters', []))
+                        logger.info(f"✅ [{current_num}/{total_videos}] {Path(ctx['file_path']).name} - Música: {music}, Personajes: {chars}")
                     else:
-                        results['errors'] += 1
-                        logger.error(f"❌ [{current_num}/{total_videos}] {Path(video['file_path']).name}: {result.get('error', 'Error desconocido')}")
-                    
-                    results['details'].append(result)
-                    
-                except Exception as e:
+                        logger.info(f"✅ [{current_num}/{total_videos}] {Path(ctx['file_path']).name}")
+                else:
                     results['errors'] += 1
-                    logger.error(f"❌ Error procesando video: {e}")
-                    results['details'].append({
-                        'success': False,
-                        'error': str(e),
-                        'video_path': video.get('file_path', 'Unknown')
-                    })
+                    logger.error(f"❌ [{current_num}/{total_videos}] {Path(ctx['file_path']).name}: {result.get('error', 'Error desconocido')}")
+                
+                results['details'].append(result)
+        
+        pipeline = StagedPipeline(build_analysis_stages(max_workers))
+        pipeline.run((new_analysis_context(video, force=force) for video in videos), on_result=on_result)
+        
+        # Garantizar que todas las escrituras pendientes están confirmadas
+        from src.database.batch_writer import get_batch_writer
+        batch_writer = get_batch_writer()
+        batch_writer.flush()
+        results['write_stats'] = batch_writer.get_stats()
+        results['pipeline_stats'] = pipeline.get_stats()
+        if total_videos > 1:
+            pipeline.log_stats()
         
         # Solo mostrar estadísticas si hay errores o múltiples videos
         if results['errors'] > 0 or total_videos > 1:
@@ -300,114 +326,9 @@ class VideoAnalyzer:
             Dict: Resultado del procesamiento
         """
         try:
-            file_path = video_data['file_path']
-            file_name = video_data.get('file_name', Path(file_path).name)
-            
-            # Removido log individual - se muestra en process_videos
-            
-            # Verificar que el archivo existe
-            if not Path(file_path).exists():
-                return {
-                    'success': False,
-                    'error': 'Archivo no encontrado',
-                    'video_path': file_path
-                }
-            
-            # Verificar que es un video válido
-            if not self.video_processor.is_valid_video(Path(file_path)):
-                return {
-                    'success': False,
-                    'error': 'Archivo de video inválido',
-                    'video_path': file_path
-                }
-            
-            # Extraer metadatos básicos
-            video_metadata = self.video_processor.extract_metadata(file_path)
-            
-            # Análisis de música (si hay audio)
-            music_result = {'song_name': None, 'artist_name': None, 'confidence': 0.0, 'source': None}
-            
-            if video_metadata.get('has_audio', False):
-                try:
-                    # Extraer audio temporal
-                    audio_path = self.video_processor.extract_audio(Path(file_path), duration=30)
-                    if audio_path:
-                        # Usar reconocimiento de música con filename para análisis completo
-                        filename = Path(file_path).name
-                        music_result = self.music_recognizer.recognize_music(audio_path, filename)
-                        # Limpiar archivo temporal
-                        if audio_path.exists():
-                            audio_path.unlink()
-                except Exception as e:
-                    logger.warning(f"  Error en reconocimiento musical: {e}")
-            
-            # Análisis de personajes y reconocimiento facial inteligente
-            face_result = {'characters': [], 'faces': []}
-            
-            try:
-                frame_data = self.video_processor.get_video_frame(Path(file_path), timestamp=2.0)
-                if frame_data:
-                    # Preparar datos del video para análisis inteligente
-                    video_data_for_recognition = {
-                        'creator_name': video_data.get('creator_name', ''),
-                        'platform': video_data.get('platform', 'unknown'),
-                        'title': video_data.get('title', '')
-                    }
-                    
-                    # Usar reconocimiento inteligente que combina todas las estrategias
-                    face_result = self.face_recognizer.recognize_faces_intelligent(frame_data, video_data_for_recognition)
-                        
-            except Exception as e:
-                logger.warning(f"  Error en reconocimiento de personajes: {e}")
-            
-            # Generar thumbnail
-            thumbnail_result = self.thumbnail_generator.generate_thumbnail(Path(file_path))
-            
-            # Preparar datos para actualizar el video existente
-            update_data = {
-                # Música detectada - corregir nombres de campos
-                'detected_music': music_result.get('detected_music'),
-                'detected_music_artist': music_result.get('detected_music_artist'),
-                'detected_music_confidence': music_result.get('detected_music_confidence'),
-                'music_source': music_result.get('music_source'),
-                
-                # Personajes detectados - corregir nombre de campo
-                'detected_characters': face_result.get('detected_characters', []),
-                
-                # Thumbnail
-                'thumbnail_path': str(thumbnail_result) if thumbnail_result else None,
-                
-                # Estado
-                'processing_status': 'completado'
-            }
-            
-            # Actualizar video existente en base de datos
-            video_id = video_data.get('id')
-            if video_id:
-                
-                success = self.db.update_video(video_id, update_data)
-                
-                if success:
-                    return {
-                        'success': True,
-                        'video_id': video_id,
-                        'detected_music': music_result.get('detected_music'),
-                        'detected_characters': face_result.get('detected_characters', []),
-                        'video_path': file_path
-                    }
-                else:
-                    logger.error(f"❌ Error actualizando video {video_id} en BD")
-                    return {
-                        'success': False,
-                        'error': 'Error actualizando video en base de datos',
-                        'video_path': file_path
-                    }
-            else:
-                return {
-                    'success': False,
-                    'error': 'Video ID no encontrado para actualización',
-                    'video_path': file_path
-                }
+            # Mismas etapas que el pipeline, ejecutadas en el hilo actual
+            from src.core.analysis_pipeline import build_result, run_analysis_stages_inline
+            return build_result(run_analysis_stages_inline(video_data))
                 
         except Exception as e:
             logger.error(f"Error procesando video {video_data.get('file_path', 'Unknown')}: {e}")
@@ -526,7 +447,7 @@ class VideoAnalyzer:
             return {'success': True, 'processed': 0, 'errors': 0}
         
         # Paso 4: Procesar videos con IA
-        result = self.process_videos(videos_to_analyze)
+        result = self.process_videos(videos_to_analyze, force=force)
         
         # Log compacto del resultado final
         if result['success']:
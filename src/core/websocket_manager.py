@@ -7,14 +7,16 @@ Sistema de comunicación en tiempo real para operaciones de mantenimiento
 import json
 import time
 import uuid
+import zlib
 import asyncio
+import inspect
 import logging
-from typing import Dict, List, Optional, Any, Set
+from typing import Dict, List, Optional, Any, Set, Tuple, Union
 from datetime import datetime
 from dataclasses import dataclass, asdict
 from enum import Enum
 import threading
-from queue import Queue
+import config
 # Imports opcionales para WebSocket
 try:
     import websockets
@@ -26,6 +28,14 @@ except ImportError:
     websockets = None
     ConnectionClosed = Exception
 
+# websockets >= 14 acepta bytes UTF-8 como frame de texto (send(..., text=True)):
+# el JSON se codifica una sola vez por mensaje y no una vez por cliente
+try:
+    from websockets.asyncio.connection import Connection as _Connection
+    SEND_TEXT_BYTES = 'text' in inspect.signature(_Connection.send).parameters
+except Exception:
+    SEND_TEXT_BYTES = False
+
 # Configurar logging
 logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -66,14 +76,135 @@ class WebSocketMessage:
         })
 
 
+# Mensajes de operación: solo a los clientes suscritos a su operation_id
+OPERATION_MESSAGE_TYPES = {
+    MessageType.OPERATION_PROGRESS, MessageType.OPERATION_COMPLETE,
+    MessageType.OPERATION_FAILED, MessageType.OPERATION_CANCELLED
+}
+TERMINAL_MESSAGE_TYPES = {
+    MessageType.OPERATION_COMPLETE, MessageType.OPERATION_FAILED, MessageType.OPERATION_CANCELLED
+}
+# Notificaciones masivas que los clientes con binary_frames reciben como frame binario (JSON + zlib)
+BULK_NOTIFICATION_TYPES = {'video_update', 'cache_invalidation'}
+
+
+class EncodedMessage:
+    """Mensaje serializado una sola vez y compartido por todos sus destinatarios"""
+
+    __slots__ = ('message', 'key', 'bulk', '_text', '_binary')
+
+    def __init__(self, message: WebSocketMessage):
+        self.message = message
+        text = message.to_json()
+        self._text = text.encode('utf-8') if SEND_TEXT_BYTES else text
+        self._binary = None
+
+        # Clave de fusión: un frame pendiente con la misma clave se reemplaza
+        if message.type == MessageType.OPERATION_PROGRESS:
+            self.key = ('progress', message.data.get('operation_id'))
+        elif message.type == MessageType.HEARTBEAT:
+            self.key = ('heartbeat',)
+        else:
+            self.key = None
+
+        payload = message.data.get('data') if message.type == MessageType.NOTIFICATION else None
+        self.bulk = isinstance(payload, dict) and payload.get('type') in BULK_NOTIFICATION_TYPES
+
+    def frame(self, binary_frames: bool) -> Tuple[Union[str, bytes], bool]:
+        """(payload, es_texto) para un cliente; la compresión se calcula una vez"""
+        if binary_frames and self.bulk:
+            if self._binary is None:
+                text = self._text if isinstance(self._text, bytes) else self._text.encode('utf-8')
+                self._binary = zlib.compress(text)
+            return self._binary, False
+        return self._text, True
+
+
+class ClientChannel:
+    """
+    Cola de envío acotada de un cliente, vaciada por su propia tarea
+
+    Un cliente lento solo retrasa su cola: los frames de progreso de una misma
+    operación (y los heartbeats) se fusionan conservando la posición del
+    primero y el contenido del último; con la cola llena se descarta el frame
+    fusionable más antiguo o, si no hay ninguno, el más antiguo.
+    """
+
+    def __init__(self, client_id: str, websocket, max_size: int, stats: Dict[str, Any]):
+        self.client_id = client_id
+        self.websocket = websocket
+        self.max_size = max(1, max_size)
+        self.binary_frames = False
+        self.task: Optional[asyncio.Task] = None
+        self._stats = stats
+        self._pending: Dict[Any, EncodedMessage] = {}
+        self._sequence = 0
+        self._ready = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def push(self, encoded: EncodedMessage):
+        """Encolar sin esperar (solo desde el loop del servidor)"""
+        key = encoded.key
+        if key is not None and key in self._pending:
+            self._pending[key] = encoded
+            self._stats['messages_coalesced'] += 1
+            return
+
+        if len(self._pending) >= self.max_size:
+            victim = next((k for k in self._pending if isinstance(k, tuple)), None)
+            if victim is None:
+                victim = next(iter(self._pending))
+            del self._pending[victim]
+            self._stats['messages_dropped'] += 1
+
+        if key is None:
+            self._sequence += 1
+            key = self._sequence
+        self._pending[key] = encoded
+        self._ready.set()
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    def close(self):
+        if self.task:
+            self.task.cancel()
+        self._pending.clear()
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            while self._pending:
+                encoded = self._pending.pop(next(iter(self._pending)))
+                payload, is_text = encoded.frame(self.binary_frames)
+                try:
+                    if SEND_TEXT_BYTES:
+                        await self.websocket.send(payload, text=is_text)
+                    else:
+                        await self.websocket.send(payload)
+                    self._stats['messages_sent'] += 1
+                except ConnectionClosed:
+                    # handle_client detecta el cierre y limpia el cliente
+                    self._pending.clear()
+                    return
+                except Exception as e:
+                    self._stats['messages_failed'] += 1
+                    logger.warning(f"Error enviando mensaje a cliente {self.client_id}: {e}")
+            self._ready.clear()
+
+
 class WebSocketManager:
     """
     🔗 Gestor de WebSockets para comunicación en tiempo real
     
     Características:
     - Conexiones múltiples simultáneas
-    - Broadcast de mensajes
-    - Filtrado por suscripciones
+    - Broadcast asyncio: índice operación → suscriptores y una cola acotada
+      por cliente (ClientChannel), de modo que un cliente lento no retrasa al resto
+    - JSON codificado una vez por mensaje; permessage-deflate opcional y
+      frames binarios comprimidos para notificaciones masivas (video_update)
     - Heartbeat automático
     - Reconexión automática
     """
@@ -86,10 +217,13 @@ class WebSocketManager:
         self.port = port or int(os.getenv('WEBSOCKET_PORT', '8766'))
         self.clients: Dict[str, Any] = {}
         self.subscriptions: Dict[str, Set[str]] = {}  # client_id -> set of operation_ids
-        self.message_queue: Queue = Queue()
+        self.operation_subscribers: Dict[str, Set[str]] = {}  # operation_id -> set of client_ids
+        self.channels: Dict[str, ClientChannel] = {}
+        self.send_queue_size = config.WEBSOCKET_SEND_QUEUE_SIZE
+        self.compression = config.WEBSOCKET_COMPRESSION
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
         self.running = False
         self.server = None
-        self.broadcast_task = None
         self.heartbeat_task = None
         
         # Verificar si WebSockets está disponible
@@ -102,6 +236,8 @@ class WebSocketManager:
             'active_connections': 0,
             'messages_sent': 0,
             'messages_failed': 0,
+            'messages_dropped': 0,
+            'messages_coalesced': 0,
             'start_time': None,
             'websockets_available': WEBSOCKETS_AVAILABLE
         }
@@ -117,19 +253,20 @@ class WebSocketManager:
             async def handler(websocket, path=None):
                 await self.handle_client(websocket, path or "/")
 
+            self.loop = asyncio.get_running_loop()
             self.server = await websockets.serve(
                 handler,
                 self.host,
                 self.port,
                 ping_interval=20,
-                ping_timeout=10
+                ping_timeout=10,
+                compression='deflate' if self.compression else None
             )
             
             self.running = True
             self.stats['start_time'] = datetime.now()
             
             # Iniciar tareas de background
-            self.broadcast_task = asyncio.create_task(self.broadcast_messages())
             self.heartbeat_task = asyncio.create_task(self.send_heartbeat())
             
             logger.info(f"🔗 WebSocket server iniciado en ws://{self.host}:{self.port}")
@@ -144,10 +281,10 @@ class WebSocketManager:
             self.running = False
             
             # Cancelar tareas
-            if self.broadcast_task:
-                self.broadcast_task.cancel()
             if self.heartbeat_task:
                 self.heartbeat_task.cancel()
+            for channel in self.channels.values():
+                channel.close()
             
             # Cerrar conexiones
             if self.clients:
@@ -198,6 +335,11 @@ class WebSocketManager:
                 logger.error(f"🔗 Error enviando bienvenida a {client_id}: {e}")
                 return
 
+            # Cola de envío propia: el broadcast nunca espera a este cliente
+            channel = ClientChannel(client_id, websocket, self.send_queue_size, self.stats)
+            self.channels[client_id] = channel
+            channel.start()
+
             # Escuchar mensajes del cliente
             async for message in websocket:
                 logger.debug(f"🔗 Mensaje recibido de {client_id}: {message}")
@@ -224,6 +366,7 @@ class WebSocketManager:
                 operation_id = data.get('operation_id')
                 if operation_id:
                     self.subscriptions[client_id].add(operation_id)
+                    self.operation_subscribers.setdefault(operation_id, set()).add(client_id)
                     logger.debug(f"Cliente {client_id} suscrito a operación {operation_id}")
             
             elif action == 'unsubscribe':
@@ -231,8 +374,16 @@ class WebSocketManager:
                 operation_id = data.get('operation_id')
                 if operation_id:
                     self.subscriptions[client_id].discard(operation_id)
+                    self._unindex_subscription(operation_id, client_id)
                     logger.debug(f"Cliente {client_id} desuscrito de operación {operation_id}")
             
+            elif action == 'set_options':
+                # Frames binarios (JSON + zlib) para notificaciones masivas
+                channel = self.channels.get(client_id)
+                if channel is not None and 'binary_frames' in data:
+                    channel.binary_frames = bool(data['binary_frames'])
+                    logger.debug(f"Cliente {client_id} binary_frames={channel.binary_frames}")
+            
             elif action == 'get_status':
                 # Enviar estado del servidor
                 await self._send_server_status(client_id)
@@ -243,7 +394,7 @@ class WebSocketManager:
                     type=MessageType.HEARTBEAT,
                     data={'type': 'pong', 'timestamp': datetime.now().isoformat()}
                 )
-                await self.clients[client_id].send(pong_message.to_json())
+                self._send_to_client(client_id, pong_message)
             
         except json.JSONDecodeError:
             logger.warning(f"Mensaje JSON inválido de cliente {client_id}")
@@ -253,10 +404,14 @@ class WebSocketManager:
     async def _cleanup_client(self, client_id: str):
         """Limpiar datos del cliente"""
         try:
+            channel = self.channels.pop(client_id, None)
+            if channel is not None:
+                channel.close()
             if client_id in self.clients:
                 del self.clients[client_id]
             if client_id in self.subscriptions:
-                del self.subscriptions[client_id]
+                for operation_id in self.subscriptions.pop(client_id):
+                    self._unindex_subscription(operation_id, client_id)
             
             self.stats['active_connections'] -= 1
             
@@ -283,7 +438,7 @@ class WebSocketManager:
                 }
             )
             
-            await self.clients[client_id].send(status_message.to_json())
+            self._send_to_client(client_id, status_message)
             
         except Exception as e:
             logger.error(f"Error enviando estado a cliente {client_id}: {e}")
@@ -300,7 +455,7 @@ class WebSocketManager:
                 'progress': progress_data
             }
         )
-        self.message_queue.put(message)
+        self.broadcast(message)
     
     def send_operation_complete(self, operation_id: str, result_data: Dict[str, Any]):
         """Enviar completado de operación (thread-safe)"""
@@ -311,7 +466,7 @@ class WebSocketManager:
                 'result': result_data
             }
         )
-        self.message_queue.put(message)
+        self.broadcast(message)
     
     def send_operation_failed(self, operation_id: str, error_data: Dict[str, Any]):
         """Enviar error de operación (thread-safe)"""
@@ -322,7 +477,7 @@ class WebSocketManager:
                 'error': error_data
             }
         )
-        self.message_queue.put(message)
+        self.broadcast(message)
     
     def send_notification(self, message: str, level: str = "info", data: Dict[str, Any] = None):
         """Enviar notificación general (thread-safe)"""
@@ -336,90 +491,58 @@ class WebSocketManager:
                 'data': data or {}
             }
         )
-        self.message_queue.put(notification)
+        self.broadcast(notification)
     
-    async def broadcast_messages(self):
-        """Procesar cola de mensajes y enviar broadcasts"""
-        while self.running:
-            try:
-                # Procesar mensajes en cola
-                messages_to_process = []
-                
-                # Obtener todos los mensajes disponibles
-                while not self.message_queue.empty():
-                    try:
-                        message = self.message_queue.get_nowait()
-                        messages_to_process.append(message)
-                    except:
-                        break
-                
-                # Enviar mensajes
-                for message in messages_to_process:
-                    await self._broadcast_message(message)
-                
-                # Pequeña pausa para evitar busy-waiting
-                await asyncio.sleep(0.1)
-                
-            except Exception as e:
-                logger.error(f"Error en broadcast de mensajes: {e}")
-                await asyncio.sleep(1)
+    def broadcast(self, message: WebSocketMessage):
+        """Entregar un mensaje al loop del servidor (thread-safe, no bloqueante)"""
+        loop = self.loop
+        if loop is None or not self.running:
+            return
+        try:
+            loop.call_soon_threadsafe(self._dispatch, message)
+        except RuntimeError:
+            # Loop cerrado: el servidor ya no tiene clientes
+            pass
     
-    async def _broadcast_message(self, message: WebSocketMessage):
-        """Enviar mensaje a clientes relevantes"""
+    def _dispatch(self, message: WebSocketMessage):
+        """Repartir un mensaje entre las colas de sus destinatarios (en el loop)"""
         try:
-            message_json = message.to_json()
-            
-            # Determinar destinatarios
-            target_clients = []
-            
-            if message.type in [MessageType.OPERATION_PROGRESS, MessageType.OPERATION_COMPLETE, 
-                               MessageType.OPERATION_FAILED, MessageType.OPERATION_CANCELLED]:
-                # Mensajes de operación - solo a clientes suscritos
+            if message.type in OPERATION_MESSAGE_TYPES:
+                # Mensajes de operación - solo a clientes suscritos (índice, sin recorrer clientes)
                 operation_id = message.data.get('operation_id')
-                if operation_id:
-                    for client_id, subscriptions in self.subscriptions.items():
-                        if operation_id in subscriptions:
-                            target_clients.append(client_id)
+                if message.type in TERMINAL_MESSAGE_TYPES:
+                    target_clients = self.operation_subscribers.pop(operation_id, set())
+                    for client_id in target_clients:
+                        self.subscriptions.get(client_id, set()).discard(operation_id)
+                else:
+                    target_clients = self.operation_subscribers.get(operation_id, ())
             else:
                 # Mensajes generales - a todos los clientes
-                target_clients = list(self.clients.keys())
+                target_clients = self.channels.keys()
             
-            # Enviar a clientes objetivo
-            send_tasks = []
+            encoded = None
             for client_id in target_clients:
-                if client_id in self.clients:
-                    send_tasks.append(self._send_to_client(client_id, message_json))
-            
-            # Ejecutar envíos en paralelo
-            if send_tasks:
-                results = await asyncio.gather(*send_tasks, return_exceptions=True)
-                
-                # Contar estadísticas
-                for result in results:
-                    if isinstance(result, Exception):
-                        self.stats['messages_failed'] += 1
-                    else:
-                        self.stats['messages_sent'] += 1
+                channel = self.channels.get(client_id)
+                if channel is not None:
+                    if encoded is None:
+                        encoded = EncodedMessage(message)
+                    channel.push(encoded)
             
         except Exception as e:
             logger.error(f"Error enviando mensaje broadcast: {e}")
     
-    async def _send_to_client(self, client_id: str, message_json: str):
-        """Enviar mensaje a cliente específico"""
-        try:
-            websocket = self.clients.get(client_id)
-            if websocket:
-                await websocket.send(message_json)
-                return True
-            return False
-            
-        except ConnectionClosed:
-            # Cliente desconectado - limpiar
-            await self._cleanup_client(client_id)
-            return False
-        except Exception as e:
-            logger.warning(f"Error enviando mensaje a cliente {client_id}: {e}")
-            return False
+    def _send_to_client(self, client_id: str, message: WebSocketMessage):
+        """Encolar mensaje para un cliente específico"""
+        channel = self.channels.get(client_id)
+        if channel is not None:
+            channel.push(EncodedMessage(message))
+    
+    def _unindex_subscription(self, operation_id: str, client_id: str):
+        subscribers = self.operation_subscribers.get(operation_id)
+        if subscribers is not None:
+            subscribers.discard(client_id)
+            if not subscribers:
+                del self.operation_subscribers[operation_id]
     
     async def send_heartbeat(self):
         """Enviar heartbeat periódico"""
@@ -437,7 +560,7 @@ class WebSocketManager:
                     }
                 )
                 
-                self.message_queue.put(heartbeat_message)
+                self.broadcast(heartbeat_message)
                 
                 # Esperar 30 segundos antes del próximo heartbeat
                 await asyncio.sleep(30)
@@ -456,11 +579,18 @@ class WebSocketManager:
         if self.stats.get('start_time'):
             uptime_seconds = (datetime.now() - self.stats['start_time']).total_seconds()
 
+        queue_depths = [len(channel) for channel in self.channels.values()]
+
         return {
             **stats_copy,
             'active_connections': len(self.clients),
             'total_subscriptions': sum(len(subs) for subs in self.subscriptions.values()),
-            'uptime_seconds': uptime_seconds
+            'uptime_seconds': uptime_seconds,
+            'send_queue_depth': sum(queue_depths),
+            'max_client_queue_depth': max(queue_depths, default=0),
+            'send_queue_size': self.send_queue_size,
+            'binary_frame_clients': sum(1 for channel in self.channels.values() if channel.binary_frames),
+            'compression': 'permessage-deflate' if self.compression else None
         }
 
 
@@ -515,6 +645,15 @@ class WebSocketClient:
             }
             await self.websocket.send(json.dumps(message))
     
+    async def set_binary_frames(self, enabled: bool = True):
+        """Recibir notificaciones masivas como frames binarios (JSON + zlib)"""
+        if self.connected:
+            message = {
+                'action': 'set_options',
+                'binary_frames': enabled
+            }
+            await self.websocket.send(json.dumps(message))
+    
     async def get_server_status(self):
         """Solicitar estado del servidor"""
         if self.connected:
@@ -527,6 +666,8 @@ class WebSocketClient:
         """Manejar mensajes entrantes"""
         try:
             async for message in self.websocket:
+                if isinstance(message, bytes):
+                    message = zlib.decompress(message)
                 data = json.loads(message)
                 message_type = data.get('type')
                 
@@ -11,6 +11,14 @@ from .batch import BatchOperations
 from .creators import CreatorOperations
 from .subscriptions import SubscriptionOperations
 from .statistics import StatisticsOperations
+from .characters import MediaCharacterOperations
+from .sync_state import SyncStateOperations
+from .audio_fingerprints import AudioFingerprintOperations
+from .operation_jobs import OperationJobOperations
+from .bulk_population import BulkPopulationOperations
+from .connection_pool import ConnectionPool, get_pool, close_all_pools
+from .batch_writer import BatchWriter, get_batch_writer
+from .file_index import FileStateIndex, IndexedFileChecker, get_file_index
 
 # Main interface - backwards compatible
 __all__ = [
@@ -22,7 +30,20 @@ __all__ = [
     'BatchOperations',
     'CreatorOperations',
     'SubscriptionOperations',
-    'StatisticsOperations'
+    'StatisticsOperations',
+    'MediaCharacterOperations',
+    'SyncStateOperations',
+    'AudioFingerprintOperations',
+    'OperationJobOperations',
+    'BulkPopulationOperations',
+    'ConnectionPool',
+    'get_pool',
+    'close_all_pools',
+    'BatchWriter',
+    'get_batch_writer',
+    'FileStateIndex',
+    'IndexedFileChecker',
+    'get_file_index'
 ]
 
 # Legacy compatibility - maintain existing import structure
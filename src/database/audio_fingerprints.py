@@ -0,0 +1,158 @@
+"""
+Tag-Flow V2 - Audio Fingerprint Index
+Spectral-peak hashes of already identified songs, so clips that reuse the same
+sound are recognized locally instead of calling remote APIs again
+"""
+
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+from .base import DatabaseBase
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keep well below SQLite's bound-parameter limit
+LOOKUP_CHUNK_SIZE = 900
+
+
+def create_audio_fingerprint_tables(conn):
+    """Create audio_tracks / audio_fingerprints tables (idempotent)"""
+    # source: recognizer that confirmed the song (same values as media.music_source)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS audio_tracks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            artist TEXT NOT NULL DEFAULT '',
+            source TEXT,
+            confidence REAL DEFAULT 0.0,
+            clip_count INTEGER DEFAULT 0,
+            match_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(title, artist)
+        )
+    ''')
+
+    # Clustered on hash: a lookup is one index range scan per query hash
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS audio_fingerprints (
+            hash INTEGER NOT NULL,
+            track_id INTEGER NOT NULL REFERENCES audio_tracks(id) ON DELETE CASCADE,
+            clip_offset INTEGER NOT NULL,
+            PRIMARY KEY (hash, track_id, clip_offset)
+        ) WITHOUT ROWID
+    ''')
+
+
+class AudioFingerprintOperations(DatabaseBase):
+    """Store and look up audio fingerprints of identified songs"""
+
+    def find_audio_match(self, hashes: Sequence[Tuple[int, int]], min_matches: int = 15) -> Optional[Dict]:
+        """
+        Find the indexed song matching a clip fingerprint
+
+        Votes are counted per (track, time offset difference): a real match
+        lines many hashes up at the same relative offset.
+
+        Returns:
+            Track dict plus 'aligned_matches', or None if no track reaches min_matches
+        """
+        self._ensure_initialized()
+        if not hashes:
+            return None
+        start_time = time.time()
+
+        offsets_by_hash: Dict[int, List[int]] = {}
+        for value, offset in hashes:
+            offsets_by_hash.setdefault(value, []).append(offset)
+        unique_hashes = list(offsets_by_hash)
+
+        votes: Counter = Counter()
+        with self.get_connection() as conn:
+            for i in range(0, len(unique_hashes), LOOKUP_CHUNK_SIZE):
+                chunk = unique_hashes[i:i + LOOKUP_CHUNK_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                rows = conn.execute(f'''
+                    SELECT hash, track_id, clip_offset FROM audio_fingerprints
+                    WHERE hash IN ({placeholders})
+                ''', chunk).fetchall()
+                for value, track_id, db_offset in rows:
+                    for query_offset in offsets_by_hash[value]:
+                        votes[(track_id, db_offset - query_offset)] += 1
+
+            match = None
+            if votes:
+                # A clip cut between two frame boundaries splits its votes over
+                # two consecutive offsets: score each offset with its neighbour
+                (track_id, _), aligned = max(
+                    (((track_id, delta), count + votes.get((track_id, delta + 1), 0))
+                     for (track_id, delta), count in votes.items()),
+                    key=lambda item: item[1]
+                )
+                if aligned >= min_matches:
+                    row = conn.execute('''
+                        SELECT id, title, artist, source, confidence FROM audio_tracks WHERE id = ?
+                    ''', (track_id,)).fetchone()
+                    if row:
+                        conn.execute('UPDATE audio_tracks SET match_count = match_count + 1 WHERE id = ?',
+                                     (track_id,))
+                        conn.commit()
+                        match = dict(row)
+                        match['aligned_matches'] = aligned
+
+        self._track_query('find_audio_match', time.time() - start_time)
+        return match
+
+    def add_audio_fingerprints(self, title: str, artist: Optional[str], source: Optional[str],
+                               confidence: float, hashes: Sequence[Tuple[int, int]]) -> Optional[int]:
+        """
+        Index the fingerprint of a clip identified by a remote recognizer
+
+        Clips of a song that is already indexed are added to the same track.
+
+        Returns:
+            Track id (None if there was nothing to index)
+        """
+        self._ensure_initialized()
+        if not title or not hashes:
+            return None
+        start_time = time.time()
+        artist = artist or ''
+
+        with self.get_connection() as conn:
+            conn.execute('''
+                INSERT INTO audio_tracks (title, artist, source, confidence)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(title, artist) DO UPDATE SET
+                    confidence = MAX(confidence, excluded.confidence)
+            ''', (title, artist, source, confidence))
+            track_id = conn.execute('SELECT id FROM audio_tracks WHERE title = ? AND artist = ?',
+                                    (title, artist)).fetchone()[0]
+
+            conn.executemany('''
+                INSERT OR IGNORE INTO audio_fingerprints (hash, track_id, clip_offset)
+                VALUES (?, ?, ?)
+            ''', [(value, track_id, offset) for value, offset in hashes])
+            conn.execute('UPDATE audio_tracks SET clip_count = clip_count + 1 WHERE id = ?', (track_id,))
+            conn.commit()
+
+        self._track_query('add_audio_fingerprints', time.time() - start_time)
+        return track_id
+
+    def get_audio_index_stats(self) -> Dict:
+        """Indexed songs, fingerprints and local matches served"""
+        self._ensure_initialized()
+
+        with self.get_connection() as conn:
+            tracks, clips, matches = conn.execute('''
+                SELECT COUNT(*), COALESCE(SUM(clip_count), 0), COALESCE(SUM(match_count), 0)
+                FROM audio_tracks
+            ''').fetchone()
+            fingerprints = conn.execute('SELECT COUNT(*) FROM audio_fingerprints').fetchone()[0]
+
+        return {
+            'tracks': tracks,
+            'clips': clips,
+            'fingerprints': fingerprints,
+            'local_matches': matches
+        }
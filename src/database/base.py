@@ -11,6 +11,7 @@ from typing import Dict, List, Optional, Tuple
 import logging
 
 from config import config
+from .connection_pool import get_pool
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +30,17 @@ class DatabaseBase:
         self._initialized = False
     
     def get_connection(self) -> sqlite3.Connection:
-        """Create database connection"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row  # Para acceso por nombre de columna
-        return conn
+        """
+        Get pooled database connection (reused per thread, WAL + tuned pragmas)
+        
+        Rows use sqlite3.Row for access by column name. Calling close() on
+        the returned connection hands it back to the pool.
+        """
+        return get_pool(self.db_path).acquire()
+    
+    def get_pool_stats(self) -> Dict:
+        """Get connection pool metrics for this database"""
+        return get_pool(self.db_path).get_stats()
     
     def _ensure_initialized(self):
         """Ensure database is initialized (lazy initialization)"""
@@ -0,0 +1,236 @@
+"""
+Tag-Flow V2 - Batched Write-Back Sink
+Single writer thread that collects media updates from workers and flushes
+them in batched transactions
+"""
+
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional
+import logging
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+# Queue markers
+_FLUSH = object()
+_STOP = object()
+
+
+class BatchWriter:
+    """
+    Collects (video_id, updates) from any thread and writes them in batches
+
+    A single background thread owns all writes: it flushes when batch_size
+    items are pending or flush_interval seconds have passed since the first
+    pending item, using DatabaseManager.write_video_updates (executemany in one
+    transaction). submit() returns a Future resolving to the per-item success.
+    Pending work is flushed on close() and at interpreter exit.
+    """
+
+    def __init__(self, db=None, batch_size: int = None, flush_interval: float = None):
+        self._db = db
+        self.batch_size = batch_size or config.DATABASE_WRITE_BATCH_SIZE
+        self.flush_interval = flush_interval or config.DATABASE_WRITE_FLUSH_INTERVAL
+
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+        # Metrics
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.coalesced = 0
+        self.total_flush_time = 0.0
+
+        atexit.register(self.close)
+
+    @property
+    def db(self):
+        """Lazy initialization of DatabaseManager via ServiceFactory"""
+        if self._db is None:
+            from src.service_factory import get_database
+            self._db = get_database()
+        return self._db
+
+    # ===========================================
+    # PUBLIC API
+    # ===========================================
+
+    def submit(self, video_id: int, updates: Dict,
+               character_confidences: Dict[str, float] = None) -> Future:
+        """Queue a media update; the Future resolves to True/False once written"""
+        future = Future()
+        if not updates:
+            future.set_result(False)
+            return future
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchWriter is closed")
+            self.submitted += 1
+            self._ensure_thread()
+
+        self._queue.put((video_id, dict(updates), character_confidences, future))
+        return future
+
+    def flush(self, timeout: float = None) -> bool:
+        """Block until everything submitted so far has been written"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                return True
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout: float = None):
+        """Flush pending writes and stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+
+        if thread is not None and thread.is_alive():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def get_stats(self) -> Dict:
+        """Get writer metrics"""
+        with self._lock:
+            return {
+                'submitted': self.submitted,
+                'written': self.written,
+                'failed': self.failed,
+                'pending': self._queue.qsize(),
+                'batches': self.batches,
+                'coalesced': self.coalesced,
+                'avg_batch_size': round((self.written + self.failed) / self.batches, 1) if self.batches else 0.0,
+                'avg_flush_time_ms': round(self.total_flush_time / self.batches * 1000, 2) if self.batches else 0.0,
+                'batch_size': self.batch_size,
+                'flush_interval': self.flush_interval
+            }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    # ===========================================
+    # WRITER THREAD
+    # ===========================================
+
+    def _ensure_thread(self):
+        """Start the writer thread on first use (lock held)"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="db-batch-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        pending = []
+        flush_waiters = []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.time())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            stop = item is _STOP
+            if isinstance(item, tuple) and item[0] is _FLUSH:
+                flush_waiters.append(item[1])
+            elif item is not None and not stop:
+                pending.append(item)
+                if deadline is None:
+                    deadline = time.time() + self.flush_interval
+
+            due = deadline is not None and time.time() >= deadline
+            if pending and (stop or flush_waiters or due or len(pending) >= self.batch_size):
+                self._write_batch(pending)
+                pending = []
+                deadline = None
+
+            for waiter in flush_waiters:
+                waiter.set()
+            flush_waiters = []
+
+            if stop:
+                # Drain anything submitted concurrently with close()
+                remaining = []
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, tuple) and item[0] is not _FLUSH:
+                        remaining.append(item)
+                    elif isinstance(item, tuple):
+                        item[1].set()
+                if remaining:
+                    self._write_batch(remaining)
+                return
+
+    def _write_batch(self, pending: List[tuple]):
+        """Write a batch, coalescing repeated updates to the same video"""
+        start_time = time.time()
+
+        merged: Dict[int, list] = {}
+        for video_id, updates, confidences, future in pending:
+            entry = merged.get(video_id)
+            if entry is None:
+                merged[video_id] = [updates, confidences, [future]]
+            else:
+                entry[0].update(updates)
+                if confidences:
+                    entry[1] = {**(entry[1] or {}), **confidences}
+                entry[2].append(future)
+
+        items = [(video_id, entry[0], entry[1]) for video_id, entry in merged.items()]
+        try:
+            results = self.db.write_video_updates(items)
+        except Exception as e:
+            logger.error(f"❌ Batch write failed: {e}")
+            results = [False] * len(items)
+
+        written = 0
+        for (video_id, entry), success in zip(merged.items(), results):
+            written += 1 if success else 0
+            for future in entry[2]:
+                future.set_result(success)
+
+        elapsed = time.time() - start_time
+        with self._lock:
+            self.batches += 1
+            self.written += written
+            self.failed += len(items) - written
+            self.coalesced += len(pending) - len(items)
+            self.total_flush_time += elapsed
+
+        logger.debug(f"💾 Batch written: {written}/{len(items)} videos in {elapsed * 1000:.1f}ms")
+
+
+# ===========================================
+# SHARED WRITER
+# ===========================================
+
+_writer: Optional[BatchWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_batch_writer() -> BatchWriter:
+    """Get the process-wide batch writer (recreated if it was closed)"""
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer._closed:
+            _writer = BatchWriter()
+        return _writer
@@ -0,0 +1,403 @@
+"""
+Tag-Flow V2 - Bulk Population
+Set-based import of external-source posts: platforms, creators and
+subscriptions resolved through in-memory key maps, posts → media rows written
+with executemany in chunked transactions
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import logging
+
+from config import config
+from .base import DatabaseBase
+from .thumbnail_keys import index_posts_thumbnails
+
+logger = logging.getLogger(__name__)
+
+# SQLite default limit for host parameters is 999 on older builds
+_IN_CHUNK = 500
+
+
+class DimensionResolver:
+    """
+    Creator / subscription / platform keys of one import run
+
+    Mirrors CreatorOperations.create_or_get_creator and
+    SubscriptionOperations.create_or_get_subscription without a query per
+    lookup: existing keys are preloaded once, new rows get their ids
+    allocated in memory and are queued for a single executemany per chunk.
+    Keys added inside a chunk are undone if its transaction rolls back.
+    """
+
+    def __init__(self, conn):
+        self.platforms: Dict[str, int] = {
+            name: platform_id for platform_id, name in conn.execute('SELECT id, name FROM platforms')
+        }
+        self.creators_by_url: Dict[Tuple, int] = {}          # (name, platform_id, profile_url)
+        self.creators_by_external_id: Dict[Tuple, int] = {}  # (platform_creator_id, platform_id)
+        self.primary_creators: Dict[Tuple, int] = {}         # (name, platform_id) → first primary
+        self.subscriptions: Dict[Tuple, int] = {}            # (name, platform_id, subscription_type)
+
+        cursor = conn.execute('''
+            SELECT id, name, platform_id, profile_url, platform_creator_id FROM creators
+            ORDER BY is_primary DESC, id ASC
+        ''')
+        for creator_id, name, platform_id, profile_url, platform_creator_id in cursor:
+            if profile_url:
+                self.creators_by_url.setdefault((name, platform_id, profile_url), creator_id)
+            if platform_creator_id:
+                self.creators_by_external_id.setdefault((platform_creator_id, platform_id), creator_id)
+            self.primary_creators.setdefault((name, platform_id), creator_id)
+
+        for subscription_id, name, platform_id, subscription_type in conn.execute(
+                'SELECT id, name, platform_id, subscription_type FROM subscriptions'):
+            self.subscriptions.setdefault((name, platform_id, subscription_type), subscription_id)
+
+        self.creator_rows: List[tuple] = []
+        self.subscription_rows: List[tuple] = []
+        self._next_ids: Dict[str, int] = {}
+        self._added: List[Tuple[Dict, Tuple]] = []
+
+    # ===========================================
+    # CHUNK LIFECYCLE
+    # ===========================================
+
+    def begin(self, conn):
+        """Start a chunk: read id high-water marks (write lock already held)"""
+        row = conn.execute('''
+            SELECT (SELECT IFNULL(MAX(id), 0) FROM creators),
+                   (SELECT IFNULL(MAX(id), 0) FROM subscriptions),
+                   (SELECT IFNULL(MAX(id), 0) FROM posts),
+                   (SELECT IFNULL(MAX(id), 0) FROM media)
+        ''').fetchone()
+        self._next_ids = dict(zip(('creators', 'subscriptions', 'posts', 'media'), (value + 1 for value in row)))
+        self.creator_rows = []
+        self.subscription_rows = []
+        self._added = []
+
+    def commit(self):
+        """Keep the keys created by the committed chunk"""
+        self._added = []
+
+    def rollback(self):
+        """Forget the keys created by a rolled back chunk"""
+        for mapping, key in reversed(self._added):
+            mapping.pop(key, None)
+        self._added = []
+        self.creator_rows = []
+        self.subscription_rows = []
+
+    def allocate(self, table: str) -> int:
+        """Next free id of a table for an explicit-id INSERT"""
+        value = self._next_ids[table]
+        self._next_ids[table] = value + 1
+        return value
+
+    def _remember(self, mapping: Dict, key: Tuple, value: int):
+        mapping[key] = value
+        self._added.append((mapping, key))
+
+    # ===========================================
+    # RESOLUTION
+    # ===========================================
+
+    def platform_id(self, platform_name: str) -> int:
+        platform_id = self.platforms.get(platform_name)
+        if not platform_id:
+            raise ValueError(f"Unknown platform: {platform_name}")
+        return platform_id
+
+    def creator_id(self, spec: Optional[Dict], platform_id: int) -> Optional[int]:
+        """
+        Id of the creator described by spec, queued for insertion if new
+
+        Same precedence as create_or_get_creator: name + profile_url, then
+        platform_creator_id; an unseen key whose name already exists becomes
+        a 'variation' of the primary creator. A spec with neither profile_url
+        nor platform_creator_id reuses the primary creator of that name.
+        """
+        if not spec or not spec.get('name'):
+            return None
+
+        name = spec['name']
+        profile_url = spec.get('profile_url')
+        platform_creator_id = spec.get('platform_creator_id')
+
+        if profile_url:
+            found = self.creators_by_url.get((name, platform_id, profile_url))
+            if found:
+                return found
+        if platform_creator_id:
+            found = self.creators_by_external_id.get((platform_creator_id, platform_id))
+            if found:
+                return found
+
+        primary_id = self.primary_creators.get((name, platform_id))
+        if primary_id and not profile_url and not platform_creator_id:
+            return primary_id
+
+        creator_id = self.allocate('creators')
+        self.creator_rows.append((
+            creator_id, name, platform_id, primary_id, primary_id is None,
+            'variation' if primary_id else 'main', platform_creator_id, profile_url,
+            spec.get('creator_name_source', 'db')
+        ))
+        if profile_url:
+            self._remember(self.creators_by_url, (name, platform_id, profile_url), creator_id)
+        if platform_creator_id:
+            self._remember(self.creators_by_external_id, (platform_creator_id, platform_id), creator_id)
+        if primary_id is None:
+            self._remember(self.primary_creators, (name, platform_id), creator_id)
+        return creator_id
+
+    def subscription_id(self, spec: Optional[Dict], platform_id: int) -> Optional[int]:
+        """Id of the subscription (name, platform, type), queued for insertion if new"""
+        if not spec or not spec.get('name') or not spec.get('subscription_type'):
+            return None
+
+        # Owner creator is resolved even for known subscriptions (as the per-video path does)
+        creator_id = self.creator_id(spec.get('creator'), platform_id)
+
+        key = (spec['name'], platform_id, spec['subscription_type'])
+        found = self.subscriptions.get(key)
+        if found:
+            return found
+
+        subscription_id = self.allocate('subscriptions')
+        self.subscription_rows.append((
+            subscription_id, spec['name'], platform_id, spec['subscription_type'],
+            bool(spec.get('have_account', False)), creator_id,
+            spec.get('subscription_url'), spec.get('external_uuid')
+        ))
+        self._remember(self.subscriptions, key, subscription_id)
+        return subscription_id
+
+
+class BulkPopulationOperations(DatabaseBase):
+    """Bulk import of posts → media records built by ExternalSourcesManager"""
+
+    def import_posts(self, records: List[Dict[str, Any]], batch_size: int = None,
+                     progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
+        """
+        Import post records in chunked transactions
+
+        Each record is a dict with 'platform', 'creator' and 'subscription'
+        specs (or None), 'post' (posts columns), 'media' (media dicts in
+        carousel order), 'categories' and 'mappings' ((media index,
+        download_item_id, external_db_source) tuples). A record whose primary
+        file is already imported is skipped, like create_post_with_media.
+
+        If a chunk fails it is rolled back and retried record by record so a
+        single bad row does not discard the rest. progress_callback receives
+        (processed, total, current_item) after every chunk.
+
+        Returns:
+            Dict with 'post_ids' (post id per record, None if skipped or
+            failed), the created/skipped counters and 'errors' as
+            (record index, message) tuples.
+        """
+        self._ensure_initialized()
+        start_time = time.time()
+        batch_size = max(1, batch_size or config.POPULATION_BATCH_SIZE)
+
+        result = {
+            'post_ids': [None] * len(records),
+            'posts_created': 0,
+            'posts_skipped': 0,
+            'media_created': 0,
+            'creators_created': 0,
+            'subscriptions_created': 0,
+            'errors': []
+        }
+        if not records:
+            return result
+
+        with self.get_connection() as conn:
+            resolver = DimensionResolver(conn)
+
+            for start in range(0, len(records), batch_size):
+                chunk = range(start, min(start + batch_size, len(records)))
+                try:
+                    self._merge(result, self._write_chunk(conn, records, chunk, resolver))
+                except Exception as e:
+                    logger.warning(f"Bulk import chunk failed ({len(chunk)} posts), retrying individually: {e}")
+                    for index in chunk:
+                        try:
+                            self._merge(result, self._write_chunk(conn, records, [index], resolver))
+                        except Exception as item_error:
+                            result['errors'].append((index, f"{_primary_path(records[index])}: {item_error}"))
+
+                if progress_callback:
+                    progress_callback(chunk.stop, len(records), f"Imported {chunk.stop} of {len(records)} posts")
+
+        self._track_query('import_posts', time.time() - start_time)
+        logger.info(f"Bulk import: {result['posts_created']} posts, {result['media_created']} media, "
+                    f"{result['creators_created']} creators, {result['subscriptions_created']} subscriptions "
+                    f"({result['posts_skipped']} skipped, {len(result['errors'])} errors) "
+                    f"in {time.time() - start_time:.2f}s")
+        return result
+
+    def _write_chunk(self, conn, records: List[Dict[str, Any]], indexes: Iterable[int],
+                     resolver: DimensionResolver) -> Dict[str, Any]:
+        """Resolve and insert one chunk in a single transaction"""
+        if not conn.in_transaction:
+            conn.execute('BEGIN IMMEDIATE')
+        try:
+            resolver.begin(conn)
+            outcome = self._plan_chunk(conn, records, indexes, resolver)
+
+            if resolver.creator_rows:
+                conn.executemany('''
+                    INSERT INTO creators (id, name, platform_id, parent_creator_id, is_primary, alias_type,
+                                          platform_creator_id, profile_url, creator_name_source)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', resolver.creator_rows)
+            if resolver.subscription_rows:
+                conn.executemany('''
+                    INSERT INTO subscriptions (id, name, platform_id, subscription_type, have_account,
+                                               creator_id, subscription_url, external_uuid)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', resolver.subscription_rows)
+            if outcome['post_rows']:
+                conn.executemany('''
+                    INSERT INTO posts (
+                        id, platform_id, platform_post_id, post_url, title_post, use_filename,
+                        creator_id, subscription_id, download_date, is_carousel, carousel_count,
+                        publication_date, publication_date_source, publication_date_confidence
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', outcome['post_rows'])
+                conn.executemany('''
+                    INSERT INTO media (
+                        id, post_id, file_path, file_name, thumbnail_path, file_size,
+                        duration_seconds, media_type, resolution_width, resolution_height,
+                        fps, carousel_order, is_primary
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', outcome['media_rows'])
+                # Thumbnail name → media / first carousel image (missing-thumbnail fallback)
+                index_posts_thumbnails(conn, outcome['thumbnail_media'])
+            if outcome['category_rows']:
+                conn.executemany('''
+                    INSERT OR IGNORE INTO post_categories (post_id, category_type)
+                    VALUES (?, ?)
+                ''', outcome['category_rows'])
+            if outcome['mapping_rows']:
+                conn.executemany('''
+                    INSERT OR IGNORE INTO downloader_mapping (media_id, download_item_id, external_db_source)
+                    VALUES (?, ?, ?)
+                ''', outcome['mapping_rows'])
+
+            outcome['creators_created'] = len(resolver.creator_rows)
+            outcome['subscriptions_created'] = len(resolver.subscription_rows)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            resolver.rollback()
+            raise
+
+        resolver.commit()
+        return outcome
+
+    def _plan_chunk(self, conn, records: List[Dict[str, Any]], indexes: Iterable[int],
+                    resolver: DimensionResolver) -> Dict[str, Any]:
+        """Build the rows of a chunk (dimensions resolved in memory, ids allocated)"""
+        indexes = list(indexes)
+        existing = self._existing_media_paths(
+            conn, [item['file_path'] for index in indexes for item in records[index].get('media') or []]
+        )
+
+        outcome = {
+            'post_ids': {}, 'skipped': 0, 'media_created': 0, 'errors': [],
+            'post_rows': [], 'media_rows': [], 'thumbnail_media': [], 'category_rows': [], 'mapping_rows': []
+        }
+
+        for index in indexes:
+            record = records[index]
+            media_items = record.get('media') or []
+            if not media_items:
+                outcome['errors'].append((index, "Post record without media"))
+                continue
+
+            file_paths = [item['file_path'] for item in media_items]
+            if file_paths[0] in existing:
+                outcome['skipped'] += 1
+                continue
+            clash = next((path for path in file_paths[1:] if path in existing), None)
+            if clash:
+                outcome['errors'].append((index, f"{clash}: media already belongs to another post"))
+                continue
+
+            try:
+                platform_id = resolver.platform_id(record['platform'])
+                creator_id = resolver.creator_id(record.get('creator'), platform_id)
+                subscription_id = resolver.subscription_id(record.get('subscription'), platform_id)
+            except ValueError as e:
+                outcome['errors'].append((index, f"{file_paths[0]}: {e}"))
+                continue
+
+            existing.update(file_paths)
+            post = record.get('post') or {}
+            post_id = resolver.allocate('posts')
+            outcome['post_ids'][index] = post_id
+            outcome['post_rows'].append((
+                post_id, platform_id, post.get('platform_post_id'), post.get('post_url'),
+                post.get('title_post'), post.get('use_filename', False), creator_id, subscription_id,
+                post.get('download_date'), len(media_items) > 1, len(media_items),
+                post.get('publication_date'), post.get('publication_date_source'),
+                post.get('publication_date_confidence')
+            ))
+
+            media_ids = []
+            for order, item in enumerate(media_items):
+                media_id = resolver.allocate('media')
+                media_ids.append(media_id)
+                outcome['media_rows'].append((
+                    media_id, post_id, item['file_path'], item['file_name'], item.get('thumbnail_path'),
+                    item.get('file_size'), item.get('duration_seconds'), item.get('media_type', 'video'),
+                    item.get('resolution_width'), item.get('resolution_height'), item.get('fps'),
+                    order, order == 0
+                ))
+            outcome['media_created'] += len(media_ids)
+            outcome['thumbnail_media'].append([
+                (media_id, item['file_path'], item.get('media_type', 'video'))
+                for media_id, item in zip(media_ids, media_items)
+            ])
+
+            outcome['category_rows'].extend((post_id, category) for category in record.get('categories') or [])
+            outcome['mapping_rows'].extend(
+                (media_ids[media_index], download_item_id, source)
+                for media_index, download_item_id, source in record.get('mappings') or []
+                if download_item_id and media_index < len(media_ids)
+            )
+
+        return outcome
+
+    def _existing_media_paths(self, conn, file_paths: List[str]) -> Set[str]:
+        """Subset of file_paths already present in media"""
+        existing = set()
+        unique_paths = list(dict.fromkeys(path for path in file_paths if path))
+        for i in range(0, len(unique_paths), _IN_CHUNK):
+            chunk = unique_paths[i:i + _IN_CHUNK]
+            placeholders = ','.join(['?' for _ in chunk])
+            cursor = conn.execute(f'SELECT file_path FROM media WHERE file_path IN ({placeholders})', chunk)
+            existing.update(row[0] for row in cursor.fetchall())
+        return existing
+
+    @staticmethod
+    def _merge(result: Dict[str, Any], outcome: Dict[str, Any]):
+        """Add a committed chunk to the run totals"""
+        for index, post_id in outcome['post_ids'].items():
+            result['post_ids'][index] = post_id
+        result['posts_created'] += len(outcome['post_ids'])
+        result['posts_skipped'] += outcome['skipped']
+        result['media_created'] += outcome['media_created']
+        result['creators_created'] += outcome['creators_created']
+        result['subscriptions_created'] += outcome['subscriptions_created']
+        result['errors'].extend(outcome['errors'])
+
+
+def _primary_path(record: Dict[str, Any]) -> str:
+    media_items = record.get('media') or []
+    return media_items[0].get('file_path', 'unknown') if media_items else 'unknown'
@@ -0,0 +1,349 @@
+"""
+Tag-Flow V2 - Media Characters Operations
+Normalized media ↔ character index backing character filters and stats
+"""
+
+import json
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from .base import DatabaseBase
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Character sources stored per media row (mirror the JSON columns)
+CHARACTER_SOURCES = {
+    'detected': 'detected_characters',
+    'final': 'final_characters'
+}
+
+
+def create_media_characters_tables(conn):
+    """Create characters + media_characters tables (idempotent)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS characters (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS media_characters (
+            media_id INTEGER NOT NULL REFERENCES media(id),
+            character_id INTEGER NOT NULL REFERENCES characters(id),
+            source TEXT NOT NULL CHECK(source IN ('detected', 'final')),
+            confidence REAL,
+            PRIMARY KEY (media_id, character_id, source)
+        ) WITHOUT ROWID
+    ''')
+
+    # "Videos with character X" and "top characters" lookups
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_media_characters_character ON media_characters(character_id, source, media_id)')
+
+    # Keep the index clean when media rows are hard-deleted
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_media_characters_media_delete
+        AFTER DELETE ON media
+        BEGIN
+            DELETE FROM media_characters WHERE media_id = OLD.id;
+        END
+    ''')
+
+
+def parse_characters(value) -> List[Tuple[str, Optional[float]]]:
+    """
+    Normalize a characters value into [(name, confidence)]
+
+    Accepts the JSON text stored in media (also double-encoded JSON), lists of
+    names or lists of {'name': ..., 'confidence': ...} dicts.
+    """
+    # Decode JSON text (update paths sometimes store an already-encoded string)
+    for _ in range(2):
+        if not isinstance(value, str):
+            break
+        value = value.strip()
+        if not value:
+            return []
+        try:
+            value = json.loads(value)
+        except (json.JSONDecodeError, TypeError):
+            return [(value, None)]
+
+    if not value:
+        return []
+    if isinstance(value, (str, dict)):
+        value = [value]
+    if not isinstance(value, (list, tuple)):
+        return []
+
+    parsed = []
+    seen = set()
+    for item in value:
+        if isinstance(item, dict):
+            name = item.get('name')
+            confidence = item.get('confidence')
+        else:
+            name = item
+            confidence = None
+
+        if not isinstance(name, str):
+            continue
+        name = name.strip()
+        if not name or name.lower() in seen:
+            continue
+
+        seen.add(name.lower())
+        try:
+            confidence = float(confidence) if confidence is not None else None
+        except (TypeError, ValueError):
+            confidence = None
+        parsed.append((name, confidence))
+
+    return parsed
+
+
+def _resolve_character_ids(conn, names: Iterable[str]) -> Dict[str, int]:
+    """Get or create character ids for names (case-insensitive)"""
+    names = list(names)
+    if not names:
+        return {}
+
+    conn.executemany('INSERT OR IGNORE INTO characters (name) VALUES (?)', [(name,) for name in names])
+
+    ids = {}
+    # Chunk to stay below SQLite's host parameter limit
+    for i in range(0, len(names), 500):
+        chunk = names[i:i + 500]
+        placeholders = ','.join(['?' for _ in chunk])
+        cursor = conn.execute(f'SELECT id, name FROM characters WHERE name IN ({placeholders})', chunk)
+        for row in cursor.fetchall():
+            ids[row[1].lower()] = row[0]
+    return ids
+
+
+def sync_media_characters(conn, media_id: int, source: str, characters,
+                          confidences: Optional[Dict[str, float]] = None) -> int:
+    """
+    Replace the media_characters rows of one media/source inside a transaction
+
+    Args:
+        conn: Open connection (caller commits)
+        media_id: Media ID
+        source: 'detected' or 'final'
+        characters: JSON text or list of names/dicts
+        confidences: Optional {name: confidence} overriding parsed values
+
+    Returns:
+        Number of character rows written
+    """
+    if source not in CHARACTER_SOURCES:
+        raise ValueError(f"Invalid character source: {source}")
+
+    parsed = parse_characters(characters)
+    conn.execute('DELETE FROM media_characters WHERE media_id = ? AND source = ?', (media_id, source))
+    if not parsed:
+        return 0
+
+    confidences = {k.lower(): v for k, v in (confidences or {}).items()}
+    character_ids = _resolve_character_ids(conn, [name for name, _ in parsed])
+
+    rows = []
+    for name, confidence in parsed:
+        character_id = character_ids.get(name.lower())
+        if character_id is None:
+            continue
+        rows.append((media_id, character_id, source, confidences.get(name.lower(), confidence)))
+
+    conn.executemany('''
+        INSERT OR REPLACE INTO media_characters (media_id, character_id, source, confidence)
+        VALUES (?, ?, ?, ?)
+    ''', rows)
+    return len(rows)
+
+
+def rebuild_media_characters(conn, batch_size: int = 1000) -> int:
+    """Backfill media_characters from the JSON columns of every media row"""
+    conn.execute('DELETE FROM media_characters')
+
+    total = 0
+    last_id = 0
+    while True:
+        rows = conn.execute('''
+            SELECT id, detected_characters, final_characters FROM media
+            WHERE id > ?
+              AND (detected_characters IS NOT NULL OR final_characters IS NOT NULL)
+            ORDER BY id
+            LIMIT ?
+        ''', (last_id, batch_size)).fetchall()
+        if not rows:
+            break
+
+        for media_id, detected, final in rows:
+            total += sync_media_characters(conn, media_id, 'detected', detected)
+            total += sync_media_characters(conn, media_id, 'final', final)
+        last_id = rows[-1][0]
+
+    return total
+
+
+class MediaCharacterOperations(DatabaseBase):
+    """Indexed character lookups over the media_characters table"""
+
+    def sync_media_characters(self, media_id: int, source: str, characters,
+                              confidences: Optional[Dict[str, float]] = None) -> int:
+        """Replace indexed characters of one media/source"""
+        self._ensure_initialized()
+        start_time = time.time()
+
+        with self.get_connection() as conn:
+            written = sync_media_characters(conn, media_id, source, characters, confidences)
+
+        self._track_query('sync_media_characters', time.time() - start_time)
+        return written
+
+    def rebuild_media_characters(self) -> int:
+        """Rebuild the whole index from the JSON columns"""
+        self._ensure_initialized()
+        start_time = time.time()
+
+        with self.get_connection() as conn:
+            total = rebuild_media_characters(conn)
+
+        self._track_query('rebuild_media_characters', time.time() - start_time)
+        logger.info(f"media_characters rebuilt: {total} rows")
+        return total
+
+    def get_media_ids_by_character(self, character_name: str, source: str = None,
+                                   include_deleted: bool = False) -> List[int]:
+        """Get media IDs tagged with a character (index lookup)"""
+        self._ensure_initialized()
+        start_time = time.time()
+
+        query = '''
+            SELECT DISTINCT mc.media_id
+            FROM characters ch
+            JOIN media_characters mc ON mc.character_id = ch.id
+            JOIN media m ON m.id = mc.media_id
+            JOIN posts p ON p.id = m.post_id
+            WHERE ch.name = ?
+        '''
+        params = [character_name]
+        if source:
+            query += ' AND mc.source = ?'
+            params.append(source)
+        if not include_deleted:
+            query += ' AND p.deleted_at IS NULL'
+        query += ' ORDER BY mc.media_id DESC'
+
+        with self.get_connection() as conn:
+            result = [row[0] for row in conn.execute(query, params).fetchall()]
+
+        self._track_query('get_media_ids_by_character', time.time() - start_time)
+        return result
+
+    def get_top_characters(self, limit: int = 10, source: str = None) -> List[Tuple[str, int]]:
+        """Get most frequent characters as [(name, media_count)]"""
+        self._ensure_initialized()
+        start_time = time.time()
+
+        query = '''
+            SELECT ch.name, COUNT(DISTINCT mc.media_id) AS media_count
+            FROM media_characters mc
+            JOIN characters ch ON ch.id = mc.character_id
+            JOIN media m ON m.id = mc.media_id
+            JOIN posts p ON p.id = m.post_id
+            WHERE p.deleted_at IS NULL
+        '''
+        params = []
+        if source:
+            query += ' AND mc.source = ?'
+            params.append(source)
+        query += ' GROUP BY ch.id ORDER BY media_count DESC, ch.name LIMIT ?'
+        params.append(limit)
+
+        with self.get_connection() as conn:
+            result = [(row[0], row[1]) for row in conn.execute(query, params).fetchall()]
+
+        self._track_query('get_top_characters', time.time() - start_time)
+        return result
+
+    def get_character_detection_stats(self, video_ids: Optional[List[int]] = None,
+                                      source: str = 'detected') -> Dict:
+        """
+        Aggregate character detection stats per platform and creator in SQL
+
+        Returns:
+            Dict with total/with_characters per platform and creator plus
+            character frequencies (global and per creator)
+        """
+        self._ensure_initialized()
+        start_time = time.time()
+
+        media_filter = 'p.deleted_at IS NULL'
+        params: List = []
+        if video_ids:
+            placeholders = ','.join(['?' for _ in video_ids])
+            media_filter += f' AND m.id IN ({placeholders})'
+            params.extend(video_ids)
+
+        stats = {
+            'total_videos': 0,
+            'videos_with_characters': 0,
+            'character_frequency': {},
+            'platform_stats': {},
+            'creator_stats': {}
+        }
+
+        with self.get_connection() as conn:
+            cursor = conn.execute(f'''
+                SELECT
+                    COALESCE(pl.name, 'unknown') AS platform,
+                    COALESCE(c.name, 'unknown') AS creator,
+                    COUNT(*) AS total,
+                    COUNT(CASE WHEN EXISTS (
+                        SELECT 1 FROM media_characters mc
+                        WHERE mc.media_id = m.id AND mc.source = ?
+                    ) THEN 1 END) AS with_characters
+                FROM media m
+                JOIN posts p ON p.id = m.post_id
+                LEFT JOIN platforms pl ON pl.id = p.platform_id
+                LEFT JOIN creators c ON c.id = p.creator_id
+                WHERE {media_filter}
+                GROUP BY platform, creator
+            ''', [source] + params)
+
+            for platform, creator, total, with_characters in cursor.fetchall():
+                stats['total_videos'] += total
+                stats['videos_with_characters'] += with_characters
+
+                platform_stats = stats['platform_stats'].setdefault(platform, {'total': 0, 'with_characters': 0})
+                platform_stats['total'] += total
+                platform_stats['with_characters'] += with_characters
+
+                creator_stats = stats['creator_stats'].setdefault(
+                    creator, {'total': 0, 'with_characters': 0, 'characters': {}}
+                )
+                creator_stats['total'] += total
+                creator_stats['with_characters'] += with_characters
+
+            cursor = conn.execute(f'''
+                SELECT COALESCE(c.name, 'unknown') AS creator, ch.name, COUNT(DISTINCT m.id)
+                FROM media_characters mc
+                JOIN characters ch ON ch.id = mc.character_id
+                JOIN media m ON m.id = mc.media_id
+                JOIN posts p ON p.id = m.post_id
+                LEFT JOIN creators c ON c.id = p.creator_id
+                WHERE mc.source = ? AND {media_filter}
+                GROUP BY creator, ch.id
+            ''', [source] + params)
+
+            for creator, character_name, count in cursor.fetchall():
+                stats['character_frequency'][character_name] = stats['character_frequency'].get(character_name, 0) + count
+                if creator in stats['creator_stats']:
+                    stats['creator_stats'][creator]['characters'][character_name] = count
+
+        stats['videos_without_characters'] = stats['total_videos'] - stats['videos_with_characters']
+
+        self._track_query('get_character_detection_stats', time.time() - start_time)
+        return stats
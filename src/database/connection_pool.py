@@ -0,0 +1,307 @@
+"""
+Tag-Flow V2 - SQLite Connection Pool
+Thread-safe pool of reusable SQLite connections with tuned pragmas
+"""
+
+import sqlite3
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, List, Tuple
+import logging
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    SQLite connection whose close() hands it back to its pool
+
+    A thread reuses one connection, so `with get_connection()` blocks can
+    nest. Only the outermost block commits or rolls back; nested blocks run
+    inside a SAVEPOINT so they cannot end the enclosing transaction, and
+    close() inside a block is deferred until the outermost block exits.
+    """
+
+    _pool = None
+    _depth = 0
+
+    def __enter__(self):
+        if self._depth > 0:
+            self.execute(f"SAVEPOINT pool_nested_{self._depth}")
+        self._depth += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._depth -= 1
+        if self._depth == 0:
+            return super().__exit__(exc_type, exc_value, traceback)
+
+        savepoint = f"pool_nested_{self._depth}"
+        # An explicit commit()/rollback() inside the block already ended it
+        if self.in_transaction:
+            try:
+                if exc_type is not None:
+                    self.execute(f"ROLLBACK TO {savepoint}")
+                self.execute(f"RELEASE {savepoint}")
+            except sqlite3.OperationalError as e:
+                logger.debug(f"Savepoint {savepoint} already released: {e}")
+        return False
+
+    def close(self):
+        """Return connection to the pool instead of closing it"""
+        if self._depth > 0:
+            return
+        pool = self._pool
+        if pool is None:
+            super().close()
+        else:
+            pool.release(self)
+
+    def close_physical(self):
+        """Really close the underlying SQLite handle"""
+        self._pool = None
+        super().close()
+
+
+class ConnectionPool:
+    """
+    Per-thread reusable SQLite connections
+
+    Each thread keeps the connection it acquired until it calls close() or
+    dies; released connections go to an idle list (bounded by max_size) and
+    are handed to the next thread that needs one. Connections are opened in
+    WAL mode with tuned synchronous/cache/mmap/temp_store pragmas.
+    """
+
+    def __init__(self, db_path: Path, max_size: int = None):
+        self.db_path = str(db_path)
+        self.max_size = max_size or config.DATABASE_POOL_SIZE
+
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._idle: List[PooledConnection] = []
+        # {thread_ident: (weakref(thread), connection)}
+        self._owners: Dict[int, Tuple[weakref.ref, PooledConnection]] = {}
+        self._open_connections = 0
+
+        # Metrics
+        self.acquisitions = 0
+        self.thread_reuses = 0
+        self.idle_reuses = 0
+        self.created = 0
+        self.overflow_created = 0
+        self.released = 0
+        self.reaped = 0
+        self.discarded = 0
+        self.total_connect_time = 0.0
+
+    # ===========================================
+    # ACQUIRE / RELEASE
+    # ===========================================
+
+    def acquire(self) -> PooledConnection:
+        """Get the connection bound to the current thread (creating one if needed)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            with self._lock:
+                self.acquisitions += 1
+                self.thread_reuses += 1
+            return conn
+
+        with self._lock:
+            self.acquisitions += 1
+            self._reap_dead_threads()
+            if self._idle:
+                conn = self._idle.pop()
+                self.idle_reuses += 1
+            else:
+                if self._open_connections >= self.max_size:
+                    self.overflow_created += 1
+                self._open_connections += 1
+
+        if conn is None:
+            try:
+                conn = self._create_connection()
+            except Exception:
+                with self._lock:
+                    self._open_connections -= 1
+                raise
+
+        thread = threading.current_thread()
+        with self._lock:
+            self._owners[thread.ident] = (weakref.ref(thread), conn)
+        self._local.conn = conn
+        return conn
+
+    def release(self, conn: PooledConnection):
+        """Unbind connection from its thread and return it to the idle list"""
+        if getattr(self._local, 'conn', None) is conn:
+            self._local.conn = None
+
+        self._reset_connection(conn)
+
+        with self._lock:
+            for ident, (_, owned) in list(self._owners.items()):
+                if owned is conn:
+                    del self._owners[ident]
+                    break
+            self.released += 1
+            self._return_to_idle(conn)
+
+    def close_all(self):
+        """Close every pooled connection (shutdown)"""
+        with self._lock:
+            connections = list(self._idle) + [conn for _, conn in self._owners.values()]
+            self._idle.clear()
+            self._owners.clear()
+            self._open_connections = 0
+        self._local = threading.local()
+
+        for conn in connections:
+            try:
+                conn.close_physical()
+            except Exception as e:
+                logger.debug(f"Error closing pooled connection: {e}")
+
+    # ===========================================
+    # INTERNALS
+    # ===========================================
+
+    def _create_connection(self) -> PooledConnection:
+        """Open a new connection with pool pragmas applied"""
+        start_time = time.time()
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=config.DATABASE_BUSY_TIMEOUT,
+            check_same_thread=False,
+            factory=PooledConnection
+        )
+        conn.row_factory = sqlite3.Row
+        conn._pool = self
+        self._apply_pragmas(conn)
+
+        with self._lock:
+            self.created += 1
+            self.total_connect_time += time.time() - start_time
+        return conn
+
+    def _apply_pragmas(self, conn: sqlite3.Connection):
+        """Apply performance pragmas to a fresh connection"""
+        pragmas = [
+            "PRAGMA journal_mode = WAL",
+            f"PRAGMA synchronous = {config.DATABASE_SYNCHRONOUS}",
+            f"PRAGMA cache_size = -{int(config.DATABASE_PAGE_CACHE_KB)}",
+            f"PRAGMA mmap_size = {int(config.DATABASE_MMAP_SIZE)}",
+            "PRAGMA temp_store = MEMORY",
+        ]
+        for pragma in pragmas:
+            try:
+                conn.execute(pragma).fetchall()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not apply '{pragma}' on {self.db_path}: {e}")
+
+    def _reset_connection(self, conn: PooledConnection):
+        """Discard any uncommitted work before the connection is reused"""
+        conn._depth = 0
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error as e:
+            logger.debug(f"Error resetting pooled connection: {e}")
+
+    def _return_to_idle(self, conn: PooledConnection):
+        """Keep connection for reuse or close it if the pool is full (lock held)"""
+        if conn in self._idle:
+            return
+        if len(self._idle) < self.max_size:
+            self._idle.append(conn)
+        else:
+            self._open_connections -= 1
+            self.discarded += 1
+            try:
+                conn.close_physical()
+            except Exception as e:
+                logger.debug(f"Error closing pooled connection: {e}")
+
+    def _reap_dead_threads(self):
+        """Reclaim connections owned by threads that have finished (lock held)"""
+        for ident, (thread_ref, conn) in list(self._owners.items()):
+            thread = thread_ref()
+            if thread is None or not thread.is_alive():
+                del self._owners[ident]
+                self._reset_connection(conn)
+                self.reaped += 1
+                self._return_to_idle(conn)
+
+    # ===========================================
+    # METRICS
+    # ===========================================
+
+    def get_stats(self) -> Dict:
+        """Get pool metrics"""
+        with self._lock:
+            self._reap_dead_threads()
+            in_use = len(self._owners)
+            idle = len(self._idle)
+            reuse_rate = 0.0
+            if self.acquisitions > 0:
+                reuse_rate = round(((self.acquisitions - self.created) / self.acquisitions) * 100, 1)
+
+            return {
+                'db_path': self.db_path,
+                'max_size': self.max_size,
+                'open_connections': self._open_connections,
+                'in_use': in_use,
+                'idle': idle,
+                'acquisitions': self.acquisitions,
+                'thread_reuses': self.thread_reuses,
+                'idle_reuses': self.idle_reuses,
+                'created': self.created,
+                'overflow_created': self.overflow_created,
+                'released': self.released,
+                'reaped': self.reaped,
+                'discarded': self.discarded,
+                'reuse_rate': reuse_rate,
+                'avg_connect_time_ms': round((self.total_connect_time / self.created) * 1000, 2) if self.created else 0.0,
+                'pragmas': {
+                    'journal_mode': 'WAL',
+                    'synchronous': config.DATABASE_SYNCHRONOUS,
+                    'cache_size_kb': config.DATABASE_PAGE_CACHE_KB,
+                    'mmap_size': config.DATABASE_MMAP_SIZE,
+                    'temp_store': 'MEMORY'
+                }
+            }
+
+
+# ===========================================
+# POOL REGISTRY (one pool per database file)
+# ===========================================
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Path = None, max_size: int = None) -> ConnectionPool:
+    """Get (or create) the shared connection pool for a database file"""
+    key = str(db_path or config.DATABASE_PATH)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(key, max_size)
+                _pools[key] = pool
+    return pool
+
+
+def close_all_pools():
+    """Close all pooled connections for every database"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close_all()
@@ -5,6 +5,14 @@ Final optimized schema implementation with posts → media structure
 
 import sqlite3
 from .base import DatabaseBase
+from .characters import create_media_characters_tables
+from .file_index import create_file_state_tables
+from .sync_state import create_sync_state_tables
+from .thumbnail_keys import create_thumbnail_key_tables
+from .thumbnail_store import create_thumbnail_store_tables
+from .preview_assets import create_preview_asset_tables
+from .audio_fingerprints import create_audio_fingerprint_tables
+from .operation_jobs import create_operation_job_tables
 import logging
 import json
 from datetime import datetime
@@ -42,10 +50,38 @@ class DatabaseCore(DatabaseBase):
             # 7. Downloader mapping table
             self._create_downloader_mapping_table(conn)
             
+            # 8. Characters + media_characters index
+            create_media_characters_tables(conn)
+            
+            # 9. File state index for incremental discovery
+            create_file_state_tables(conn)
+            
+            # 10. Sync cursors of external 4K Apps databases
+            create_sync_state_tables(conn)
+            
+            # 11. Thumbnail name → media / fallback image index
+            create_thumbnail_key_tables(conn)
+            
+            # 12. Audio fingerprints of identified songs
+            create_audio_fingerprint_tables(conn)
+            
+            # 13. Persistent OperationManager job queue / checkpoints
+            create_operation_job_tables(conn)
+            
+            # 14. Content-addressed thumbnail store manifest
+            create_thumbnail_store_tables(conn)
+            
+            # 15. Sprite sheet / hover preview clip of each media
+            create_preview_asset_tables(conn)
+            
             # Insert initial platform data
             self._insert_initial_platforms(conn)
             
             logger.info("New database schema initialized successfully")
+        
+        # Pooled connections are shared by every module: restore SQLite default
+        with self.get_connection() as conn:
+            conn.execute('PRAGMA foreign_keys = OFF')
 
     def _create_platforms_table(self, conn):
         """Create platforms table with initial data"""
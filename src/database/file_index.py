@@ -0,0 +1,385 @@
+"""
+Tag-Flow V2 - File State Index
+Persistent (path, size, mtime, file id, last_seen) index for incremental
+discovery of media files on local and network drives
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from .base import DatabaseBase
+import logging
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = {'.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v'}
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif'}
+
+# The index always tracks every media extension so that callers interested in
+# different file types can share (and never invalidate) the same state
+INDEXED_EXTENSIONS = VIDEO_EXTENSIONS | IMAGE_EXTENSIONS
+
+# Upper bound for "every path below a directory" range queries
+_PATH_RANGE_END = '\U0010ffff'
+
+
+def create_file_state_tables(conn):
+    """Create file_state, dir_state and file_index_cursors tables (idempotent)"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS file_state (
+            path TEXT PRIMARY KEY,
+            dir_path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL,
+            file_id TEXT,
+            last_seen REAL NOT NULL,
+            changed_at REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_file_state_dir ON file_state(dir_path)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_file_state_changed ON file_state(changed_at)')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS dir_state (
+            path TEXT PRIMARY KEY,
+            parent_path TEXT,
+            mtime_ns INTEGER NOT NULL,
+            last_scanned REAL NOT NULL
+        )
+    ''')
+
+    # Per-consumer "changes seen up to" timestamps
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS file_index_cursors (
+            consumer TEXT PRIMARY KEY,
+            synced_at REAL NOT NULL
+        )
+    ''')
+
+
+def normalize_path(path) -> str:
+    """Comparable form of a path (separators and, on Windows, case)"""
+    return os.path.normcase(os.path.normpath(str(path)))
+
+
+def _subtree_range(root: str) -> Tuple[str, str]:
+    """(low, high) bounds selecting every path strictly below root"""
+    prefix = root if root.endswith(os.sep) else root + os.sep
+    return prefix, prefix + _PATH_RANGE_END
+
+
+@dataclass
+class FileState:
+    """Indexed state of a single file"""
+    path: str
+    size: int
+    mtime_ns: int
+    file_id: Optional[str] = None
+
+
+@dataclass
+class ScanDiff:
+    """Changes found by an incremental scan of one root"""
+    root: str
+    added: List[FileState] = field(default_factory=list)
+    changed: List[FileState] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    dirs_scanned: int = 0
+    dirs_skipped: int = 0
+    elapsed: float = 0.0
+    scanned_at: float = 0.0  # changed_at stamped on files changed by this scan
+
+    @property
+    def has_changes(self) -> bool:
+        return bool(self.added or self.changed or self.removed)
+
+    def summary(self) -> Dict:
+        return {
+            'root': self.root,
+            'added': len(self.added),
+            'changed': len(self.changed),
+            'removed': len(self.removed),
+            'unchanged': self.unchanged,
+            'dirs_scanned': self.dirs_scanned,
+            'dirs_skipped': self.dirs_skipped,
+            'elapsed': round(self.elapsed, 3)
+        }
+
+
+class FileStateIndex(DatabaseBase):
+    """
+    Incremental directory scanner backed by file_state/dir_state
+
+    Only directories whose mtime changed since the last scan are listed with
+    os.scandir; unchanged directories are skipped (their known subdirectories
+    are still visited, costing one stat each). Creating, deleting or renaming
+    a file updates its directory mtime, so those are always detected; in-place
+    rewrites of an existing file do not, which is what full=True is for.
+
+    State is keyed by absolute path, so overlapping roots share it safely.
+    """
+
+    def _ensure_initialized(self):
+        """Create index tables on first use (usable without DatabaseManager)"""
+        if not self._initialized:
+            with self.get_connection() as conn:
+                create_file_state_tables(conn)
+                conn.commit()
+            self._initialized = True
+
+    def scan(self, root, extensions: Iterable[str] = None, full: bool = False) -> ScanDiff:
+        """
+        Diff a directory tree against the index and persist the new state
+
+        Args:
+            root: Directory to scan
+            extensions: Extensions reported in the returned diff (default: video)
+            full: List every directory regardless of its mtime
+
+        Returns:
+            ScanDiff with added, changed and removed files
+        """
+        self._ensure_initialized()
+        start_time = time.time()
+
+        root_str = os.path.normpath(str(root))
+        report_extensions = {ext.lower() for ext in (extensions or VIDEO_EXTENSIONS)}
+        now = time.time()
+        diff = ScanDiff(root=root_str, scanned_at=now)
+
+        def reported(path: str) -> bool:
+            return os.path.splitext(path)[1].lower() in report_extensions
+
+        with self.get_connection() as conn:
+            low, high = _subtree_range(root_str)
+            known_dirs = {
+                row[0]: (row[1], row[2])
+                for row in conn.execute(
+                    'SELECT path, parent_path, mtime_ns FROM dir_state WHERE path = ? OR (path >= ? AND path < ?)',
+                    (root_str, low, high)
+                )
+            }
+            children: Dict[str, List[str]] = {}
+            for dir_path, (parent_path, _) in known_dirs.items():
+                children.setdefault(parent_path, []).append(dir_path)
+
+            dir_rows: List[Tuple] = []
+            upserts: List[Tuple] = []
+            removed: List[str] = []
+            seen_dirs: Set[str] = set()
+
+            stack: List[Tuple[str, str]] = [(root_str, os.path.dirname(root_str))]
+            while stack:
+                dir_path, parent_path = stack.pop()
+                try:
+                    dir_mtime = os.stat(dir_path).st_mtime_ns
+                except OSError:
+                    continue
+                seen_dirs.add(dir_path)
+
+                known = known_dirs.get(dir_path)
+                if known is not None and known[1] == dir_mtime and not full:
+                    # Directory listing unchanged: only descend into known subdirectories
+                    diff.dirs_skipped += 1
+                    stack.extend((child, dir_path) for child in children.get(dir_path, []))
+                    continue
+
+                indexed = {
+                    row[0]: (row[1], row[2])
+                    for row in conn.execute('SELECT path, size, mtime_ns FROM file_state WHERE dir_path = ?', (dir_path,))
+                }
+
+                try:
+                    with os.scandir(dir_path) as entries:
+                        for entry in entries:
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    if not entry.name.startswith('.'):
+                                        stack.append((os.path.normpath(entry.path), dir_path))
+                                    continue
+                                if os.path.splitext(entry.name)[1].lower() not in INDEXED_EXTENSIONS:
+                                    continue
+                                if not entry.is_file():
+                                    continue
+
+                                stat = entry.stat()
+                                path = os.path.normpath(entry.path)
+                                state = FileState(path, stat.st_size, stat.st_mtime_ns, self._file_id(entry, stat))
+
+                                previous = indexed.pop(path, None)
+                                if previous == (state.size, state.mtime_ns):
+                                    diff.unchanged += 1
+                                    upserts.append((path, dir_path, state.size, state.mtime_ns, state.file_id, now, None))
+                                    continue
+
+                                upserts.append((path, dir_path, state.size, state.mtime_ns, state.file_id, now, now))
+                                if reported(path):
+                                    (diff.added if previous is None else diff.changed).append(state)
+                            except OSError as e:
+                                # Unreadable entry: keep its previous state instead of reporting it removed
+                                indexed.pop(os.path.normpath(entry.path), None)
+                                logger.debug(f"Skipping {entry.path}: {e}")
+                except OSError as e:
+                    logger.warning(f"Cannot list {dir_path}: {e}")
+                    continue
+
+                diff.dirs_scanned += 1
+                dir_rows.append((dir_path, parent_path, dir_mtime, now))
+
+                # Files still in the index but no longer listed were removed
+                removed.extend(indexed.keys())
+
+            # Directories that disappeared take their files with them
+            removed_dirs = [dir_path for dir_path in known_dirs if dir_path not in seen_dirs]
+            for i in range(0, len(removed_dirs), 500):
+                chunk = removed_dirs[i:i + 500]
+                placeholders = ','.join(['?' for _ in chunk])
+                removed.extend(
+                    row[0] for row in conn.execute(
+                        f'SELECT path FROM file_state WHERE dir_path IN ({placeholders})', chunk
+                    )
+                )
+                conn.execute(f'DELETE FROM dir_state WHERE path IN ({placeholders})', chunk)
+
+            conn.executemany('DELETE FROM file_state WHERE path = ?', [(path,) for path in removed])
+            # ?7 (changed_at) is NULL for unchanged files: keep their previous value
+            conn.executemany('''
+                INSERT INTO file_state (path, dir_path, size, mtime_ns, file_id, last_seen, changed_at)
+                VALUES (?1, ?2, ?3, ?4, ?5, ?6, COALESCE(?7, ?6))
+                ON CONFLICT(path) DO UPDATE SET
+                    dir_path = excluded.dir_path, size = excluded.size, mtime_ns = excluded.mtime_ns,
+                    file_id = excluded.file_id, last_seen = excluded.last_seen,
+                    changed_at = COALESCE(?7, file_state.changed_at)
+            ''', upserts)
+            conn.executemany('''
+                INSERT OR REPLACE INTO dir_state (path, parent_path, mtime_ns, last_scanned)
+                VALUES (?, ?, ?, ?)
+            ''', dir_rows)
+            conn.commit()
+
+        diff.removed = [path for path in removed if reported(path)]
+        diff.elapsed = time.time() - start_time
+        self._track_query('file_index_scan', diff.elapsed)
+        logger.info(
+            f"📂 Scan {root_str}: +{len(diff.added)} ~{len(diff.changed)} -{len(diff.removed)} "
+            f"({diff.dirs_scanned} dirs listed, {diff.dirs_skipped} skipped, {diff.elapsed:.2f}s)"
+        )
+        return diff
+
+    def get_paths(self, root) -> Set[str]:
+        """Normalized paths currently indexed below a root"""
+        self._ensure_initialized()
+        low, high = _subtree_range(os.path.normpath(str(root)))
+        with self.get_connection() as conn:
+            cursor = conn.execute('SELECT path FROM file_state WHERE path >= ? AND path < ?', (low, high))
+            return {normalize_path(row[0]) for row in cursor}
+
+    def get_changed_since(self, root, since: float, extensions: Iterable[str] = None) -> List[FileState]:
+        """Files below root added or modified after a timestamp"""
+        self._ensure_initialized()
+        extensions = {ext.lower() for ext in (extensions or VIDEO_EXTENSIONS)}
+        low, high = _subtree_range(os.path.normpath(str(root)))
+        with self.get_connection() as conn:
+            cursor = conn.execute('''
+                SELECT path, size, mtime_ns, file_id FROM file_state
+                WHERE path >= ? AND path < ? AND changed_at > ?
+                ORDER BY path
+            ''', (low, high, since))
+            return [FileState(*row) for row in cursor if os.path.splitext(row[0])[1].lower() in extensions]
+
+    def get_cursor(self, consumer: str) -> float:
+        """Timestamp up to which a consumer has processed changes (0 = never)"""
+        self._ensure_initialized()
+        with self.get_connection() as conn:
+            row = conn.execute('SELECT synced_at FROM file_index_cursors WHERE consumer = ?', (consumer,)).fetchone()
+            return row[0] if row else 0.0
+
+    def set_cursor(self, consumer: str, synced_at: float):
+        """Record that a consumer has processed changes up to synced_at"""
+        self._ensure_initialized()
+        with self.get_connection() as conn:
+            conn.execute('INSERT OR REPLACE INTO file_index_cursors (consumer, synced_at) VALUES (?, ?)',
+                         (consumer, synced_at))
+            conn.commit()
+
+    def clear(self, root=None):
+        """Forget indexed state (forces a full rescan)"""
+        self._ensure_initialized()
+        with self.get_connection() as conn:
+            if root is None:
+                conn.execute('DELETE FROM file_state')
+                conn.execute('DELETE FROM dir_state')
+            else:
+                root_str = os.path.normpath(str(root))
+                low, high = _subtree_range(root_str)
+                conn.execute('DELETE FROM file_state WHERE path >= ? AND path < ?', (low, high))
+                conn.execute('DELETE FROM dir_state WHERE path = ? OR (path >= ? AND path < ?)', (root_str, low, high))
+            conn.commit()
+
+    @staticmethod
+    def _file_id(entry: os.DirEntry, stat: os.stat_result) -> Optional[str]:
+        """Stable file identity (device + inode / NTFS file index) when available"""
+        try:
+            inode = entry.inode()
+        except OSError:
+            inode = stat.st_ino
+        if not inode:
+            return None
+        return f"{stat.st_dev}:{inode}"
+
+
+class IndexedFileChecker:
+    """
+    Existence checks answered from the file index
+
+    Each root is scanned incrementally once, then paths under an indexed root
+    are checked against the in-memory set instead of stat()ing the file on
+    disk. Paths outside every root, or with an extension the index does not
+    track, fall back to os.path.exists().
+    """
+
+    def __init__(self, roots: Iterable, index: FileStateIndex = None):
+        self.index = index or get_file_index()
+        self.roots: List[str] = []
+        self.known_paths: Set[str] = set()
+        self.diffs: List[ScanDiff] = []
+
+        for root in roots:
+            if not root or not os.path.isdir(str(root)):
+                continue
+            self.diffs.append(self.index.scan(root))
+            prefix = normalize_path(root)
+            self.roots.append(prefix if prefix.endswith(os.sep) else prefix + os.sep)
+            self.known_paths |= self.index.get_paths(root)
+
+    def exists(self, path) -> bool:
+        normalized = normalize_path(path)
+        if os.path.splitext(normalized)[1] not in INDEXED_EXTENSIONS:
+            return os.path.exists(str(path))
+        for root in self.roots:
+            if normalized.startswith(root):
+                return normalized in self.known_paths
+        return os.path.exists(str(path))
+
+
+# ===========================================
+# SHARED INDEX
+# ===========================================
+
+_indexes: Dict[str, FileStateIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_file_index(db_path: Path = None) -> FileStateIndex:
+    """Get the shared FileStateIndex for a database"""
+    key = str(db_path)
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = FileStateIndex(db_path)
+            _indexes[key] = index
+        return index
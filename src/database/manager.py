@@ -12,6 +12,11 @@ from .batch import BatchOperations
 from .creators import CreatorOperations
 from .subscriptions import SubscriptionOperations
 from .statistics import StatisticsOperations
+from .characters import MediaCharacterOperations
+from .sync_state import SyncStateOperations
+from .audio_fingerprints import AudioFingerprintOperations
+from .operation_jobs import OperationJobOperations
+from .bulk_population import BulkPopulationOperations
 import logging
 
 logger = logging.getLogger(__name__)
@@ -32,6 +37,11 @@ class DatabaseManager:
         self.creators = CreatorOperations(db_path)
         self.subscriptions = SubscriptionOperations(db_path)
         self.statistics = StatisticsOperations(db_path)
+        self.characters = MediaCharacterOperations(db_path)
+        self.sync_state = SyncStateOperations(db_path)
+        self.audio_fingerprints = AudioFingerprintOperations(db_path)
+        self.operation_jobs = OperationJobOperations(db_path)
+        self.bulk_population = BulkPopulationOperations(db_path)
         
         # Share performance tracking across all modules
         self._sync_performance_tracking()
@@ -41,7 +51,9 @@ class DatabaseManager:
     
     def _sync_performance_tracking(self):
         """Synchronize performance tracking across all modules"""
-        modules = [self.videos, self.deletion, self.batch, self.creators, self.subscriptions, self.statistics]
+        modules = [self.videos, self.deletion, self.batch, self.creators, self.subscriptions, self.statistics,
+                   self.characters, self.sync_state, self.audio_fingerprints, self.operation_jobs,
+                   self.bulk_population]
         
         # Use core module as the main tracker
         for module in modules:
@@ -86,14 +98,18 @@ class DatabaseManager:
         """Count videos with filters"""
         return self.videos.count_videos(filters, include_deleted)
     
-    def update_video(self, video_id: int, updates: Dict) -> bool:
+    def update_video(self, video_id: int, updates: Dict, character_confidences: Dict[str, float] = None) -> bool:
         """Update video"""
-        return self.videos.update_video(video_id, updates)
+        return self.videos.update_video(video_id, updates, character_confidences)
     
     def batch_update_videos(self, video_updates: List[Dict]) -> Tuple[int, int]:
         """Update multiple videos in batch"""
         return self.videos.batch_update_videos(video_updates)
     
+    def write_video_updates(self, items: List[Tuple[int, Dict, Optional[Dict[str, float]]]]) -> List[bool]:
+        """Apply (video_id, updates, character_confidences) items in one transaction"""
+        return self.videos.write_video_updates(items)
+    
     def update_video_characters(self, video_id: int, characters_json: str = None) -> bool:
         """Update video characters"""
         return self.videos.update_video_characters(video_id, characters_json)
@@ -274,6 +290,84 @@ class DatabaseManager:
         """Get videos by subscription with metadata"""
         return self.subscriptions.get_videos_by_subscription_with_metadata(subscription_id, limit)
     
+    # ===========================================
+    # CHARACTER INDEX OPERATIONS (delegate to MediaCharacterOperations)
+    # ===========================================
+    
+    def get_media_ids_by_character(self, character_name: str, source: str = None,
+                                   include_deleted: bool = False) -> List[int]:
+        """Get media IDs tagged with a character"""
+        return self.characters.get_media_ids_by_character(character_name, source, include_deleted)
+    
+    def get_top_characters(self, limit: int = 10, source: str = None) -> List[Tuple[str, int]]:
+        """Get most frequent characters"""
+        return self.characters.get_top_characters(limit, source)
+    
+    def get_character_detection_stats(self, video_ids: List[int] = None, source: str = 'detected') -> Dict:
+        """Get character detection stats per platform and creator"""
+        return self.characters.get_character_detection_stats(video_ids, source)
+    
+    def rebuild_media_characters(self) -> int:
+        """Rebuild media_characters from JSON columns"""
+        return self.characters.rebuild_media_characters()
+    
+    # ===========================================
+    # EXTERNAL SYNC STATE (delegate to SyncStateOperations)
+    # ===========================================
+    
+    def get_sync_state(self, source_key: str) -> Optional[Dict]:
+        """Get stored sync cursor of an external source"""
+        return self.sync_state.get_sync_state(source_key)
+    
+    def save_sync_state(self, source_key: str, last_position: int, row_count: int, checksum: int):
+        """Store sync cursor of an external source"""
+        return self.sync_state.save_sync_state(source_key, last_position, row_count, checksum)
+    
+    def reset_sync_state(self, source_key: str = None) -> int:
+        """Forget sync cursor(s) to force a full read"""
+        return self.sync_state.reset_sync_state(source_key)
+    
+    # ===========================================
+    # AUDIO FINGERPRINTS (delegate to AudioFingerprintOperations)
+    # ===========================================
+    
+    def find_audio_match(self, hashes, min_matches: int = 15) -> Optional[Dict]:
+        """Find an already identified song matching a clip fingerprint"""
+        return self.audio_fingerprints.find_audio_match(hashes, min_matches)
+    
+    def add_audio_fingerprints(self, title: str, artist: Optional[str], source: Optional[str],
+                               confidence: float, hashes) -> Optional[int]:
+        """Index the fingerprint of an identified clip"""
+        return self.audio_fingerprints.add_audio_fingerprints(title, artist, source, confidence, hashes)
+    
+    def get_audio_index_stats(self) -> Dict:
+        """Get audio fingerprint index statistics"""
+        return self.audio_fingerprints.get_audio_index_stats()
+    
+    # ===========================================
+    # OPERATION JOBS (delegate to OperationJobOperations)
+    # ===========================================
+    
+    def save_operation_job(self, job: Dict):
+        """Persist OperationManager job state"""
+        return self.operation_jobs.save_operation_job(job)
+    
+    def get_unfinished_operation_jobs(self) -> List[Dict]:
+        """Get jobs left pending, running or paused"""
+        return self.operation_jobs.get_unfinished_operation_jobs()
+    
+    def delete_finished_operation_jobs(self, older_than_seconds: float = 7 * 24 * 3600) -> int:
+        """Remove old finished jobs"""
+        return self.operation_jobs.delete_finished_operation_jobs(older_than_seconds)
+    
+    # ===========================================
+    # BULK POPULATION (delegate to BulkPopulationOperations)
+    # ===========================================
+    
+    def import_posts(self, records: List[Dict], batch_size: int = None, progress_callback=None) -> Dict:
+        """Import external-source post records in chunked transactions"""
+        return self.bulk_population.import_posts(records, batch_size, progress_callback)
+    
     # ===========================================
     # STATISTICS OPERATIONS (delegate to StatisticsOperations)
     # ===========================================
@@ -10,6 +10,33 @@ from typing import List, Dict, Any
 
 logger = logging.getLogger(__name__)
 
+# Índice de búsqueda de texto completo (FTS5) sobre media + posts + creators
+# rowid = media.id; se mantiene sincronizado mediante triggers
+FTS_SEARCH_TABLE = "media_search"
+
+FTS_SEARCH_COLUMNS = ("title", "file_name", "creator_name", "music", "characters", "notes")
+
+_FTS_SEARCH_SOURCE_SELECT = """
+    SELECT
+        m.id,
+        COALESCE(p.title_post, ''),
+        COALESCE(m.file_name, ''),
+        COALESCE(c.name, ''),
+        TRIM(COALESCE(m.detected_music, '') || ' ' || COALESCE(m.detected_music_artist, '') || ' ' ||
+             COALESCE(m.final_music, '') || ' ' || COALESCE(m.final_music_artist, '')),
+        TRIM(COALESCE(m.detected_characters, '') || ' ' || COALESCE(m.final_characters, '')),
+        COALESCE(m.notes, '')
+    FROM media m
+    JOIN posts p ON m.post_id = p.id
+    LEFT JOIN creators c ON p.creator_id = c.id
+"""
+
+_FTS_SEARCH_INSERT = f"""
+    INSERT INTO {FTS_SEARCH_TABLE} (rowid, {', '.join(FTS_SEARCH_COLUMNS)})
+    {_FTS_SEARCH_SOURCE_SELECT}
+"""
+
+
 class DatabaseMigration:
     """Sistema de migraciones automáticas para la base de datos"""
 
@@ -181,6 +208,205 @@ class DatabaseMigration:
             logger.error(f"❌ Error aplicando índices de performance: {e}")
             return False
 
+    def apply_fts_search_index(self) -> bool:
+        """
+        Crear índice FTS5 para la búsqueda de la galería
+
+        Tabla virtual con título, nombre de archivo, creador, música, personajes
+        y notas (tokenizer unicode61 sin acentos + índices de prefijo), poblada
+        desde los datos existentes y mantenida por triggers en media/posts/creators.
+        """
+        migration_name = "fts_search_index_v1"
+
+        if migration_name in self.migrations_applied:
+            logger.info(f"🔎 Índice FTS de búsqueda ya aplicado")
+            return True
+
+        try:
+            conn = sqlite3.connect(self.db_path)
+            cursor = conn.cursor()
+
+            logger.info("🔎 Creando índice FTS5 de búsqueda...")
+
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_SEARCH_TABLE} USING fts5(
+                    {', '.join(FTS_SEARCH_COLUMNS)},
+                    tokenize = 'unicode61 remove_diacritics 2',
+                    prefix = '2 3'
+                )
+            """)
+
+            # Media: alta, cambios en campos indexados y borrado
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{FTS_SEARCH_TABLE}_media_insert
+                AFTER INSERT ON media
+                BEGIN
+                    {_FTS_SEARCH_INSERT} WHERE m.id = NEW.id;
+                END
+            """)
+
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{FTS_SEARCH_TABLE}_media_update
+                AFTER UPDATE OF post_id, file_name, detected_music, detected_music_artist,
+                                final_music, final_music_artist, detected_characters,
+                                final_characters, notes ON media
+                BEGIN
+                    DELETE FROM {FTS_SEARCH_TABLE} WHERE rowid = OLD.id;
+                    {_FTS_SEARCH_INSERT} WHERE m.id = NEW.id;
+                END
+            """)
+
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{FTS_SEARCH_TABLE}_media_delete
+                AFTER DELETE ON media
+                BEGIN
+                    DELETE FROM {FTS_SEARCH_TABLE} WHERE rowid = OLD.id;
+                END
+            """)
+
+            # Posts: título o creador cambian para todos sus media
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{FTS_SEARCH_TABLE}_posts_update
+                AFTER UPDATE OF title_post, creator_id ON posts
+                BEGIN
+                    DELETE FROM {FTS_SEARCH_TABLE}
+                    WHERE rowid IN (SELECT id FROM media WHERE post_id = NEW.id);
+                    {_FTS_SEARCH_INSERT} WHERE m.post_id = NEW.id;
+                END
+            """)
+
+            # Creators: renombrar un creador actualiza todos sus media
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{FTS_SEARCH_TABLE}_creators_update
+                AFTER UPDATE OF name ON creators
+                BEGIN
+                    DELETE FROM {FTS_SEARCH_TABLE}
+                    WHERE rowid IN (
+                        SELECT m.id FROM media m JOIN posts p ON m.post_id = p.id
+                        WHERE p.creator_id = NEW.id
+                    );
+                    {_FTS_SEARCH_INSERT} WHERE p.creator_id = NEW.id;
+                END
+            """)
+
+            # Poblar con los datos existentes
+            cursor.execute(f"DELETE FROM {FTS_SEARCH_TABLE}")
+            cursor.execute(_FTS_SEARCH_INSERT)
+            indexed = cursor.rowcount
+            cursor.execute(f"INSERT INTO {FTS_SEARCH_TABLE}({FTS_SEARCH_TABLE}) VALUES ('optimize')")
+
+            conn.commit()
+            conn.close()
+
+            self._mark_migration_applied(migration_name)
+
+            logger.info(f"✅ Índice FTS de búsqueda creado ({indexed} media indexados)")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Error creando índice FTS de búsqueda: {e}")
+            return False
+
+    def apply_media_characters_table(self) -> bool:
+        """
+        Crear tabla normalizada media_characters y poblarla desde el JSON
+
+        Convierte detected_characters/final_characters (JSON en TEXT) en filas
+        indexadas (media_id, character_id, source, confidence).
+        """
+        migration_name = "media_characters_v1"
+
+        if migration_name in self.migrations_applied:
+            logger.info(f"👥 Tabla media_characters ya aplicada")
+            return True
+
+        try:
+            from .characters import create_media_characters_tables, rebuild_media_characters
+
+            conn = sqlite3.connect(self.db_path)
+
+            logger.info("👥 Creando tabla media_characters...")
+
+            create_media_characters_tables(conn)
+            total = rebuild_media_characters(conn)
+
+            conn.commit()
+            conn.close()
+
+            self._mark_migration_applied(migration_name)
+
+            logger.info(f"✅ media_characters poblada desde JSON ({total} filas)")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Error creando tabla media_characters: {e}")
+            return False
+
+    def apply_thumbnail_keys_table(self) -> bool:
+        """
+        Crear índice thumbnail_keys y poblarlo desde media
+
+        Mapea el nombre de thumbnail ({stem}_thumb.jpg) al media y a la imagen
+        de fallback (primera imagen del carrusel o la propia imagen), para que
+        un thumbnail ausente se resuelva con una búsqueda por clave primaria.
+        """
+        migration_name = "thumbnail_keys_v1"
+
+        if migration_name in self.migrations_applied:
+            logger.info(f"🖼️ Índice thumbnail_keys ya aplicado")
+            return True
+
+        try:
+            from .thumbnail_keys import create_thumbnail_key_tables, rebuild_thumbnail_keys
+
+            conn = sqlite3.connect(self.db_path)
+
+            logger.info("🖼️ Creando índice thumbnail_keys...")
+
+            create_thumbnail_key_tables(conn)
+            total = rebuild_thumbnail_keys(conn)
+
+            conn.commit()
+            conn.close()
+
+            self._mark_migration_applied(migration_name)
+
+            logger.info(f"✅ thumbnail_keys poblado desde media ({total} claves)")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Error creando índice thumbnail_keys: {e}")
+            return False
+
+    def apply_thumbnail_store_table(self) -> bool:
+        """
+        Crear el manifiesto del almacén de thumbnails direccionado por contenido
+
+        Solo el esquema: mover los thumbnails planos existentes recorre todos
+        los archivos, así que no se hace al arrancar sino con la operación de
+        mantenimiento reanudable migrate-thumbnail-store.
+        """
+        try:
+            from .thumbnail_keys import create_thumbnail_key_tables
+            from .thumbnail_store import create_thumbnail_store_tables, count_flat_thumbnails
+
+            conn = sqlite3.connect(self.db_path)
+
+            create_thumbnail_key_tables(conn)
+            create_thumbnail_store_tables(conn)
+            conn.commit()
+            pending = count_flat_thumbnails(conn)
+            conn.close()
+
+            if pending:
+                logger.info(f"🗂️ {pending} thumbnails con nombre plano pendientes de migrar al almacén por contenido "
+                            f"(python main.py migrate-thumbnail-store)")
+            return True
+
+        except Exception as e:
+            logger.error(f"❌ Error creando el almacén de thumbnails: {e}")
+            return False
+
     def run_all_migrations(self) -> bool:
         """Ejecutar todas las migraciones necesarias"""
         success = True
@@ -189,6 +415,22 @@ class DatabaseMigration:
         if not self.apply_performance_indices():
             success = False
 
+        # Índice FTS5 para búsqueda de texto
+        if not self.apply_fts_search_index():
+            success = False
+
+        # Tabla normalizada de personajes por media
+        if not self.apply_media_characters_table():
+            success = False
+
+        # Índice de claves de thumbnail (fallback sin escaneo LIKE)
+        if not self.apply_thumbnail_keys_table():
+            success = False
+
+        # Manifiesto del almacén direccionado por contenido (ab/cd/{hash}.jpg)
+        if not self.apply_thumbnail_store_table():
+            success = False
+
         return success
 
 def ensure_database_optimized(db_path: str) -> bool:
@@ -0,0 +1,116 @@
+"""
+Tag-Flow V2 - Operation Jobs
+Persistent state of OperationManager jobs (queue, progress and checkpoints),
+so queued or interrupted operations survive a restart
+"""
+
+import json
+import time
+from typing import Any, Dict, List
+from .base import DatabaseBase
+import logging
+
+logger = logging.getLogger(__name__)
+
+UNFINISHED_STATUSES = ('pending', 'running', 'paused')
+
+
+def create_operation_job_tables(conn):
+    """Create operation_jobs table (idempotent)"""
+    # params: JSON arguments needed to rebuild the job on resume
+    # checkpoint: JSON resume point reported by the job (e.g. processed ids)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS operation_jobs (
+            operation_id TEXT PRIMARY KEY,
+            operation_type TEXT NOT NULL,
+            status TEXT NOT NULL,
+            priority TEXT NOT NULL,
+            params TEXT,
+            checkpoint TEXT,
+            total_items INTEGER DEFAULT 0,
+            processed_items INTEGER DEFAULT 0,
+            successful_items INTEGER DEFAULT 0,
+            failed_items INTEGER DEFAULT 0,
+            error_message TEXT,
+            created_at REAL NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_operation_jobs_status ON operation_jobs(status, created_at)')
+
+
+class OperationJobOperations(DatabaseBase):
+    """Store and reload OperationManager job state"""
+
+    def save_operation_job(self, job: Dict[str, Any]):
+        """Insert or update a job (params/checkpoint are stored as JSON)"""
+        self._ensure_initialized()
+        start_time = time.time()
+        now = time.time()
+
+        with self.get_connection() as conn:
+            conn.execute('''
+                INSERT INTO operation_jobs (
+                    operation_id, operation_type, status, priority, params, checkpoint,
+                    total_items, processed_items, successful_items, failed_items,
+                    error_message, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(operation_id) DO UPDATE SET
+                    status = excluded.status,
+                    priority = excluded.priority,
+                    params = excluded.params,
+                    checkpoint = excluded.checkpoint,
+                    total_items = excluded.total_items,
+                    processed_items = excluded.processed_items,
+                    successful_items = excluded.successful_items,
+                    failed_items = excluded.failed_items,
+                    error_message = excluded.error_message,
+                    updated_at = excluded.updated_at
+            ''', (
+                job['operation_id'], job['operation_type'], job['status'], job['priority'],
+                json.dumps(job.get('params')) if job.get('params') is not None else None,
+                json.dumps(job.get('checkpoint')) if job.get('checkpoint') is not None else None,
+                job.get('total_items', 0), job.get('processed_items', 0),
+                job.get('successful_items', 0), job.get('failed_items', 0),
+                job.get('error_message'), job.get('created_at', now), now
+            ))
+            conn.commit()
+
+        self._track_query('save_operation_job', time.time() - start_time)
+
+    def get_unfinished_operation_jobs(self) -> List[Dict[str, Any]]:
+        """Jobs left pending, running or paused (oldest first)"""
+        self._ensure_initialized()
+        placeholders = ','.join('?' * len(UNFINISHED_STATUSES))
+
+        with self.get_connection() as conn:
+            rows = conn.execute(f'''
+                SELECT * FROM operation_jobs
+                WHERE status IN ({placeholders})
+                ORDER BY created_at
+            ''', UNFINISHED_STATUSES).fetchall()
+
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            for column in ('params', 'checkpoint'):
+                try:
+                    job[column] = json.loads(job[column]) if job[column] else None
+                except (TypeError, ValueError):
+                    logger.warning(f"Invalid {column} JSON for operation job {job['operation_id']}")
+                    job[column] = None
+            jobs.append(job)
+        return jobs
+
+    def delete_finished_operation_jobs(self, older_than_seconds: float = 7 * 24 * 3600) -> int:
+        """Remove completed/failed/cancelled jobs last updated before the cutoff"""
+        self._ensure_initialized()
+        placeholders = ','.join('?' * len(UNFINISHED_STATUSES))
+
+        with self.get_connection() as conn:
+            cursor = conn.execute(f'''
+                DELETE FROM operation_jobs
+                WHERE status NOT IN ({placeholders}) AND updated_at < ?
+            ''', (*UNFINISHED_STATUSES, time.time() - older_than_seconds))
+            conn.commit()
+            return cursor.rowcount
@@ -7,6 +7,7 @@ import json
 import time
 from typing import Dict, List, Optional, Tuple
 from .base import DatabaseBase
+from .thumbnail_keys import index_post_thumbnails
 import logging
 
 logger = logging.getLogger(__name__)
@@ -216,6 +217,9 @@ class PostOperations(DatabaseBase):
                 ))
                 media_ids.append(cursor.lastrowid)
             
+            # Thumbnail name → media / first carousel image (missing-thumbnail fallback)
+            index_post_thumbnails(conn, post_id)
+            
             # Create categories
             if category_types:
                 for category_type in category_types:
@@ -0,0 +1,90 @@
+"""
+Tag-Flow V2 - Preview Assets
+Sprite sheet layout and short preview clip of each media, used for
+hover-scrubbing in the gallery without streaming the video
+"""
+
+import time
+from pathlib import Path
+from typing import Dict, Iterable
+import logging
+
+from .thumbnail_keys import preview_asset_owner
+
+logger = logging.getLogger(__name__)
+
+
+def create_preview_asset_tables(conn):
+    """Create preview_assets table (idempotent)"""
+    # Files live next to the media thumbnail in the thumbnail store; this
+    # table records their names and the sprite layout the UI needs
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS preview_assets (
+            media_id INTEGER PRIMARY KEY REFERENCES media(id),
+            sprite_name TEXT NOT NULL,
+            frame_count INTEGER NOT NULL,
+            tile_columns INTEGER NOT NULL,
+            tile_rows INTEGER NOT NULL,
+            frame_width INTEGER NOT NULL,
+            frame_height INTEGER NOT NULL,
+            interval_seconds REAL NOT NULL,
+            preview_name TEXT,
+            created_at REAL NOT NULL
+        )
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_preview_assets_media_delete
+        AFTER DELETE ON media
+        BEGIN
+            DELETE FROM preview_assets WHERE media_id = OLD.id;
+        END
+    ''')
+
+
+def record_preview_assets(conn, media_id: int, assets: Dict) -> None:
+    """Store the preview assets generated for a media, replacing older ones (caller commits)"""
+    conn.execute('''
+        INSERT OR REPLACE INTO preview_assets (
+            media_id, sprite_name, frame_count, tile_columns, tile_rows,
+            frame_width, frame_height, interval_seconds, preview_name, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        media_id, assets['sprite_name'], assets['frame_count'], assets['columns'], assets['rows'],
+        assets['frame_width'], assets['frame_height'], assets['interval_seconds'],
+        assets.get('preview_name'), time.time()
+    ))
+
+
+def drop_stale_preview_assets(conn, media_id: int, thumbnail_path) -> None:
+    """Forget assets that belonged to a previous thumbnail of the media (caller commits)"""
+    row = conn.execute('SELECT sprite_name FROM preview_assets WHERE media_id = ?', (media_id,)).fetchone()
+    if row and preview_asset_owner(row[0]) != Path(str(thumbnail_path)).stem:
+        conn.execute('DELETE FROM preview_assets WHERE media_id = ?', (media_id,))
+
+
+def get_preview_assets(conn, media_ids: Iterable[int]) -> Dict[int, Dict]:
+    """Preview assets of several media in one query ({media_id: assets})"""
+    media_ids = list(media_ids)
+    if not media_ids:
+        return {}
+
+    rows = conn.execute(f'''
+        SELECT media_id, sprite_name, frame_count, tile_columns, tile_rows,
+               frame_width, frame_height, interval_seconds, preview_name
+        FROM preview_assets
+        WHERE media_id IN ({','.join('?' * len(media_ids))})
+    ''', media_ids).fetchall()
+    return {
+        row[0]: {
+            'sprite_name': row[1],
+            'frame_count': row[2],
+            'columns': row[3],
+            'rows': row[4],
+            'frame_width': row[5],
+            'frame_height': row[6],
+            'interval_seconds': row[7],
+            'preview_name': row[8]
+        }
+        for row in rows
+    }
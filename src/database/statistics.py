@@ -212,6 +212,7 @@ class StatisticsOperations(DatabaseBase):
             'cache_hit_rate': 0.0,
             'queries_by_type': {},
             'database_size_mb': 0.0,
+            'connection_pool': self.get_pool_stats(),
             'performance_grade': 'UNKNOWN'
         }
         
@@ -315,6 +316,9 @@ class StatisticsOperations(DatabaseBase):
             logger.info(f"📊 Total Queries: {report['total_queries']}")
             logger.info(f"🎯 Cache Hit Rate: {report['cache_hit_rate']}%")
             logger.info(f"💾 Database Size: {report['database_size_mb']} MB")
+            pool = report['connection_pool']
+            logger.info(f"🔌 Connection Pool: {pool['open_connections']} open, "
+                       f"{pool['in_use']} in use, {pool['reuse_rate']}% reuse")
             logger.info(f"🏆 Performance Grade: {report['performance_grade']}")
             
             if report['queries_by_type']:
@@ -0,0 +1,88 @@
+"""
+Tag-Flow V2 - External Source Sync State
+Persistent high-water marks for incremental sync from the 4K Apps databases
+"""
+
+import time
+from typing import Dict, List, Optional
+from .base import DatabaseBase
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def create_sync_state_tables(conn):
+    """Create external_sync_state table (idempotent)"""
+    # last_position: high-water mark (download_item.id, recordingDate, photos.id)
+    # row_count/checksum: aggregate of the source rows at or below last_position,
+    # used to detect rows removed from the already-synced range
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS external_sync_state (
+            source_key TEXT PRIMARY KEY,
+            last_position INTEGER NOT NULL,
+            row_count INTEGER NOT NULL,
+            checksum INTEGER NOT NULL,
+            synced_at REAL NOT NULL
+        )
+    ''')
+
+
+class SyncStateOperations(DatabaseBase):
+    """Read/write sync cursors of external sources"""
+
+    def get_sync_state(self, source_key: str) -> Optional[Dict]:
+        """Get the stored cursor of a source (None if it was never synced)"""
+        self._ensure_initialized()
+        start_time = time.time()
+
+        with self.get_connection() as conn:
+            row = conn.execute('''
+                SELECT source_key, last_position, row_count, checksum, synced_at
+                FROM external_sync_state WHERE source_key = ?
+            ''', (source_key,)).fetchone()
+
+        self._track_query('get_sync_state', time.time() - start_time)
+        if not row:
+            return None
+        state = dict(row)
+        # Tables created before the integer checksum declared the column REAL
+        state['checksum'] = int(state['checksum'])
+        return state
+
+    def save_sync_state(self, source_key: str, last_position: int, row_count: int, checksum: int):
+        """Store (or advance) the cursor of a source"""
+        self._ensure_initialized()
+        start_time = time.time()
+
+        with self.get_connection() as conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO external_sync_state
+                    (source_key, last_position, row_count, checksum, synced_at)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (source_key, last_position, row_count, checksum, time.time()))
+            conn.commit()
+
+        self._track_query('save_sync_state', time.time() - start_time)
+
+    def reset_sync_state(self, source_key: str = None) -> int:
+        """Forget one cursor (or all of them) so the next sync reads the full source"""
+        self._ensure_initialized()
+
+        with self.get_connection() as conn:
+            if source_key is None:
+                cursor = conn.execute('DELETE FROM external_sync_state')
+            else:
+                cursor = conn.execute('DELETE FROM external_sync_state WHERE source_key = ?', (source_key,))
+            conn.commit()
+            return cursor.rowcount
+
+    def get_all_sync_states(self) -> List[Dict]:
+        """Get every stored cursor"""
+        self._ensure_initialized()
+
+        with self.get_connection() as conn:
+            rows = conn.execute('''
+                SELECT source_key, last_position, row_count, checksum, synced_at
+                FROM external_sync_state ORDER BY source_key
+            ''').fetchall()
+            return [dict(row) for row in rows]
@@ -0,0 +1,268 @@
+"""
+Tag-Flow V2 - Thumbnail Key Index
+Precomputed thumbnail file name → media / fallback image mapping used when a
+thumbnail is missing on disk
+"""
+
+import glob
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+import logging
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+def create_thumbnail_key_tables(conn):
+    """Create thumbnail_keys table (idempotent)"""
+    # fallback_path: image served instead of a missing thumbnail (first image
+    # of a carousel, or the media itself when it is an image); NULL = default
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS thumbnail_keys (
+            thumbnail_key TEXT PRIMARY KEY,
+            media_id INTEGER NOT NULL REFERENCES media(id),
+            fallback_path TEXT
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_thumbnail_keys_media ON thumbnail_keys(media_id)')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_thumbnail_keys_media_delete
+        AFTER DELETE ON media
+        BEGIN
+            DELETE FROM thumbnail_keys WHERE media_id = OLD.id;
+        END
+    ''')
+
+    # Size variants (grid/card/detail × webp/avif/jpeg) written next to the thumbnail
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS thumbnail_variants (
+            media_id INTEGER NOT NULL REFERENCES media(id),
+            variant TEXT NOT NULL,
+            format TEXT NOT NULL,
+            file_name TEXT NOT NULL,
+            width INTEGER NOT NULL,
+            height INTEGER NOT NULL,
+            file_size INTEGER NOT NULL,
+            PRIMARY KEY (media_id, variant, format)
+        ) WITHOUT ROWID
+    ''')
+
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_thumbnail_variants_media_delete
+        AFTER DELETE ON media
+        BEGIN
+            DELETE FROM thumbnail_variants WHERE media_id = OLD.id;
+        END
+    ''')
+
+
+def thumbnail_key_for(file_path) -> str:
+    """Thumbnail file name generated for a media file (ThumbnailGenerator naming)"""
+    return f"{Path(str(file_path)).stem}_thumb.jpg"
+
+
+VARIANT_EXTENSIONS = {'avif': 'avif', 'webp': 'webp', 'jpeg': 'jpg'}
+
+# Hover-scrub assets stored next to the thumbnail (sprite sheet, short clip)
+PREVIEW_ASSET_EXTENSIONS = {'sprite': 'jpg', 'preview': 'mp4'}
+
+# {stem}_{asset}-{layout tag}.{ext}; untagged names come from older releases
+_PREVIEW_ASSET_NAME = re.compile(r'^(.+)_(sprite|preview)(?:-[0-9a-f]{8})?\.(?:jpg|mp4)$')
+
+
+def thumbnail_variant_name(thumbnail_name: str, variant: str, fmt: str) -> str:
+    """
+    File name of a size variant of a thumbnail ({stem}_thumb_{variant}.{ext})
+
+    Every variant gets its own JPEG, even one sized like THUMBNAIL_SIZE: the
+    generator may render the base at another size (ultra-fast mode shrinks it).
+    """
+    return f"{Path(thumbnail_name).stem}_{variant}.{VARIANT_EXTENSIONS.get(fmt, fmt)}"
+
+
+def preview_layout(asset: str) -> str:
+    """Settings that change the content of a hover-scrub asset"""
+    if asset == 'sprite':
+        frame_width, frame_height = config.PREVIEW_SPRITE_FRAME_SIZE
+        return f"{config.PREVIEW_SPRITE_FRAMES}/{config.PREVIEW_SPRITE_COLUMNS}:{frame_width}x{frame_height}"
+    return f"{config.PREVIEW_CLIP_SECONDS}/{config.PREVIEW_CLIP_WIDTH}"
+
+
+def preview_asset_name(thumbnail_name: str, asset: str) -> str:
+    """
+    File name of a hover-scrub asset of a thumbnail ({stem}_sprite-{tag}.jpg, {stem}_preview-{tag}.mp4)
+
+    The tag hashes the asset layout, so a content-addressed thumbnail keeps its
+    key when a preview setting changes and the asset gets a new name instead.
+    """
+    tag = hashlib.sha1(preview_layout(asset).encode('utf-8')).hexdigest()[:8]
+    return f"{Path(thumbnail_name).stem}_{asset}-{tag}.{PREVIEW_ASSET_EXTENSIONS[asset]}"
+
+
+def preview_asset_owner(file_name: str) -> Optional[str]:
+    """Stem of the thumbnail a hover-scrub asset belongs to (any layout), None otherwise"""
+    match = _PREVIEW_ASSET_NAME.match(file_name)
+    return match.group(1) if match else None
+
+
+def thumbnail_variant_names(thumbnail_name: str) -> List[str]:
+    """Every derived file name a thumbnail may have (size variants and current preview assets)"""
+    names = [
+        thumbnail_variant_name(thumbnail_name, variant, fmt)
+        for variant in config.THUMBNAIL_VARIANTS
+        for fmt in VARIANT_EXTENSIONS
+    ]
+    names.extend(preview_asset_name(thumbnail_name, asset) for asset in PREVIEW_ASSET_EXTENSIONS)
+    return names
+
+
+def thumbnail_derived_files(thumbnail_path) -> List[Path]:
+    """Derived files of a thumbnail on disk, including preview assets of earlier layouts"""
+    thumbnail_path = Path(str(thumbnail_path))
+    paths = {thumbnail_path.with_name(name) for name in thumbnail_variant_names(thumbnail_path.name)}
+    for asset in PREVIEW_ASSET_EXTENSIONS:
+        paths.update(path for path in thumbnail_path.parent.glob(f"{glob.escape(thumbnail_path.stem)}_{asset}*")
+                     if preview_asset_owner(path.name) == thumbnail_path.stem)
+    return sorted(path for path in paths if path.is_file())
+
+
+def index_thumbnail_variants(conn, media_id: int, thumbnail_path) -> int:
+    """
+    Record the size variants found next to a generated thumbnail (caller commits)
+
+    Replaces the previous rows of the media; only files present on disk are
+    recorded, with their size in bytes.
+    """
+    thumbnail_path = Path(str(thumbnail_path))
+    conn.execute('DELETE FROM thumbnail_variants WHERE media_id = ?', (media_id,))
+
+    rows = []
+    for variant, (width, height) in config.THUMBNAIL_VARIANTS.items():
+        for fmt in VARIANT_EXTENSIONS:
+            file_name = thumbnail_variant_name(thumbnail_path.name, variant, fmt)
+            try:
+                file_size = os.stat(thumbnail_path.parent / file_name).st_size
+            except OSError:
+                continue
+            rows.append((media_id, variant, fmt, file_name, width, height, file_size))
+
+    if rows:
+        conn.executemany('''
+            INSERT INTO thumbnail_variants (media_id, variant, format, file_name, width, height, file_size)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+    return len(rows)
+
+
+def _post_rows(media_rows: List) -> List[tuple]:
+    """thumbnail_keys rows for the media of one post (ordered by carousel_order)"""
+    first_image = next((row[1] for row in media_rows if row[2] == 'image'), None)
+    is_carousel = len(media_rows) > 1
+
+    rows = []
+    for media_id, file_path, media_type in media_rows:
+        if is_carousel:
+            fallback = first_image
+        else:
+            fallback = file_path if media_type == 'image' else None
+        rows.append((thumbnail_key_for(file_path), media_id, fallback))
+    return rows
+
+
+def index_post_thumbnails(conn, post_id: int) -> int:
+    """(Re)index the thumbnail keys of every media of a post (caller commits)"""
+    media_rows = conn.execute('''
+        SELECT id, file_path, media_type FROM media
+        WHERE post_id = ?
+        ORDER BY carousel_order ASC, id ASC
+    ''', (post_id,)).fetchall()
+    if not media_rows:
+        return 0
+
+    rows = _post_rows([tuple(row) for row in media_rows])
+    conn.executemany('''
+        INSERT OR REPLACE INTO thumbnail_keys (thumbnail_key, media_id, fallback_path)
+        VALUES (?, ?, ?)
+    ''', rows)
+    return len(rows)
+
+
+def index_posts_thumbnails(conn, posts_media: List[List[tuple]]) -> int:
+    """
+    Index the thumbnail keys of posts whose media rows are already known
+
+    posts_media holds, per post, its (media_id, file_path, media_type) rows
+    in carousel order; avoids re-reading media after a bulk insert (caller
+    commits).
+    """
+    rows: List[tuple] = []
+    for media_rows in posts_media:
+        rows.extend(_post_rows(media_rows))
+    return _write_rows(conn, rows)
+
+
+def index_generated_thumbnail(conn, media_id: int, thumbnail_path) -> None:
+    """Map a generated thumbnail name to its media, keeping a known fallback"""
+    conn.execute('''
+        INSERT INTO thumbnail_keys (thumbnail_key, media_id, fallback_path)
+        VALUES (?, ?, NULL)
+        ON CONFLICT(thumbnail_key) DO UPDATE SET media_id = excluded.media_id
+    ''', (Path(str(thumbnail_path)).name, media_id))
+
+
+def rebuild_thumbnail_keys(conn, batch_size: int = 5000) -> int:
+    """Backfill thumbnail_keys from every media row"""
+    conn.execute('DELETE FROM thumbnail_keys')
+
+    total = 0
+    pending: List[tuple] = []
+    current_post = None
+    post_media: List[tuple] = []
+
+    cursor = conn.execute('''
+        SELECT post_id, id, file_path, media_type FROM media
+        ORDER BY post_id, carousel_order, id
+    ''')
+    for post_id, media_id, file_path, media_type in cursor:
+        if post_id != current_post and post_media:
+            pending.extend(_post_rows(post_media))
+            post_media = []
+        current_post = post_id
+        post_media.append((media_id, file_path, media_type))
+
+        if len(pending) >= batch_size:
+            total += _write_rows(conn, pending)
+            pending = []
+
+    if post_media:
+        pending.extend(_post_rows(post_media))
+    total += _write_rows(conn, pending)
+    return total
+
+
+def _write_rows(conn, rows: List[tuple]) -> int:
+    if rows:
+        conn.executemany('''
+            INSERT OR REPLACE INTO thumbnail_keys (thumbnail_key, media_id, fallback_path)
+            VALUES (?, ?, ?)
+        ''', rows)
+    return len(rows)
+
+
+def resolve_thumbnail_key(conn, thumbnail_key: str) -> Optional[Dict]:
+    """Media and fallback image of a thumbnail name (None if unknown or deleted)"""
+    row = conn.execute('''
+        SELECT tk.media_id, tk.fallback_path
+        FROM thumbnail_keys tk
+        JOIN media m ON m.id = tk.media_id
+        JOIN posts p ON p.id = m.post_id
+        WHERE tk.thumbnail_key = ? AND p.deleted_at IS NULL
+    ''', (thumbnail_key,)).fetchone()
+    if not row:
+        return None
+    return {'media_id': row[0], 'fallback_path': row[1]}
@@ -0,0 +1,227 @@
+"""
+Tag-Flow V2 - Content-Addressed Thumbnail Store
+Thumbnails keyed by a hash of media id, source size/mtime and render
+parameters, sharded into two-level subdirectories and tracked in a manifest
+"""
+
+import hashlib
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+from config import config
+from .thumbnail_keys import (
+    VARIANT_EXTENSIONS, index_generated_thumbnail, index_thumbnail_variants,
+    thumbnail_variant_name, thumbnail_derived_files
+)
+
+logger = logging.getLogger(__name__)
+
+# {sha1}.jpg and its derived files ({sha1}_grid.webp, {sha1}_sprite-{tag}.jpg, {sha1}_preview-{tag}.mp4, ...)
+_CONTENT_NAME = re.compile(r'^([0-9a-f]{40})(?:_[A-Za-z0-9-]+)?\.[a-z0-9]+$')
+
+# Render signature of thumbnails adopted from the legacy flat layout
+MIGRATED_RENDER_SIGNATURE = 'legacy-flat'
+
+
+def create_thumbnail_store_tables(conn):
+    """Create thumbnail_store manifest table (idempotent)"""
+    # No delete trigger on media: a manifest row whose media is gone is
+    # exactly how orphaned files are found without walking the directory
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS thumbnail_store (
+            content_key TEXT PRIMARY KEY,
+            media_id INTEGER NOT NULL,
+            relative_path TEXT NOT NULL,
+            file_size INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_thumbnail_store_media ON thumbnail_store(media_id)')
+
+
+def thumbnail_content_key(media_id: int, source_size: int, source_mtime_ns: int,
+                          render_signature: str) -> str:
+    """Stable key of a thumbnail: changes whenever the source or the render parameters change"""
+    raw = f"{media_id}:{source_size}:{source_mtime_ns}:{render_signature}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def content_key_of(file_name: str) -> Optional[str]:
+    """Content key of a stored thumbnail or variant name (None for legacy flat names)"""
+    match = _CONTENT_NAME.match(file_name)
+    return match.group(1) if match else None
+
+
+def sharded_thumbnail_path(root, file_name: str) -> Path:
+    """
+    Location of a thumbnail name under the thumbnails root
+
+    Content-addressed names live in root/ab/cd/; legacy names stay flat.
+    """
+    root = Path(root)
+    key = content_key_of(file_name)
+    if key is None:
+        return root / file_name
+    return root / key[:2] / key[2:4] / file_name
+
+
+def record_stored_thumbnail(conn, media_id: int, thumbnail_path) -> bool:
+    """Add a content-addressed thumbnail to the manifest (caller commits)"""
+    thumbnail_path = Path(str(thumbnail_path))
+    key = content_key_of(thumbnail_path.name)
+    if key is None:
+        return False
+
+    try:
+        file_size = os.stat(thumbnail_path).st_size
+    except OSError:
+        file_size = 0
+
+    conn.execute('''
+        INSERT OR REPLACE INTO thumbnail_store (content_key, media_id, relative_path, file_size, created_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''', (key, media_id, f"{key[:2]}/{key[2:4]}/{thumbnail_path.name}", file_size, time.time()))
+    return True
+
+
+def find_orphaned_thumbnails(conn) -> List[Tuple[str, str]]:
+    """
+    (content_key, relative_path) of stored thumbnails no media points to
+
+    Covers hard-deleted media and thumbnails superseded by a new key (source
+    modified or render parameters changed). Soft-deleted posts keep theirs
+    so a restore does not need to regenerate them.
+    """
+    return [tuple(row) for row in conn.execute('''
+        SELECT ts.content_key, ts.relative_path
+        FROM thumbnail_store ts
+        LEFT JOIN media m ON m.id = ts.media_id
+        WHERE m.id IS NULL
+           OR m.thumbnail_path IS NULL
+           OR instr(m.thumbnail_path, ts.content_key) = 0
+    ''').fetchall()]
+
+
+def forget_stored_thumbnails(conn, content_keys: List[str]) -> int:
+    """Remove manifest entries once their files are deleted (caller commits)"""
+    conn.executemany('DELETE FROM thumbnail_store WHERE content_key = ?', [(key,) for key in content_keys])
+    return len(content_keys)
+
+
+def count_flat_thumbnails(conn) -> int:
+    """Media whose thumbnail still uses a legacy flat name"""
+    return conn.execute('''
+        SELECT COUNT(*) FROM media
+        WHERE thumbnail_path IS NOT NULL AND thumbnail_path != ''
+          AND thumbnail_path LIKE '%\\_thumb.jpg' ESCAPE '\\'
+    ''').fetchone()[0]
+
+
+def migrate_flat_thumbnails(conn, root=None, batch_size: int = 500,
+                            progress_callback: Optional[Callable] = None) -> Dict[str, int]:
+    """
+    Move legacy {stem}_thumb.jpg thumbnails (and their variants) into the store
+
+    Every media gets its own content-addressed copy, so media that shared a
+    colliding flat name stop sharing a file. media.thumbnail_path,
+    thumbnail_keys, thumbnail_variants and the manifest are updated; commits
+    every batch_size media so an interrupted run resumes where it stopped.
+    progress_callback(processed, total, current_item) is called per media.
+    """
+    root = Path(root or config.THUMBNAILS_PATH)
+    stats = {'migrated': 0, 'missing': 0, 'already_stored': 0}
+
+    rows = conn.execute('''
+        SELECT id, file_path, thumbnail_path FROM media
+        WHERE thumbnail_path IS NOT NULL AND thumbnail_path != ''
+        ORDER BY thumbnail_path, id
+    ''').fetchall()
+
+    # Flat name → media using it (more than one when video stems collide)
+    by_name: Dict[str, List[Tuple[int, str]]] = {}
+    for media_id, file_path, thumbnail_path in rows:
+        name = Path(str(thumbnail_path)).name
+        if content_key_of(name):
+            stats['already_stored'] += 1
+            continue
+        by_name.setdefault(name, []).append((media_id, file_path))
+
+    total = sum(len(owners) for owners in by_name.values())
+    processed = 0
+    pending = 0
+    for name, owners in by_name.items():
+        source = root / name
+        for position, (media_id, file_path) in enumerate(owners):
+            processed += 1
+            if progress_callback:
+                progress_callback(processed, total, name)
+            try:
+                stat = os.stat(file_path)
+                source_size, source_mtime_ns = stat.st_size, stat.st_mtime_ns
+            except OSError:
+                source_size, source_mtime_ns = 0, 0
+            key = thumbnail_content_key(media_id, source_size, source_mtime_ns, MIGRATED_RENDER_SIGNATURE)
+            target = sharded_thumbnail_path(root, f"{key}.jpg")
+
+            # A target already on disk comes from a run interrupted before its commit
+            if not target.is_file():
+                if not source.is_file():
+                    stats['missing'] += 1
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+
+                # The last owner takes the original files, the others get copies
+                move = position == len(owners) - 1
+                _transfer(source, target, move)
+                for old_name, new_name in _variant_pairs(name, target.name):
+                    old_variant = root / old_name
+                    if old_variant.is_file():
+                        _transfer(old_variant, target.with_name(new_name), move)
+
+            conn.execute('UPDATE media SET thumbnail_path = ? WHERE id = ?', (str(target), media_id))
+            index_generated_thumbnail(conn, media_id, target)
+            index_thumbnail_variants(conn, media_id, target)
+            record_stored_thumbnail(conn, media_id, target)
+            stats['migrated'] += 1
+
+            pending += 1
+            if pending >= batch_size:
+                conn.commit()
+                pending = 0
+
+    conn.commit()
+    return stats
+
+
+def delete_stored_files(root, relative_path: str) -> int:
+    """Delete a stored thumbnail, its variants and preview assets (returns files removed)"""
+    base = Path(root) / relative_path
+    removed = 0
+    for path in [base, *thumbnail_derived_files(base)]:
+        try:
+            path.unlink()
+            removed += 1
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def _variant_pairs(old_name: str, new_name: str) -> List[Tuple[str, str]]:
+    """(legacy, stored) file names of every variant of a thumbnail"""
+    return [
+        (thumbnail_variant_name(old_name, variant, fmt), thumbnail_variant_name(new_name, variant, fmt))
+        for variant in config.THUMBNAIL_VARIANTS
+        for fmt in VARIANT_EXTENSIONS
+    ]
+
+
+def _transfer(source: Path, target: Path, move: bool):
+    if move:
+        os.replace(source, target)
+    else:
+        shutil.copy2(source, target)
@@ -7,10 +7,17 @@ import json
 import time
 from typing import Dict, List, Optional, Tuple
 from .base import DatabaseBase
+from .characters import CHARACTER_SOURCES, sync_media_characters
+from .thumbnail_keys import index_generated_thumbnail, index_thumbnail_variants
+from .thumbnail_store import record_stored_thumbnail
+from .preview_assets import record_preview_assets, drop_stale_preview_assets
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Update keys stored outside the media columns (see _sync_preview_assets)
+NON_COLUMN_FIELDS = ('id', 'created_at', 'preview_assets')
+
 
 class VideoOperations(DatabaseBase):
     """Video CRUD operations with performance optimizations"""
@@ -289,11 +296,15 @@ class VideoOperations(DatabaseBase):
             self._track_query('count_videos', time.time() - start_time)
             return count
 
-    def update_video(self, video_id: int, updates: Dict) -> bool:
+    def update_video(self, video_id: int, updates: Dict,
+                     character_confidences: Dict[str, float] = None) -> bool:
         """
         Update video with provided data - NUEVO ESQUEMA
         Note: This method currently updates the `videos` table.
         It should ideally be updating the `media` table according to the new schema.
+        
+        Character fields are also mirrored into media_characters
+        (character_confidences: optional {name: confidence}).
         """
         if not updates:
             return False
@@ -310,7 +321,7 @@ class VideoOperations(DatabaseBase):
                 # JSON fields need special handling
                 set_clauses.append(f"{field} = ?")
                 params.append(self._safe_json_dumps(value))
-            elif field not in ['id', 'created_at']:  # Don't allow updating these fields
+            elif field not in NON_COLUMN_FIELDS:  # Don't allow updating these fields
                 set_clauses.append(f"{field} = ?")
                 params.append(value)
 
@@ -327,6 +338,11 @@ class VideoOperations(DatabaseBase):
             cursor = conn.execute(query, params)
             success = cursor.rowcount > 0
             
+            if success:
+                self._sync_character_index(conn, video_id, updates, character_confidences)
+                self._sync_thumbnail_key(conn, video_id, updates)
+                self._sync_preview_assets(conn, video_id, updates)
+            
             self._track_query('update_video', time.time() - start_time)
             if success:
                 logger.debug(f"Video {video_id} updated successfully")
@@ -346,58 +362,132 @@ class VideoOperations(DatabaseBase):
         
         with self.get_connection() as conn:
             try:
+                items = []
                 for update_data in video_updates:
                     video_id = update_data.get('id')
                     if not video_id:
                         failed += 1
                         continue
-                    
-                    updates = {k: v for k, v in update_data.items() if k != 'id'}
-                    if self._update_single_video(conn, video_id, updates):
-                        successful += 1
-                    else:
-                        failed += 1
+                    items.append((video_id, {k: v for k, v in update_data.items() if k != 'id'}, None))
+                
+                results = self._apply_video_updates(conn, items)
+                successful += sum(1 for ok in results if ok)
+                failed += sum(1 for ok in results if not ok)
                 
                 conn.commit()
                 
             except Exception as e:
                 logger.error(f"Error in batch update: {e}")
                 conn.rollback()
+                successful = 0
                 failed = len(video_updates)
         
         self._track_query('batch_update_videos', time.time() - start_time)
         logger.info(f"Batch update completed: {successful} successful, {failed} failed")
         return successful, failed
     
-    def _update_single_video(self, conn, video_id: int, updates: Dict) -> bool:
+    def write_video_updates(self, items: List[Tuple[int, Dict, Optional[Dict[str, float]]]]) -> List[bool]:
         """
-        Update single video within existing transaction - NUEVO ESQUEMA
-        Note: This method currently updates the `videos` table.
-        It should ideally be updating the `media` table according to the new schema.
+        Apply (video_id, updates, character_confidences) items in one transaction
+        
+        Same semantics as batch_update_videos but returns per-item success. If
+        the batch transaction fails, items are retried one by one so a single
+        bad row does not discard the rest.
         """
-        if not updates:
-            return False
-
-        set_clauses = []
-        params = []
-
-        for field, value in updates.items():
-            if field in ['detected_characters', 'final_characters']:
-                set_clauses.append(f"{field} = ?")
-                params.append(self._safe_json_dumps(value))
-            elif field not in ['id', 'created_at']:
-                set_clauses.append(f"{field} = ?")
+        if not items:
+            return []
+        
+        self._ensure_initialized()
+        start_time = time.time()
+        
+        try:
+            with self.get_connection() as conn:
+                results = self._apply_video_updates(conn, items)
+                conn.commit()
+        except Exception as e:
+            logger.warning(f"Batch write failed ({len(items)} items), retrying individually: {e}")
+            results = []
+            for video_id, updates, confidences in items:
+                try:
+                    results.append(self.update_video(video_id, updates, confidences))
+                except Exception as item_error:
+                    logger.error(f"Error updating video {video_id}: {item_error}")
+                    results.append(False)
+        
+        self._track_query('write_video_updates', time.time() - start_time)
+        return results
+    
+    def _apply_video_updates(self, conn, items: List[Tuple[int, Dict, Optional[Dict[str, float]]]]) -> List[bool]:
+        """
+        Apply updates inside an open transaction using executemany
+        
+        Updates are grouped by their set of columns so each group runs as a
+        single prepared UPDATE statement.
+        """
+        results = [False] * len(items)
+        
+        # Only existing media rows count as successful updates
+        existing_ids = set()
+        video_ids = list({video_id for video_id, _, _ in items})
+        for i in range(0, len(video_ids), 500):
+            chunk = video_ids[i:i + 500]
+            placeholders = ','.join(['?' for _ in chunk])
+            cursor = conn.execute(f'SELECT id FROM media WHERE id IN ({placeholders})', chunk)
+            existing_ids.update(row[0] for row in cursor.fetchall())
+        
+        groups: Dict[Tuple[str, ...], List[Tuple[int, list]]] = {}
+        for index, (video_id, updates, _) in enumerate(items):
+            fields = tuple(field for field in (updates or {}) if field not in NON_COLUMN_FIELDS)
+            if not fields or video_id not in existing_ids:
+                continue
+            
+            params = []
+            for field in fields:
+                value = updates[field]
+                if field in ['detected_characters', 'final_characters']:
+                    value = self._safe_json_dumps(value)
                 params.append(value)
+            params.append(video_id)
+            groups.setdefault(fields, []).append((index, params))
+        
+        for fields, rows in groups.items():
+            set_clauses = [f"{field} = ?" for field in fields]
+            set_clauses.append("last_updated = CURRENT_TIMESTAMP")
+            query = f"UPDATE media SET {', '.join(set_clauses)} WHERE id = ?"
+            conn.executemany(query, [params for _, params in rows])
+            for index, _ in rows:
+                results[index] = True
+        
+        # Character index follows applied updates in submission order
+        for index, (video_id, updates, confidences) in enumerate(items):
+            if results[index]:
+                self._sync_character_index(conn, video_id, updates, confidences)
+                self._sync_thumbnail_key(conn, video_id, updates)
+                self._sync_preview_assets(conn, video_id, updates)
+        
+        return results
+    
+    def _sync_character_index(self, conn, video_id: int, updates: Dict,
+                              character_confidences: Dict[str, float] = None):
+        """Mirror updated character JSON fields into media_characters"""
+        for source, field in CHARACTER_SOURCES.items():
+            if field in updates:
+                sync_media_characters(conn, video_id, source, updates[field], character_confidences)
 
-        if not set_clauses:
-            return False
-
-        set_clauses.append("last_updated = CURRENT_TIMESTAMP")
-        params.append(video_id)
+    def _sync_thumbnail_key(self, conn, video_id: int, updates: Dict):
+        """Map a newly generated thumbnail name to its media (thumbnail_keys, variants, store manifest)"""
+        if updates.get('thumbnail_path'):
+            index_generated_thumbnail(conn, video_id, updates['thumbnail_path'])
+            index_thumbnail_variants(conn, video_id, updates['thumbnail_path'])
+            record_stored_thumbnail(conn, video_id, updates['thumbnail_path'])
 
-        query = f"UPDATE media SET {', '.join(set_clauses)} WHERE id = ?"
-        cursor = conn.execute(query, params)
-        return cursor.rowcount > 0
+    def _sync_preview_assets(self, conn, video_id: int, updates: Dict):
+        """Record sprite sheet / preview clip produced by the analysis pipeline"""
+        if updates.get('preview_assets'):
+            record_preview_assets(conn, video_id, updates['preview_assets'])
+        elif updates.get('thumbnail_path'):
+            # A new thumbnail without new assets: the old sprite lives under the old key
+            drop_stale_preview_assets(conn, video_id, updates['thumbnail_path'])
 
     def update_video_characters(self, video_id: int, characters_json: str = None) -> bool:
         """Update video characters specifically"""
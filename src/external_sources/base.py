@@ -11,6 +11,10 @@ from abc import ABC, abstractmethod
 
 logger = logging.getLogger(__name__)
 
+# Sync keys are reduced modulo this prime before summing, so the checksum is
+# an exact integer that cannot overflow (unlike a float TOTAL compared with ==)
+SYNC_CHECKSUM_MODULUS = 2147483647
+
 
 class ExternalSourceHandler(ABC):
     """Base class for all external source handlers"""
@@ -107,6 +111,9 @@ class DatabaseExtractor(ExternalSourceHandler):
     def __init__(self, db_path: Optional[Path] = None):
         super().__init__(db_path)
         self.db_path = db_path
+        # Failed queries/extractions: tells an unreadable (locked, corrupt)
+        # database apart from one with no new rows, which both yield []
+        self.extraction_errors = 0
     
     def is_available(self) -> bool:
         """Check if database is available"""
@@ -120,6 +127,7 @@ class DatabaseExtractor(ExternalSourceHandler):
         try:
             conn = self._get_connection(self.db_path)
             if not conn:
+                self.extraction_errors += 1
                 return []
             
             with conn:
@@ -127,16 +135,57 @@ class DatabaseExtractor(ExternalSourceHandler):
                 return cursor.fetchall()
                 
         except Exception as e:
+            self.extraction_errors += 1
             self.logger.error(f"Database query error: {e}")
             return []
+    
+    def get_sync_snapshot(self, upto: Optional[int] = None) -> Optional[Dict]:
+        """
+        Cheap aggregate of the downloaded rows for incremental sync
+        
+        Returns None when the source does not support sync cursors. Otherwise:
+        high_water (max sync key), row_count/checksum (all rows) and
+        synced_count/synced_checksum (rows with key <= upto), computed in a
+        single scan of the external database.
+        """
+        return None
+    
+    def _query_sync_snapshot(self, from_where: str, key_expr: str, upto: Optional[int] = None) -> Optional[Dict]:
+        """Run the snapshot aggregate over `SELECT ... {from_where}` keyed on key_expr"""
+        query = f"""
+        SELECT 
+            MAX({key_expr}) as high_water,
+            COUNT(*) as row_count,
+            COALESCE(SUM(CAST({key_expr} AS INTEGER) % {SYNC_CHECKSUM_MODULUS}), 0) as checksum,
+            COUNT(CASE WHEN {key_expr} <= ? THEN 1 END) as synced_count,
+            COALESCE(SUM(CASE WHEN {key_expr} <= ? THEN CAST({key_expr} AS INTEGER) % {SYNC_CHECKSUM_MODULUS} END), 0) as synced_checksum
+        {from_where}
+        """
+        bound = upto if upto is not None else -1
+        rows = self._execute_query(query, (bound, bound))
+        if not rows:
+            return None
+        
+        row = rows[0]
+        return {
+            'high_water': row['high_water'],
+            'row_count': row['row_count'],
+            'checksum': row['checksum'],
+            'synced_count': row['synced_count'],
+            'synced_checksum': row['synced_checksum']
+        }
 
 
 class FolderExtractor(ExternalSourceHandler):
     """Base class for folder-based external sources"""
     
+    video_extensions = {'.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm'}
+    
     def __init__(self, base_path: Optional[Path] = None):
         super().__init__(base_path)
         self.base_path = base_path
+        # Incremental reads not yet confirmed by the caller (consumer -> scanned_at)
+        self._pending_scan_cursors: Dict[str, float] = {}
     
     def is_available(self) -> bool:
         """Check if base folder is available"""
@@ -147,19 +196,69 @@ class FolderExtractor(ExternalSourceHandler):
         if not directory.exists():
             return []
         
-        video_extensions = {'.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm'}
         video_files = []
         
         try:
             for file_path in directory.rglob('*'):
                 if (file_path.is_file() and 
-                    file_path.suffix.lower() in video_extensions):
+                    file_path.suffix.lower() in self.video_extensions):
                     video_files.append(file_path)
         except Exception as e:
             self.logger.error(f"Error scanning directory {directory}: {e}")
         
         return video_files
     
+    def _scan_consumer(self, directory: Path) -> str:
+        """Cursor name of this handler for a directory in the file_state index"""
+        from src.database.file_index import normalize_path
+        return f"{self.__class__.__name__}:{normalize_path(directory)}"
+    
+    def _get_changed_video_files(self, directory: Path) -> List[Path]:
+        """
+        Get only video files added or modified since this handler last read the directory
+        
+        The cursor is not moved here: it stays pending until the caller has
+        processed the files and calls advance_scan_cursors().
+        """
+        if not directory.exists():
+            return []
+        
+        from src.database.file_index import get_file_index
+        index = get_file_index()
+        consumer = self._scan_consumer(directory)
+        
+        since = index.get_cursor(consumer)
+        diff = index.scan(directory, extensions=self.video_extensions)
+        if diff.removed:
+            self.logger.info(f"🗑️ {len(diff.removed)} videos removed from {directory}")
+        
+        # Changes recorded by any scan (also other consumers') since our cursor
+        changed = index.get_changed_since(directory, since, self.video_extensions)
+        self._pending_scan_cursors[consumer] = diff.scanned_at
+        return [Path(state.path) for state in changed]
+    
+    def _drop_scan_cursor(self, directory: Path):
+        """Keep a directory's cursor where it was (its changes were not fully returned)"""
+        self._pending_scan_cursors.pop(self._scan_consumer(directory), None)
+    
+    def advance_scan_cursors(self):
+        """Store the cursors of the incremental reads once their files were processed"""
+        if not self._pending_scan_cursors:
+            return
+        
+        from src.database.file_index import get_file_index
+        index = get_file_index()
+        for consumer, scanned_at in self._pending_scan_cursors.items():
+            try:
+                index.set_cursor(consumer, scanned_at)
+            except Exception as e:
+                self.logger.warning(f"⚠️ Could not save scan cursor {consumer}: {e}")
+        self._pending_scan_cursors.clear()
+    
+    def discard_scan_cursors(self):
+        """Forget pending cursors so the same changes are returned again next time"""
+        self._pending_scan_cursors.clear()
+    
     def _get_file_stats(self, file_path: Path) -> Dict:
         """Get file statistics"""
         try:
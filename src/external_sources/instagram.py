@@ -34,8 +34,20 @@ class InstagramStogramHandler(DatabaseExtractor):
         else:
             self.base_path = base_path
     
-    def extract_videos(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
-        """🆕 NUEVA ESTRUCTURA: Extraer contenido de Instagram desde 4K Stogram con soporte completo"""
+    def get_sync_snapshot(self, upto: Optional[int] = None) -> Optional[Dict]:
+        """Snapshot de photos descargadas (clave incremental: photos.id)"""
+        if not self.is_available():
+            return None
+        return self._query_sync_snapshot(
+            "FROM photos p WHERE p.file IS NOT NULL AND p.state = 4", 'p.id', upto
+        )
+    
+    def extract_videos(self, offset: int = 0, limit: Optional[int] = None, min_photo_id: Optional[int] = None) -> List[Dict]:
+        """🆕 NUEVA ESTRUCTURA: Extraer contenido de Instagram desde 4K Stogram con soporte completo
+        
+        min_photo_id: solo posts con alguna foto de id mayor (extracción incremental);
+        se devuelven todos los elementos de esos posts para no partir carruseles
+        """
         if limit is not None:
             self.logger.debug(f"Extrayendo contenido de Instagram (offset: {offset}, limit: {limit})...")
         else:
@@ -55,10 +67,11 @@ class InstagramStogramHandler(DatabaseExtractor):
                 FROM photos p
                 WHERE p.file IS NOT NULL AND p.state = 4
                 GROUP BY p.web_url
+                HAVING MAX(p.id) > ?
                 ORDER BY MIN(p.id) ASC
                 LIMIT ? OFFSET ?
                 """
-                urls = [row[0] for row in self._execute_query(url_query, (limit, offset))]
+                urls = [row[0] for row in self._execute_query(url_query, (min_photo_id or 0, limit, offset))]
                 
                 if not urls:
                     rows = []
@@ -107,9 +120,19 @@ class InstagramStogramHandler(DatabaseExtractor):
                 FROM photos p
                 LEFT JOIN subscriptions s ON p.subscriptionId = s.id
                 WHERE p.file IS NOT NULL AND p.state = 4
+                """
+                if min_photo_id:
+                    query += """
+                AND p.web_url IN (
+                    SELECT web_url FROM photos
+                    WHERE file IS NOT NULL AND state = 4 AND id > ?
+                )
                 ORDER BY p.id ASC
                 """
-                rows = self._execute_query(query)
+                    rows = self._execute_query(query, (min_photo_id,))
+                else:
+                    query += " ORDER BY p.id ASC"
+                    rows = self._execute_query(query)
 
             # Configurar base path para Instagram
             instagram_base = self.base_path or Path(".")
@@ -130,6 +153,7 @@ class InstagramStogramHandler(DatabaseExtractor):
             return content
 
         except Exception as e:
+            self.extraction_errors += 1
             self.logger.error(f"Error extrayendo contenido de Instagram desde Stogram: {e}")
             return content
 
@@ -70,59 +70,83 @@ class ExternalSourcesManager:
         # Extract videos from 4K BD
         videos = self.youtube_handler.extract_videos(platform_filter=platform_filter, limit=limit)
         
-        populated_count = 0
-        
-        for video_data in videos:
-            try:
-                # Process video through new structure
-                self._process_4k_youtube_video(video_data)
-                populated_count += 1
-                
-            except Exception as e:
-                logger.error(f"Failed to process YouTube video {video_data.get('title', 'Unknown')}: {e}")
-                continue
+        # Import through the bulk path (one chunked transaction per batch)
+        result = self.import_videos(videos, '4k_youtube')
+        for _, message in result['errors']:
+            logger.error(f"Failed to process YouTube video {message}")
+        populated_count = len(videos) - len(result['errors'])
         
         logger.info(f"Populated {populated_count} videos from 4K Video Downloader")
         return populated_count
 
+    def import_videos(self, videos: List[Dict], source: str, progress_callback=None) -> Dict[str, Any]:
+        """
+        Import videos of a 4K source ('4k_youtube', '4k_tokkit', '4k_stogram') in bulk
+
+        Each video is turned into a post record and the whole list goes through
+        DatabaseManager.import_posts (dimensions resolved in memory, executemany
+        in chunked transactions). 'post_ids' and 'errors' are indexed by video.
+        """
+        builders = {
+            '4k_youtube': self._build_4k_youtube_record,
+            '4k_tokkit': self._build_4k_tokkit_record,
+            '4k_stogram': self._build_4k_stogram_record
+        }
+        build_record = builders[source]
+
+        records, positions, errors = [], [], []
+        for i, video_data in enumerate(videos):
+            try:
+                records.append(build_record(video_data))
+                positions.append(i)
+            except Exception as e:
+                errors.append((i, f"{video_data.get('file_path', 'unknown')}: {e}"))
+
+        from src.service_factory import get_database
+        result = get_database().import_posts(records, progress_callback=progress_callback)
+
+        post_ids = [None] * len(videos)
+        for position, post_id in zip(positions, result['post_ids']):
+            post_ids[position] = post_id
+        result['post_ids'] = post_ids
+        result['errors'] = sorted(errors + [(positions[index], message) for index, message in result['errors']])
+        
+        if result['media_created']:
+            from src.services.cache_manager import invalidate_paths_cache, invalidate_pending_cache
+            invalidate_paths_cache()
+            invalidate_pending_cache()
+        return result
+
+    def _import_single_video(self, video_data, source: str):
+        """Import one video through the bulk path (post_id, None if already imported)"""
+        result = self.import_videos([video_data], source)
+        if result['errors']:
+            raise RuntimeError(result['errors'][0][1])
+        return result['post_ids'][0]
+
     def _process_4k_youtube_video(self, video_data):
         """Process single video from 4K Video Downloader into new structure"""
+        return self._import_single_video(video_data, '4k_youtube')
+
+    def _build_4k_youtube_record(self, video_data):
+        """Build post record for a 4K Video Downloader video (see DatabaseManager.import_posts)"""
+        import urllib.parse
         
-        # Use database core's new methods
-        from ..database.posts import PostOperations
-        from ..database.creators import CreatorOperations
-        from ..database.subscriptions import SubscriptionOperations
-        
-        post_ops = PostOperations()
-        creator_ops = CreatorOperations()
-        subscription_ops = SubscriptionOperations()
-        
-        # 1. Create or get creator
-        creator_id = None
+        # 1. Creator
+        creator = None
         if video_data.get('creator_name'):
             # Extract platform_creator_id from profile URL if available
             # Decode creator URL (4K Video Downloader provides encoded URLs)
             raw_creator_url = video_data.get('creator_url')
-            decoded_creator_url = None
-            if raw_creator_url:
-                import urllib.parse
-                decoded_creator_url = urllib.parse.unquote(raw_creator_url)
-            
-            platform_creator_id = self._extract_platform_creator_id(
-                raw_creator_url, 
-                video_data['platform']
-            )
-            
-            creator_id = creator_ops.create_or_get_creator(
-                name=video_data['creator_name'],
-                platform_name=video_data['platform'],
-                creator_name_source='db',
-                profile_url=decoded_creator_url,
-                platform_creator_id=platform_creator_id
-            )
-        
-        # 2. Create or get subscription
-        subscription_id = None
+            creator = {
+                'name': video_data['creator_name'],
+                'creator_name_source': 'db',
+                'profile_url': urllib.parse.unquote(raw_creator_url) if raw_creator_url else None,
+                'platform_creator_id': self._extract_platform_creator_id(raw_creator_url, video_data['platform'])
+            }
+        
+        # 2. Subscription
+        subscription = None
         subscription_type, have_account = self._determine_subscription_type_4k_youtube(video_data)
         
         if subscription_type:
@@ -137,46 +161,33 @@ class ExternalSourcesManager:
                 subscription_name = video_data.get('creator_name', 'Unknown')
             
             # Determine subscription URL based on type
-            subscription_url = None
-            subscription_creator_id = None
+            raw_subscription_url = None
+            subscription_creator = None
             
             if subscription_type == 'account':
                 # For account subscriptions, use creator_url (channel URL)
                 raw_subscription_url = video_data.get('creator_url') or video_data.get('channel_url')
-                subscription_url = None
-                if raw_subscription_url:
-                    import urllib.parse
-                    subscription_url = urllib.parse.unquote(raw_subscription_url)
-                subscription_creator_id = creator_id  # Account always belongs to the creator
+                subscription_creator = creator  # Account always belongs to the creator
             elif subscription_type == 'playlist':
                 # For playlist subscriptions, use playlist_url
+                # Creator ALWAYS NULL for playlists - cannot reliably identify playlist owner from external DB data
                 raw_subscription_url = video_data.get('playlist_url')
-                subscription_url = None
-                if raw_subscription_url:
-                    import urllib.parse
-                    subscription_url = urllib.parse.unquote(raw_subscription_url)
-                # ALWAYS NULL for playlists - cannot reliably identify playlist owner from external DB data
-                subscription_creator_id = None
             
-            subscription_id = subscription_ops.create_or_get_subscription(
-                name=subscription_name,
-                platform_name=video_data['platform'],
-                subscription_type=subscription_type,
-                have_account=have_account,
-                creator_id=subscription_creator_id,
-                subscription_url=subscription_url,
-                external_uuid=video_data.get('downloader_subscription_uuid')
-            )
-        
-        # 3. Prepare post data
+            subscription = {
+                'name': subscription_name,
+                'subscription_type': subscription_type,
+                'have_account': have_account,
+                'creator': subscription_creator,
+                'subscription_url': urllib.parse.unquote(raw_subscription_url) if raw_subscription_url else None,
+                'external_uuid': video_data.get('downloader_subscription_uuid')
+            }
+        
+        # 3. Post data
         post_data = {
-            'platform_id': subscription_ops.get_platform_id(video_data['platform']),
             'platform_post_id': video_data.get('video_id'),
             'post_url': video_data.get('url'),
             'title_post': video_data.get('title'),
             'use_filename': False,  # YouTube doesn't need filename-based titles
-            'creator_id': creator_id,
-            'subscription_id': subscription_id,
             # publication_date: prefer publishing_timestamp from 4K DB when available
             'publication_date': int(video_data.get('publishing_timestamp')) if video_data.get('publishing_timestamp') else None,
             'publication_date_source': '4k_bd' if video_data.get('publishing_timestamp') else None,
@@ -184,7 +195,7 @@ class ExternalSourcesManager:
             'download_date': int(video_data.get('timestampNs', 0) / 1_000_000_000) if video_data.get('timestampNs') else None
         }
         
-        # 4. Prepare media data
+        # 4. Media data
         media_data = [{
             'file_path': video_data['file_path'],
             'file_name': video_data['file_name'],
@@ -197,17 +208,15 @@ class ExternalSourcesManager:
             'fps': video_data.get('fps')
         }]
         
-        # 5. Determine categories
-        category_types = self._categorize_youtube_content(video_data)
-        
-        # 6. Create post with media
-        post_id, media_ids = post_ops.create_post_with_media(post_data, media_data, category_types)
-        
-        # 7. Create downloader mapping
-        if media_ids:
-            post_ops.create_downloader_mapping(media_ids[0], video_data.get('download_item_id'), '4k_youtube')
-        
-        return post_id
+        return {
+            'platform': video_data['platform'],
+            'creator': creator,
+            'subscription': subscription,
+            'post': post_data,
+            'media': media_data,
+            'categories': self._categorize_youtube_content(video_data),
+            'mappings': [(0, video_data.get('download_item_id'), '4k_youtube')]
+        }
 
     def _normalize_youtube_playlist_name(self, playlist_name):
         """Normalize YouTube playlist names for consistency"""
@@ -307,16 +316,10 @@ class ExternalSourcesManager:
         # Extract videos from 4K Tokkit
         videos = self.tiktok_handler.extract_videos(limit=limit)
         
-        populated_count = 0
-        
-        for video_data in videos:
-            try:
-                self._process_4k_tokkit_video(video_data)
-                populated_count += 1
-                
-            except Exception as e:
-                logger.error(f"Failed to process TikTok video {video_data.get('description', 'Unknown')}: {e}")
-                continue
+        result = self.import_videos(videos, '4k_tokkit')
+        for _, message in result['errors']:
+            logger.error(f"Failed to process TikTok video {message}")
+        populated_count = len(videos) - len(result['errors'])
         
         logger.info(f"Populated {populated_count} videos from 4K Tokkit")
         return populated_count
@@ -332,16 +335,10 @@ class ExternalSourcesManager:
         # Extract videos from 4K Stogram
         videos = self.instagram_handler.extract_videos(limit=limit)
         
-        populated_count = 0
-        
-        for video_data in videos:
-            try:
-                self._process_4k_stogram_video(video_data)
-                populated_count += 1
-                
-            except Exception as e:
-                logger.error(f"Failed to process Instagram video {video_data.get('title', 'Unknown')}: {e}")
-                continue
+        result = self.import_videos(videos, '4k_stogram')
+        for _, message in result['errors']:
+            logger.error(f"Failed to process Instagram video {message}")
+        populated_count = len(videos) - len(result['errors'])
         
         logger.info(f"Populated {populated_count} videos from 4K Stogram")
         return populated_count
@@ -389,27 +386,22 @@ class ExternalSourcesManager:
 
     def _process_4k_tokkit_video(self, video_data):
         """Process single video from 4K Tokkit into new structure"""
+        return self._import_single_video(video_data, '4k_tokkit')
+
+    def _build_4k_tokkit_record(self, video_data):
+        """Build post record for a 4K Tokkit video (see DatabaseManager.import_posts)"""
         
-        from ..database.posts import PostOperations
-        from ..database.creators import CreatorOperations
-        from ..database.subscriptions import SubscriptionOperations
-        
-        post_ops = PostOperations()
-        creator_ops = CreatorOperations()
-        subscription_ops = SubscriptionOperations()
-        
-        # 1. Create or get creator
+        # 1. Creator
         creator_name = video_data.get('creator_name') or video_data.get('authorName') or 'unknown_creator'
-        creator_id = creator_ops.create_or_get_creator(
-            name=creator_name,
-            platform_name='tiktok',
-            creator_name_source='db',
-            profile_url=video_data.get('creator_url') or f"https://www.tiktok.com/@{creator_name}",
-            platform_creator_id=f"@{creator_name}" if creator_name != 'unknown_creator' else None
-        )
-        
-        # 2. Create or get subscription
-        subscription_id = None
+        creator = {
+            'name': creator_name,
+            'creator_name_source': 'db',
+            'profile_url': video_data.get('creator_url') or f"https://www.tiktok.com/@{creator_name}",
+            'platform_creator_id': f"@{creator_name}" if creator_name != 'unknown_creator' else None
+        }
+        
+        # 2. Subscription
+        subscription = None
         subscription_name = video_data.get('subscription_name')
         subscription_type = video_data.get('subscription_type')
         
@@ -419,34 +411,31 @@ class ExternalSourcesManager:
             # FALSE: hashtag, music (not associated with accounts)
             have_account = subscription_type in ['account', 'liked', 'saved']
             
-            # For liked/saved subscriptions, create the account owner creator
-            subscription_creator_id = None
+            subscription_creator = None
             if have_account:
                 if subscription_type in ['liked', 'saved']:
                     # For liked/saved, subscription_name is the account name (without suffix)
-                    # Create creator for the account that owns the liked/saved list
-                    subscription_creator_id = creator_ops.create_or_get_creator(
-                        name=subscription_name,
-                        platform_name='tiktok',
-                        creator_name_source='db',
-                        profile_url=f"https://www.tiktok.com/@{subscription_name}",
-                        platform_creator_id=f"@{subscription_name}"
-                    )
+                    # and the account that owns the list is its creator
+                    subscription_creator = {
+                        'name': subscription_name,
+                        'creator_name_source': 'db',
+                        'profile_url': f"https://www.tiktok.com/@{subscription_name}",
+                        'platform_creator_id': f"@{subscription_name}"
+                    }
                 else:
                     # For account subscriptions, use the video's creator
-                    subscription_creator_id = creator_id
+                    subscription_creator = creator
             
-            subscription_id = subscription_ops.create_or_get_subscription(
-                name=subscription_name,
-                platform_name='tiktok',
-                subscription_type=subscription_type,
-                have_account=have_account,
-                creator_id=subscription_creator_id,
-                subscription_url=video_data.get('subscription_url'),
-                external_uuid=self._format_external_uuid(video_data.get('subscription_database_id'))
-            )
-        
-        # 3. Prepare post data with proper mapping
+            subscription = {
+                'name': subscription_name,
+                'subscription_type': subscription_type,
+                'have_account': have_account,
+                'creator': subscription_creator,
+                'subscription_url': video_data.get('subscription_url'),
+                'external_uuid': self._format_external_uuid(video_data.get('subscription_database_id'))
+            }
+        
+        # 3. Post data with proper mapping
         title_from_content = video_data.get('title') or video_data.get('description')
         
         # Check if filename was used as title (either from handler or fallback logic)
@@ -458,26 +447,24 @@ class ExternalSourcesManager:
             use_filename = True
         
         post_data = {
-            'platform_id': subscription_ops.get_platform_id('tiktok'),
             'platform_post_id': str(video_data.get('id')),
             'post_url': video_data.get('post_url'),
             'title_post': title_from_content,
             'use_filename': use_filename,  # New field to track filename usage
-            'creator_id': creator_id,
-            'subscription_id': subscription_id,
             'publication_date': video_data.get('postingDate'),  # Already Unix timestamp
             'publication_date_source': '4k_bd' if video_data.get('postingDate') else None,
             'publication_date_confidence': None,  # Remove hardcoded 95, use NULL as requested
             'download_date': video_data.get('recordingDate')  # Already Unix timestamp
         }
         
-        # 4. Prepare media data - handle carousel properly
+        # 4. Media data and downloader mappings - handle carousel properly
         media_data = []
+        mappings = []
         
         if video_data.get('is_carousel') and video_data.get('carousel_items'):
-            # This is a carousel post with multiple media items
-            for carousel_item in video_data['carousel_items']:
-                media_item = {
+            # This is a carousel post with multiple media items, each mapped to its download item
+            for i, carousel_item in enumerate(video_data['carousel_items']):
+                media_data.append({
                     'file_path': carousel_item['file_path'],
                     'file_name': carousel_item['file_name'],
                     'media_type': carousel_item.get('content_type', 'video'),
@@ -486,11 +473,12 @@ class ExternalSourcesManager:
                     'resolution_width': carousel_item.get('width'),
                     'resolution_height': carousel_item.get('height'),
                     'fps': None  # Not available in TikTok data
-                }
-                media_data.append(media_item)
+                })
+                item_mapping = carousel_item.get('downloader_mapping', {})
+                mappings.append((i, item_mapping.get('download_item_id'), '4k_tokkit'))
         else:
             # Single media item
-            media_item = {
+            media_data.append({
                 'file_path': video_data['file_path'],
                 'file_name': video_data['file_name'],
                 'media_type': video_data.get('content_type', 'video'),
@@ -499,90 +487,51 @@ class ExternalSourcesManager:
                 'resolution_width': video_data.get('width'),
                 'resolution_height': video_data.get('height'),
                 'fps': None  # Not available in TikTok data
-            }
-            media_data.append(media_item)
-        
-        # 5. Determine categories for TikTok (always 'videos' according to specification)
-        category_types = ['videos']  # TikTok only has 'videos' category type
-        
-        # 6. Create post with media
-        post_id, media_ids = post_ops.create_post_with_media(post_data, media_data, category_types)
-        
-        # 7. Create downloader mapping for each media
-        if media_ids:
-            if video_data.get('is_carousel') and video_data.get('carousel_items'):
-                # For carousel, map each media to its corresponding carousel item
-                for i, media_id in enumerate(media_ids):
-                    if i < len(video_data['carousel_items']):
-                        carousel_item = video_data['carousel_items'][i]
-                        item_mapping = carousel_item.get('downloader_mapping', {})
-                        download_item_id = item_mapping.get('download_item_id')
-                        if download_item_id:
-                            self._create_downloader_mapping(media_id, download_item_id, '4k_tokkit')
-            else:
-                # Single media item
-                downloader_mapping = video_data.get('downloader_mapping', {})
-                download_item_id = downloader_mapping.get('download_item_id')
-                if download_item_id:
-                    for media_id in media_ids:
-                        self._create_downloader_mapping(media_id, download_item_id, '4k_tokkit')
-        
-        return post_id
+            })
+            downloader_mapping = video_data.get('downloader_mapping', {})
+            mappings.append((0, downloader_mapping.get('download_item_id'), '4k_tokkit'))
+        
+        return {
+            'platform': 'tiktok',
+            'creator': creator,
+            'subscription': subscription,
+            'post': post_data,
+            'media': media_data,
+            'categories': ['videos'],  # TikTok only has 'videos' category type
+            'mappings': mappings
+        }
     
-    def _create_downloader_mapping(self, media_id: int, download_item_id: int, external_db_source: str):
-        """Create downloader mapping entry"""
-        try:
-            from src.service_factory import get_database
-            db = get_database()
-            with db.get_connection() as conn:
-                conn.execute('''
-                    INSERT INTO downloader_mapping (media_id, download_item_id, external_db_source)
-                    VALUES (?, ?, ?)
-                ''', (media_id, download_item_id, external_db_source))
-        except Exception as e:
-            logger.error(f"Error creating downloader mapping: {e}")
-
     def _process_4k_stogram_video(self, video_data):
         """Process single video from 4K Stogram (Instagram) using correct data mapping"""
+        return self._import_single_video(video_data, '4k_stogram')
+
+    def _build_4k_stogram_record(self, video_data):
+        """Build post record for a 4K Stogram item (see DatabaseManager.import_posts)"""
         
-        from ..database.posts import PostOperations
-        from ..database.creators import CreatorOperations
-        from ..database.subscriptions import SubscriptionOperations
-        
-        post_ops = PostOperations()
-        creator_ops = CreatorOperations()
-        subscription_ops = SubscriptionOperations()
-        
-        # 1. Create or get creator - use data from Instagram handler
-        creator_name = video_data.get('creator_name')
-        creator_url = video_data.get('creator_url')
-        creator_id = None
-        
-        if creator_name:
-            creator_id = creator_ops.create_or_get_creator(
-                name=creator_name,
-                platform_name='instagram',
-                creator_name_source='db',
-                profile_url=creator_url,
-                platform_creator_id=creator_name  # Instagram username
-            )
-        
-        # 2. Create or get subscription - use proper Instagram data
-        subscription_id = None
-        subscription_creator_id = creator_id if video_data.get('subscription_type') in ['account', 'saved'] else None
+        # 1. Creator - use data from Instagram handler
+        creator = None
+        if video_data.get('creator_name'):
+            creator = {
+                'name': video_data['creator_name'],
+                'creator_name_source': 'db',
+                'profile_url': video_data.get('creator_url'),
+                'platform_creator_id': video_data['creator_name']  # Instagram username
+            }
         
+        # 2. Subscription - use proper Instagram data
+        subscription = None
         if video_data.get('subscription_name'):
-            subscription_id = subscription_ops.create_or_get_subscription(
-                name=video_data.get('subscription_name'),
-                platform_name='instagram',
-                subscription_type=video_data.get('subscription_type', 'account'),
-                have_account=video_data.get('subscription_type') in ['account', 'saved'],
-                creator_id=subscription_creator_id,
-                subscription_url=video_data.get('subscription_url'),
-                external_uuid=self._format_external_uuid(video_data.get('subscription_database_id'))
-            )
-        
-        # 3. Prepare post data - use correct Instagram field mapping
+            owned = video_data.get('subscription_type') in ['account', 'saved']
+            subscription = {
+                'name': video_data.get('subscription_name'),
+                'subscription_type': video_data.get('subscription_type', 'account'),
+                'have_account': owned,
+                'creator': creator if owned else None,
+                'subscription_url': video_data.get('subscription_url'),
+                'external_uuid': self._format_external_uuid(video_data.get('subscription_database_id'))
+            }
+        
+        # 3. Post data - use correct Instagram field mapping
         title_from_content = video_data.get('title')
         use_filename = video_data.get('title_is_filename', False)
         
@@ -592,21 +541,17 @@ class ExternalSourcesManager:
             use_filename = True
         
         post_data = {
-            'platform_id': subscription_ops.get_platform_id('instagram'),
             'platform_post_id': str(video_data.get('id')),  # Use 'id' field from handler
             'post_url': video_data.get('post_url'),  # Use 'post_url' field from handler
             'title_post': title_from_content,
             'use_filename': use_filename,
-            'creator_id': creator_id,
-            'subscription_id': subscription_id,
             'publication_date': None,  # Instagram doesn't provide publication_date
             'publication_date_source': None,
             'publication_date_confidence': None,
             'download_date': video_data.get('created_time')  # Use 'created_time' field from handler
         }
         
-        
-        # 4. Prepare media data - use correct content_type
+        # 4. Media data - use correct content_type
         media_data = []
         if video_data.get('is_carousel'):
             # Multiple media items
@@ -634,24 +579,20 @@ class ExternalSourcesManager:
                 'fps': None
             })
         
-        # 5. Determine categories - use list_types from Instagram handler
-        list_types = video_data.get('list_types', ['feed'])
-        category_types = list_types
-        
-        # 6. Create post with media
-        post_id, media_ids = post_ops.create_post_with_media(post_data, media_data, category_types)
-        
-        # 7. Create downloader mapping - use dynamic external_db_source
-        if media_ids:
-            downloader_mapping = video_data.get('downloader_mapping', {})
-            download_item_id = downloader_mapping.get('download_item_id')
-            external_db_source = downloader_mapping.get('external_db_source', '4k_stogram')
-            
-            if download_item_id:
-                for media_id in media_ids:
-                    self._create_downloader_mapping(media_id, download_item_id, external_db_source)
-        
-        return post_id
+        # 5. Downloader mapping - same download item (dynamic external_db_source) for every media
+        downloader_mapping = video_data.get('downloader_mapping', {})
+        download_item_id = downloader_mapping.get('download_item_id')
+        external_db_source = downloader_mapping.get('external_db_source', '4k_stogram')
+        
+        return {
+            'platform': 'instagram',
+            'creator': creator,
+            'subscription': subscription,
+            'post': post_data,
+            'media': media_data,
+            'categories': video_data.get('list_types', ['feed']),  # list_types from Instagram handler
+            'mappings': [(i, download_item_id, external_db_source) for i in range(len(media_data))]
+        }
 
     def _determine_subscription_type_4k_tokkit(self, subscription_data):
         """Determine subscription type from 4K Tokkit data"""
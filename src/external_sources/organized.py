@@ -101,12 +101,18 @@ class OrganizedFoldersHandler(FolderExtractor):
             self.logger.error(f"Error descubriendo plataformas adicionales: {e}")
             return additional
     
-    def extract_videos(self, platform_filter: Optional[str] = None) -> List[Dict]:
+    def extract_videos(self, platform_filter: Optional[str] = None, limit: Optional[int] = None,
+                       incremental: bool = False) -> List[Dict]:
         """
         🆕 Extraer videos de TODAS las carpetas organizadas (principales + adicionales)
         
         Args:
             platform_filter: 'youtube', 'tiktok', 'instagram', 'other', 'all-platforms', o nombre específico como 'iwara'
+            limit: Número máximo de videos a devolver
+            incremental: Solo videos nuevos o modificados desde el último escaneo
+                (índice file_state; solo se listan directorios cuyo mtime cambió).
+                Los cursores quedan pendientes hasta que el llamador los confirma
+                (advance_scan_cursors) o los descarta (discard_scan_cursors)
         """
         self.logger.info("Extrayendo videos de carpetas organizadas (modo extendido)...")
         videos = []
@@ -167,10 +173,17 @@ class OrganizedFoldersHandler(FolderExtractor):
             self.logger.info(f"📁 Escaneando {folder_name} ({folder_path})...")
             
             try:
-                platform_videos = self._extract_from_organized_folder(folder_path, platform_key)
+                platform_videos = self._extract_from_organized_folder(folder_path, platform_key, incremental)
                 videos.extend(platform_videos)
                 self.logger.info(f"✅ Extraídos {len(platform_videos)} videos de {folder_name}")
                 
+                if limit and len(videos) >= limit:
+                    if len(videos) > limit:
+                        # Los cambios recortados deben volver a leerse: el cursor no avanza
+                        self._drop_scan_cursor(folder_path)
+                    videos = videos[:limit]
+                    break
+                
             except Exception as e:
                 self.logger.error(f"❌ Error escaneando {folder_name}: {e}")
                 continue
@@ -182,7 +195,8 @@ class OrganizedFoldersHandler(FolderExtractor):
         """Método legacy para compatibilidad con código existente"""
         return self.extract_videos(platform)
     
-    def _extract_from_organized_folder(self, folder_path: Path, platform: str) -> List[Dict]:
+    def _extract_from_organized_folder(self, folder_path: Path, platform: str,
+                                       incremental: bool = False) -> List[Dict]:
         """Extraer videos de una carpeta organizada específica"""
         videos = []
         
@@ -190,25 +204,30 @@ class OrganizedFoldersHandler(FolderExtractor):
             return videos
         
         try:
-            video_files = self._get_video_files(folder_path)
+            if incremental:
+                video_files = self._get_changed_video_files(folder_path)
+            else:
+                video_files = self._get_video_files(folder_path)
             
             for video_file in video_files:
                 video_data = self._process_organized_video_file(video_file, platform)
                 if video_data:
                     videos.append(video_data)
+                elif incremental:
+                    # Reintentar el archivo fallido en la próxima lectura incremental
+                    self._drop_scan_cursor(folder_path)
             
             return videos
             
         except Exception as e:
             self.logger.error(f"Error extrayendo de carpeta organizada {folder_path}: {e}")
+            if incremental:
+                self._drop_scan_cursor(folder_path)
             return videos
     
     def _process_organized_video_file(self, file_path: Path, platform: str) -> Optional[Dict]:
         """Procesar un archivo de video de carpeta organizada"""
         try:
-            if not file_path.exists():
-                return None
-            
             # Determinar creador desde la estructura de carpetas
             creator_name = self._extract_creator_from_organized_path(file_path, platform)
             
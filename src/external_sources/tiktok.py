@@ -24,6 +24,18 @@ class TikTokTokkitHandler(DatabaseExtractor):
         else:
             self.base_path = base_path
     
+    def get_sync_snapshot(self, upto: Optional[int] = None) -> Optional[Dict]:
+        """Snapshot de MediaItems descargados (clave incremental: recordingDate)"""
+        if not self.is_available():
+            return None
+        return self._query_sync_snapshot(
+            """FROM MediaItems mi
+            WHERE mi.relativePath IS NOT NULL 
+            AND mi.downloaded = 1 
+            AND mi.mediaType IN (2, 3)""",
+            'mi.recordingDate', upto
+        )
+    
     def extract_videos(self, offset: int = 0, limit: Optional[int] = None, min_download_item_id = None, min_recording_date: int = None) -> List[Dict]:
         """Extraer videos e imágenes de TikTok desde BD de 4K Tokkit con nueva estructura completa
         Solo incluye contenido descargado (downloaded=1) y excluye imágenes de perfil (mediaType IN (2,3))
@@ -237,6 +249,7 @@ class TikTokTokkitHandler(DatabaseExtractor):
             return videos
 
         except Exception as e:
+            self.extraction_errors += 1
             self.logger.error(f"Error extrayendo videos de TikTok desde Tokkit: {e}")
             return videos
 
@@ -93,14 +93,25 @@ class YouTube4KHandler(DatabaseExtractor):
             self.logger.error(f"Error autodescubriendo plataformas 4K Video Downloader: {e}")
             return platforms
     
-    def extract_videos(self, offset: int = 0, limit: Optional[int] = None) -> List[Dict]:
-        """🚀 Extract videos ultra-fast con todas las optimizaciones posibles"""
+    def get_sync_snapshot(self, upto: Optional[int] = None) -> Optional[Dict]:
+        """Snapshot de download_item (clave incremental: download_item.id)"""
+        if not self.is_available():
+            return None
+        return self._query_sync_snapshot(
+            "FROM download_item di WHERE di.filename IS NOT NULL", 'di.id', upto
+        )
+    
+    def extract_videos(self, offset: int = 0, limit: Optional[int] = None, min_download_item_id: int = 0) -> List[Dict]:
+        """🚀 Extract videos ultra-fast con todas las optimizaciones posibles
+        
+        min_download_item_id: solo filas con download_item.id mayor (extracción incremental)
+        """
         if not self.is_available():
             return []
         
         try:
             # 🚀 USAR PREPARED STATEMENT CACHEADO
-            query_key = 'main_query_v3'  # Changed key to invalidate cache (added timestampNs)
+            query_key = 'main_query_v4'  # Changed key to invalidate cache (added min_download_item_id)
             if self._prepared_statements_cache.get(query_key) is None:
                 # Preparar query una sola vez con estructura correcta y metadatos completos
                 self._prepared_statements_cache[query_key] = '''
@@ -135,6 +146,7 @@ class YouTube4KHandler(DatabaseExtractor):
                     LEFT JOIN media_info mi ON di.id = mi.download_item_id
                     LEFT JOIN video_info vi ON mi.id = vi.media_info_id
                     WHERE di.filename IS NOT NULL
+                        AND di.id > ?
                     GROUP BY di.id, di.filename, mid.title, ud.service_name, ud.url, mid.duration, mid.publishing_timestamp, vi.dimension, vi.resolution, vi.fps, di.timestampNs
                     ORDER BY di.id ASC
                 '''
@@ -151,8 +163,9 @@ class YouTube4KHandler(DatabaseExtractor):
                     # Si solo hay offset sin limit, usar un limit muy grande
                     main_query += f' LIMIT 999999 OFFSET {offset}'
             
-            return self._process_videos_ultra_fast(main_query, [])
+            return self._process_videos_ultra_fast(main_query, [min_download_item_id or 0])
         except Exception as e:
+            self.extraction_errors += 1
             self.logger.error(f"Error en extract_videos optimized: {e}")
             return []
     
@@ -224,6 +237,7 @@ class YouTube4KHandler(DatabaseExtractor):
             return self._process_videos_ultra_fast(main_query, params)
             
         except Exception as e:
+            self.extraction_errors += 1
             self.logger.error(f"Error en extract_by_platform {platform}: {e}")
             return []
     
@@ -346,6 +360,7 @@ class YouTube4KHandler(DatabaseExtractor):
         try:
             conn = self._get_connection(self.db_path)
             if not conn:
+                self.extraction_errors += 1
                 return []
             
             with conn:
@@ -565,5 +580,6 @@ class YouTube4KHandler(DatabaseExtractor):
                 return videos
                 
         except Exception as e:
+            self.extraction_errors += 1
             self.logger.error(f"Error en _process_videos_ultra_fast: {e}")
             return []
\ No newline at end of file
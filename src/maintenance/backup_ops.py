@@ -24,6 +24,9 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 import config
+from src.database.connection_pool import close_all_pools
+from src.database.thumbnail_keys import thumbnail_derived_files
+from src.database.thumbnail_store import content_key_of
 
 class BackupOperations:
     """
@@ -525,7 +528,8 @@ class BackupOperations:
             database_backed_up = False
             
             if db_source.exists():
-                shutil.copy2(db_source, backup_path / 'videos.db')
+                # API de backup de SQLite: incluye las páginas que siguen en el -wal
+                self._copy_sqlite_database(db_source, backup_path / 'videos.db')
                 database_backed_up = True
                 backup_info['database_size'] = db_source.stat().st_size
                 logger.info("✓ Base de datos principal respaldada")
@@ -562,12 +566,19 @@ class BackupOperations:
             thumbnails_backup.mkdir(exist_ok=True)
             
             thumbnail_count = 0
-            for thumb in thumbnails_source.glob('*.jpg'):
-                if thumbnail_count < limit:
-                    shutil.copy2(thumb, thumbnails_backup)
-                    thumbnail_count += 1
-                else:
+            # rglob: incluye el almacén por contenido (ab/cd/{hash}.jpg) conservando la ruta relativa.
+            # El límite cuenta thumbnails base; cada uno se copia con sus variantes (WebP/AVIF), sprite y clip
+            for thumb in thumbnails_source.rglob('*.jpg'):
+                if thumbnail_count >= limit:
                     break
+                if not self._is_base_thumbnail(thumb.name):
+                    continue
+                for source in [thumb, *thumbnail_derived_files(thumb)]:
+                    if source.is_file():
+                        target = thumbnails_backup / source.relative_to(thumbnails_source)
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        shutil.copy2(source, target)
+                thumbnail_count += 1
             
             backup_info['components']['thumbnails'] = thumbnail_count > 0
             logger.info(f"✓ {thumbnail_count} thumbnails respaldados")
@@ -700,6 +711,26 @@ class BackupOperations:
             logger.warning(f"No se pudo leer la información del backup {backup_path}: {e}")
             return None
     
+    def _is_base_thumbnail(self, file_name: str) -> bool:
+        """Thumbnail base ({stem}_thumb.jpg o {hash}.jpg), no una de sus variantes"""
+        key = content_key_of(file_name)
+        if key is not None:
+            return file_name == f"{key}.jpg"
+        return file_name.endswith('_thumb.jpg')
+    
+    def _copy_sqlite_database(self, source: Path, destination: Path):
+        """Copia consistente de una BD SQLite en modo WAL (archivo único, sin -wal/-shm)"""
+        import sqlite3
+        destination.unlink(missing_ok=True)
+        source_conn = sqlite3.connect(str(source))
+        destination_conn = sqlite3.connect(str(destination))
+        try:
+            source_conn.backup(destination_conn)
+            destination_conn.execute("PRAGMA journal_mode = DELETE").fetchall()
+        finally:
+            destination_conn.close()
+            source_conn.close()
+    
     def _get_component_path(self, component: str) -> str:
         """Obtener ruta del componente en el backup"""
         paths = {
@@ -734,10 +765,17 @@ class BackupOperations:
             target = config.DATABASE_PATH
             
             if source.exists():
+                # Cerrar las conexiones del pool antes de sustituir el archivo
+                close_all_pools()
+                
                 # Crear backup del actual
                 if target.exists():
                     backup_current = target.with_suffix('.db.backup')
-                    shutil.copy2(target, backup_current)
+                    self._copy_sqlite_database(target, backup_current)
+                
+                # Un -wal/-shm antiguo junto al archivo restaurado lo corrompería
+                for suffix in ('-wal', '-shm'):
+                    Path(f"{target}{suffix}").unlink(missing_ok=True)
                 
                 # Restaurar
                 target.parent.mkdir(parents=True, exist_ok=True)
@@ -778,8 +816,13 @@ class BackupOperations:
             
             if source.exists():
                 target.mkdir(parents=True, exist_ok=True)
-                for thumb in source.glob('*.jpg'):
-                    shutil.copy2(thumb, target)
+                # Todos los archivos: thumbnails, variantes .webp/.avif, sprites y clips .mp4
+                for thumb in source.rglob('*'):
+                    if not thumb.is_file():
+                        continue
+                    destination = target / thumb.relative_to(source)
+                    destination.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copy2(thumb, destination)
                 logger.info("✓ Thumbnails restaurados")
                 return True
             return False
@@ -690,86 +690,8 @@ class CharacterOperations:
             Dict con reporte de detección
         """
         try:
-            # Obtener videos
-            if video_ids:
-                videos = []
-                for video_id in video_ids:
-                    video = self.db.get_video(video_id)
-                    if video:
-                        videos.append(video)
-            else:
-                videos = self.db.query_videos()
-            
-            # Analizar detecciones
-            detection_stats = {
-                'total_videos': len(videos),
-                'videos_with_characters': 0,
-                'videos_without_characters': 0,
-                'character_frequency': {},
-                'platform_stats': {},
-                'creator_stats': {}
-            }
-            
-            for video in videos:
-                platform = video.get('platform', 'unknown')
-                creator = video.get('creator_name', 'unknown')
-                detected_characters = video.get('detected_characters')
-                
-                # Actualizar estadísticas de plataforma
-                if platform not in detection_stats['platform_stats']:
-                    detection_stats['platform_stats'][platform] = {
-                        'total': 0,
-                        'with_characters': 0
-                    }
-                detection_stats['platform_stats'][platform]['total'] += 1
-                
-                # Actualizar estadísticas de creador
-                if creator not in detection_stats['creator_stats']:
-                    detection_stats['creator_stats'][creator] = {
-                        'total': 0,
-                        'with_characters': 0,
-                        'characters': {}
-                    }
-                detection_stats['creator_stats'][creator]['total'] += 1
-                
-                # Procesar personajes detectados
-                if detected_characters:
-                    try:
-                        if isinstance(detected_characters, str):
-                            characters = json.loads(detected_characters)
-                        else:
-                            characters = detected_characters
-                        
-                        if characters:
-                            detection_stats['videos_with_characters'] += 1
-                            detection_stats['platform_stats'][platform]['with_characters'] += 1
-                            detection_stats['creator_stats'][creator]['with_characters'] += 1
-                            
-                            for char in characters:
-                                # Verificar que char es un diccionario
-                                if isinstance(char, dict):
-                                    char_name = char.get('name', 'Unknown')
-                                elif isinstance(char, str):
-                                    char_name = char
-                                else:
-                                    char_name = str(char)
-                                
-                                # Frecuencia global
-                                if char_name not in detection_stats['character_frequency']:
-                                    detection_stats['character_frequency'][char_name] = 0
-                                detection_stats['character_frequency'][char_name] += 1
-                                
-                                # Frecuencia por creador
-                                if char_name not in detection_stats['creator_stats'][creator]['characters']:
-                                    detection_stats['creator_stats'][creator]['characters'][char_name] = 0
-                                detection_stats['creator_stats'][creator]['characters'][char_name] += 1
-                        else:
-                            detection_stats['videos_without_characters'] += 1
-                    except Exception as e:
-                        logger.warning(f"Error procesando personajes del video {video.get('id')}: {e}")
-                        detection_stats['videos_without_characters'] += 1
-                else:
-                    detection_stats['videos_without_characters'] += 1
+            # Agregación SQL sobre el índice media_characters (sin decodificar JSON)
+            detection_stats = self.db.get_character_detection_stats(video_ids)
             
             # Calcular porcentajes
             total = detection_stats['total_videos']
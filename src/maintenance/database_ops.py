@@ -764,6 +764,11 @@ class DatabaseOperations:
                 logger.error(f"Error insertando lote: {e}")
                 errors += len(batch)
         
+        if imported:
+            from src.services.cache_manager import invalidate_paths_cache, invalidate_pending_cache
+            invalidate_paths_cache()
+            invalidate_pending_cache()
+        
         return imported, errors
     
     def _prepare_db_data(self, video_data: Dict) -> Dict:
@@ -23,6 +23,8 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 import config
+from src.database.thumbnail_keys import thumbnail_variant_names, preview_asset_owner
+from src.database.thumbnail_store import sharded_thumbnail_path
 
 class IntegrityOperations:
     """
@@ -196,7 +198,7 @@ class IntegrityOperations:
             # 3. Verificar thumbnails
             thumbnails_dir = config.THUMBNAILS_PATH
             if thumbnails_dir.exists():
-                thumbnail_files = set(f.name for f in thumbnails_dir.glob('*.jpg'))
+                thumbnail_files = set(f.name for f in thumbnails_dir.rglob('*.jpg'))
                 integrity_report['thumbnails']['total_thumbnails'] = len(thumbnail_files)
                 
                 # Verificar thumbnails en BD
@@ -221,8 +223,13 @@ class IntegrityOperations:
                     thumbnail_path = video.get('thumbnail_path')
                     if thumbnail_path:
                         video_thumbnail_names.add(Path(thumbnail_path).name)
+                        video_thumbnail_names.update(thumbnail_variant_names(Path(thumbnail_path).name))
                 
-                orphaned_thumbnails = thumbnail_files - video_thumbnail_names
+                video_thumbnail_stems = {Path(name).stem for name in video_thumbnail_names}
+                orphaned_thumbnails = {
+                    name for name in thumbnail_files - video_thumbnail_names
+                    if preview_asset_owner(name) not in video_thumbnail_stems
+                }
                 integrity_report['thumbnails']['orphaned_thumbnails'] = len(orphaned_thumbnails)
                 
                 for orphaned in orphaned_thumbnails:
@@ -416,7 +423,7 @@ class IntegrityOperations:
             
             # Verificar directorio de thumbnails
             if thumbnails_dir.exists():
-                thumbnail_files = list(thumbnails_dir.glob('*.jpg'))
+                thumbnail_files = list(thumbnails_dir.rglob('*.jpg'))
                 verification_results['thumbnails_directory']['total_files'] = len(thumbnail_files)
                 
                 # Calcular tamaño total
@@ -443,6 +450,7 @@ class IntegrityOperations:
                     verification_results['video_thumbnails']['with_thumbnails'] += 1
                     thumbnail_name = Path(thumbnail_path).name
                     video_thumbnail_names.add(thumbnail_name)
+                    video_thumbnail_names.update(thumbnail_variant_names(thumbnail_name))
                     
                     # Verificar si el thumbnail existe
                     if thumbnail_name not in existing_thumbnails:
@@ -462,13 +470,17 @@ class IntegrityOperations:
                         'thumbnail_name': None
                     })
             
-            # Identificar thumbnails huérfanos
-            orphaned_thumbnails = existing_thumbnails - video_thumbnail_names
+            # Identificar thumbnails huérfanos (sprites de otro layout siguen siendo del thumbnail)
+            video_thumbnail_stems = {Path(name).stem for name in video_thumbnail_names}
+            orphaned_thumbnails = {
+                name for name in existing_thumbnails - video_thumbnail_names
+                if preview_asset_owner(name) not in video_thumbnail_stems
+            }
             verification_results['orphaned_thumbnails'] = [
                 {
                     'file_name': thumb,
-                    'file_path': str(thumbnails_dir / thumb),
-                    'size_kb': (thumbnails_dir / thumb).stat().st_size / 1024
+                    'file_path': str(sharded_thumbnail_path(thumbnails_dir, thumb)),
+                    'size_kb': sharded_thumbnail_path(thumbnails_dir, thumb).stat().st_size / 1024
                 }
                 for thumb in orphaned_thumbnails
             ]
@@ -487,10 +499,10 @@ class IntegrityOperations:
                         
                         if video_path and Path(video_path).exists():
                             try:
-                                thumbnail_path = thumbnail_generator.generate_thumbnail(video_path, video_id)
+                                thumbnail_path = thumbnail_generator.generate_thumbnail(Path(video_path), media_id=video_id)
                                 if thumbnail_path:
                                     # Actualizar BD
-                                    self.db.update_video(video_id, {'thumbnail_path': thumbnail_path})
+                                    self.db.update_video(video_id, {'thumbnail_path': str(thumbnail_path)})
                                     verification_results['regenerated_count'] += 1
                                     logger.info(f"✅ Regenerado thumbnail para video {video_id}")
                             except Exception as e:
@@ -920,7 +932,7 @@ class IntegrityOperations:
                     file_name = issue.get('file_name')
                     if file_name:
                         thumbnails_dir = config.THUMBNAILS_PATH
-                        orphaned_file = thumbnails_dir / file_name
+                        orphaned_file = sharded_thumbnail_path(thumbnails_dir, file_name)
                         if orphaned_file.exists():
                             orphaned_file.unlink()
                             fixed_count += 1
@@ -83,6 +83,10 @@ class MissingFilesOperations:
             records = cursor.fetchall()
             self.logger.info(f"Verificando {len(records)} registros de TikTok...")
             
+            # Existencia resuelta con el índice incremental (solo relista directorios modificados)
+            from src.database.file_index import IndexedFileChecker
+            file_checker = IndexedFileChecker([tokkit_base_path])
+            
             for record in records:
                 db_id, tiktok_id, author, description, rel_path, media_type = record
                 
@@ -91,7 +95,7 @@ class MissingFilesOperations:
                 expected_path = tokkit_base_path / rel_path_clean
                 
                 # Verificar si el archivo existe
-                if not expected_path.exists():
+                if not file_checker.exists(expected_path):
                     missing_record = MissingFileRecord(
                         db_id=db_id,  # Mantener como blob binario para UPDATE
                         platform='tiktok',
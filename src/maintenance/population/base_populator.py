@@ -26,6 +26,8 @@ class BasePopulator(ABC):
     def __init__(self):
         self._db = None
         self._external_sources = None
+        # Set by populate(): read only new/modified files from organized folders
+        self.incremental_scan = False
     
     @property
     def db(self):
@@ -99,6 +101,68 @@ class BasePopulator(ABC):
         """
         pass
     
+    def import_videos(self, videos: List[Dict], source: str,
+                      progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
+        """
+        Bulk-import videos through the shared population engine.
+        
+        Posts, media, categories and downloader mappings of every video are
+        written by ExternalSourcesManager.import_videos in chunked
+        transactions, with creators/subscriptions/platforms resolved in memory.
+        
+        Args:
+            videos: Video data extracted from the source
+            source: 4K source of the record builder ('4k_youtube', '4k_tokkit', '4k_stogram')
+            progress_callback: Optional callback(processed, total, current_item), called per chunk
+            
+        Returns:
+            Common counters of process_videos results (without 'message')
+        """
+        result = self.external_sources.import_videos(videos, source, progress_callback)
+        
+        errors = []
+        for _, message in result['errors']:
+            error_msg = f"Error processing {self.platform_name} video {message}"
+            logger.error(error_msg)
+            errors.append(error_msg)
+        
+        return {
+            'videos_added': result['posts_created'],
+            'videos_updated': 0,
+            'posts_created': result['posts_created'],
+            'posts_skipped': result['posts_skipped'],
+            'media_created': result['media_created'],
+            'creators_created': result['creators_created'],
+            'subscriptions_created': result['subscriptions_created'],
+            'errors': len(errors),
+            'error_details': errors[:5] if errors else []  # First 5 errors
+        }
+    
+    def get_sync_handler(self, source: str):
+        """
+        External handler providing sync snapshots for a source.
+        
+        Platforms backed by a 4K Apps database return their handler for
+        source 'db'; None disables the persistent sync cursor.
+        """
+        return None
+    
+    def get_scan_handler(self, source: str):
+        """
+        Folder handler whose incremental scan cursors follow a source.
+        
+        Source 'organized' is read through the file_state index: only files
+        added or modified since the last clean population are extracted.
+        """
+        if source != 'organized':
+            return None
+        return self.external_sources.organized_handler
+    
+    def get_sync_key(self, source: str, specific_platform: str = None) -> str:
+        """Key under which the sync cursor of this platform/source is stored"""
+        key = f"{self.platform_name}:{source}"
+        return f"{key}:{specific_platform}" if specific_platform else key
+    
     def populate(self, source: str, limit: Optional[int] = None, 
                 force: bool = False, progress_callback: Optional[Callable] = None, 
                 specific_platform: str = None) -> Dict[str, Any]:
@@ -106,24 +170,62 @@ class BasePopulator(ABC):
         Main population method - orchestrates the entire process.
         
         This is the template method that coordinates:
-        1. Get last processed ID
+        1. Get last processed ID (and check the persistent sync cursor)
         2. Extract videos
         3. Process videos
-        4. Return results
+        4. Advance the sync/scan cursors and return results
         """
         start_time = time.time()
         
         logger.info(f"🚀 Starting {self.platform_name} population from {source}")
         
+        # force re-reads every file; the scan cursors are left where they were
+        scan_handler = self.get_scan_handler(source)
+        self.incremental_scan = scan_handler is not None and not force
+        if scan_handler is not None:
+            scan_handler.discard_scan_cursors()
+        
         try:
             # Step 1: Get incremental position
             last_processed_id, missing_files = self.get_last_processed_id(source, specific_platform)
             
+            sync = self._check_sync_cursor(source, specific_platform, force)
+            if sync and sync['up_to_date']:
+                logger.info(f"✅ {self.platform_name} source unchanged since last sync, nothing to extract")
+                return {
+                    'success': True,
+                    'platform': self.platform_name,
+                    'source': source,
+                    'videos_added': 0,
+                    'videos_updated': 0,
+                    'creators_created': 0,
+                    'subscriptions_created': 0,
+                    'up_to_date': True,
+                    'execution_time': time.time() - start_time,
+                    'message': f"{self.platform_name} already up to date"
+                }
+            if sync and sync['position'] is not None:
+                last_processed_id = self._merge_positions(last_processed_id, sync['position'])
+            
             # Step 2: Extract videos
+            errors_before = self._extraction_errors(source)
             videos = self.extract_videos(source, limit, last_processed_id, specific_platform)
+            extraction_failed = self._extraction_errors(source) > errors_before
+            if extraction_failed:
+                logger.warning(f"⚠️ {self.platform_name} extraction from {source} failed, sync cursor not advanced")
             
             if not videos:
+                if extraction_failed:
+                    return {
+                        'success': False,
+                        'platform': self.platform_name,
+                        'source': source,
+                        'error': f"Could not read {self.platform_name} videos from {source}",
+                        'execution_time': time.time() - start_time
+                    }
                 logger.warning(f"No videos found for {self.platform_name} from {source}")
+                self._advance_sync_cursor(sync, limit)
+                self._advance_scan_cursors(scan_handler, limit)
                 return {
                     'success': True,
                     'platform': self.platform_name,
@@ -139,7 +241,11 @@ class BasePopulator(ABC):
             # Step 3: Process videos
             result = self.process_videos(videos, progress_callback)
             
-            # Step 4: Add common metadata
+            # Step 4: Advance cursor (only after a clean run) and add common metadata
+            if not result.get('errors') and not extraction_failed:
+                self._advance_sync_cursor(sync, limit)
+                self._advance_scan_cursors(scan_handler, limit)
+            
             result.update({
                 'success': True,
                 'platform': self.platform_name,
@@ -147,6 +253,8 @@ class BasePopulator(ABC):
                 'execution_time': time.time() - start_time,
                 'missing_files_count': len(missing_files) if missing_files else 0
             })
+            if sync and sync['removed']:
+                result['source_rows_removed'] = sync['removed']
             
             return result
             
@@ -160,6 +268,98 @@ class BasePopulator(ABC):
                 'execution_time': time.time() - start_time
             }
     
+    def _check_sync_cursor(self, source: str, specific_platform: str = None,
+                           force: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Compare the stored sync cursor with a snapshot of the external database.
+        
+        The stored row count/checksum cover the rows at or below the cursor, so
+        a mismatch means rows were removed (or rewritten) in the already-synced
+        range; in that case the cursor is dropped and the legacy position used.
+        
+        Returns:
+            None when the source has no sync support, else a dict with the
+            snapshot, the usable cursor position (or None), 'up_to_date' and
+            the number of removed rows detected.
+        """
+        handler = self.get_sync_handler(source)
+        if handler is None or not handler.is_available():
+            return None
+        
+        key = self.get_sync_key(source, specific_platform)
+        try:
+            if force:
+                self.db.reset_sync_state(key)
+                state = None
+            else:
+                state = self.db.get_sync_state(key)
+            snapshot = handler.get_sync_snapshot(state['last_position'] if state else None)
+        except Exception as e:
+            logger.warning(f"⚠️ Sync cursor unavailable for {key}: {e}")
+            return None
+        
+        if not snapshot:
+            return None
+        
+        sync = {'key': key, 'snapshot': snapshot, 'position': None, 'up_to_date': False, 'removed': 0}
+        if state is None:
+            return sync
+        
+        if (snapshot['synced_count'] == state['row_count'] and
+                snapshot['synced_checksum'] == state['checksum']):
+            sync['position'] = state['last_position']
+            sync['up_to_date'] = snapshot['row_count'] == state['row_count']
+            logger.info(f"🔍 Sync cursor {key}: {snapshot['row_count'] - state['row_count']} new rows "
+                        f"after position {state['last_position']}")
+        else:
+            sync['removed'] = max(0, state['row_count'] - snapshot['synced_count'])
+            logger.warning(f"🗑️ Source rows changed below sync cursor {key} "
+                           f"({sync['removed']} removed), falling back to last processed ID")
+        return sync
+    
+    def _extraction_errors(self, source: str) -> int:
+        """Failed-extraction counter of the sync handler (0 for sources without one)"""
+        handler = self.get_sync_handler(source)
+        return getattr(handler, 'extraction_errors', 0) if handler is not None else 0
+    
+    def _advance_sync_cursor(self, sync: Optional[Dict[str, Any]], limit: Optional[int]):
+        """Store the pre-extraction snapshot as the new cursor"""
+        # A limited run may leave part of the delta unread; the legacy
+        # last-processed position keeps track of that progress instead
+        if not sync or limit is not None:
+            return
+        
+        snapshot = sync['snapshot']
+        if snapshot['high_water'] is None:
+            return
+        
+        # Rows added while extracting lie above high_water and are read next time
+        try:
+            self.db.save_sync_state(sync['key'], int(snapshot['high_water']),
+                                    snapshot['row_count'], snapshot['checksum'])
+        except Exception as e:
+            logger.warning(f"⚠️ Could not save sync cursor {sync['key']}: {e}")
+    
+    def _advance_scan_cursors(self, scan_handler, limit: Optional[int]):
+        """Confirm the incremental folder reads once their videos were imported"""
+        if scan_handler is None:
+            return
+        # A limited run may cut the changed files short: read them again next time
+        if limit is not None or not self.incremental_scan:
+            scan_handler.discard_scan_cursors()
+            return
+        scan_handler.advance_scan_cursors()
+    
+    @staticmethod
+    def _merge_positions(last_processed_id: Any, cursor_position: int) -> Any:
+        """Furthest of the legacy last-processed position and the sync cursor"""
+        if last_processed_id is None:
+            return cursor_position
+        try:
+            return max(int(last_processed_id), cursor_position)
+        except (TypeError, ValueError):
+            return cursor_position
+    
     def _validate_source(self, source: str) -> bool:
         """Validate if source is supported by this populator"""
         if source not in self.supported_sources:
@@ -26,6 +26,10 @@ class InstagramPopulator(BasePopulator):
     def supported_sources(self) -> List[str]:
         return ['db', 'organized']
     
+    def get_sync_handler(self, source: str):
+        """4K Stogram handler provides the sync snapshots for source 'db'"""
+        return self.external_sources.instagram_handler if source == 'db' else None
+    
     def get_last_processed_id(self, source: str, specific_platform: str = None) -> tuple[Any, List[str]]:
         """
         Get last processed Instagram ID for incremental population.
@@ -69,8 +73,8 @@ class InstagramPopulator(BasePopulator):
                 return []
             
             return self.external_sources.instagram_handler.extract_videos(
-                limit=limit
-                # Note: Instagram handler may need updates for incremental support
+                limit=limit,
+                min_photo_id=last_processed_id
             )
             
         elif source == 'organized':
@@ -81,7 +85,8 @@ class InstagramPopulator(BasePopulator):
             
             return self.external_sources.organized_handler.extract_videos(
                 platform_filter='instagram',
-                limit=limit
+                limit=limit,
+                incremental=self.incremental_scan
             )
         
         else:
@@ -97,80 +102,17 @@ class InstagramPopulator(BasePopulator):
         - Saved content collections
         - Instagram-specific metadata
         """
-        
-        posts_created = 0
-        posts_skipped = 0
-        media_created = 0
-        creators_created = 0
-        subscriptions_created = 0
-        errors = []
-        
-        # Track unique entities
-        processed_creators = set()
-        processed_subscriptions = set()
-        
         logger.info(f"📸 Processing {len(videos)} Instagram items...")
         
-        for video_data in videos:
-            try:
-                # Process single Instagram item using updated stogram processing
-                post_id = self.external_sources._process_4k_stogram_video(video_data)
-                
-                if post_id:
-                    # Post was created successfully
-                    posts_created += 1
-                    
-                    # Count media (Instagram may have carousel posts)
-                    if video_data.get('is_carousel') and video_data.get('carousel_items'):
-                        media_created += len(video_data['carousel_items'])
-                    else:
-                        media_created += 1
-                    
-                    # Track creators and subscriptions
-                    creator_name = video_data.get('creator_name')
-                    subscription_name = video_data.get('subscription_name')
-                    
-                    if creator_name and creator_name not in processed_creators:
-                        processed_creators.add(creator_name)
-                        creators_created += 1
-                    
-                    if subscription_name and subscription_name not in processed_subscriptions:
-                        processed_subscriptions.add(subscription_name)
-                        subscriptions_created += 1
-                    
-                    # Progress callback
-                    if progress_callback:
-                        progress_callback(f"Created Instagram post {post_id}")
-                        
-                elif post_id is None:
-                    # Post was skipped (duplicate)
-                    posts_skipped += 1
-                    logger.debug(f"Skipped duplicate Instagram post: {video_data.get('file_path', 'unknown')}")
-                
-            except Exception as e:
-                error_msg = f"Error processing Instagram item {video_data.get('file_path', 'unknown')}: {e}"
-                logger.error(error_msg)
-                errors.append(error_msg)
-                continue
+        result = self.import_videos(videos, '4k_stogram', progress_callback)
         
-        # Build results
-        result = {
-            'videos_added': posts_created,
-            'videos_updated': 0,
-            'posts_created': posts_created,
-            'posts_skipped': posts_skipped,
-            'media_created': media_created,
-            'creators_created': creators_created,
-            'subscriptions_created': subscriptions_created,
-            'errors': len(errors),
-            'error_details': errors[:5] if errors else [],
-            'message': (
-                f"Instagram population completed: {posts_created} posts, "
-                f"{media_created} media, {creators_created} creators, "
-                f"{subscriptions_created} subscriptions"
-                + (f", {posts_skipped} duplicates skipped" if posts_skipped > 0 else "")
-                + (f", {len(errors)} errors" if errors else "")
-            )
-        }
+        posts_skipped = result['posts_skipped']
+        result['message'] = (
+            f"Instagram population completed: {result['posts_created']} posts, "
+            f"{result['media_created']} media, {result['creators_created']} creators, "
+            f"{result['subscriptions_created']} subscriptions"
+            + (f", {posts_skipped} duplicates skipped" if posts_skipped > 0 else "")
+            + (f", {result['errors']} errors" if result['errors'] else "")
+        )
         
         return result
\ No newline at end of file
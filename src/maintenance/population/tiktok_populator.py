@@ -27,6 +27,10 @@ class TikTokPopulator(BasePopulator):
     def supported_sources(self) -> List[str]:
         return ['db', 'organized']
     
+    def get_sync_handler(self, source: str):
+        """4K Tokkit handler provides the sync snapshots for source 'db'"""
+        return self.external_sources.tiktok_handler if source == 'db' else None
+    
     def get_last_processed_id(self, source: str, specific_platform: str = None) -> tuple[Any, List[str]]:
         """
         Get last processed TikTok ID (BLOB type) for incremental population.
@@ -96,7 +100,8 @@ class TikTokPopulator(BasePopulator):
             
             return self.external_sources.organized_handler.extract_videos(
                 platform_filter='tiktok',
-                limit=limit
+                limit=limit,
+                incremental=self.incremental_scan
             )
         
         else:
@@ -111,87 +116,21 @@ class TikTokPopulator(BasePopulator):
         - Carousel posts (multiple media items per post)
         - BLOB ID mapping for downloader_mapping
         - TikTok-specific subscription types
-        """
-        
-        posts_created = 0
-        media_created = 0
-        creators_created = 0
-        subscriptions_created = 0
-        errors = []
-        
-        # Track unique entities to count new ones
-        processed_creators = set()
-        processed_subscriptions = set()
-        
-        # Filter out videos that already exist (by file_path) to avoid duplicates
-        from src.database.posts import PostOperations
-        post_ops = PostOperations()
-        
-        new_videos = post_ops.filter_existing_posts_by_file_path(videos)
-        posts_skipped = len(videos) - len(new_videos)
         
-        logger.info(f"📱 Processing {len(videos)} TikTok videos: {len(new_videos)} new, {posts_skipped} already exist")
-        
-        for i, video_data in enumerate(new_videos):
-            try:
-                # Process single TikTok video
-                post_id = self.external_sources._process_4k_tokkit_video(video_data)
-                
-                if post_id:
-                    # Post was created successfully
-                    posts_created += 1
-                    
-                    # Count media items (handle carousels)
-                    if video_data.get('is_carousel') and video_data.get('carousel_items'):
-                        media_created += len(video_data['carousel_items'])
-                    else:
-                        media_created += 1
-                    
-                    # Track creators and subscriptions (only for successfully created posts)
-                    creator_name = video_data.get('creator_name')
-                    subscription_name = video_data.get('subscription_name')
-                    
-                    if creator_name and creator_name not in processed_creators:
-                        processed_creators.add(creator_name)
-                        creators_created += 1
-                    
-                    if subscription_name and subscription_name not in processed_subscriptions:
-                        processed_subscriptions.add(subscription_name)
-                        subscriptions_created += 1
-                    
-                    # Progress callback
-                    if progress_callback:
-                        progress_callback(f"Created TikTok post {post_id}")
-                        
-                elif post_id is None:
-                    # This should not happen with new filtering, but handle just in case
-                    logger.debug(f"Post creation returned None for: {video_data.get('file_path', 'unknown')}")
-                
-            except Exception as e:
-                error_msg = f"Error processing TikTok video {video_data.get('file_path', 'unknown')}: {e}"
-                logger.error(error_msg)
-                errors.append(error_msg)
-                continue
-        
-        # Build results
-        result = {
-            'videos_added': posts_created,
-            'videos_updated': 0,
-            'posts_created': posts_created,
-            'posts_skipped': posts_skipped,
-            'media_created': media_created,
-            'creators_created': creators_created,
-            'subscriptions_created': subscriptions_created,
-            'errors': len(errors),
-            'error_details': errors[:5] if errors else [],  # First 5 errors
-            'message': (
-                f"TikTok population completed: {posts_created} posts, "
-                f"{media_created} media, {creators_created} creators, "
-                f"{subscriptions_created} subscriptions"
-                + (f", {posts_skipped} duplicates skipped" if posts_skipped > 0 else "")
-                + (f", {len(errors)} errors" if errors else "")
-            )
-        }
+        Videos whose file_path already exists are skipped by the bulk engine.
+        """
+        logger.info(f"📱 Processing {len(videos)} TikTok videos...")
+        
+        result = self.import_videos(videos, '4k_tokkit', progress_callback)
+        
+        posts_skipped = result['posts_skipped']
+        result['message'] = (
+            f"TikTok population completed: {result['posts_created']} posts, "
+            f"{result['media_created']} media, {result['creators_created']} creators, "
+            f"{result['subscriptions_created']} subscriptions"
+            + (f", {posts_skipped} duplicates skipped" if posts_skipped > 0 else "")
+            + (f", {result['errors']} errors" if result['errors'] else "")
+        )
         
         return result
     
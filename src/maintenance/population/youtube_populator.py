@@ -26,6 +26,10 @@ class YouTubePopulator(BasePopulator):
     def supported_sources(self) -> List[str]:
         return ['db', 'organized']
     
+    def get_sync_handler(self, source: str):
+        """4K Video Downloader handler provides the sync snapshots for source 'db'"""
+        return self.external_sources.youtube_handler if source == 'db' else None
+    
     def get_last_processed_id(self, source: str, specific_platform: str = None) -> tuple[Any, List[str]]:
         """
         Get last processed YouTube ID (integer type) for incremental population.
@@ -138,7 +142,8 @@ class YouTubePopulator(BasePopulator):
             for platform in platforms:
                 platform_videos = self.external_sources.organized_handler.extract_videos(
                     platform_filter=platform,
-                    limit=limit
+                    limit=limit,
+                    incremental=self.incremental_scan
                 )
                 all_videos.extend(platform_videos)
                 
@@ -161,87 +166,24 @@ class YouTubePopulator(BasePopulator):
         - Integer ID mapping for downloader_mapping
         - Account vs Playlist subscription types
         """
-        
-        posts_created = 0
-        posts_skipped = 0
-        media_created = 0
-        creators_created = 0
-        subscriptions_created = 0
-        errors = []
-        
-        # Track unique entities to count new ones
-        processed_creators = set()
-        processed_subscriptions = set()
-        
-        # Group videos by platform for processing
-        platform_groups = {}
+        platform_counts = {}
         for video in videos:
             platform = video.get('platform', 'youtube')
-            if platform not in platform_groups:
-                platform_groups[platform] = []
-            platform_groups[platform].append(video)
+            platform_counts[platform] = platform_counts.get(platform, 0) + 1
         
-        logger.info(f"🎬 Processing YouTube-family videos: {dict((k, len(v)) for k, v in platform_groups.items())}")
+        logger.info(f"🎬 Processing YouTube-family videos: {platform_counts}")
         
-        for platform, platform_videos in platform_groups.items():
-            logger.info(f"📺 Processing {len(platform_videos)} {platform} videos...")
-            
-            for video_data in platform_videos:
-                try:
-                    # Process single YouTube-family video
-                    post_id = self.external_sources._process_4k_youtube_video(video_data)
-                    
-                    if post_id:
-                        # Post was created successfully
-                        posts_created += 1
-                        media_created += 1  # YouTube typically has 1 media per post
-                        
-                        # Track creators and subscriptions
-                        creator_name = video_data.get('creator_name')
-                        subscription_name = video_data.get('subscription_name')
-                        
-                        if creator_name and creator_name not in processed_creators:
-                            processed_creators.add(creator_name)
-                            creators_created += 1
-                        
-                        if subscription_name and subscription_name not in processed_subscriptions:
-                            processed_subscriptions.add(subscription_name)
-                            subscriptions_created += 1
-                        
-                        # Progress callback
-                        if progress_callback:
-                            progress_callback(f"Created {platform} post {post_id}")
-                            
-                    elif post_id is None:
-                        # Post was skipped (duplicate)
-                        posts_skipped += 1
-                        logger.debug(f"Skipped duplicate {platform} post: {video_data.get('file_path', 'unknown')}")
-                    
-                except Exception as e:
-                    error_msg = f"Error processing {platform} video {video_data.get('file_path', 'unknown')}: {e}"
-                    logger.error(error_msg)
-                    errors.append(error_msg)
-                    continue
+        # One bulk import for every platform (each record carries its own platform)
+        result = self.import_videos(videos, '4k_youtube', progress_callback)
         
-        # Build results
-        result = {
-            'videos_added': posts_created,
-            'videos_updated': 0,
-            'posts_created': posts_created,
-            'posts_skipped': posts_skipped,
-            'media_created': media_created,
-            'creators_created': creators_created,
-            'subscriptions_created': subscriptions_created,
-            'errors': len(errors),
-            'error_details': errors[:5] if errors else [],
-            'platforms_processed': list(platform_groups.keys()),
-            'message': (
-                f"YouTube-family population completed: {posts_created} posts, "
-                f"{media_created} media, {creators_created} creators, "
-                f"{subscriptions_created} subscriptions across {len(platform_groups)} platforms"
-                + (f", {posts_skipped} duplicates skipped" if posts_skipped > 0 else "")
-                + (f", {len(errors)} errors" if errors else "")
-            )
-        }
+        posts_skipped = result['posts_skipped']
+        result['platforms_processed'] = list(platform_counts.keys())
+        result['message'] = (
+            f"YouTube-family population completed: {result['posts_created']} posts, "
+            f"{result['media_created']} media, {result['creators_created']} creators, "
+            f"{result['subscriptions_created']} subscriptions across {len(platform_counts)} platforms"
+            + (f", {posts_skipped} duplicates skipped" if posts_skipped > 0 else "")
+            + (f", {result['errors']} errors" if result['errors'] else "")
+        )
         
         return result
\ No newline at end of file
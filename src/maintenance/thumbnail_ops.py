@@ -4,12 +4,11 @@
 Módulo especializado para operaciones de thumbnails extraído de main.py
 """
 
-import os
 import time
 import logging
 from pathlib import Path
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import List, Dict, Optional, Tuple, Any
+from typing import List, Dict, Optional, Tuple, Any, Callable
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -20,6 +19,10 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 import config
+from src.database.thumbnail_keys import thumbnail_variant_names, thumbnail_derived_files, preview_asset_owner
+from src.database.thumbnail_store import (
+    find_orphaned_thumbnails, forget_stored_thumbnails, delete_stored_files, migrate_flat_thumbnails
+)
 
 # Referencias eliminadas para evitar inicialización automática
 
@@ -135,13 +138,17 @@ class ThumbnailOperations:
             'throughput': success/duration if success > 0 else 0
         }
     
-    def regenerate_thumbnails_by_ids(self, video_ids: List[int], force: bool = False) -> Dict[str, Any]:
+    def regenerate_thumbnails_by_ids(self, video_ids: List[int], force: bool = False,
+                                     progress_callback: Optional[Callable] = None,
+                                     checkpoint: Optional[Dict] = None) -> Dict[str, Any]:
         """
         🆕 NUEVA: Regenerar thumbnails para IDs específicos (para app web)
         
         Args:
             video_ids: Lista de IDs de videos
             force: regenerar thumbnails existentes también
+            progress_callback: función para reportar progreso y checkpoint
+            checkpoint: checkpoint de una ejecución interrumpida (sus IDs se saltan)
             
         Returns:
             Dict con resultados de la operación
@@ -189,6 +196,10 @@ class ThumbnailOperations:
             if needs_regeneration:
                 videos_to_process.append(video)
         
+        checkpoint = self._new_thumbnail_checkpoint(checkpoint)
+        done_ids = set(checkpoint['done_ids'])
+        videos_to_process = [v for v in videos_to_process if v['id'] not in done_ids]
+        
         if not videos_to_process:
             return {
                 'success': True,
@@ -201,7 +212,8 @@ class ThumbnailOperations:
         
         # Regenerar thumbnails en paralelo
         logger.info(f"⚡ Regenerando {len(videos_to_process)} thumbnails...")
-        success, failed = self._regenerate_thumbnails_parallel(videos_to_process, force)
+        success, failed = self._regenerate_thumbnails_parallel(videos_to_process, force,
+                                                               progress_callback, checkpoint)
         
         # Métricas finales
         end_time = time.time()
@@ -234,11 +246,14 @@ class ThumbnailOperations:
         # Obtener videos en BD
         videos = self.db.query_videos()
         valid_thumbnails = set()
+        valid_stems = set()
         
         for video in videos:
             if video.get('thumbnail_path'):
                 thumb_name = Path(video['thumbnail_path']).name
                 valid_thumbnails.add(thumb_name)
+                valid_thumbnails.update(thumbnail_variant_names(thumb_name))
+                valid_stems.add(Path(thumb_name).stem)
         
         # Encontrar thumbnails huérfanos
         orphaned = []
@@ -255,12 +270,26 @@ class ThumbnailOperations:
                 'message': f"Directorio de thumbnails no encontrado: {config.THUMBNAILS_PATH}"
             }
         
-        for thumb_path in config.THUMBNAILS_PATH.glob('*.jpg'):
-            if thumb_path.name not in valid_thumbnails:
+        # Thumbnails planos (nombre {stem}_thumb.jpg): solo el nivel superior
+        for thumb_path in config.THUMBNAILS_PATH.iterdir():
+            if thumb_path.suffix not in ('.jpg', '.webp', '.avif', '.mp4'):
+                continue
+            # Sprites/clips de otro layout siguen siendo del thumbnail hasta que se regeneran
+            if thumb_path.name not in valid_thumbnails and preview_asset_owner(thumb_path.name) not in valid_stems:
                 orphaned.append(thumb_path)
                 total_size += thumb_path.stat().st_size
         
-        if not orphaned:
+        # Almacén por contenido: los huérfanos salen del manifiesto, sin recorrer los subdirectorios
+        with self.db.get_connection() as conn:
+            stored_orphans = find_orphaned_thumbnails(conn)
+        for _, relative_path in stored_orphans:
+            try:
+                total_size += (config.THUMBNAILS_PATH / relative_path).stat().st_size
+            except OSError:
+                pass
+        
+        orphaned_count = len(orphaned) + len(stored_orphans)
+        if not orphaned_count:
             logger.info("✅ No se encontraron thumbnails huérfanos")
             return {
                 'success': True,
@@ -270,16 +299,16 @@ class ThumbnailOperations:
                 'message': "No se encontraron thumbnails huérfanos"
             }
         
-        logger.info(f"Encontrados {len(orphaned)} thumbnails huérfanos ({total_size / 1024 / 1024:.1f} MB)")
+        logger.info(f"Encontrados {orphaned_count} thumbnails huérfanos ({total_size / 1024 / 1024:.1f} MB)")
         
         if not force:
             # En modo interactivo, solo reportar
             return {
                 'success': True,
-                'orphaned_count': len(orphaned),
+                'orphaned_count': orphaned_count,
                 'total_size_mb': total_size / 1024 / 1024,
                 'deleted_count': 0,
-                'message': f"Encontrados {len(orphaned)} thumbnails huérfanos, usar force=True para eliminar"
+                'message': f"Encontrados {orphaned_count} thumbnails huérfanos, usar force=True para eliminar"
             }
         
         # Eliminar thumbnails
@@ -291,16 +320,63 @@ class ThumbnailOperations:
             except Exception as e:
                 logger.warning(f"Error eliminando {thumb_path}: {e}")
         
+        forgotten = []
+        for content_key, relative_path in stored_orphans:
+            try:
+                delete_stored_files(config.THUMBNAILS_PATH, relative_path)
+                forgotten.append(content_key)
+                deleted += 1
+            except Exception as e:
+                logger.warning(f"Error eliminando {relative_path}: {e}")
+        if forgotten:
+            with self.db.get_connection() as conn:
+                forget_stored_thumbnails(conn, forgotten)
+        
         logger.info(f"✅ Eliminados {deleted} thumbnails huérfanos")
         
         return {
             'success': True,
-            'orphaned_count': len(orphaned),
+            'orphaned_count': orphaned_count,
             'total_size_mb': total_size / 1024 / 1024,
             'deleted_count': deleted,
             'message': f"Eliminados {deleted} thumbnails huérfanos"
         }
     
+    def migrate_thumbnail_store(self, batch_size: int = 500,
+                                progress_callback: Optional[Callable] = None) -> Dict[str, Any]:
+        """
+        🗂️ Mover los thumbnails planos ({stem}_thumb.jpg) al almacén por contenido
+        
+        Reanudable: confirma cada batch_size media y los ya migrados se
+        saltan, así que una ejecución interrumpida continúa donde se quedó.
+        
+        Args:
+            batch_size: media por transacción
+            progress_callback: función para reportar progreso
+            
+        Returns:
+            Dict con resultados de la operación
+        """
+        logger.info("🗂️ Migrando thumbnails al almacén por contenido...")
+        
+        try:
+            with self.db.get_connection() as conn:
+                stats = migrate_flat_thumbnails(conn, config.THUMBNAILS_PATH, batch_size, progress_callback)
+        except InterruptedError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Error migrando thumbnails al almacén: {e}")
+            return {'success': False, 'error': str(e)}
+        
+        logger.info(f"✅ Thumbnails migrados: {stats['migrated']} "
+                    f"(sin archivo: {stats['missing']}, ya en el almacén: {stats['already_stored']})")
+        
+        return {
+            'success': True,
+            **stats,
+            'message': f"Migrados {stats['migrated']} thumbnails al almacén por contenido"
+        }
+    
     def get_thumbnail_stats(self, video_ids: Optional[List[int]] = None) -> Dict[str, Any]:
         """
         📊 Obtener estadísticas de thumbnails
@@ -416,7 +492,9 @@ class ThumbnailOperations:
             'message': f'Cobertura de thumbnails: {coverage_percentage:.1f}% ({status})'
         }
     
-    def populate_thumbnails(self, platform: Optional[str] = None, limit: Optional[int] = None, force: bool = False) -> Dict[str, Any]:
+    def populate_thumbnails(self, platform: Optional[str] = None, limit: Optional[int] = None, force: bool = False,
+                            progress_callback: Optional[Callable] = None,
+                            checkpoint: Optional[Dict] = None) -> Dict[str, Any]:
         """
         🚀 OPTIMIZADO: Generación ultra-rápida de thumbnails con procesamiento paralelo
         
@@ -424,11 +502,29 @@ class ThumbnailOperations:
             platform: plataforma específica o None para todas
             limit: número máximo de thumbnails a generar
             force: regenerar thumbnails existentes
+            progress_callback: función para reportar progreso y checkpoint
+            checkpoint: checkpoint de una ejecución interrumpida (sus IDs se saltan)
             
         Returns:
             Dict con resultados de la operación
         """
         start_time = time.time()
+        checkpoint = self._new_thumbnail_checkpoint(checkpoint)
+        
+        # Sin force, los ya guardados en BD no vuelven a salir en la consulta:
+        # el límite se reduce en lo ya procesado
+        if limit and not force and checkpoint['done_ids']:
+            limit -= len(checkpoint['done_ids'])
+            if limit <= 0:
+                return {
+                    'success': True,
+                    'total_videos': 0,
+                    'successful': 0,
+                    'failed': 0,
+                    'duration': 0.0,
+                    'message': "Operación ya completada según el checkpoint"
+                }
+        
         logger.info("🚀 Generando thumbnails OPTIMIZADO...")
         
         # 🔧 CORREGIDO: Usar configuración del .env en lugar de forzar ultra_fast
@@ -456,12 +552,14 @@ class ThumbnailOperations:
         prioritized_videos = self._prioritize_videos_with_characters(videos_needing_thumbs)
         logger.info(f"📈 Videos priorizados: {len(prioritized_videos['priority'])} con personajes, {len(prioritized_videos['normal'])} normales")
         
-        # Combinar videos priorizados
-        ordered_videos = prioritized_videos['priority'] + prioritized_videos['normal']
+        # Combinar videos priorizados (sin los ya procesados antes de una interrupción)
+        done_ids = set(checkpoint['done_ids'])
+        ordered_videos = [v for v in prioritized_videos['priority'] + prioritized_videos['normal']
+                          if v['id'] not in done_ids]
         
         # ⚡ PASO 3: Generación en paralelo con ThreadPoolExecutor
         logger.info("⚡ Generando thumbnails en paralelo...")
-        success, failed = self._generate_thumbnails_parallel(ordered_videos, force)
+        success, failed = self._generate_thumbnails_parallel(ordered_videos, force, progress_callback, checkpoint)
         
         # 📊 PASO 4: Métricas finales
         end_time = time.time()
@@ -552,9 +650,14 @@ class ThumbnailOperations:
         for video_id, thumb_path in thumbnails_to_delete:
             try:
                 thumb_path.unlink()
+                for derived_path in thumbnail_derived_files(thumb_path):
+                    derived_path.unlink(missing_ok=True)
                 # Limpiar referencia en BD usando nuevo esquema
                 with self.db.get_connection() as conn:
                     conn.execute("UPDATE media SET thumbnail_path = NULL WHERE id = ?", (video_id,))
+                    conn.execute("DELETE FROM thumbnail_variants WHERE media_id = ?", (video_id,))
+                    conn.execute("DELETE FROM thumbnail_store WHERE media_id = ?", (video_id,))
+                    conn.execute("DELETE FROM preview_assets WHERE media_id = ?", (video_id,))
                 deleted += 1
             except Exception as e:
                 logger.warning(f"Error eliminando thumbnail {thumb_path}: {e}")
@@ -814,17 +917,10 @@ class ThumbnailOperations:
         
         return cleaned_count
     
-    def _regenerate_thumbnails_parallel(self, videos: List[Dict], force: bool = False) -> Tuple[int, int]:
+    def _regenerate_thumbnails_parallel(self, videos: List[Dict], force: bool = False,
+                                        progress_callback: Optional[Callable] = None,
+                                        checkpoint: Optional[Dict] = None) -> Tuple[int, int]:
         """⚡ Regenerar thumbnails en paralelo con ThreadPoolExecutor"""
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        
-        success = 0
-        failed = 0
-        # Optimizar workers para I/O bound (thumbnail generation)
-        cpu_count = os.cpu_count() or 4
-        # Para thumbnail generation, usar menos workers para evitar thrashing
-        max_workers = min(4, len(videos))
-        
         def regenerate_single_thumbnail(video_data):
             """Regenerar thumbnail para un video individual (sin actualizar BD)"""
             try:
@@ -835,7 +931,9 @@ class ThumbnailOperations:
                     return {'success': False, 'error': f"Video no existe: {video_path}", 'video_id': video_data['id']}
                 
                 # Generar thumbnail (siempre con force=True para regeneración)
-                thumbnail_path = self.thumbnail_generator.generate_thumbnail(video_path, force_regenerate=True)
+                thumbnail_path = self.thumbnail_generator.generate_thumbnail(
+                    video_path, force_regenerate=True, media_id=video_data['id']
+                )
                 
                 if thumbnail_path:
                     # NO actualizar BD aquí - acumular para batch update
@@ -852,76 +950,12 @@ class ThumbnailOperations:
             except Exception as e:
                 return {'success': False, 'error': f"Error con {video_data.get('file_name', 'unknown')}: {e}", 'video_id': video_data['id']}
         
-        # Procesamiento en paralelo con batch updates
-        batch_updates = []  # Acumular updates para BD
-        batch_size = 25  # Actualizar BD cada 25 thumbnails
-        
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Enviar todas las tareas
-            future_to_video = {
-                executor.submit(regenerate_single_thumbnail, video): video 
-                for video in videos
-            }
-            
-            # Recopilar resultados conforme se completan
-            for i, future in enumerate(as_completed(future_to_video), 1):
-                try:
-                    result = future.result()
-                    
-                    if result['success']:
-                        success += 1
-                        logger.info(f"✓ {result['video_name']}")
-                        
-                        # Acumular update para batch (formato correcto para batch_update_videos)
-                        batch_updates.append({
-                            'id': result['video_id'],
-                            'thumbnail_path': result['thumbnail_path']
-                        })
-                        
-                    else:
-                        failed += 1
-                        logger.warning(f"✗ {result['error']}")
-                    
-                    # Batch update cada 25 thumbnails o al final
-                    if len(batch_updates) >= batch_size or i == len(videos):
-                        if batch_updates:
-                            try:
-                                batch_success, batch_failed = self.db.batch_update_videos(batch_updates)
-                                logger.debug(f"🔄 Batch update: {batch_success} exitosos, {batch_failed} fallidos")
-                                batch_updates = []  # Limpiar batch
-                            except Exception as e:
-                                logger.warning(f"Error en batch update: {e}")
-                    
-                    # Mostrar progreso cada 10 thumbnails
-                    if i % 10 == 0 or i == len(videos):
-                        logger.info(f"⚡ Progreso: {i}/{len(videos)} ({i/len(videos)*100:.1f}%) - {success} exitosos, {failed} fallidos")
-                        
-                except Exception as e:
-                    failed += 1
-                    video = future_to_video[future]
-                    logger.error(f"Error procesando {video.get('file_name', 'unknown')}: {e}")
-        
-        # Procesar cualquier update restante
-        if batch_updates:
-            try:
-                batch_success, batch_failed = self.db.batch_update_videos(batch_updates)
-                logger.info(f"🔄 Batch update final: {batch_success} exitosos, {batch_failed} fallidos")
-            except Exception as e:
-                logger.warning(f"Error en batch update final: {e}")
-        
-        return success, failed
+        return self._run_thumbnail_jobs(videos, regenerate_single_thumbnail, progress_callback, checkpoint)
     
-    def _generate_thumbnails_parallel(self, videos: List[Dict], force: bool = False) -> Tuple[int, int]:
+    def _generate_thumbnails_parallel(self, videos: List[Dict], force: bool = False,
+                                      progress_callback: Optional[Callable] = None,
+                                      checkpoint: Optional[Dict] = None) -> Tuple[int, int]:
         """⚡ Generar thumbnails en paralelo con ThreadPoolExecutor"""
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        
-        success = 0
-        failed = 0
-        # Optimizar workers para I/O bound (thumbnail generation)
-        cpu_count = os.cpu_count() or 4
-        # Para thumbnail generation, usar menos workers para evitar thrashing
-        max_workers = min(4, len(videos))
-        
         def generate_single_thumbnail(video_data):
             """Generar thumbnail para un video individual"""
             try:
@@ -932,7 +966,9 @@ class ThumbnailOperations:
                     return {'success': False, 'error': f"Video no existe: {video_path}", 'video_id': video_data['id']}
                 
                 # Generar thumbnail
-                thumbnail_path = self.thumbnail_generator.generate_thumbnail(video_path, force_regenerate=force)
+                thumbnail_path = self.thumbnail_generator.generate_thumbnail(
+                    video_path, force_regenerate=force, media_id=video_data['id']
+                )
                 
                 if thumbnail_path:
                     return {
@@ -948,19 +984,72 @@ class ThumbnailOperations:
             except Exception as e:
                 return {'success': False, 'error': f"Error con {video_data.get('file_name', 'unknown')}: {e}", 'video_id': video_data['id']}
         
+        return self._run_thumbnail_jobs(videos, generate_single_thumbnail, progress_callback, checkpoint)
+    
+    @staticmethod
+    def _new_thumbnail_checkpoint(checkpoint: Optional[Dict] = None) -> Dict:
+        """Copia de un checkpoint {'done_ids', 'successful', 'failed'} (vacío si no hay)"""
+        checkpoint = checkpoint or {}
+        return {
+            'done_ids': list(checkpoint.get('done_ids') or []),
+            'successful': checkpoint.get('successful', 0),
+            'failed': checkpoint.get('failed', 0)
+        }
+    
+    def _run_thumbnail_jobs(self, videos: List[Dict], job: Callable[[Dict], Dict],
+                            progress_callback: Optional[Callable] = None,
+                            checkpoint: Optional[Dict] = None) -> Tuple[int, int]:
+        """
+        ⚡ Ejecutar job por video en paralelo y guardar las rutas en BD por lotes
+        
+        checkpoint['done_ids'] acumula los videos ya procesados (los fallidos al
+        momento, los exitosos cuando su ruta queda escrita en BD) y se reporta
+        en cada progress_callback para poder reanudar la operación.
+        
+        Returns:
+            (exitosos, fallidos) de esta ejecución
+        """
+        success = 0
+        failed = 0
+        if not videos:
+            return success, failed
+        
+        if checkpoint is None:
+            checkpoint = self._new_thumbnail_checkpoint()
+        done_ids = checkpoint['done_ids']
+        already_done = len(done_ids)
+        total = already_done + len(videos)
+        
+        # Para thumbnail generation, usar menos workers para evitar thrashing
+        max_workers = min(4, len(videos))
+        
         # Procesamiento en paralelo con batch updates
         batch_updates = []  # Acumular updates para BD
         batch_size = 25  # Actualizar BD cada 25 thumbnails
         
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        def flush_batch_updates():
+            nonlocal batch_updates
+            if not batch_updates:
+                return
+            try:
+                batch_success, batch_failed = self.db.batch_update_videos(batch_updates)
+                logger.debug(f"🔄 Batch update: {batch_success} exitosos, {batch_failed} fallidos")
+                done_ids.extend(update['id'] for update in batch_updates)
+                batch_updates = []  # Limpiar batch
+            except Exception as e:
+                logger.warning(f"Error en batch update: {e}")
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
             # Enviar todas las tareas
             future_to_video = {
-                executor.submit(generate_single_thumbnail, video): video 
+                executor.submit(job, video): video 
                 for video in videos
             }
             
             # Recopilar resultados conforme se completan
             for i, future in enumerate(as_completed(future_to_video), 1):
+                video = future_to_video[future]
                 try:
                     result = future.result()
                     
@@ -976,17 +1065,12 @@ class ThumbnailOperations:
                         
                     else:
                         failed += 1
+                        done_ids.append(video['id'])
                         logger.warning(f"✗ {result['error']}")
                     
                     # Batch update cada 25 thumbnails o al final
                     if len(batch_updates) >= batch_size or i == len(videos):
-                        if batch_updates:
-                            try:
-                                batch_success, batch_failed = self.db.batch_update_videos(batch_updates)
-                                logger.debug(f"🔄 Batch update: {batch_success} exitosos, {batch_failed} fallidos")
-                                batch_updates = []  # Limpiar batch
-                            except Exception as e:
-                                logger.warning(f"Error en batch update: {e}")
+                        flush_batch_updates()
                     
                     # Mostrar progreso cada 10 thumbnails
                     if i % 10 == 0 or i == len(videos):
@@ -994,16 +1078,22 @@ class ThumbnailOperations:
                         
                 except Exception as e:
                     failed += 1
-                    video = future_to_video[future]
+                    done_ids.append(video['id'])
                     logger.error(f"Error procesando {video.get('file_name', 'unknown')}: {e}")
-        
-        # Procesar cualquier update restante
-        if batch_updates:
-            try:
-                batch_success, batch_failed = self.db.batch_update_videos(batch_updates)
-                logger.info(f"🔄 Batch update final: {batch_success} exitosos, {batch_failed} fallidos")
-            except Exception as e:
-                logger.warning(f"Error en batch update final: {e}")
+                
+                if progress_callback:
+                    progress_callback(
+                        already_done + i, total, video.get('file_name', ''),
+                        successful=checkpoint['successful'] + success,
+                        failed=checkpoint['failed'] + failed,
+                        checkpoint={'done_ids': done_ids,
+                                    'successful': checkpoint['successful'] + success,
+                                    'failed': checkpoint['failed'] + failed}
+                    )
+        finally:
+            # Cancelación o error: no arrancar los pendientes y guardar lo ya generado
+            executor.shutdown(wait=True, cancel_futures=True)
+            flush_batch_updates()
         
         return success, failed
     
@@ -1055,6 +1145,11 @@ def clean_thumbnails(force: bool = False) -> Dict[str, Any]:
     ops = ThumbnailOperations()
     return ops.clean_thumbnails(force)
 
+def migrate_thumbnail_store(batch_size: int = 500) -> Dict[str, Any]:
+    """Función de conveniencia para migrar thumbnails planos al almacén por contenido"""
+    ops = ThumbnailOperations()
+    return ops.migrate_thumbnail_store(batch_size)
+
 def get_thumbnail_stats(video_ids: Optional[List[int]] = None) -> Dict[str, Any]:
     """Función de conveniencia para obtener estadísticas de thumbnails"""
     ops = ThumbnailOperations()
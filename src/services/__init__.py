@@ -17,7 +17,10 @@ __all__ = [
     'CharacterIntelligence',
     'OptimizedCharacterDetector',
     'VideoProcessor',
+    'MediaProbe',
+    'get_media_probe',
     'get_existing_paths_cached',
     'PatternCache',
+    'CacheEngine',
     'get_global_cache',
 ]
@@ -0,0 +1,169 @@
+"""
+Tag-Flow V2 - Audio Fingerprint
+Huellas acústicas locales (NumPy) por hashing de pares de picos espectrales,
+para reconocer sonidos ya identificados sin llamar a APIs externas
+"""
+
+import io
+import wave
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Tuple
+import logging
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+logger = logging.getLogger(__name__)
+
+# Parámetros del espectrograma (≈23 ms por frame a 11025 Hz)
+SAMPLE_RATE = 11025
+FFT_SIZE = 1024
+HOP_SIZE = 256
+
+# Picos: máximo local en una vecindad tiempo × frecuencia
+PEAK_NEIGHBORHOOD_TIME = 10
+PEAK_NEIGHBORHOOD_FREQ = 10
+PEAKS_PER_SECOND = 30
+PEAK_MIN_PROMINENCE_DB = 20.0  # Sobre la mediana del espectrograma (suelo de ruido)
+
+# Pares ancla → objetivo: hash = f1 (10 bits) | f2 (10 bits) | dt (6 bits)
+FAN_OUT = 10
+MAX_DELTA_FRAMES = 63
+
+
+@dataclass
+class AudioClip:
+    """Clip de audio en memoria: PCM 16-bit mono (sin archivo temporal)"""
+    samples: np.ndarray = field(repr=False)  # int16
+    sample_rate: int
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate if self.sample_rate else 0.0
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def to_float(self, target_rate: int = SAMPLE_RATE) -> np.ndarray:
+        """Muestras float32 remuestreadas a target_rate"""
+        return resample(self.samples.astype(np.float32), self.sample_rate, target_rate)
+
+    def to_wav_bytes(self) -> bytes:
+        """Clip codificado como WAV (para APIs que reciben un archivo)"""
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(self.samples.astype('<i2').tobytes())
+        return buffer.getvalue()
+
+
+def load_wav_mono(audio_path: Path, target_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Leer WAV PCM 16-bit como float32 mono remuestreado a target_rate"""
+    with wave.open(str(audio_path), 'rb') as wav:
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"Solo se soporta PCM 16-bit: {audio_path}")
+        raw = wav.readframes(wav.getnframes())
+
+    samples = np.frombuffer(raw, dtype='<i2').astype(np.float32)
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return resample(samples, rate, target_rate)
+
+
+def resample(samples: np.ndarray, rate: int, target_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Remuestreo simple: promedio por bloques si el factor es entero, interpolación si no"""
+    if rate == target_rate or len(samples) == 0:
+        return samples
+    if rate % target_rate == 0:
+        factor = rate // target_rate
+        usable = len(samples) - len(samples) % factor
+        return samples[:usable].reshape(-1, factor).mean(axis=1)
+
+    duration = len(samples) / rate
+    target_length = int(duration * target_rate)
+    positions = np.linspace(0, len(samples) - 1, target_length)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def spectrogram(samples: np.ndarray) -> np.ndarray:
+    """Espectrograma log-magnitud (frames × bins)"""
+    if len(samples) < FFT_SIZE:
+        return np.zeros((0, FFT_SIZE // 2 + 1), dtype=np.float32)
+
+    frames = sliding_window_view(samples, FFT_SIZE)[::HOP_SIZE] * np.hanning(FFT_SIZE).astype(np.float32)
+    magnitude = np.abs(np.fft.rfft(frames, axis=1))
+    return (20.0 * np.log10(magnitude + 1e-6)).astype(np.float32)
+
+
+def _max_filter(values: np.ndarray, radius: int, axis: int) -> np.ndarray:
+    """Máximo deslizante separable a lo largo de un eje"""
+    pad = [(0, 0)] * values.ndim
+    pad[axis] = (radius, radius)
+    padded = np.pad(values, pad, mode='constant', constant_values=-np.inf)
+    return sliding_window_view(padded, 2 * radius + 1, axis=axis).max(axis=-1)
+
+
+def find_peaks(spec: np.ndarray) -> np.ndarray:
+    """
+    Picos espectrales (frame, bin) ordenados por tiempo
+
+    Un pico es el máximo de su vecindad y supera el suelo de ruido (mediana)
+    en PEAK_MIN_PROMINENCE_DB; se conservan los PEAKS_PER_SECOND más fuertes
+    por segundo de audio.
+    """
+    if spec.size == 0:
+        return np.zeros((0, 2), dtype=np.int32)
+
+    local_max = _max_filter(_max_filter(spec, PEAK_NEIGHBORHOOD_FREQ, axis=1), PEAK_NEIGHBORHOOD_TIME, axis=0)
+    mask = (spec == local_max) & (spec > np.median(spec) + PEAK_MIN_PROMINENCE_DB)
+    frames, bins = np.nonzero(mask)
+    if len(frames) == 0:
+        return np.zeros((0, 2), dtype=np.int32)
+
+    duration = spec.shape[0] * HOP_SIZE / SAMPLE_RATE
+    max_peaks = max(1, int(duration * PEAKS_PER_SECOND))
+    if len(frames) > max_peaks:
+        strongest = np.argpartition(spec[frames, bins], -max_peaks)[-max_peaks:]
+        frames, bins = frames[strongest], bins[strongest]
+
+    order = np.lexsort((bins, frames))
+    return np.stack([frames[order], bins[order]], axis=1).astype(np.int32)
+
+
+def hash_peaks(peaks: np.ndarray) -> List[Tuple[int, int]]:
+    """Pares (ancla, objetivo) → [(hash, frame_ancla)]"""
+    hashes = []
+    for step in range(1, FAN_OUT + 1):
+        if len(peaks) <= step:
+            break
+        anchors = peaks[:-step]
+        targets = peaks[step:]
+        delta = targets[:, 0] - anchors[:, 0]
+        valid = (delta >= 1) & (delta <= MAX_DELTA_FRAMES)
+        if not valid.any():
+            continue
+
+        anchors, targets, delta = anchors[valid], targets[valid], delta[valid]
+        values = (anchors[:, 1].astype(np.int64) << 16) | (targets[:, 1].astype(np.int64) << 6) | delta
+        hashes.extend(zip(values.tolist(), anchors[:, 0].tolist()))
+    return hashes
+
+
+def fingerprint_samples(samples: np.ndarray) -> List[Tuple[int, int]]:
+    """Huella de muestras mono a SAMPLE_RATE: [(hash, offset en frames)]"""
+    return hash_peaks(find_peaks(spectrogram(samples)))
+
+
+def fingerprint_file(audio_path: Path) -> List[Tuple[int, int]]:
+    """Huella de un WAV (p.ej. el clip de VideoProcessor.extract_audio)"""
+    return fingerprint_samples(load_wav_mono(audio_path))
+
+
+def fingerprint_clip(clip: AudioClip) -> List[Tuple[int, int]]:
+    """Huella de un clip en memoria (VideoProcessor.extract_audio_clip)"""
+    return fingerprint_samples(clip.to_float())
@@ -0,0 +1,495 @@
+"""
+Tag-Flow V2 - Cache Engine
+Motor de cache en memoria común: LRU O(1) con OrderedDict, lock striping,
+contabilidad de bytes sin serializar, índices de tags para invalidación y
+single-flight para evitar estampidas en los misses
+"""
+
+import heapq
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import wraps
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Recálculos en segundo plano (stale-while-revalidate), compartido por todos los motores
+_refresh_executor: Optional[ThreadPoolExecutor] = None
+_refresh_executor_lock = threading.Lock()
+
+
+def _get_refresh_executor() -> ThreadPoolExecutor:
+    global _refresh_executor
+    with _refresh_executor_lock:
+        if _refresh_executor is None:
+            _refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cache-refresh')
+        return _refresh_executor
+
+# Estimación de tamaño: profundidad y elementos muestreados por contenedor
+_SIZE_MAX_DEPTH = 3
+_SIZE_SAMPLE = 32
+
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Tamaño aproximado en bytes sin serializar
+
+    Recorre contenedores hasta _SIZE_MAX_DEPTH niveles muestreando como mucho
+    _SIZE_SAMPLE elementos y extrapolando, de modo que el coste es acotado
+    incluso para sets de 100K paths.
+    """
+    try:
+        size = sys.getsizeof(value)
+    except TypeError:
+        return 64
+    if _depth >= _SIZE_MAX_DEPTH or isinstance(value, (str, bytes, bytearray, int, float, bool)):
+        return size
+
+    if isinstance(value, dict):
+        count = len(value)
+        if not count:
+            return size
+        sample = list(islice(value.items(), _SIZE_SAMPLE))
+        sampled = sum(estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in sample)
+        return size + sampled * count // len(sample)
+
+    if isinstance(value, (list, tuple, set, frozenset)):
+        count = len(value)
+        if not count:
+            return size
+        sample = list(islice(value, _SIZE_SAMPLE))
+        sampled = sum(estimate_size(item, _depth + 1) for item in sample)
+        return size + sampled * count // len(sample)
+
+    if hasattr(value, '__dict__'):
+        return size + estimate_size(vars(value), _depth + 1)
+    return size
+
+
+class _Entry:
+    __slots__ = ('value', 'expires_at', 'stale_until', 'size', 'tags', 'access_count')
+
+    def __init__(self, value: Any, expires_at: Optional[float], stale_until: Optional[float],
+                 size: int, tags: frozenset):
+        self.value = value
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.size = size
+        self.tags = tags
+        self.access_count = 0
+
+    def expired(self, now: float) -> bool:
+        return self.expires_at is not None and now >= self.expires_at
+
+    def servable_stale(self, now: float) -> bool:
+        """Caducada pero aún dentro de la ventana stale-while-revalidate"""
+        return self.stale_until is not None and now < self.stale_until
+
+
+class _Stripe:
+    """Segmento del cache con su propio lock, orden LRU y cálculos en vuelo"""
+    __slots__ = ('lock', 'entries', 'bytes', 'inflight', 'epoch')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.bytes = 0
+        self.inflight: Dict[str, Future] = {}
+        # Las invalidaciones incrementan la época: un cálculo que empezó antes
+        # no guarda su resultado (podría estar obsoleto)
+        self.epoch = 0
+
+
+class CacheEngine:
+    """
+    Cache LRU con TTL, lock striping, límite de bytes e invalidación por tags
+
+    - Cada clave vive en un stripe (hash % stripes); las operaciones sobre
+      claves distintas no compiten por el mismo lock.
+    - LRU por stripe con OrderedDict (move_to_end / popitem en O(1)).
+    - max_entries y max_bytes se reparten entre stripes.
+    - tags: índice tag → claves para invalidar por creador, plataforma,
+      suscripción... sin recorrer el cache.
+    - get_or_compute(): un único cálculo por clave; los demás llamantes
+      esperan su resultado y el lock no se mantiene durante el cálculo.
+      Con stale_ttl_seconds, un valor caducado se sigue sirviendo durante
+      esa ventana mientras se recalcula en segundo plano.
+
+    default_ttl=None significa que las entradas no caducan.
+    """
+
+    def __init__(self, max_entries: int = 1000, default_ttl: Optional[float] = 300,
+                 max_bytes: Optional[int] = None, stripes: int = 16, name: str = 'cache'):
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+
+        stripe_count = max(1, min(stripes, self.max_entries))
+        self._stripes = [_Stripe() for _ in range(stripe_count)]
+        self._stripe_max_entries = max(1, -(-self.max_entries // stripe_count))
+        self._stripe_max_bytes = max_bytes // stripe_count if max_bytes else None
+
+        self._tags: Dict[str, Set[str]] = {}
+        self._tags_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'waits': 0,
+            'stale_hits': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0
+        }
+
+    # ------------------------------------------------------------------
+    # Internos
+    # ------------------------------------------------------------------
+
+    def _stripe(self, key: str) -> _Stripe:
+        return self._stripes[hash(key) % len(self._stripes)]
+
+    def _count(self, stat: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[stat] += amount
+
+    def _expires_at(self, ttl_seconds: Optional[float]) -> Optional[float]:
+        ttl = self.default_ttl if ttl_seconds is None else ttl_seconds
+        return time.time() + ttl if ttl else None
+
+    def _lookup(self, stripe: _Stripe, key: str, now: float) -> Any:
+        """Entrada válida o _MISSING (con el lock del stripe tomado)"""
+        entry = stripe.entries.get(key)
+        if entry is None:
+            return _MISSING
+        if entry.expired(now):
+            if not entry.servable_stale(now):
+                self._remove(stripe, key)
+                self._count('expirations')
+            return _MISSING
+        stripe.entries.move_to_end(key)
+        entry.access_count += 1
+        return entry.value
+
+    def _remove(self, stripe: _Stripe, key: str) -> Optional[_Entry]:
+        """Quitar una clave del stripe y del índice de tags (con el lock del stripe tomado)"""
+        entry = stripe.entries.pop(key, None)
+        if entry is None:
+            return None
+        stripe.bytes -= entry.size
+        if entry.tags:
+            with self._tags_lock:
+                for tag in entry.tags:
+                    keys = self._tags.get(tag)
+                    if keys is not None:
+                        keys.discard(key)
+                        if not keys:
+                            del self._tags[tag]
+        return entry
+
+    def _store(self, stripe: _Stripe, key: str, value: Any, size: int,
+               ttl_seconds: Optional[float], tags: Optional[Iterable[str]],
+               stale_ttl_seconds: Optional[float] = None):
+        """Guardar y desalojar por LRU (con el lock del stripe tomado)"""
+        tags = frozenset(tags) if tags else frozenset()
+        self._remove(stripe, key)
+
+        expires_at = self._expires_at(ttl_seconds)
+        stale_until = expires_at + stale_ttl_seconds if expires_at and stale_ttl_seconds else None
+        entry = _Entry(value, expires_at, stale_until, size, tags)
+        stripe.entries[key] = entry
+        stripe.bytes += entry.size
+        if tags:
+            with self._tags_lock:
+                for tag in tags:
+                    self._tags.setdefault(tag, set()).add(key)
+
+        evicted = 0
+        while len(stripe.entries) > 1 and (
+                len(stripe.entries) > self._stripe_max_entries or
+                (self._stripe_max_bytes and stripe.bytes > self._stripe_max_bytes)):
+            oldest_key = next(iter(stripe.entries))
+            self._remove(stripe, oldest_key)
+            evicted += 1
+        if evicted:
+            self._count('evictions', evicted)
+
+    # ------------------------------------------------------------------
+    # API
+    # ------------------------------------------------------------------
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Valor cacheado (default si no existe o caducó)"""
+        stripe = self._stripe(key)
+        with stripe.lock:
+            value = self._lookup(stripe, key, time.time())
+        if value is _MISSING:
+            self._count('misses')
+            return default
+        self._count('hits')
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        stripe = self._stripe(key)
+        with stripe.lock:
+            entry = stripe.entries.get(key)
+            return entry is not None and not entry.expired(time.time())
+
+    def __len__(self) -> int:
+        return sum(len(stripe.entries) for stripe in self._stripes)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None,
+            tags: Optional[Iterable[str]] = None):
+        """Guardar valor (ttl_seconds=None usa default_ttl)"""
+        size = estimate_size(value)
+        stripe = self._stripe(key)
+        with stripe.lock:
+            self._store(stripe, key, value, size, ttl_seconds, tags)
+
+    def delete(self, key: str) -> bool:
+        """Eliminar una clave"""
+        stripe = self._stripe(key)
+        with stripe.lock:
+            stripe.epoch += 1
+            removed = self._remove(stripe, key) is not None
+        if removed:
+            self._count('invalidations')
+        return removed
+
+    def get_or_compute(self, key: str, compute_func: Callable, *args,
+                       ttl_seconds: Optional[float] = None, tags: Optional[Iterable[str]] = None,
+                       stale_ttl_seconds: Optional[float] = None, **kwargs) -> Any:
+        """
+        Valor cacheado o calculado una sola vez (single-flight)
+
+        Llamadas concurrentes con la misma clave esperan el cálculo en curso;
+        si falla, todas reciben la excepción y no se cachea nada. Con
+        stale_ttl_seconds, tras caducar se sirve el valor anterior durante esa
+        ventana y un único recálculo corre en segundo plano.
+        """
+        stripe = self._stripe(key)
+        now = time.time()
+        with stripe.lock:
+            value = self._lookup(stripe, key, now)
+            if value is not _MISSING:
+                self._count('hits')
+                return value
+
+            future = stripe.inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                stripe.inflight[key] = future
+                epoch = stripe.epoch
+
+            entry = stripe.entries.get(key)
+            stale = entry is not None and entry.servable_stale(now)
+            if stale:
+                stripe.entries.move_to_end(key)
+                value = entry.value
+
+        compute = (stripe, key, future, epoch if owner else None, compute_func, args, kwargs,
+                   ttl_seconds, tags, stale_ttl_seconds)
+
+        if stale:
+            self._count('stale_hits')
+            if owner:
+                self._count('refreshes')
+                _get_refresh_executor().submit(self._refresh, *compute)
+            return value
+
+        if not owner:
+            self._count('waits')
+            return future.result()
+
+        self._count('misses')
+        return self._compute(*compute)
+
+    def _compute(self, stripe: _Stripe, key: str, future: Future, epoch: int, compute_func: Callable,
+                 args: tuple, kwargs: dict, ttl_seconds: Optional[float], tags: Optional[Iterable[str]],
+                 stale_ttl_seconds: Optional[float]) -> Any:
+        """Ejecutar el cálculo del propietario de la clave y publicar el resultado"""
+        try:
+            value = compute_func(*args, **kwargs)
+        except BaseException as e:
+            with stripe.lock:
+                stripe.inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        size = estimate_size(value)
+        with stripe.lock:
+            if stripe.epoch == epoch:
+                self._store(stripe, key, value, size, ttl_seconds, tags, stale_ttl_seconds)
+            stripe.inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def _refresh(self, *compute):
+        """Recálculo en segundo plano; si falla se conserva el valor anterior"""
+        key = compute[1]
+        try:
+            self._compute(*compute)
+        except Exception as e:
+            self._count('refresh_errors')
+            logger.warning(f"⚠️ Error recalculando '{key}' en segundo plano: {e}")
+
+    def invalidate_tag(self, tag: str) -> int:
+        """Invalidar todas las claves con un tag"""
+        with self._tags_lock:
+            keys = self._tags.pop(tag, set())
+        return self._invalidate_keys(keys)
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """Invalidar todas las claves con alguno de los tags"""
+        return sum(self.invalidate_tag(tag) for tag in tags)
+
+    def invalidate_matching(self, predicate: Callable[[str], bool]) -> int:
+        """Invalidar por predicado sobre la clave (recorre el cache: preferir tags)"""
+        keys = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                keys.extend(key for key in stripe.entries if predicate(key))
+        return self._invalidate_keys(keys)
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        """Invalidar claves que empiezan por prefix"""
+        return self.invalidate_matching(lambda key: key.startswith(prefix))
+
+    def _invalidate_keys(self, keys: Iterable[str]) -> int:
+        removed = 0
+        for key in keys:
+            stripe = self._stripe(key)
+            with stripe.lock:
+                stripe.epoch += 1
+                if self._remove(stripe, key) is not None:
+                    removed += 1
+        if removed:
+            self._count('invalidations', removed)
+        return removed
+
+    def clear(self) -> int:
+        """Vaciar el cache (las métricas se conservan)"""
+        cleared = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                stripe.epoch += 1
+                cleared += len(stripe.entries)
+                stripe.entries.clear()
+                stripe.bytes = 0
+        with self._tags_lock:
+            self._tags.clear()
+        if cleared:
+            self._count('invalidations', cleared)
+        return cleared
+
+    def reset_stats(self):
+        """Poner a cero las métricas"""
+        with self._stats_lock:
+            for stat in self._stats:
+                self._stats[stat] = 0
+
+    def cleanup_expired(self) -> int:
+        """Eliminar entradas caducadas (fuera de su ventana stale)"""
+        now = time.time()
+        removed = 0
+        for stripe in self._stripes:
+            with stripe.lock:
+                expired = [key for key, entry in stripe.entries.items()
+                           if entry.expired(now) and not entry.servable_stale(now)]
+                for key in expired:
+                    self._remove(stripe, key)
+                removed += len(expired)
+        if removed:
+            self._count('expirations', removed)
+        return removed
+
+    def keys(self) -> List[str]:
+        """Claves actuales (incluidas las caducadas aún no eliminadas)"""
+        keys = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                keys.extend(stripe.entries)
+        return keys
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(stripe.bytes for stripe in self._stripes)
+
+    def most_accessed(self, limit: int = 5) -> List[Dict]:
+        """Claves con más hits"""
+        candidates = []
+        for stripe in self._stripes:
+            with stripe.lock:
+                candidates.extend((entry.access_count, key) for key, entry in stripe.entries.items())
+        return [{'key': key, 'access_count': count} for count, key in heapq.nlargest(limit, candidates)]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Métricas del cache"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with self._tags_lock:
+            tag_count = len(self._tags)
+
+        entries = len(self)
+        total_bytes = self.total_bytes
+        total_requests = stats['hits'] + stats['misses']
+        return {
+            'name': self.name,
+            **stats,
+            'total_requests': total_requests,
+            'hit_rate_percent': round(stats['hits'] / total_requests * 100, 2) if total_requests else 0.0,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'total_bytes': total_bytes,
+            'max_bytes': self.max_bytes,
+            'avg_entry_bytes': total_bytes // entries if entries else 0,
+            'stripes': len(self._stripes),
+            'tags': tag_count
+        }
+
+    def cached(self, ttl: Optional[float] = None, key_func: Optional[Callable] = None,
+               tags: Optional[Callable] = None):
+        """
+        Decorador: cachear el resultado de una función en este motor
+
+        Args:
+            ttl: TTL en segundos (None = default_ttl)
+            key_func: función (*args, **kwargs) -> clave; por defecto nombre + argumentos
+            tags: función (*args, **kwargs) -> iterable de tags
+        """
+        def decorator(func):
+            def build_key(*args, **kwargs):
+                if key_func:
+                    return key_func(*args, **kwargs)
+                key_parts = [func.__name__]
+                key_parts.extend(str(arg) for arg in args)
+                key_parts.extend(f"{k}={v}" for k, v in sorted(kwargs.items()))
+                return ":".join(key_parts)
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                return self.get_or_compute(
+                    build_key(*args, **kwargs),
+                    lambda: func(*args, **kwargs),
+                    ttl_seconds=ttl,
+                    tags=tags(*args, **kwargs) if tags else None
+                )
+
+            wrapper.cache_key = build_key
+            wrapper.cache_invalidate = lambda pattern=None: self.invalidate_matching(
+                lambda key: (pattern or func.__name__) in key
+            )
+            return wrapper
+        return decorator
@@ -0,0 +1,220 @@
+"""
+Tag-Flow V2 - Face Embedding Index
+Embeddings precalculados de caras_conocidas/ con búsqueda vectorizada:
+una inferencia por frame + un producto matriz·vector en lugar de N DeepFace.verify
+"""
+
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """Normalizar L2 por filas (filas nulas quedan a cero)"""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if matrix.ndim == 1:
+        matrix = matrix[np.newaxis, :]
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class FaceEmbeddingIndex:
+    """
+    Índice persistente de embeddings de caras conocidas
+
+    El archivo .npz guarda la matriz normalizada (N × D, float32) y un
+    manifiesto con ruta, tamaño y mtime de cada imagen; sync() solo recalcula
+    las imágenes nuevas o modificadas y descarta las eliminadas.
+
+    La búsqueda es un único producto matriz·vector sobre vectores
+    normalizados; de la similitud se derivan la distancia coseno (métrica por
+    defecto de DeepFace.verify) o la euclídea L2 (sqrt(2 · coseno)).
+    """
+
+    def __init__(self, index_path: Path, model_name: str,
+                 embed_fn: Callable[[str], Optional[Sequence[float]]]):
+        self.index_path = Path(index_path)
+        self.model_name = model_name
+        self._embed_fn = embed_fn
+        self._lock = threading.Lock()
+
+        self.entries: List[Dict] = []
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def _load(self):
+        """Cargar índice desde disco (ignorado si es de otro modelo o versión)"""
+        if not self.index_path.exists():
+            return
+        try:
+            with np.load(self.index_path, allow_pickle=False) as data:
+                manifest = json.loads(str(data['manifest']))
+                matrix = data['embeddings']
+
+            if (manifest.get('version') != INDEX_FORMAT_VERSION or
+                    manifest.get('model') != self.model_name or
+                    len(manifest.get('entries', [])) != len(matrix)):
+                logger.info(f"Índice de embeddings obsoleto ({self.index_path.name}), se reconstruirá")
+                return
+
+            self.entries = manifest['entries']
+            self.matrix = matrix.astype(np.float32, copy=False)
+        except Exception as e:
+            logger.warning(f"No se pudo cargar índice de embeddings {self.index_path}: {e}")
+
+    def _save(self):
+        """Escritura atómica del índice (tmp + replace)"""
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            'version': INDEX_FORMAT_VERSION,
+            'model': self.model_name,
+            'entries': self.entries
+        }
+        # Nombre temporal único: varios procesos del pipeline pueden reconstruir el índice a la vez
+        with tempfile.NamedTemporaryFile(dir=self.index_path.parent, prefix=self.index_path.name + '.',
+                                         suffix='.tmp', delete=False) as f:
+            tmp_path = f.name
+            try:
+                np.savez(f, embeddings=self.matrix, manifest=np.array(json.dumps(manifest)))
+            except BaseException:
+                f.close()
+                os.unlink(tmp_path)
+                raise
+        os.replace(tmp_path, self.index_path)
+
+    def sync(self, known_faces_db: Dict[str, List[Dict]]) -> Dict:
+        """
+        Sincronizar el índice con known_faces_db
+
+        Returns:
+            Dict con contadores reused / embedded / removed / failed
+        """
+        with self._lock:
+            previous = {entry['image_path']: (entry, row) for row, entry in enumerate(self.entries)}
+            stats = {'reused': 0, 'embedded': 0, 'removed': 0, 'failed': 0}
+
+            entries: List[Dict] = []
+            vectors: List[np.ndarray] = []
+            for category, characters in known_faces_db.items():
+                for character in characters:
+                    image_path = character['image_path']
+                    try:
+                        stat = os.stat(image_path)
+                    except OSError:
+                        continue
+
+                    cached = previous.pop(image_path, None)
+                    if cached and cached[0]['mtime_ns'] == stat.st_mtime_ns and cached[0]['size'] == stat.st_size:
+                        vector = self.matrix[cached[1]]
+                        stats['reused'] += 1
+                    else:
+                        embedding = self._embed(image_path)
+                        if embedding is None:
+                            stats['failed'] += 1
+                            continue
+                        vector = normalize_rows(embedding)[0]
+                        stats['embedded'] += 1
+
+                    entries.append({
+                        'name': character['name'],
+                        'category': category,
+                        'image_path': image_path,
+                        'mtime_ns': stat.st_mtime_ns,
+                        'size': stat.st_size
+                    })
+                    vectors.append(vector)
+
+            stats['removed'] = len(previous)
+            changed = stats['embedded'] or stats['removed'] or len(entries) != len(self.entries)
+
+            self.entries = entries
+            self.matrix = np.vstack(vectors).astype(np.float32) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+            if changed:
+                try:
+                    self._save()
+                except Exception as e:
+                    logger.warning(f"No se pudo guardar índice de embeddings: {e}")
+
+            logger.info(f"🧠 Índice de caras: {len(self.entries)} embeddings "
+                        f"(reutilizados {stats['reused']}, nuevos {stats['embedded']}, "
+                        f"eliminados {stats['removed']}, fallidos {stats['failed']})")
+            return stats
+
+    def _embed(self, image_path: str) -> Optional[np.ndarray]:
+        try:
+            embedding = self._embed_fn(image_path)
+        except Exception as e:
+            logger.debug(f"No se pudo calcular embedding de {image_path}: {e}")
+            return None
+        if embedding is None or len(embedding) == 0:
+            return None
+        return np.asarray(embedding, dtype=np.float32)
+
+    def search(self, embeddings, top_k: int = 3, max_distance: float = 0.6,
+               metric: str = 'cosine') -> List[List[Dict]]:
+        """
+        Buscar los top_k vecinos de cada embedding de consulta
+
+        Args:
+            embeddings: vector (D,) o matriz (M × D) de caras del frame
+            top_k: máximo de coincidencias por cara
+            max_distance: distancia máxima aceptada (en la métrica indicada)
+            metric: 'cosine' o 'euclidean_l2'
+
+        Returns:
+            Por cada cara, lista de {name, category, image_path, distance, confidence}
+            ordenada por distancia ascendente
+        """
+        queries = normalize_rows(embeddings)
+        with self._lock:
+            matrix = self.matrix
+            entries = self.entries
+
+        if not entries or queries.shape[1] != matrix.shape[1]:
+            return [[] for _ in range(len(queries))]
+
+        distances = np.clip(1.0 - queries @ matrix.T, 0.0, 2.0)  # (M × N)
+        if metric == 'euclidean_l2':
+            distances = np.sqrt(2.0 * distances)
+        elif metric != 'cosine':
+            raise ValueError(f"Métrica no soportada: {metric}")
+        k = min(top_k, len(entries))
+
+        results = []
+        for row in distances:
+            if k < len(row):
+                candidates = np.argpartition(row, k - 1)[:k]
+            else:
+                candidates = np.arange(len(row))
+            candidates = candidates[np.argsort(row[candidates])]
+
+            matches = []
+            for idx in candidates:
+                distance = float(row[idx])
+                if distance >= max_distance:
+                    break
+                entry = entries[idx]
+                matches.append({
+                    'name': entry['name'],
+                    'category': entry['category'],
+                    'image_path': entry['image_path'],
+                    'distance': distance,
+                    'confidence': max(0.0, 1.0 - distance)
+                })
+            results.append(matches)
+        return results
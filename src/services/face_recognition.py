@@ -16,6 +16,7 @@ from config import config
 
 # Importar el nuevo sistema de inteligencia a través del service factory
 from .service_factory import get_character_intelligence
+from .face_embedding_index import FaceEmbeddingIndex
 
 # Configurar logger primero
 logger = logging.getLogger(__name__)
@@ -55,6 +56,7 @@ class FaceRecognizer:
         self.deepface_model = config.DEEPFACE_MODEL
         self.known_faces_path = config.KNOWN_FACES_PATH
         self.known_faces_db = self._load_known_faces_db()
+        self._embedding_index = None  # Se construye en el primer uso de DeepFace
         
         logger.info(f"Reconocedor facial inicializado - Vision: {bool(self.vision_client)}, DeepFace: {self.deepface_available}")
     
@@ -86,6 +88,39 @@ class FaceRecognizer:
         
         return db
     
+    def _represent(self, img) -> List[List[float]]:
+        """Embeddings de todas las caras de una imagen (una inferencia por cara)"""
+        representations = DeepFace.represent(
+            img_path=img,
+            model_name=self.deepface_model,
+            enforce_detection=False  # No fallar si no detecta cara
+        )
+        if isinstance(representations, dict):
+            representations = [representations]
+        return [r['embedding'] for r in representations if r.get('embedding') is not None]
+    
+    def _get_embedding_index(self) -> FaceEmbeddingIndex:
+        """Índice de embeddings de caras conocidas (solo recalcula imágenes nuevas o modificadas)"""
+        if self._embedding_index is None:
+            def embed_reference(image_path: str):
+                embeddings = self._represent(image_path)
+                return embeddings[0] if embeddings else None
+            
+            index = FaceEmbeddingIndex(config.FACE_EMBEDDING_INDEX_PATH, self.deepface_model, embed_reference)
+            index.sync(self.known_faces_db)
+            self._embedding_index = index
+        return self._embedding_index
+    
+    def refresh_known_faces(self) -> Dict:
+        """Recargar caras_conocidas/ y actualizar el índice de embeddings"""
+        self.known_faces_db = self._load_known_faces_db()
+        if self._embedding_index is None:
+            self._get_embedding_index()
+            return {'embeddings': len(self._embedding_index)}
+        stats = self._embedding_index.sync(self.known_faces_db)
+        stats['embeddings'] = len(self._embedding_index)
+        return stats
+    
     def recognize_faces_intelligent(self, image_data: bytes, video_data: Dict = None) -> Dict:
         """Reconocimiento facial inteligente combinando todas las estrategias"""
         logger.info("Iniciando reconocimiento facial inteligente")
@@ -387,7 +422,12 @@ class FaceRecognizer:
         return False
     
     def _recognize_with_deepface(self, image_data: bytes) -> Dict:
-        """Reconocimiento con DeepFace para personajes anime/gaming"""
+        """
+        Reconocimiento con DeepFace para personajes anime/gaming
+        
+        Una inferencia por frame y búsqueda top-k vectorizada sobre el índice
+        de embeddings; si el índice no está disponible se recurre a verify().
+        """
         results = {
             'detected_characters': [],
             'confidence_scores': []
@@ -399,7 +439,51 @@ class FaceRecognizer:
             
             # Convertir a array numpy
             image_array = np.array(image)
+        except Exception as e:
+            logger.error(f"Error en DeepFace: {e}")
+            return results
+        
+        try:
+            index = self._get_embedding_index()
+        except Exception as e:
+            logger.warning(f"Índice de embeddings no disponible, usando DeepFace.verify: {e}")
+            return self._recognize_with_deepface_verify(image_array)
+        
+        try:
+            frame_embeddings = self._represent(image_array)
+            if not frame_embeddings:
+                return results
+            
+            matches_per_face = index.search(
+                frame_embeddings,
+                top_k=config.FACE_MATCH_TOP_K,
+                max_distance=config.FACE_MATCH_MAX_DISTANCE,
+                metric=config.FACE_MATCH_METRIC
+            )
             
+            for matches in matches_per_face:
+                for match in matches:
+                    character_full_name = f"{match['name']} ({match['category']})"
+                    if character_full_name in results['detected_characters']:
+                        continue
+                    results['detected_characters'].append(character_full_name)
+                    results['confidence_scores'].append(match['confidence'])
+                    
+                    logger.info(f"Personaje detectado: {character_full_name} (confianza: {match['confidence']:.2f})")
+        
+        except Exception as e:
+            logger.error(f"Error en DeepFace: {e}")
+        
+        return results
+    
+    def _recognize_with_deepface_verify(self, image_array: np.ndarray) -> Dict:
+        """Comparación 1:1 con DeepFace.verify contra cada cara conocida (fallback)"""
+        results = {
+            'detected_characters': [],
+            'confidence_scores': []
+        }
+        
+        try:
             # Buscar en cada categoría de personajes conocidos
             for category, characters in self.known_faces_db.items():
                 for character in characters:
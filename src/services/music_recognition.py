@@ -10,7 +10,7 @@ import hashlib
 import time
 import json
 import re
-from typing import Dict, Optional, Tuple, List
+from typing import Dict, Optional, Tuple, List, Union
 import logging
 from pathlib import Path
 
@@ -19,6 +19,7 @@ import spotipy
 from spotipy.oauth2 import SpotifyClientCredentials
 
 from config import config
+from .audio_fingerprint import AudioClip, fingerprint_clip, fingerprint_file
 
 logger = logging.getLogger(__name__)
 
@@ -66,7 +67,109 @@ class MusicRecognizer:
             r'_([^_#\n]+)_',   # Patrón para _TITULO_
         ]
     
-    def recognize_music(self, audio_path: Path, filename: str = None) -> Dict:
+    def recognize_music(self, audio: Union[Path, AudioClip, None], filename: str = None) -> Dict:
+        """
+        Reconocer música: primero en el índice local de huellas acústicas y,
+        solo si no hay coincidencia, con la estrategia híbrida (filename + APIs)
+        
+        Args:
+            audio: clip en memoria (VideoProcessor.extract_audio_clip), ruta a
+                un WAV o None si la música se resuelve por el nombre de archivo
+            filename: nombre del archivo de video
+        """
+        fingerprint = self._fingerprint_clip(audio)
+        
+        if fingerprint:
+            indexed_result = self._recognize_with_fingerprint_index(fingerprint)
+            if indexed_result:
+                return indexed_result
+        
+        results = self._recognize_music_remote(audio, filename)
+        
+        if fingerprint and self._is_confirmed_result(results):
+            self._index_fingerprint(results, fingerprint)
+        
+        return results
+    
+    def resolves_from_filename(self, filename: str) -> bool:
+        """True si el nombre de archivo ya identifica la música (no hace falta extraer audio)"""
+        if not filename:
+            return False
+        try:
+            return bool(self._extract_music_from_filename(filename)['detected_music'])
+        except Exception:
+            return False
+    
+    def _fingerprint_clip(self, audio: Union[Path, AudioClip, None]) -> Optional[List[Tuple[int, int]]]:
+        """Huella acústica del clip (None si el índice está desactivado o falla)"""
+        if not config.USE_AUDIO_FINGERPRINT_INDEX or audio is None:
+            return None
+        try:
+            if isinstance(audio, AudioClip):
+                return fingerprint_clip(audio) or None
+            if not Path(audio).exists():
+                return None
+            return fingerprint_file(Path(audio)) or None
+        except Exception as e:
+            logger.debug(f"No se pudo calcular huella acústica: {e}")
+            return None
+    
+    def _read_audio_bytes(self, audio: Union[Path, AudioClip]) -> bytes:
+        """Audio codificado para APIs que reciben un archivo (WAV en memoria o bytes del archivo)"""
+        if isinstance(audio, AudioClip):
+            return audio.to_wav_bytes()
+        with open(audio, 'rb') as f:
+            return f.read()
+    
+    def _recognize_with_fingerprint_index(self, fingerprint: List[Tuple[int, int]]) -> Optional[Dict]:
+        """Buscar el clip en el índice local de canciones ya identificadas"""
+        try:
+            from src.service_factory import get_database
+            match = get_database().find_audio_match(fingerprint, config.AUDIO_FINGERPRINT_MIN_MATCHES)
+        except Exception as e:
+            logger.warning(f"Error consultando índice de huellas acústicas: {e}")
+            return None
+        
+        if not match:
+            return None
+        
+        artist = match['artist'] or None
+        logger.info(f"🎵 Música reconocida en índice local: {match['title']} "
+                    f"({match['aligned_matches']} hashes alineados)")
+        return {
+            'detected_music': match['title'],
+            'detected_music_artist': artist,
+            'detected_music_confidence': match['confidence'],
+            'music_source': match['source'],  # Reconocedor que la confirmó originalmente
+            'final_music': match['title'],
+            'final_music_artist': artist,
+            'fingerprint_match': True,
+            'error': None
+        }
+    
+    def _is_confirmed_result(self, results: Dict) -> bool:
+        """Resultado identificado por una API (no el filename sin validar ni playlists genéricas)"""
+        if not results.get('final_music'):
+            return False
+        if results.get('music_source') == 'manual':
+            return results.get('detected_music_confidence', 0.0) >= 0.85  # Validado con Spotify/YouTube
+        return results.get('music_source') in ('spotify', 'youtube', 'acrcloud')
+    
+    def _index_fingerprint(self, results: Dict, fingerprint: List[Tuple[int, int]]):
+        """Añadir el clip identificado al índice local"""
+        try:
+            from src.service_factory import get_database
+            get_database().add_audio_fingerprints(
+                results['final_music'],
+                results.get('final_music_artist'),
+                results.get('music_source'),
+                results.get('detected_music_confidence', 0.0),
+                fingerprint
+            )
+        except Exception as e:
+            logger.warning(f"Error indexando huella acústica: {e}")
+    
+    def _recognize_music_remote(self, audio: Union[Path, AudioClip, None], filename: str = None) -> Dict:
         """Reconocer música usando estrategia híbrida mejorada"""
         
         results = {
@@ -105,7 +208,7 @@ class MusicRecognizer:
         # Estrategia 2: Spotify API (para metadatos musicales)
         if self.spotify:
             try:
-                spotify_result = self._recognize_with_spotify(audio_path)
+                spotify_result = self._recognize_with_spotify(audio)
                 if spotify_result['detected_music']:
                     results.update(spotify_result)
                     results['music_source'] = 'spotify'
@@ -119,7 +222,7 @@ class MusicRecognizer:
         # Estrategia 3: YouTube API (para trends virales)
         if self.youtube:
             try:
-                youtube_result = self._recognize_with_youtube(audio_path, filename)
+                youtube_result = self._recognize_with_youtube(audio, filename)
                 if youtube_result['detected_music']:
                     results.update(youtube_result)
                     results['music_source'] = 'youtube'
@@ -132,10 +235,10 @@ class MusicRecognizer:
             except Exception as e:
                 logger.error(f"Error en YouTube API: {e}")
         
-        # Estrategia 4: ACRCloud (fallback confiable)
-        if self.acrcloud_config:
+        # Estrategia 4: ACRCloud (fallback confiable, necesita el audio)
+        if self.acrcloud_config and audio is not None:
             try:
-                acrcloud_result = self._recognize_with_acrcloud(audio_path)
+                acrcloud_result = self._recognize_with_acrcloud(audio)
                 if acrcloud_result['detected_music']:
                     results.update(acrcloud_result)
                     results['music_source'] = 'acrcloud'
@@ -146,7 +249,7 @@ class MusicRecognizer:
             except Exception as e:
                 logger.error(f"Error en ACRCloud: {e}")
         
-        logger.warning(f"No se pudo reconocer música en: {audio_path}")
+        logger.warning(f"No se pudo reconocer música en: {filename or audio}")
         results['error'] = "No se pudo identificar la música con ningún método"
         return results
     
@@ -403,7 +506,7 @@ class MusicRecognizer:
         
         return results
     
-    def _recognize_with_acrcloud(self, audio_path: Path) -> Dict:
+    def _recognize_with_acrcloud(self, audio: Union[Path, AudioClip]) -> Dict:
         """Reconocimiento usando ACRCloud (método más confiable)"""
         results = {
             'detected_music': None,
@@ -412,9 +515,8 @@ class MusicRecognizer:
         }
         
         try:
-            # Leer archivo de audio
-            with open(audio_path, 'rb') as f:
-                audio_data = f.read()
+            # Audio codificado (sin releer un temporal cuando el clip está en memoria)
+            audio_data = self._read_audio_bytes(audio)
             
             # Preparar datos para ACRCloud
             timestamp = time.time()
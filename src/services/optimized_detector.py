@@ -13,6 +13,8 @@ from typing import Dict, List, Optional, Tuple
 import logging
 from dataclasses import dataclass
 
+from .variant_automaton import VariantAutomaton, fold_text
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -32,9 +34,15 @@ class DetectionMatch:
 class OptimizedCharacterDetector:
     """Detector de personajes optimizado con jerarquías y resolución de conflictos"""
     
-    def __init__(self, character_db: Dict):
+    CATEGORY_ORDER = ['exact', 'native', 'joined', 'common', 'abbreviations']
+    
+    def __init__(self, character_db: Dict, use_automaton: bool = True):
         self.character_db = character_db
         self.search_patterns = self._build_hierarchical_patterns()
+        # Un único autómata sobre todas las variantes; los regex por variante solo
+        # confirman límites de palabra en las posiciones candidatas
+        self.use_automaton = use_automaton
+        self.automaton, self._automaton_patterns = self._build_variant_automaton()
         self.detection_cache = {}
         self.performance_stats = {
             "cache_hits": 0,
@@ -102,6 +110,19 @@ class OptimizedCharacterDetector:
         
         return patterns
     
+    def _build_variant_automaton(self) -> Tuple[VariantAutomaton, List[Tuple[str, int, Dict]]]:
+        """Construir el autómata Aho-Corasick sobre todas las categorías"""
+        automaton_patterns = []
+        keys = []
+        for category in self.CATEGORY_ORDER:
+            for pattern_index, pattern_info in enumerate(self.search_patterns.get(category, [])):
+                keys.append((pattern_info['variant'], len(automaton_patterns)))
+                automaton_patterns.append((category, pattern_index, pattern_info))
+        
+        automaton = VariantAutomaton(keys)
+        logger.info(f"Autómata de variantes: {automaton.key_count} claves, {automaton.node_count} nodos")
+        return automaton, automaton_patterns
+    
     def _create_optimized_regex(self, variant: str) -> re.Pattern:
         """Crear regex optimizado para una variante"""
         # Escapar caracteres especiales
@@ -146,10 +167,14 @@ class OptimizedCharacterDetector:
         
         # Detectar con jerarquía de prioridad
         all_detections = []
+        candidates = self._collect_candidates(normalized_title) if self.use_automaton else None
         
         # Buscar en orden de prioridad: exact -> native -> joined -> common -> abbreviations
-        for category in ['exact', 'native', 'joined', 'common', 'abbreviations']:
-            category_detections = self._search_in_category(normalized_title, category)
+        for category in self.CATEGORY_ORDER:
+            if candidates is not None:
+                category_detections = candidates.get(category, [])
+            else:
+                category_detections = self._search_in_category(normalized_title, category)
             all_detections.extend(category_detections)
             
             # Early stopping: si encontramos detecciones de alta confianza, no seguir con categorías de menor prioridad
@@ -247,8 +272,58 @@ class OptimizedCharacterDetector:
         
         return normalized
     
+    def _collect_candidates(self, title: str) -> Dict[str, List[DetectionMatch]]:
+        """
+        Detecciones de todas las categorías en una sola pasada del autómata
+        
+        Equivale a ejecutar _search_in_category para cada categoría: cada
+        aparición se confirma con el regex de su variante en esa posición
+        (límites de palabra / CJK) y, como finditer, las apariciones de una
+        misma variante no se solapan. El orden de salida (patrón, posición)
+        es el mismo, de modo que la resolución de conflictos no cambia.
+        """
+        occurrences: Dict[int, List[int]] = {}
+        for start, pattern_id in self.automaton.find_all(fold_text(title), folded=True):
+            occurrences.setdefault(pattern_id, []).append(start)
+        
+        found = []
+        for pattern_id in sorted(occurrences):
+            category, pattern_index, pattern_info = self._automaton_patterns[pattern_id]
+            pattern = pattern_info['pattern']
+            last_end = -1
+            for start in sorted(occurrences[pattern_id]):
+                if start < last_end:
+                    continue
+                match = pattern.match(title, start)
+                if match is None:
+                    continue
+                last_end = match.end()
+                found.append((category, pattern_info, match))
+        
+        candidates: Dict[str, List[DetectionMatch]] = {}
+        for category, pattern_info, match in found:
+            candidates.setdefault(category, []).append(
+                self._build_detection(pattern_info, match, title, category)
+            )
+        return candidates
+    
+    def _build_detection(self, pattern_info: Dict, match: re.Match, title: str, category: str) -> DetectionMatch:
+        """Crear DetectionMatch para una coincidencia confirmada"""
+        return DetectionMatch(
+            character=pattern_info['variant'],
+            canonical_name=pattern_info['canonical_name'],
+            game=pattern_info['game'],
+            confidence=self._calculate_confidence(pattern_info, match, title, category),
+            match_type=category,
+            matched_text=match.group(),
+            position=match.start(),
+            length=len(match.group()),
+            priority=pattern_info['priority'],
+            context_bonus=self._calculate_context_bonus(pattern_info, title)
+        )
+    
     def _search_in_category(self, title: str, category: str) -> List[DetectionMatch]:
-        """Buscar detecciones en una categoría específica"""
+        """Buscar detecciones en una categoría específica (un regex por variante)"""
         detections = []
         
         for pattern_info in self.search_patterns.get(category, []):
@@ -256,22 +331,7 @@ class OptimizedCharacterDetector:
             
             for match in matches:
                 # Calcular confianza basada en categoría y contexto
-                confidence = self._calculate_confidence(pattern_info, match, title, category)
-                
-                detection = DetectionMatch(
-                    character=pattern_info['variant'],
-                    canonical_name=pattern_info['canonical_name'],
-                    game=pattern_info['game'],
-                    confidence=confidence,
-                    match_type=category,
-                    matched_text=match.group(),
-                    position=match.start(),
-                    length=len(match.group()),
-                    priority=pattern_info['priority'],
-                    context_bonus=self._calculate_context_bonus(pattern_info, title)
-                )
-                
-                detections.append(detection)
+                detections.append(self._build_detection(pattern_info, match, title, category))
         
         return detections
     
@@ -466,6 +526,8 @@ class OptimizedCharacterDetector:
         
         return {
             "total_patterns": sum(len(patterns) for patterns in self.search_patterns.values()),
+            "automaton_enabled": self.use_automaton,
+            "automaton_nodes": self.automaton.node_count,
             "cache_size": len(self.detection_cache),
             "cache_hit_rate": round(hit_rate, 2),
             "total_detections": self.performance_stats["total_detections"],
@@ -4,68 +4,41 @@ Sistema de cache para mejorar rendimiento de consultas frecuentes en main.py
 """
 
 import time
-from typing import Set, List, Dict, Optional, Any, Callable
+from typing import Set, List, Dict, Optional, Any
 from functools import lru_cache
 import logging
 
+from .cache_engine import CacheEngine
+
 logger = logging.getLogger(__name__)
 
 
-class PatternCache:
-    """Cache LRU para patrones de personajes con gestión automática"""
+class PatternCache(CacheEngine):
+    """Cache LRU para patrones de personajes (sin TTL) sobre el motor común"""
     
     def __init__(self, max_size=1000):
+        super().__init__(max_entries=max_size, default_ttl=None, name='pattern_cache')
         self.max_size = max_size
-        self.cache = {}
-        self.access_order = []
-        self.hits = 0
-        self.misses = 0
-        
-    def get_or_compute(self, key: str, compute_func: Callable, *args, **kwargs):
-        """Obtener valor del cache o computarlo"""
-        if key in self.cache:
-            self.hits += 1
-            # Mover al final (más reciente)
-            self.access_order.remove(key)
-            self.access_order.append(key)
-            return self.cache[key]
-        
-        # Cache miss - computar valor
-        self.misses += 1
-        value = compute_func(*args, **kwargs)
-        
-        # Agregar al cache
-        self.cache[key] = value
-        self.access_order.append(key)
-        
-        # Limpiar si excede tamaño máximo
-        if len(self.cache) > self.max_size:
-            oldest_key = self.access_order.pop(0)
-            del self.cache[oldest_key]
-            
-        return value
     
     def get_stats(self) -> Dict:
         """Obtener estadísticas del cache"""
-        total_requests = self.hits + self.misses
-        hit_rate = (self.hits / max(1, total_requests)) * 100
+        stats = super().get_stats()
+        hit_rate = stats['hit_rate_percent']
         
         return {
             'max_size': self.max_size,
-            'current_size': len(self.cache),
-            'hits': self.hits,
-            'misses': self.misses,
-            'total_requests': total_requests,
+            'current_size': stats['entries'],
+            'hits': stats['hits'],
+            'misses': stats['misses'],
+            'total_requests': stats['total_requests'],
             'hit_rate': round(hit_rate, 1),
             'efficiency_score': round(hit_rate, 1)
         }
     
     def clear(self):
         """Limpiar cache"""
-        self.cache.clear()
-        self.access_order.clear()
-        self.hits = 0
-        self.misses = 0
+        super().clear()
+        self.reset_stats()
 
 class DatabaseCache:
     """Cache LRU para consultas frecuentes de main.py con gestión automática"""
@@ -78,8 +51,8 @@ class DatabaseCache:
         self.path_cache = None
         self.path_cache_time = 0
         
-        # Cache de videos pendientes por filtro
-        self.pending_cache = {}
+        # Cache de videos pendientes por filtro (LRU O(1) con TTL)
+        self.pending_cache = CacheEngine(max_entries=max_size, default_ttl=ttl_seconds, name='pending_videos')
         
         # Cache de estadísticas
         self.stats_cache = None
@@ -116,27 +89,17 @@ class DatabaseCache:
         
     def get_pending_videos_cached(self, cache_key: str, db_manager, platform_filter: str, source_filter: str, limit: int) -> List[Dict]:
         """✅ Cache de videos pendientes con gestión inteligente"""
-        current_time = time.time()
-        
         # Verificar cache
-        if cache_key in self.pending_cache:
-            cached_data, cache_time = self.pending_cache[cache_key]
-            if current_time - cache_time < self.ttl_seconds:
-                self.cache_hits += 1
-                self.total_queries += 1
-                logger.debug(f"💾 Cache HIT para pendientes: {cache_key}")
-                return cached_data
-        
-        # Cache miss - actualizar
-        pending_videos = db_manager.get_pending_videos_filtered(platform_filter, source_filter, limit)
-        self.pending_cache[cache_key] = (pending_videos, current_time)
+        cached_data = self.pending_cache.get(cache_key)
+        if cached_data is not None:
+            self.cache_hits += 1
+            self.total_queries += 1
+            logger.debug(f"💾 Cache HIT para pendientes: {cache_key}")
+            return cached_data
         
-        # Limpiar cache si es muy grande
-        if len(self.pending_cache) > self.max_size:
-            oldest_key = min(self.pending_cache.keys(), 
-                           key=lambda k: self.pending_cache[k][1])
-            del self.pending_cache[oldest_key]
-            logger.debug(f"🗑️ Cache pendientes limpiado (tamaño máximo alcanzado)")
+        # Cache miss - actualizar (el motor desaloja por LRU al superar max_size)
+        pending_videos = db_manager.get_pending_videos_filtered(platform_filter, source_filter, limit)
+        self.pending_cache.set(cache_key, pending_videos)
         
         self.cache_misses += 1
         self.total_queries += 1
@@ -182,7 +145,7 @@ class DatabaseCache:
         import sys
         
         paths_memory = sys.getsizeof(self.path_cache) if self.path_cache else 0
-        pending_memory = sum(sys.getsizeof(data[0]) for data in self.pending_cache.values())
+        pending_memory = self.pending_cache.total_bytes
         
         return {
             'paths_cache_mb': round(paths_memory / (1024*1024), 2),
@@ -7,14 +7,19 @@ import cv2
 import numpy as np
 import time
 import os
+import io
 import subprocess
-import tempfile
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image, ImageDraw, ImageFont, ImageOps, features
 from pathlib import Path
 import logging
 from typing import Optional, Tuple
 
 from config import config
+from src.services.video_processor import get_media_probe
+from src.database.thumbnail_keys import (
+    thumbnail_variant_name, preview_asset_name, preview_asset_owner, thumbnail_derived_files
+)
+from src.database.thumbnail_store import thumbnail_content_key, sharded_thumbnail_path, content_key_of
 
 logger = logging.getLogger(__name__)
 
@@ -58,6 +63,16 @@ class ThumbnailGenerator:
         self.max_cache_size = int(os.getenv('THUMBNAIL_CACHE_SIZE', '50'))  # Máximo frames en cache
         self.use_ram_optimization = True  # Activar optimizaciones de RAM
         self.preload_cache = {}  # Cache para pre-cargar datos de video en RAM
+        self.media_probe = get_media_probe()  # Probe compartido con VideoProcessor
+        
+        # 🖼️ Variantes por tamaño (grid/card/detail) en formatos modernos + JPEG de fallback
+        self.variants = dict(config.THUMBNAIL_VARIANTS)
+        self.variant_formats = []
+        for fmt in config.THUMBNAIL_VARIANT_FORMATS:
+            if fmt in ('webp', 'avif') and features.check(fmt):
+                self.variant_formats.append(fmt)
+            else:
+                logger.warning(f"Formato de variante no soportado por Pillow: {fmt}")
         
         # 🎯 OPTIMIZACIÓN: Tamaño dinámico según modo
         self.adaptive_sizing = os.getenv('ADAPTIVE_THUMBNAIL_SIZE', 'true').lower() == 'true'
@@ -139,99 +154,70 @@ class ThumbnailGenerator:
             logger.debug(f"Error detectando GPU: {e}")
             return None
         
-    def _generate_thumbnail_ffmpeg_direct(self, video_path: Path, thumbnail_path: Path, timestamp: float = 3.0) -> bool:
-        """🚀 MEJORADO: Generar thumbnail con FFmpeg GPU optimizado por modo"""
+    def _ffmpeg_hwaccel_args(self) -> list:
+        """Argumentos -hwaccel según la GPU detectada (frames descargados a memoria del sistema)"""
+        if not getattr(self, '_enable_gpu_acceleration', False):
+            return []
+        decoder = getattr(self, '_gpu_decoder', None)
+        if decoder in ('cuda', 'qsv', 'dxva2'):
+            # Sin -hwaccel_output_format: la salida rawvideo necesita el frame en RAM
+            return ['-hwaccel', decoder]
+        return []
+    
+    def _ffmpeg_scale_flags(self) -> str:
+        """Escalado del filtro FFmpeg (ultra rápido: algoritmo más básico)"""
+        return 'fast_bilinear' if getattr(self, '_gpu_mode', 'balanced') == 'ultra_fast' else 'lanczos'
+    
+    def _thumbnail_filter_graph(self, size: Optional[Tuple[int, int]] = None) -> str:
+        """Filtro FFmpeg que produce el thumbnail final: escala, padding y mejoras visuales"""
+        target_width, target_height = size or self.thumbnail_size
+        
+        # 1. Redimensionar
+        filters = [
+            f'scale={target_width}:{target_height}:force_original_aspect_ratio=decrease:flags={self._ffmpeg_scale_flags()}',
+            # 2. Mismas mejoras que el post-procesado PIL (contraste 1.1, saturación 1.05, nitidez 1.1)
+            'eq=contrast=1.1:saturation=1.05',
+            'unsharp=3:3:0.3:3:3:0.0',
+            # 3. Padding centrado hasta el tamaño exacto del buffer crudo (en RGB: admite tamaños impares)
+            'format=rgb24',
+            f'pad={target_width}:{target_height}:(ow-iw)/2:(oh-ih)/2:black'
+        ]
+        return ','.join(filters)
+    
+    def _render_thumbnail_ffmpeg_raw(self, video_path: Path, timestamp: float = 3.0,
+                                     size: Optional[Tuple[int, int]] = None) -> Optional[np.ndarray]:
+        """
+        🚀 Thumbnail final como frame RGB leído del stdout de FFmpeg (-f rawvideo)
+        
+        El filtro de FFmpeg escala, rellena y mejora el frame, así que el
+        resultado solo se codifica una vez al guardarlo: sin JPEG temporal,
+        sin recarga con PIL y sin ciclo decodificar/recodificar con pérdida.
+        """
         try:
-            # Usar timestamp fijo para máximo rendimiento
-            fixed_timestamp = min(timestamp, 3.0)
-            target_width, target_height = self.thumbnail_size
-            
-            # 🎮 CONFIGURACIÓN GPU ESPECÍFICA POR MODO
-            cmd = ['ffmpeg', '-y']
-            gpu_mode = getattr(self, '_gpu_mode', 'balanced')
+            fixed_timestamp = self._fixed_timestamp(video_path, timestamp)
+            target_width, target_height = size or self.thumbnail_size
+            frame_size = target_width * target_height * 3
             
-            # Configurar GPU según modo
-            if hasattr(self, '_enable_gpu_acceleration') and self._enable_gpu_acceleration and hasattr(self, '_gpu_decoder'):
-                if self._gpu_decoder == 'cuda':
-                    if gpu_mode == 'ultra_fast':
-                        # Modo ultra rápido: decodificación GPU básica
-                        cmd.extend(['-hwaccel', 'cuda'])
-                    else:
-                        # Otros modos: decodificación GPU completa
-                        cmd.extend(['-hwaccel', 'cuda', '-hwaccel_output_format', 'cuda'])
-                elif self._gpu_decoder == 'qsv':
-                    cmd.extend(['-hwaccel', 'qsv'])
-                elif self._gpu_decoder == 'dxva2':
-                    cmd.extend(['-hwaccel', 'dxva2'])
-            
-            cmd.extend(['-ss', str(fixed_timestamp), '-i', str(video_path)])
-            
-            # 🎨 FILTROS OPTIMIZADOS POR MODO GPU
-            vf_filters = []
-            
-            # 🚀 OPTIMIZACIÓN: Mantener más trabajo en GPU para reducir carga CPU
-            gpu_transfer_needed = False
-            if gpu_mode in ['quality', 'max_quality'] and self.enable_image_enhancement:
-                # Solo transferir si necesitamos filtros complejos que requieren CPU
-                gpu_transfer_needed = True
-            
-            if hasattr(self, '_gpu_decoder') and self._gpu_decoder == 'cuda' and gpu_transfer_needed:
-                vf_filters.append('hwdownload,format=nv12,format=yuv420p')
-            
-            # 1. Redimensionar (optimizado por modo)
-            if gpu_mode == 'ultra_fast':
-                # Ultra rápido: algoritmo más básico
-                vf_filters.append(f'scale={target_width}:{target_height}:force_original_aspect_ratio=decrease:flags=fast_bilinear')
-            else:
-                # Otros modos: algoritmo de mejor calidad
-                vf_filters.append(f'scale={target_width}:{target_height}:force_original_aspect_ratio=decrease:flags=lanczos')
-            
-            # 2. Padding
-            vf_filters.append(f'pad={target_width}:{target_height}:(ow-iw)/2:(oh-ih)/2:black')
-            
-            # 3. Mejoras de imagen según modo
-            if gpu_mode == 'ultra_fast':
-                # Sin mejoras para máxima velocidad
-                pass
-            elif gpu_mode == 'balanced':
-                # Mejoras básicas
-                if self.quality >= 70:
-                    vf_filters.append('eq=contrast=1.05:saturation=1.02')
-            elif gpu_mode in ['quality', 'max_quality']:
-                # Mejoras completas
-                if self.quality >= 70:
-                    vf_filters.append('eq=contrast=1.1:saturation=1.05:brightness=0.02')
-                    vf_filters.append('unsharp=5:5:1.0:5:5:0.0')
-            
-            # Unir filtros
-            vf_filter = ','.join(vf_filters)
-            
-            # 🎯 CONFIGURACIÓN DE CALIDAD POR MODO
-            if gpu_mode == 'ultra_fast':
-                q_value = 8  # Calidad básica para velocidad
-            elif gpu_mode == 'balanced':
-                q_value = max(3, min(7, 9 - int(self.quality/15)))
-            else:  # quality/max_quality
-                q_value = max(2, min(5, 7 - int(self.quality/20)))
+            cmd = ['ffmpeg', '-v', 'error', *self._ffmpeg_hwaccel_args(),
+                   '-ss', str(fixed_timestamp), '-i', str(video_path),
+                   '-frames:v', '1',
+                   '-vf', self._thumbnail_filter_graph((target_width, target_height)),
+                   '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                   'pipe:1']
             
             # 🚀 TIMEOUT OPTIMIZADO POR MODO
-            timeout = 8 if gpu_mode == 'ultra_fast' else 15
-            
-            cmd.extend([
-                '-vframes', '1',
-                '-vf', vf_filter,
-                '-q:v', str(q_value),
-                '-loglevel', 'quiet',
-                str(thumbnail_path)
-            ])
-            
+            timeout = 8 if getattr(self, '_gpu_mode', None) == 'ultra_fast' else 15
             result = subprocess.run(cmd, capture_output=True, timeout=timeout)
-            if result.returncode == 0 and thumbnail_path.exists():
-                return True
-            return False
+            if result.returncode != 0 or len(result.stdout) < frame_size:
+                logger.debug(f"FFmpeg raw sin frame para {video_path.name}: "
+                             f"{result.stderr.decode('utf-8', errors='replace').strip()[:200]}")
+                return None
+            
+            self._last_used_ffmpeg = True
+            return np.frombuffer(result.stdout, dtype=np.uint8, count=frame_size).reshape(target_height, target_width, 3)
         except Exception as e:
-            logger.debug(f"Error con FFmpeg GPU (modo {getattr(self, '_gpu_mode', 'unknown')}): {e}")
-            return False
+            logger.debug(f"Error con FFmpeg raw (modo {getattr(self, '_gpu_mode', 'unknown')}): {e}")
+            return None
     
     def _extract_frame_with_cache(self, video_path: Path, timestamp: float, cache_key: str) -> Optional[np.ndarray]:
         """🧠 OPTIMIZACIÓN RAM: Extraer frame con cache inteligente"""
@@ -283,23 +269,92 @@ class ThumbnailGenerator:
         
         self._initialized = True
         
+    def _uses_ffmpeg_render(self) -> bool:
+        """FFmpeg entrega el thumbnail final (sin post-procesado PIL)"""
+        return self.fast_mode and self.use_ffmpeg_direct and not self.add_watermark
+    
+    def renderer_name(self, ffmpeg_render: Optional[bool] = None) -> str:
+        """
+        Camino de render que fija los píxeles: filtro FFmpeg (con su escalado) o post-procesado PIL
+        
+        El decodificador (GPU/CPU, detectado en tiempo de ejecución) no cambia
+        la imagen, así que no forma parte de la clave.
+        """
+        if ffmpeg_render is None:
+            ffmpeg_render = self._uses_ffmpeg_render()
+        return f"ffmpeg/{self._ffmpeg_scale_flags()}" if ffmpeg_render else 'pil'
+    
+    def existing_thumbnail_path(self, video_path: Path, media_id: Optional[int] = None) -> Path:
+        """
+        Thumbnail ya generado de un video, o la ruta prevista si no hay ninguno
+        
+        Con render FFmpeg también se busca la clave del fallback PIL, así un
+        video en el que FFmpeg falla no se decodifica de nuevo en cada llamada.
+        """
+        if media_id is None or not self._uses_ffmpeg_render():
+            return self.thumbnail_path_for(video_path, media_id)
+        
+        candidates = [self.thumbnail_path_for(video_path, media_id, self.renderer_name(ffmpeg_render))
+                      for ffmpeg_render in (True, False)]
+        return next((path for path in candidates if path.exists()), candidates[0])
+    
+    def render_signature(self, renderer: Optional[str] = None) -> str:
+        """
+        Parámetros de render que cambian el contenido del thumbnail (parte de su clave)
+        
+        Incluye el camino de render (filtro FFmpeg o PIL). El layout del sprite
+        y del clip de hover no entra: sus nombres llevan su propia etiqueta
+        (preview_asset_name), así cambiarlo no re-genera los thumbnails.
+        """
+        width, height = self.thumbnail_size
+        variants = ','.join(f"{name}:{w}x{h}" for name, (w, h) in sorted(self.variants.items()))
+        signature = (f"{renderer or self.renderer_name()}:{width}x{height}:q{self.quality}"
+                     f":{'fast' if self.fast_mode else 'hq'}"
+                     f":wm{int(self.add_watermark)}:{variants}:{','.join(self.variant_formats)}")
+        return signature
+    
+    def thumbnail_path_for(self, video_path: Path, media_id: Optional[int] = None,
+                           renderer: Optional[str] = None, regeneration: Optional[int] = None) -> Path:
+        """
+        Ruta del thumbnail de un video
+        
+        Con media_id el nombre es direccionado por contenido (hash de media id,
+        tamaño/mtime del video y parámetros de render) dentro de subdirectorios
+        ab/cd/: dos videos con el mismo nombre no colisionan y un video
+        modificado obtiene un thumbnail nuevo. regeneration (nonce de una
+        regeneración forzada) da otra clave, así un nombre por contenido nunca
+        se sobrescribe. Sin media_id se mantiene el nombre plano {stem}_thumb.jpg.
+        """
+        video_path = Path(video_path)
+        if media_id is None:
+            return self.output_path / f"{video_path.stem}_thumb.jpg"
+        
+        stat = video_path.stat()
+        signature = self.render_signature(renderer)
+        if regeneration is not None:
+            signature += f":regen{regeneration}"
+        key = thumbnail_content_key(media_id, stat.st_size, stat.st_mtime_ns, signature)
+        return sharded_thumbnail_path(self.output_path, f"{key}.jpg")
+    
     def generate_thumbnail(self, video_path: Path, timestamp: float = 3.0, 
-                          force_regenerate: bool = False) -> Optional[Path]:
+                          force_regenerate: bool = False, media_id: Optional[int] = None) -> Optional[Path]:
         """
         🚀 OPTIMIZADO: Generar thumbnail optimizado de un video con caché y validación
         
         Args:
             video_path: Ruta al video
             timestamp: Momento del video para captura (segundos)
-            force_regenerate: Forzar regeneración si ya existe
+            force_regenerate: Forzar regeneración si ya existe (con media_id,
+                bajo una clave nueva)
+            media_id: ID del media (activa el almacén direccionado por contenido)
             
         Returns:
             Path al thumbnail generado o None si falla
         """
         try:
-            # Generar nombre del thumbnail
-            thumbnail_name = f"{video_path.stem}_thumb.jpg"
-            thumbnail_path = self.output_path / thumbnail_name
+            video_path = Path(video_path)
+            stored = media_id is not None
+            thumbnail_path = self.existing_thumbnail_path(video_path, media_id)
             
             # Si ya existe y no forzamos regeneración, validar thumbnail
             if thumbnail_path.exists() and not force_regenerate:
@@ -308,6 +363,9 @@ class ThumbnailGenerator:
                     return thumbnail_path
                 elif self._is_thumbnail_valid(thumbnail_path):
                     return thumbnail_path
+                elif stored:
+                    # Un nombre por contenido no se sobrescribe: se regenera bajo otra clave
+                    logger.debug(f"Thumbnail corrupto detectado, regenerando con clave nueva: {thumbnail_path}")
                 else:
                     # Thumbnail corrupto, eliminarlo y regenerar
                     logger.debug(f"Thumbnail corrupto detectado, eliminando: {thumbnail_path}")
@@ -316,23 +374,22 @@ class ThumbnailGenerator:
                     except Exception as e:
                         logger.warning(f"Error eliminando thumbnail corrupto: {e}")
             
-            # ULTRA OPTIMIZACIÓN: Usar FFmpeg directo en modo ultra-rápido para extracción, pero siempre procesar visualmente
+            # Regenerar un nombre por contenido existente crea una clave nueva
+            regeneration = time.time_ns() if stored and thumbnail_path.exists() else None
+            
+            # Un único frame decodificado al tamaño mayor (base o variante más grande);
+            # el resto de tamaños se reducen desde él
+            render_size = self._largest_output_size()
+            
+            # ULTRA OPTIMIZACIÓN: FFmpeg entrega el thumbnail final (escalado, padding y
+            # mejoras en su filtro) como RGB crudo por pipe; solo queda codificarlo
             frame = None
-            used_ffmpeg_direct = False
-            if self.fast_mode and self.use_ffmpeg_direct and not self.add_watermark:
-                # Extraer frame con FFmpeg directo a archivo temporal
-                if self._generate_thumbnail_ffmpeg_direct(video_path, thumbnail_path, timestamp):
-                    # Cargar el thumbnail generado por FFmpeg para reprocesar visualmente
-                    try:
-                        frame = np.array(Image.open(thumbnail_path))
-                        used_ffmpeg_direct = True
-                        # Eliminar el thumbnail temporal, lo vamos a sobrescribir
-                        thumbnail_path.unlink()
-                    except Exception as e:
-                        logger.debug(f"No se pudo cargar thumbnail FFmpeg directo para reprocesar: {e}")
-                        frame = None
-                else:
-                    logger.debug(f"FFmpeg directo falló, usando método tradicional")
+            rendered_by_ffmpeg = False
+            if self._uses_ffmpeg_render():
+                frame = self._render_thumbnail_ffmpeg_raw(video_path, timestamp, render_size)
+                rendered_by_ffmpeg = frame is not None
+                if not rendered_by_ffmpeg:
+                    logger.debug(f"FFmpeg raw falló, usando método tradicional")
             
             if frame is None:
                 # 🧠 OPTIMIZACIÓN RAM: Verificar cache de frames primero
@@ -348,35 +405,49 @@ class ThumbnailGenerator:
                 logger.error(f"No se pudo extraer frame de {video_path}")
                 return None
             
-            # Procesar imagen SIEMPRE con resize con aspecto y mejoras visuales
-            # Forzar siempre el resize con padding y mejoras visuales, incluso en modo rápido
-            # 1. Redimensionar manteniendo aspecto y padding a tamaño destino
-            processed_image = self._resize_with_aspect_ratio_optimized(Image.fromarray(frame))
+            if rendered_by_ffmpeg:
+                processed_image = Image.fromarray(frame)
+            else:
+                # Procesar imagen SIEMPRE con resize con aspecto y mejoras visuales
+                # 1. Redimensionar manteniendo aspecto y padding a tamaño destino
+                processed_image = self._resize_with_aspect_ratio_optimized(Image.fromarray(frame), render_size)
 
-            # 2. Aplicar mejoras visuales SIEMPRE (no solo si enable_image_enhancement)
-            try:
-                from PIL import ImageEnhance
-                # Contraste
-                enhancer = ImageEnhance.Contrast(processed_image)
-                processed_image = enhancer.enhance(1.1)
-                # Saturación
-                enhancer = ImageEnhance.Color(processed_image)
-                processed_image = enhancer.enhance(1.05)
-                # Nitidez
-                enhancer = ImageEnhance.Sharpness(processed_image)
-                processed_image = enhancer.enhance(1.1)
-            except Exception as e:
-                logger.debug(f"Error aplicando mejoras visuales forzadas: {e}")
+                # 2. Aplicar mejoras visuales SIEMPRE (no solo si enable_image_enhancement)
+                try:
+                    from PIL import ImageEnhance
+                    # Contraste
+                    enhancer = ImageEnhance.Contrast(processed_image)
+                    processed_image = enhancer.enhance(1.1)
+                    # Saturación
+                    enhancer = ImageEnhance.Color(processed_image)
+                    processed_image = enhancer.enhance(1.05)
+                    # Nitidez
+                    enhancer = ImageEnhance.Sharpness(processed_image)
+                    processed_image = enhancer.enhance(1.1)
+                except Exception as e:
+                    logger.debug(f"Error aplicando mejoras visuales forzadas: {e}")
 
             # Añadir watermark si está habilitado
             if self.add_watermark:
                 processed_image = self._add_watermark(processed_image)
 
+            if stored:
+                # La clave refleja el camino de render usado realmente (fallback PIL incluido)
+                thumbnail_path = self.thumbnail_path_for(
+                    video_path, media_id, self.renderer_name(rendered_by_ffmpeg), regeneration
+                )
+                if thumbnail_path.exists():
+                    return thumbnail_path
+
             # Guardar thumbnail con optimizaciones
+            base_image = self._fit_to_size(processed_image, self.thumbnail_size)
             if self.fast_mode:
-                self._save_thumbnail_ultra_fast(processed_image, thumbnail_path)
+                self._save_thumbnail_ultra_fast(base_image, thumbnail_path)
             else:
-                self._save_thumbnail_optimized(processed_image, thumbnail_path)
+                self._save_thumbnail_optimized(base_image, thumbnail_path)
+            
+            if self.variants:
+                self._save_variants(processed_image, thumbnail_path)
 
             logger.debug(f"Thumbnail generado: {thumbnail_path}")
             return thumbnail_path
@@ -421,42 +492,38 @@ class ThumbnailGenerator:
     def _extract_frame_ffmpeg(self, video_path: Path, timestamp: float) -> Optional[np.ndarray]:
         """🚀 ULTRA OPTIMIZADO: Extraer frame usando FFmpeg (mucho más rápido que OpenCV), SIN distorsionar aspecto"""
         try:
-            fixed_timestamp = min(timestamp, 3.0)
-            with tempfile.NamedTemporaryFile(suffix='.jpg', delete=False) as temp_file:
-                temp_path = temp_file.name
-            try:
-                target_width, target_height = self.thumbnail_size
-                vf_filter = f'scale={target_width}:-1'
-                cmd = [
-                    'ffmpeg',
-                    '-y',
-                    '-ss', str(fixed_timestamp),
-                    '-i', str(video_path),
-                    '-vframes', '1',
-                    '-vf', vf_filter,
-                    '-q:v', '5',
-                    '-loglevel', 'quiet',
-                    temp_path
-                ]
-                result = subprocess.run(cmd, capture_output=True, timeout=5)
-                if result.returncode == 0 and os.path.exists(temp_path):
-                    image = Image.open(temp_path)
-                    frame_array = np.array(image)
-                    if len(frame_array.shape) == 2:
-                        frame_array = np.stack([frame_array] * 3, axis=-1)
-                    self._last_used_ffmpeg = True
-                    return frame_array
-                return None
-            finally:
-                try:
-                    if os.path.exists(temp_path):
-                        os.unlink(temp_path)
-                except:
-                    pass
+            fixed_timestamp = self._fixed_timestamp(video_path, timestamp)
+            target_width, target_height = self.thumbnail_size
+            # Alto desconocido (-1): PPM por pipe, sin pérdida y con dimensiones en la cabecera
+            cmd = [
+                'ffmpeg',
+                '-v', 'error',
+                '-ss', str(fixed_timestamp),
+                '-i', str(video_path),
+                '-frames:v', '1',
+                '-vf', f'scale={target_width}:-1',
+                '-f', 'image2pipe', '-c:v', 'ppm',
+                'pipe:1'
+            ]
+            result = subprocess.run(cmd, capture_output=True, timeout=5)
+            if result.returncode == 0 and result.stdout:
+                with Image.open(io.BytesIO(result.stdout)) as image:
+                    frame_array = np.array(image.convert('RGB'))
+                self._last_used_ffmpeg = True
+                return frame_array
+            return None
         except Exception as e:
             logger.debug(f"Error con FFmpeg: {e}")
             return None
     
+    def _fixed_timestamp(self, video_path: Path, timestamp: float) -> float:
+        """Timestamp fijo (máx. 3s) acotado a la duración real del video"""
+        fixed_timestamp = min(timestamp, 3.0)
+        duration = self.media_probe.probe(video_path).duration_seconds
+        if duration and fixed_timestamp >= duration:
+            fixed_timestamp = duration * 0.5
+        return fixed_timestamp
+    
     def _extract_frame_ultra_fast(self, video_path: Path, timestamp: float) -> Optional[np.ndarray]:
         """🚀 ULTRA OPTIMIZADO: Extraer frame con mínimo procesamiento"""
         cap = None
@@ -472,7 +539,7 @@ class ThumbnailGenerator:
             
             # Usar timestamp fijo para evitar cálculos
             # La mayoría de videos tienen contenido interesante en los primeros 3-5 segundos
-            fixed_timestamp = min(timestamp, 3.0)  # Máximo 3 segundos
+            fixed_timestamp = self._fixed_timestamp(video_path, timestamp)  # Máximo 3 segundos
             
             # 🧠 OPTIMIZACIÓN RAM: Usar metadatos pre-cargados si están disponibles
             video_path_str = str(video_path)
@@ -522,9 +589,14 @@ class ThumbnailGenerator:
                 logger.warning(f"No se pudo abrir video: {video_path}")
                 return None
             
-            # Obtener información del video
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            # Obtener información del video (probe compartido, sin reabrir el contenedor)
+            info = self.media_probe.probe(video_path)
+            if info.valid and info.fps and info.duration_seconds:
+                fps = info.fps
+                total_frames = int(info.duration_seconds * fps)
+            else:
+                fps = cap.get(cv2.CAP_PROP_FPS)
+                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
             
             # Validar FPS
             if fps <= 0:
@@ -596,9 +668,10 @@ class ThumbnailGenerator:
         
         return pil_image
     
-    def _resize_with_aspect_ratio_optimized(self, image: Image.Image) -> Image.Image:
+    def _resize_with_aspect_ratio_optimized(self, image: Image.Image,
+                                            size: Optional[Tuple[int, int]] = None) -> Image.Image:
         """🚀 OPTIMIZADO: Redimensionar imagen con mejor calidad y manejo de aspectos"""
-        target_width, target_height = self.thumbnail_size
+        target_width, target_height = size or self.thumbnail_size
         
         # Calcular dimensiones para mantener aspecto
         img_width, img_height = image.size
@@ -743,6 +816,168 @@ class ThumbnailGenerator:
             logger.error(f"Error guardando thumbnail en {thumbnail_path}: {e}")
             raise
     
+    def _largest_output_size(self) -> Tuple[int, int]:
+        """Tamaño mayor entre el thumbnail base y sus variantes"""
+        sizes = [tuple(self.thumbnail_size), *(tuple(size) for size in self.variants.values())]
+        return max(sizes, key=lambda size: size[0] * size[1])
+    
+    def _fit_to_size(self, image: Image.Image, size: Tuple[int, int]) -> Image.Image:
+        """Reducir el thumbnail ya procesado a otro tamaño (padding negro si cambia el aspecto)"""
+        size = tuple(size)
+        if image.size == size:
+            return image
+        method = Image.Resampling.BILINEAR if self.fast_mode else Image.Resampling.LANCZOS
+        return ImageOps.pad(image, size, method=method, color=(0, 0, 0))
+    
+    def _save_variants(self, image: Image.Image, thumbnail_path: Path):
+        """
+        🖼️ Guardar las variantes por tamaño del thumbnail desde la misma imagen
+        
+        Cada variante se escribe en los formatos modernos configurados (WebP,
+        AVIF) y en JPEG como fallback. Un fallo aquí no invalida el thumbnail
+        base: /thumbnail sirve el JPEG base si falta la variante.
+        """
+        for variant, size in self.variants.items():
+            try:
+                variant_image = self._fit_to_size(image, size)
+                for fmt in [*self.variant_formats, 'jpeg']:
+                    variant_name = thumbnail_variant_name(thumbnail_path.name, variant, fmt)
+                    self._save_variant(variant_image, thumbnail_path.parent / variant_name, fmt)
+            except Exception as e:
+                logger.warning(f"Error generando variante '{variant}' de {thumbnail_path.name}: {e}")
+    
+    def _save_variant(self, image: Image.Image, variant_path: Path, fmt: str):
+        """Codificar una variante en su formato (esfuerzo de compresión según modo)"""
+        if fmt == 'webp':
+            image.save(variant_path, format='WEBP', quality=self.quality, method=0 if self.fast_mode else 4)
+        elif fmt == 'avif':
+            image.save(variant_path, format='AVIF', quality=self.quality, speed=10 if self.fast_mode else 6)
+        elif self.fast_mode:
+            self._save_thumbnail_ultra_fast(image, variant_path)
+        else:
+            self._save_thumbnail_optimized(image, variant_path)
+    
+    def generate_preview_assets(self, video_path: Path, thumbnail_path: Path,
+                                force_regenerate: bool = False) -> Optional[dict]:
+        """
+        🎞️ Sprite sheet (y clip corto opcional) para scrubbing al pasar el ratón
+        
+        Una sola ejecución de FFmpeg decodifica el video una vez: PREVIEW_SPRITE_FRAMES
+        frames equiespaciados se escalan a PREVIEW_SPRITE_FRAME_SIZE y se
+        mosaican en una imagen; con PREVIEW_CLIP_ENABLED la misma decodificación
+        alimenta un clip H.264 sin audio de PREVIEW_CLIP_SECONDS a baja tasa.
+        
+        Los archivos se guardan junto al thumbnail ({stem}_sprite-{tag}.jpg,
+        {stem}_preview-{tag}.mp4, la etiqueta fija el layout), así que en el
+        almacén por contenido heredan su clave, su directorio y su limpieza.
+        Junto a un nombre por contenido un sprite existente que abre con las
+        dimensiones esperadas se reutiliza y nunca se sobrescribe
+        (force_regenerate no aplica: regenerar pasa por una clave de thumbnail
+        nueva); junto a un nombre plano se regeneran siempre. FFmpeg escribe en
+        nombres .part que se renombran al terminar: un proceso interrumpido no
+        deja un sprite truncado con el nombre definitivo. Los sprites/clips de
+        layouts anteriores del thumbnail se eliminan tras generar los nuevos.
+        
+        Returns:
+            Dict con nombres y layout del sprite, o None si falla
+        """
+        try:
+            video_path = Path(video_path)
+            thumbnail_path = Path(thumbnail_path)
+            sprite_path = thumbnail_path.with_name(preview_asset_name(thumbnail_path.name, 'sprite'))
+            clip_path = thumbnail_path.with_name(preview_asset_name(thumbnail_path.name, 'preview'))
+            with_clip = config.PREVIEW_CLIP_ENABLED
+            
+            duration = self.media_probe.probe(video_path).duration_seconds
+            if not duration or duration <= 0:
+                logger.debug(f"Sin duración para sprite de {video_path.name}")
+                return None
+            
+            frame_count = max(1, config.PREVIEW_SPRITE_FRAMES)
+            columns = max(1, min(config.PREVIEW_SPRITE_COLUMNS, frame_count))
+            rows = -(-frame_count // columns)
+            frame_width, frame_height = config.PREVIEW_SPRITE_FRAME_SIZE
+            interval = duration / frame_count
+            
+            stored = content_key_of(thumbnail_path.name) is not None
+            reusable = (stored and self._is_valid_sprite(sprite_path, columns * frame_width, rows * frame_height)
+                        and (not with_clip or clip_path.exists()))
+            if reusable:
+                logger.debug(f"Sprite ya existente: {sprite_path.name}")
+            else:
+                sprite_filter = (
+                    f"fps={1 / interval:.6f},"
+                    f"scale={frame_width}:{frame_height}:force_original_aspect_ratio=decrease:flags=fast_bilinear,"
+                    f"format=rgb24,pad={frame_width}:{frame_height}:(ow-iw)/2:(oh-ih)/2:black,"
+                    f"tile={columns}x{rows}"
+                )
+                cmd = ['ffmpeg', '-v', 'error', '-y', *self._ffmpeg_hwaccel_args()]
+                if with_clip:
+                    clip_start = max(0.0, duration / 2 - config.PREVIEW_CLIP_SECONDS / 2)
+                    filter_graph = (
+                        f"[0:v]split=2[sprite_in][clip_in];"
+                        f"[sprite_in]{sprite_filter}[sprite];"
+                        f"[clip_in]trim=start={clip_start:.3f}:duration={config.PREVIEW_CLIP_SECONDS},"
+                        f"setpts=PTS-STARTPTS,fps=15,scale={config.PREVIEW_CLIP_WIDTH}:-2,format=yuv420p[clip]"
+                    )
+                else:
+                    filter_graph = f"[0:v]{sprite_filter}[sprite]"
+                
+                sprite_part = sprite_path.with_name(f"{sprite_path.stem}.part{sprite_path.suffix}")
+                clip_part = clip_path.with_name(f"{clip_path.stem}.part{clip_path.suffix}")
+                cmd.extend(['-i', str(video_path), '-filter_complex', filter_graph,
+                            '-map', '[sprite]', '-frames:v', '1', '-q:v', '5', str(sprite_part)])
+                if with_clip:
+                    cmd.extend(['-map', '[clip]', '-an', '-c:v', 'libx264', '-preset', 'veryfast',
+                                '-crf', '32', '-movflags', '+faststart', str(clip_part)])
+                
+                sprite_path.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    result = subprocess.run(cmd, capture_output=True, timeout=max(30, min(duration, 600)))
+                    if result.returncode != 0 or not sprite_part.exists():
+                        logger.debug(f"FFmpeg sin sprite para {video_path.name}: "
+                                     f"{result.stderr.decode('utf-8', errors='replace').strip()[:200]}")
+                        return None
+                    if with_clip and clip_part.exists():
+                        os.replace(clip_part, clip_path)
+                    os.replace(sprite_part, sprite_path)
+                finally:
+                    sprite_part.unlink(missing_ok=True)
+                    clip_part.unlink(missing_ok=True)
+                
+                self._remove_superseded_preview_assets(thumbnail_path, {sprite_path.name, clip_path.name})
+            
+            return {
+                'sprite_name': sprite_path.name,
+                'frame_count': frame_count,
+                'columns': columns,
+                'rows': rows,
+                'frame_width': frame_width,
+                'frame_height': frame_height,
+                'interval_seconds': round(interval, 3),
+                'preview_name': clip_path.name if with_clip and clip_path.exists() else None
+            }
+        except Exception as e:
+            logger.warning(f"Error generando sprite para {video_path}: {e}")
+            return None
+    
+    def _is_valid_sprite(self, sprite_path: Path, width: int, height: int) -> bool:
+        """Sprite existente completo: abre como imagen con el tamaño del mosaico"""
+        try:
+            with Image.open(sprite_path) as sprite:
+                if sprite.size != (width, height):
+                    return False
+                sprite.load()
+            return True
+        except (OSError, SyntaxError):
+            return False
+    
+    def _remove_superseded_preview_assets(self, thumbnail_path: Path, current_names: set):
+        """Eliminar sprites/clips de layouts anteriores del mismo thumbnail"""
+        for path in thumbnail_derived_files(thumbnail_path):
+            if preview_asset_owner(path.name) and path.name not in current_names:
+                path.unlink(missing_ok=True)
+    
     def _add_watermark(self, image: Image.Image) -> Image.Image:
         """Añadir watermark discreto al thumbnail"""
         try:
@@ -831,7 +1066,8 @@ class ThumbnailGenerator:
                 thumbnail_path = self.generate_thumbnail(
                     video_path, 
                     timestamp=timestamp, 
-                    force_regenerate=force_regenerate
+                    force_regenerate=force_regenerate,
+                    media_id=video_data.get('id')
                 )
                 
                 if thumbnail_path:
@@ -940,12 +1176,12 @@ class ThumbnailGenerator:
                 if not path_obj.exists():
                     continue
                 
-                # Pre-cargar información básica del video
-                cap = cv2.VideoCapture(str(path_obj))
-                if cap.isOpened():
-                    fps = cap.get(cv2.CAP_PROP_FPS) or 30
-                    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                    duration = total_frames / fps if fps > 0 else 0
+                # Pre-cargar información básica del video (probe compartido)
+                info = self.media_probe.probe(path_obj)
+                if info.valid:
+                    fps = info.fps or 30
+                    duration = info.duration_seconds or 0
+                    total_frames = int(duration * fps)
                     
                     # Guardar metadatos en cache
                     self.preload_cache[str(path_obj)] = {
@@ -956,7 +1192,6 @@ class ThumbnailGenerator:
                     }
                     
                     preload_results['loaded'] += 1
-                    cap.release()
                 else:
                     preload_results['failed'] += 1
                     
@@ -988,8 +1223,7 @@ class ThumbnailGenerator:
                     continue
                 
                 # Verificar si necesita thumbnail
-                thumbnail_name = f"{video_path.stem}_thumb.jpg"
-                thumbnail_path = self.output_path / thumbnail_name
+                thumbnail_path = self.existing_thumbnail_path(video_path, video_data.get('id'))
                 
                 if thumbnail_path.exists() and not force_regenerate:
                     if self._is_thumbnail_valid(thumbnail_path):
@@ -0,0 +1,107 @@
+"""
+Tag-Flow V2 - Variant Automaton
+Autómata Aho-Corasick sobre todas las variantes de personajes: una sola pasada
+lineal por título devuelve todas las coincidencias candidatas (case-folded)
+"""
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+def fold_text(text: str) -> str:
+    """
+    Case folding carácter a carácter que conserva las posiciones
+
+    str.lower() puede expandir algunos caracteres (p.ej. 'İ'); en ese caso se
+    conserva el original para que los índices del texto plegado coincidan con
+    los del título.
+    """
+    folded = []
+    for char in text:
+        lower = char.lower()
+        folded.append(lower if len(lower) == 1 else char)
+    return ''.join(folded)
+
+
+class VariantAutomaton:
+    """
+    Autómata Aho-Corasick (goto/fail/output) sobre claves plegadas
+
+    Cada clave lleva una lista de payloads (índices de patrón); find_all()
+    devuelve (start, payload) para todas las apariciones, incluidas las
+    solapadas, en una única pasada O(len(texto) + coincidencias).
+    """
+
+    def __init__(self, keys: Iterable[Tuple[str, int]] = ()):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # Por nodo: [(longitud de clave, payload)] incluyendo salidas heredadas por fail
+        self._output: List[List[Tuple[int, int]]] = [[]]
+        self.key_count = 0
+
+        for key, payload in keys:
+            self._add(key, payload)
+        self._build_failure_links()
+
+    def _add(self, key: str, payload: int):
+        folded = fold_text(key)
+        if not folded:
+            return
+
+        node = 0
+        for char in folded:
+            next_node = self._goto[node].get(char)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+                self._goto[node][char] = next_node
+            node = next_node
+
+        self._output[node].append((len(folded), payload))
+        self.key_count += 1
+
+    def _build_failure_links(self):
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            queue.append(child)
+
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+
+                if self._output[self._fail[child]]:
+                    self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_all(self, text: str, folded: bool = False) -> Iterator[Tuple[int, int]]:
+        """Yield (start, payload) de todas las apariciones de claves en el texto"""
+        if not folded:
+            text = fold_text(text)
+
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        node = 0
+
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            if output[node]:
+                end = index + 1
+                for length, payload in output[node]:
+                    yield end - length, payload
+
+    @property
+    def node_count(self) -> int:
+        return len(self._goto)
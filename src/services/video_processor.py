@@ -4,8 +4,13 @@ Análisis y extracción de metadatos de videos TikTok/MMD
 """
 
 import cv2
+import json
+import numpy as np
+import shutil
 import subprocess
-from moviepy.editor import VideoFileClip
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
 from pathlib import Path
 from typing import Dict, Optional, Tuple
 import logging
@@ -13,9 +18,218 @@ import os
 import tempfile
 
 from config import config
+from .audio_fingerprint import AudioClip
 
 logger = logging.getLogger(__name__)
 
+_ffmpeg_path = shutil.which('ffmpeg')
+
+
+@dataclass
+class MediaInfo:
+    """Resultado de un probe de contenedor multimedia"""
+    file_path: str
+    valid: bool
+    duration_seconds: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    has_video: bool = False
+    has_audio: bool = False
+    video_codec: Optional[str] = None
+    audio_codec: Optional[str] = None
+    probe_method: Optional[str] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+class MediaProbe:
+    """
+    Probe único por archivo (un solo ffprobe) con cache por (path, mtime, size)
+
+    Comparte duración, dimensiones, fps, presencia de audio y codecs entre
+    validación, metadatos, extracción de audio y generación de thumbnails,
+    evitando abrir el mismo archivo varias veces con OpenCV/MoviePy.
+    """
+
+    def __init__(self, max_entries: int = 4096, timeout: int = 15):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._cache: "OrderedDict[Tuple[str, int, int], MediaInfo]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._ffprobe_path = shutil.which('ffprobe')
+
+        # Métricas
+        self.hits = 0
+        self.misses = 0
+        self.ffprobe_runs = 0
+        self.opencv_fallbacks = 0
+
+    def probe(self, video_path) -> MediaInfo:
+        """Obtener información del archivo (cacheada mientras no cambie en disco)"""
+        path = Path(video_path)
+        try:
+            stat = path.stat()
+        except OSError as e:
+            return MediaInfo(file_path=str(path), valid=False, error=str(e))
+
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            info = self._cache.get(key)
+            if info is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return info
+            self.misses += 1
+
+        info = self._probe_ffprobe(path) if self._ffprobe_path else None
+        if info is None:
+            info = self._probe_opencv(path)
+
+        with self._lock:
+            self._cache[key] = info
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+        return info
+
+    def invalidate(self, video_path=None):
+        """Eliminar entradas del cache (todas o las de un archivo)"""
+        with self._lock:
+            if video_path is None:
+                self._cache.clear()
+                return
+            path_str = str(Path(video_path))
+            for key in [k for k in self._cache if k[0] == path_str]:
+                del self._cache[key]
+
+    def get_stats(self) -> Dict:
+        """Métricas del cache de probes"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._cache),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total * 100, 1) if total else 0.0,
+                'ffprobe_runs': self.ffprobe_runs,
+                'opencv_fallbacks': self.opencv_fallbacks,
+                'ffprobe_available': bool(self._ffprobe_path)
+            }
+
+    def _probe_ffprobe(self, path: Path) -> Optional[MediaInfo]:
+        """Un único ffprobe con salida JSON de formato y streams"""
+        cmd = [
+            self._ffprobe_path, '-v', 'error',
+            '-print_format', 'json',
+            '-show_entries',
+            'format=duration:stream=codec_type,codec_name,width,height,avg_frame_rate,r_frame_rate,duration',
+            str(path)
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, timeout=self.timeout)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.debug(f"ffprobe no disponible para {path.name}: {e}")
+            return None
+
+        with self._lock:
+            self.ffprobe_runs += 1
+
+        if result.returncode != 0:
+            error = result.stderr.decode('utf-8', errors='replace').strip()
+            return MediaInfo(file_path=str(path), valid=False, probe_method='ffprobe', error=error or 'ffprobe failed')
+
+        try:
+            data = json.loads(result.stdout or b'{}')
+        except json.JSONDecodeError as e:
+            return MediaInfo(file_path=str(path), valid=False, probe_method='ffprobe', error=str(e))
+
+        info = MediaInfo(file_path=str(path), valid=True, probe_method='ffprobe')
+
+        for stream in data.get('streams', []):
+            codec_type = stream.get('codec_type')
+            if codec_type == 'video' and not info.has_video:
+                info.has_video = True
+                info.video_codec = stream.get('codec_name')
+                info.width = stream.get('width')
+                info.height = stream.get('height')
+                info.fps = self._parse_rate(stream.get('avg_frame_rate')) or self._parse_rate(stream.get('r_frame_rate'))
+                info.duration_seconds = self._parse_float(stream.get('duration'))
+            elif codec_type == 'audio' and not info.has_audio:
+                info.has_audio = True
+                info.audio_codec = stream.get('codec_name')
+
+        format_duration = self._parse_float(data.get('format', {}).get('duration'))
+        if format_duration:
+            info.duration_seconds = format_duration
+
+        return info
+
+    def _probe_opencv(self, path: Path) -> MediaInfo:
+        """Fallback sin ffprobe: una sola apertura con OpenCV (sin info de audio)"""
+        with self._lock:
+            self.opencv_fallbacks += 1
+
+        cap = cv2.VideoCapture(str(path))
+        try:
+            if not cap.isOpened():
+                return MediaInfo(file_path=str(path), valid=False, probe_method='opencv', error='cannot open')
+
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            return MediaInfo(
+                file_path=str(path),
+                valid=True,
+                duration_seconds=total_frames / fps if fps > 0 else None,
+                width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                fps=fps if fps > 0 else None,
+                has_video=True,
+                probe_method='opencv'
+            )
+        finally:
+            cap.release()
+
+    @staticmethod
+    def _parse_rate(value) -> Optional[float]:
+        """Convertir '30000/1001' en 29.97"""
+        if not value:
+            return None
+        try:
+            if '/' in value:
+                num, den = value.split('/', 1)
+                return float(num) / float(den) if float(den) else None
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _parse_float(value) -> Optional[float]:
+        try:
+            return float(value) if value not in (None, 'N/A') else None
+        except (TypeError, ValueError):
+            return None
+
+
+# Instancia compartida entre VideoProcessor y ThumbnailGenerator
+_media_probe_instance = None
+_media_probe_lock = threading.Lock()
+
+
+def get_media_probe() -> MediaProbe:
+    """Obtener el MediaProbe compartido del proceso"""
+    global _media_probe_instance
+    if _media_probe_instance is None:
+        with _media_probe_lock:
+            if _media_probe_instance is None:
+                _media_probe_instance = MediaProbe()
+    return _media_probe_instance
+
+
 class VideoProcessor:
     """Procesador principal de videos para extracción de metadatos"""
     
@@ -23,6 +237,11 @@ class VideoProcessor:
         self.thumbnail_size = config.THUMBNAIL_SIZE
         self.thumbnails_path = config.THUMBNAILS_PATH
         self.thumbnails_path.mkdir(parents=True, exist_ok=True)
+        self.media_probe = get_media_probe()
+    
+    def probe(self, video_path) -> MediaInfo:
+        """Información del contenedor (compartida y cacheada por archivo)"""
+        return self.media_probe.probe(video_path)
     
     def extract_metadata(self, video_path) -> Dict:
         """Extraer metadatos completos del video"""
@@ -41,30 +260,20 @@ class VideoProcessor:
                 'has_audio': False
             }
             
-            # Usar OpenCV para datos básicos
-            cap = cv2.VideoCapture(str(video_path))
-            if cap.isOpened():
-                # Dimensiones
-                metadata['width'] = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-                metadata['height'] = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))                
-                # FPS
-                metadata['fps'] = cap.get(cv2.CAP_PROP_FPS)
-                
-                # Duración (frames / fps)
-                total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-                if metadata['fps'] > 0:
-                    metadata['duration_seconds'] = total_frames / metadata['fps']
-                
-                cap.release()
-            
-            # Usar MoviePy para verificar audio
-            try:
-                with VideoFileClip(str(video_path)) as clip:
-                    metadata['has_audio'] = clip.audio is not None
-                    if not metadata['duration_seconds']:
-                        metadata['duration_seconds'] = clip.duration
-            except Exception as e:
-                logger.warning(f"Error con MoviePy para {video_path}: {e}")
+            # Un solo probe para dimensiones, fps, duración, audio y codecs
+            info = self.probe(video_path)
+            if info.valid:
+                metadata.update({
+                    'duration_seconds': info.duration_seconds,
+                    'width': info.width,
+                    'height': info.height,
+                    'fps': info.fps,
+                    'has_audio': info.has_audio,
+                    'video_codec': info.video_codec,
+                    'audio_codec': info.audio_codec
+                })
+            else:
+                logger.warning(f"Probe fallido para {video_path}: {info.error}")
             
             logger.info(f"Metadatos extraídos de {video_path.name}")
             return metadata
@@ -89,13 +298,8 @@ class VideoProcessor:
                 logger.error(f"No se pudo abrir el video: {video_path}")
                 return None
             
-            # Calcular frame del timestamp
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            target_frame = min(int(timestamp * fps), total_frames - 1)
-            
-            # Ir al frame objetivo
-            cap.set(cv2.CAP_PROP_POS_FRAMES, target_frame)
+            # Ir al timestamp (acotado a la duración conocida por el probe)
+            cap.set(cv2.CAP_PROP_POS_MSEC, self._clamp_timestamp(video_path, timestamp) * 1000)
             ret, frame = cap.read()
             cap.release()
             
@@ -136,6 +340,12 @@ class VideoProcessor:
     def extract_audio(self, video_path: Path, duration: int = 30) -> Optional[Path]:
         """Extraer audio del video para análisis musical"""
         try:
+            # Sin pista de audio no hay nada que extraer (probe cacheado)
+            info = self.probe(video_path)
+            if info.valid and info.probe_method == 'ffprobe' and not info.has_audio:
+                logger.debug(f"Sin pista de audio, se omite extracción: {Path(video_path).name}")
+                return None
+            
             # Crear archivo temporal para audio
             audio_temp = tempfile.NamedTemporaryFile(suffix='.wav', delete=False)
             audio_path = Path(audio_temp.name)
@@ -165,6 +375,53 @@ class VideoProcessor:
             logger.error(f"Error extrayendo audio de {video_path}: {e}")
             return None
     
+    def extract_audio_clip(self, video_path: Path, duration: int = 30,
+                           sample_rate: int = None) -> Optional[AudioClip]:
+        """
+        Extraer audio a memoria: ffmpeg decodifica a PCM 16-bit mono remuestreado
+        y lo entrega por pipe (sin WAV temporal en disco)
+        """
+        sample_rate = sample_rate or config.AUDIO_CLIP_SAMPLE_RATE
+        try:
+            info = self.probe(video_path)
+            if info.valid and info.probe_method == 'ffprobe' and not info.has_audio:
+                logger.debug(f"Sin pista de audio, se omite extracción: {Path(video_path).name}")
+                return None
+            
+            cmd = [
+                _ffmpeg_path or 'ffmpeg', '-v', 'error',
+                '-i', str(video_path),
+                '-t', str(duration),  # Primeros N segundos
+                '-vn',  # Sin video
+                '-f', 's16le', '-acodec', 'pcm_s16le',  # PCM crudo
+                '-ar', str(sample_rate),
+                '-ac', '1',  # Mono
+                'pipe:1'
+            ]
+            
+            # Un archivo corrupto no debe bloquear indefinidamente un worker de la etapa de audio
+            try:
+                result = subprocess.run(cmd, capture_output=True, timeout=max(30, duration * 2))
+            except subprocess.TimeoutExpired:
+                logger.warning(f"Timeout extrayendo audio de {Path(video_path).name}")
+                return None
+            
+            if result.returncode != 0:
+                logger.error(f"Error extrayendo audio: {result.stderr.decode('utf-8', errors='replace')}")
+                return None
+            
+            usable = len(result.stdout) - len(result.stdout) % 2
+            samples = np.frombuffer(result.stdout[:usable], dtype='<i2')
+            if not len(samples):
+                return None
+            
+            clip = AudioClip(samples=samples, sample_rate=sample_rate)
+            logger.info(f"Audio extraído en memoria: {Path(video_path).name} ({clip.duration:.1f}s, {usable // 1024} KB)")
+            return clip
+        except Exception as e:
+            logger.error(f"Error extrayendo audio de {video_path}: {e}")
+            return None
+    
     def is_valid_video(self, file_path: Path) -> bool:
         """Verificar si el archivo es un video válido"""
         if not file_path.exists():
@@ -175,26 +432,41 @@ class VideoProcessor:
         if file_path.suffix.lower() not in video_extensions:
             return False
         
-        # Verificar que se puede abrir con OpenCV
+        # Verificar con el probe compartido (reutilizado luego por metadatos y thumbnails)
         try:
-            cap = cv2.VideoCapture(str(file_path))
-            is_valid = cap.isOpened()
-            cap.release()
-            return is_valid
-        except:
+            info = self.probe(file_path)
+            return info.valid and info.has_video
+        except Exception:
             return False
     
     def get_video_frame(self, video_path: Path, timestamp: float) -> Optional[bytes]:
         """Obtener frame específico como bytes para análisis de caras"""
+        timestamp = self._clamp_timestamp(video_path, timestamp)
+        
+        # ffmpeg con seek previo a -i: decodifica solo desde el keyframe más cercano
+        if _ffmpeg_path:
+            try:
+                cmd = [
+                    _ffmpeg_path, '-v', 'error',
+                    '-ss', f'{timestamp:.3f}',
+                    '-i', str(video_path),
+                    '-frames:v', '1',
+                    '-f', 'image2pipe', '-vcodec', 'mjpeg',
+                    '-'
+                ]
+                result = subprocess.run(cmd, capture_output=True, timeout=30)
+                if result.returncode == 0 and result.stdout:
+                    return result.stdout
+            except (OSError, subprocess.TimeoutExpired) as e:
+                logger.debug(f"ffmpeg no pudo extraer frame de {video_path}: {e}")
+        
         try:
             cap = cv2.VideoCapture(str(video_path))
             if not cap.isOpened():
                 return None
             
             # Ir al timestamp específico
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            target_frame = int(timestamp * fps)
-            cap.set(cv2.CAP_PROP_POS_FRAMES, target_frame)
+            cap.set(cv2.CAP_PROP_POS_MSEC, timestamp * 1000)
             
             ret, frame = cap.read()
             cap.release()
@@ -209,5 +481,12 @@ class VideoProcessor:
         except Exception as e:
             logger.error(f"Error obteniendo frame de {video_path}: {e}")
             return None
+    
+    def _clamp_timestamp(self, video_path, timestamp: float) -> float:
+        """Acotar timestamp a la duración del video (evita seeks fuera de rango)"""
+        duration = self.probe(video_path).duration_seconds
+        if duration and timestamp >= duration:
+            return duration / 2
+        return max(timestamp, 0.0)
 
-# video_processor = VideoProcessor()
\ No newline at end of file
+# video_processor = VideoProcessor()
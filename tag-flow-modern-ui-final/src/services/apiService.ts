@@ -24,6 +24,9 @@ const getApiBaseUrl = (): string => {
 const API_BASE_URL = getApiBaseUrl();
 const STREAM_BASE_URL = API_BASE_URL.replace('/api', '');
 
+// Variante de thumbnail para las tarjetas de la galería (320x180; /thumbnail/<nombre>?size=card)
+const THUMBNAIL_CARD_SIZE = 'card';
+
 export interface VideoFilters {
   search?: string;
   creator_name?: string;
@@ -178,8 +181,10 @@ class ApiService {
           return `${STREAM_BASE_URL}/static/img/no-thumbnail.svg`;
         }
         
-        // Si el filename no termina con _thumb.jpg, intentar construirlo desde file_name
-        if (!filename.includes('_thumb.')) {
+        // Si el filename no es un thumbnail (ni plano _thumb.jpg ni por contenido {hash}.jpg),
+        // intentar construirlo desde file_name
+        const isContentAddressed = /^[0-9a-f]{40}\.[a-z0-9]+$/.test(filename);
+        if (!filename.includes('_thumb.') && !isContentAddressed) {
           // Usar file_name para construir el nombre esperado del thumbnail
           if (video.file_name) {
             const baseName = video.file_name.replace(/\.[^/.]+$/, ''); // Remover extensión
@@ -187,7 +192,7 @@ class ApiService {
           }
         }
         
-        return `${STREAM_BASE_URL}/thumbnail/${encodeURIComponent(filename)}`;
+        return `${STREAM_BASE_URL}/thumbnail/${encodeURIComponent(filename)}?size=${THUMBNAIL_CARD_SIZE}`;
       })(),
       postUrl: `${STREAM_BASE_URL}/video-stream/${video.id}`,
       originalUrl: video.post_url,
@@ -11,6 +11,9 @@ const host = import.meta.env.VITE_BACKEND_HOST || 'localhost';
 const port = import.meta.env.VITE_BACKEND_PORT || 5000;
 const API_BASE_URL = `http://${host}:${port}`;
 
+// Variante de thumbnail para las tarjetas de la galería (320x180; /thumbnail/<nombre>?size=card)
+const THUMBNAIL_CARD_SIZE = 'card';
+
 class CursorApiService {
 
   /**
@@ -296,7 +299,7 @@ class CursorApiService {
       title: video.title_post || video.file_name || 'Sin título',
       creator: video.creator_name || 'Desconocido',
       platform: this.mapPlatform(video.platform),
-      thumbnailUrl: video.thumbnail_path ? `${API_BASE_URL}/thumbnail/${encodeURIComponent(video.thumbnail_path)}` : `${API_BASE_URL}/static/img/no-thumbnail.svg`,
+      thumbnailUrl: video.thumbnail_path ? `${API_BASE_URL}/thumbnail/${encodeURIComponent(video.thumbnail_path)}?size=${THUMBNAIL_CARD_SIZE}` : `${API_BASE_URL}/static/img/no-thumbnail.svg`,
       postUrl: `${API_BASE_URL}/api/video-stream/${video.id}`,
       type: video.duration_seconds > 60 ? 'Video' as any : 'Video' as any, // Default to Video
       editStatus: this.mapEditStatus(video.edit_status),